@@ -0,0 +1,225 @@
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+import matplotlib
+matplotlib.use('Agg')  # noqa: E402
+import matplotlib.figure
+import numpy as np
+import gobenchplot.benchmark as benchmark
+import gobenchplot.columns as columns
+import gobenchplot.expr as expr
+import gobenchplot.plot as plot
+import gobenchplot.plotdata as plotdata
+import gobenchplot.streaming as streaming
+from benchmarks import synthetic
+
+# measures each stage of the pipeline on synthetic `go test -json` streams,
+# from parsing them to rendering the plot, and records the throughput of
+# each in a history file so runs can be compared
+#
+# usage: python -m benchmarks.bench_pipeline [--max-results 10000000]
+#            [--history benchmarks/history.jsonl]
+
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+
+class StageTiming(typing.NamedTuple):
+    stage: str
+    results: int
+    seconds: float
+
+    def rate(self) -> float:
+        return self.results / self.seconds
+
+
+def _best_of(repeat: int, fn: typing.Callable[[], typing.Any]) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def time_stages(
+        config: synthetic.StreamConfig,
+        repeat: int) -> typing.List[StageTiming]:
+    num_results = config.num_results()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'results.json')
+        with open(path, 'w') as f:
+            synthetic.write_stream(config, f)
+        start = time.perf_counter()
+        with open(path) as f:
+            suite = benchmark.parse_bench_output(f)
+        parse_seconds = time.perf_counter() - start
+        # parsing and aggregating at once, without keeping the results
+        start = time.perf_counter()
+        aggregator = streaming.StreamAggregator('var0', 'var1')
+        with open(path) as f:
+            streaming.aggregate_stream(f, 'Benchmark0', aggregator)
+        aggregator.bench_data('Benchmark0')
+        stream_seconds = time.perf_counter() - start
+    # the later stages query the first benchmark
+    bench = suite.benchmarks[0]
+    num_bench = len(bench.results)
+
+    # built once per benchmark, later queries only reuse them
+    start = time.perf_counter()
+    cols = columns.bench_columns(bench)
+    columns_seconds = time.perf_counter() - start
+
+    # about half the sizes of the last variable
+    limit = 2 ** (config.cardinality // 2)
+    filters = [benchmark.parse_bench_var_val_cmp('var1<=%d' % (limit))]
+    rows = columns.select_rows(cols, None, filters)
+    groups = columns.group_rows(cols, rows, 'var0')
+    y_expr = expr.compile_expr('time')
+
+    def aggregate():
+        data = plotdata.columns_plot_data(cols, rows, groups, 'var1', y_expr)
+        return plotdata.aggregate(data)
+
+    bench_data = plotdata.bench_data(
+        bench, 'var0', 'var1', filter_vars=['var1<=%d' % (limit)])
+
+    def render():
+        fig = matplotlib.figure.Figure()
+        plot.draw_bench_data(bench_data, ax=fig.add_subplot())
+        fig.savefig(io.BytesIO(), format='png')
+
+    return [
+        StageTiming('parse', num_results, parse_seconds),
+        StageTiming('columns', num_bench, columns_seconds),
+        StageTiming('filter', num_bench, _best_of(
+            repeat, lambda: columns.select_rows(cols, None, filters))),
+        StageTiming('group', len(rows), _best_of(
+            repeat, lambda: columns.group_rows(cols, rows, 'var0'))),
+        StageTiming('aggregate', len(rows), _best_of(repeat, aggregate)),
+        StageTiming('render', len(rows), _best_of(repeat, render)),
+        StageTiming('stream', num_results, stream_seconds),
+    ]
+
+
+def _commit() -> typing.Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True,
+            universal_newlines=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def history_record(
+        config: synthetic.StreamConfig,
+        timings: typing.List[StageTiming]) -> typing.Dict[str, typing.Any]:
+    config_dict = config._asdict()
+    del config_dict['count']  # follows from the number of results
+    return {
+        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'config': config_dict,
+        'timings': [
+            {'stage': timing.stage, 'results': timing.results,
+             'seconds': timing.seconds, 'rate': timing.rate()}
+            for timing in timings],
+    }
+
+
+def last_record(
+        path: str,
+        config: typing.Dict[str, typing.Any]) -> typing.Optional[typing.Dict]:
+    # the latest run with the same stream config
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if record.get('config') == config:
+                last = record
+    return last
+
+
+def compare(previous: typing.Dict, current: typing.Dict):
+    # the rate of each (stage, results) relative to the previous run
+    rates = {
+        (timing['stage'], timing['results']): timing['rate']
+        for timing in previous['timings']}
+    print('compared to %s (%s):' % (
+        previous['time'], previous.get('commit') or 'unknown commit'))
+    for timing in current['timings']:
+        key = (timing['stage'], timing['results'])
+        if key in rates:
+            print('%-10s %10d %11.2fx' % (
+                timing['stage'], timing['results'],
+                timing['rate'] / rates[key]))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='benchmark each stage of the pipeline')
+    parser.add_argument(
+        '--max-results', type=int, default=1_000_000,
+        help='the largest of %s to run, 10M needs several GB of memory' % (
+            ', '.join(str(size) for size in SIZES)))
+    parser.add_argument('--repeat', type=int, default=3)
+    synthetic.add_config_args(parser)
+    parser.add_argument(
+        '--history',
+        help='append the timings to this file, one json object per run, ' +
+        'and compare them to the last run with the same stream options')
+    parser.add_argument(
+        '--min-rate', type=float, default=20_000,
+        help='fail if fewer results than this are parsed per second')
+    args = parser.parse_args()
+    if args.variables < 2:
+        # the stages group by var0 and plot against var1
+        parser.error('--variables needs to be at least 2')
+
+    stream_config = synthetic.StreamConfig(
+        benchmarks=args.benchmarks, depth=args.depth, variables=args.variables,
+        cardinality=args.cardinality, noise=args.noise, seed=args.seed)
+    timings: typing.List[StageTiming] = []
+    print('%-10s %10s %12s   %14s' % ('stage', 'results', 'seconds', 'rate'))
+    for size in SIZES:
+        if size > args.max_results:
+            continue
+        config = synthetic.config_for(size, **stream_config._asdict())
+        for timing in time_stages(config, args.repeat):
+            timings.append(timing)
+            print('%-10s %10d %12.4f s %14.0f results/s' % (
+                timing.stage, timing.results, timing.seconds, timing.rate()))
+
+    if args.history is not None:
+        record = history_record(stream_config, timings)
+        previous = last_record(args.history, record['config'])
+        if previous is not None:
+            compare(previous, record)
+        with open(args.history, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+    parse_rates = [
+        timing.rate() for timing in timings if timing.stage == 'parse']
+    if len(parse_rates) != 0 and parse_rates[-1] < args.min_rate:
+        print('parsing is slower than %d results/s' % (args.min_rate),
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
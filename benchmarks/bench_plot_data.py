@@ -0,0 +1,105 @@
+import argparse
+import sys
+import time
+import typing
+import numpy as np
+import gobenchplot.benchmark as benchmark
+import gobenchplot.columns as columns
+import gobenchplot.expr as expr
+import gobenchplot.plotdata as plotdata
+
+# measures the columns -> PlotData path and checks that it scales linearly
+#
+# usage: python -m benchmarks.bench_plot_data [--max-points 10000000]
+
+FINDERS = np.array(['map', 'slice', 'sorted_slice', 'tree'])
+SIZES = [
+    10_000, 30_000, 100_000, 300_000, 1_000_000, 3_000_000, 10_000_000]
+# sizes the scaling exponent is fitted to, at least, before it is checked
+MIN_FIT_SIZES = 3
+
+
+def synthetic_columns(num_points: int, seed: int = 0) -> columns.BenchColumns:
+    rng = np.random.default_rng(seed)
+    num_elems = rng.integers(1, 101, size=num_points)
+    finder_codes = rng.integers(0, len(FINDERS), size=num_points)
+    time_op = num_elems * (finder_codes + 1) * rng.uniform(
+        0.9, 1.1, num_points)
+    nan = np.full(num_points, np.nan)
+    return columns.BenchColumns(
+        outputs={
+            'runs': np.full(num_points, 10000.0),
+            'time': time_op,
+            'mem_allocs': nan,
+            'mem_used': nan,
+        },
+        variables={
+            'finder': columns.VarColumn(
+                values=FINDERS[finder_codes],
+                present=np.ones(num_points, dtype=bool)),
+            'num_elems': columns.VarColumn(
+                values=num_elems,
+                present=np.ones(num_points, dtype=bool)),
+        },
+        subs_codes=np.zeros(num_points, dtype=np.int64),
+        subs=[None])
+
+
+def run_query(
+        cols: columns.BenchColumns) -> typing.Dict[str, plotdata.PlotData]:
+    rows = columns.select_rows(
+        cols, None, [benchmark.parse_bench_var_val_cmp('num_elems<=90')])
+    groups = columns.group_rows(cols, rows, 'finder')
+    data = plotdata.columns_plot_data(
+        cols, rows, groups, 'num_elems', expr.compile_expr('time/num_elems'))
+    plotdata.aggregate(data)
+    return data
+
+
+def time_query(cols: columns.BenchColumns, repeat: int) -> float:
+    # the first run factorizes each variable column, which happens once
+    # per benchmark rather than once per query
+    run_query(cols)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run_query(cols)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='benchmark building PlotData from columns')
+    parser.add_argument('--max-points', type=int, default=10_000_000)
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='the best of this many runs is kept for each size')
+    parser.add_argument(
+        '--max-exponent', type=float, default=1.2,
+        help='fail if time grows faster than points**max_exponent')
+    args = parser.parse_args()
+
+    sizes = [size for size in SIZES if size <= args.max_points]
+    timings: typing.List[float] = []
+    print('%12s %12s %12s' % ('points', 'seconds', 'ns/point'))
+    for size in sizes:
+        cols = synthetic_columns(size)
+        seconds = time_query(cols, args.repeat)
+        timings.append(seconds)
+        print('%12d %12.4f %12.1f' % (size, seconds, 1e9 * seconds / size))
+
+    # fixed overheads dominate the smallest size, so fit the rest. A fit
+    # to fewer sizes is too noisy to fail on
+    if len(sizes) - 1 < MIN_FIT_SIZES:
+        return 0
+    exponent = np.polyfit(np.log(sizes[1:]), np.log(timings[1:]), 1)[0]
+    print('scaling exponent: %.3f' % (exponent))
+    if exponent > args.max_exponent:
+        print('scaling is worse than linear', file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import typing
+import numpy as np
+import gobenchplot.benchmark as benchmark
+import gobenchplot.store as store
+
+# measures bulk ingest into the sqlite store and loading it back
+#
+# usage: python -m benchmarks.bench_store [--results 1000000]
+
+FINDERS = ['map', 'slice', 'sorted_slice', 'tree']
+COUNT = 10  # results per configuration, as with `go test -count 10`
+
+
+def synthetic_results(
+        num_results: int,
+        seed: int = 0) -> typing.List[typing.Tuple[str, benchmark.BenchRes]]:
+    # repeated configurations share their inputs, as they do when parsed
+    rng = np.random.default_rng(seed)
+    configs = [
+        benchmark.BenchInputs(
+            variables=[
+                benchmark.BenchVarValue(var_name='finder', var_value=finder),
+                benchmark.BenchVarValue(
+                    var_name='num_elems', var_value=num_elems)],
+            subs=None)
+        for finder in FINDERS
+        for num_elems in range(1, num_results // (COUNT * len(FINDERS)) + 2)]
+    times = rng.uniform(1, 1000, size=num_results)
+    return [
+        ('BenchmarkFind', benchmark.BenchRes(
+            inputs=configs[i // COUNT],
+            outputs=benchmark.BenchOutputs(
+                runs=10000, time=float(times[i]), mem_allocs=1,
+                mem_used=8.0)))
+        for i in range(num_results)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='benchmark ingesting into and loading from the store')
+    parser.add_argument('--results', type=int, default=1_000_000)
+    parser.add_argument(
+        '--min-rate', type=float, default=100_000,
+        help='fail if fewer results than this are ingested per second')
+    args = parser.parse_args()
+
+    results = synthetic_results(args.results)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = store.connect(os.path.join(tmp_dir, 'history.db'))
+        start = time.perf_counter()
+        store.ingest(conn, results)
+        ingest_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.load_suite(conn, bench_names=['BenchmarkFind'])
+        load_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.load_suite(
+            conn, bench_names=['BenchmarkFind'],
+            filter_vars=['finder==map', 'num_elems<10'])
+        query_seconds = time.perf_counter() - start
+        conn.close()
+
+    rate = args.results / ingest_seconds
+    print('%-8s %12.4f s %14.0f results/s' % ('ingest', ingest_seconds, rate))
+    print('%-8s %12.4f s %14.0f results/s' % (
+        'load', load_seconds, args.results / load_seconds))
+    print('%-8s %12.4f s' % ('query', query_seconds))
+    if rate < args.min_rate:
+        print('ingest is slower than %d results/s' % (args.min_rate),
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import argparse
+import json
+import sys
+import typing
+import numpy as np
+
+# writes `go test -json` streams of synthetic benchmark results, laid out
+# as go 1.21 writes them: a header, === RUN lines, names and outputs split
+# across lines or on one line, and the PASS / ok trailer
+#
+# usage: python -m benchmarks.synthetic [--results 100000] > results.json
+
+PACKAGE = 'example.com/synthetic'
+HEADER = [
+    'goos: linux\n', 'goarch: amd64\n', 'pkg: %s\n' % (PACKAGE),
+    'cpu: Synthetic CPU @ 3.00GHz\n']
+# written between results, as benchmarks logging with b.Log would
+NOISE = [
+    '    bench_test.go:42: warming up\n',
+    '    bench_test.go:57: cache size 4096\n',
+]
+
+
+class StreamConfig(typing.NamedTuple):
+    benchmarks: int = 1
+    depth: int = 0  # levels of named sub-benchmarks before the variables
+    variables: int = 2
+    cardinality: int = 10  # values of each variable
+    count: int = 10  # results per configuration, as with -count
+    noise: float = 0.1  # noise lines per result
+    seed: int = 0
+
+    def num_configs(self) -> int:
+        # each sub-benchmark level has two names
+        return (
+            self.benchmarks * 2 ** self.depth *
+            self.cardinality ** self.variables)
+
+    def num_results(self) -> int:
+        return self.num_configs() * self.count
+
+
+def config_for(num_results: int, **kwargs) -> StreamConfig:
+    # the smallest -count giving at least num_results
+    config = StreamConfig(**kwargs)
+    count = max(1, -(-num_results // config.num_configs()))
+    return config._replace(count=count)
+
+
+def variable_values(i: int, cardinality: int) -> typing.List[str]:
+    # the first variable names an implementation, the others are sizes
+    if i == 0:
+        return ['impl%d' % (value) for value in range(cardinality)]
+    return [str(2 ** value) for value in range(cardinality)]
+
+
+def config_names(config: StreamConfig) -> typing.List[str]:
+    names = ['Benchmark%d' % (i) for i in range(config.benchmarks)]
+    for level in range(config.depth):
+        names = [
+            '%s/case%d_%d' % (name, level, i)
+            for name in names for i in range(2)]
+    for i in range(config.variables):
+        names = [
+            '%s/var%d=%s' % (name, i, value)
+            for name in names
+            for value in variable_values(i, config.cardinality)]
+    return names
+
+
+def _event(action: str, test: typing.Optional[str], output: str) -> str:
+    event = {'Action': action, 'Package': PACKAGE}
+    if test is not None:
+        event['Test'] = test
+    if action == 'output':
+        event['Output'] = output
+    return json.dumps(event) + '\n'
+
+
+def write_stream(config: StreamConfig, file):
+    # each configuration runs count times in a row, with a time around
+    # its own mean
+    rng = np.random.default_rng(config.seed)
+    names = config_names(config)
+    for line in HEADER:
+        file.write(_event('output', None, line))
+    for name in names:
+        file.write(_event('run', name, ''))
+        file.write(_event('output', name, '=== RUN   %s\n' % (name)))
+        file.write(_event('output', name, '%s\n' % (name)))
+        mean = rng.lognormal(6, 2)
+        times = mean * rng.lognormal(0, 0.05, size=config.count)
+        allocs = int(rng.integers(0, 100))
+        noise = rng.poisson(config.noise, size=config.count)
+        # the name is padded to a tab stop, and given the GOMAXPROCS
+        padded = '%-40s\t' % ('%s-8' % (name))
+        for time, num_noise in zip(times.tolist(), noise.tolist()):
+            outputs = '%8d\t%10.1f ns/op\t%8d B/op\t%8d allocs/op\n' % (
+                max(1, int(1e9 / time)), time, allocs * 16, allocs)
+            if rng.random() < 0.5:
+                file.write(_event('output', name, padded + outputs))
+            else:
+                file.write(_event('output', name, padded))
+                file.write(_event('output', name, outputs))
+            for i in range(num_noise):
+                file.write(_event('output', name, NOISE[i % len(NOISE)]))
+    file.write(_event('output', None, 'PASS\n'))
+    file.write(_event('output', None, 'ok  \t%s\t1.000s\n' % (PACKAGE)))
+    file.write(_event('pass', None, ''))
+
+
+def add_config_args(parser: argparse.ArgumentParser):
+    defaults = StreamConfig()
+    parser.add_argument('--benchmarks', type=int, default=defaults.benchmarks)
+    parser.add_argument(
+        '--depth', type=int, default=defaults.depth,
+        help='levels of sub-benchmarks before the variables')
+    parser.add_argument('--variables', type=int, default=defaults.variables)
+    parser.add_argument(
+        '--cardinality', type=int, default=defaults.cardinality,
+        help='values of each variable')
+    parser.add_argument(
+        '--noise', type=float, default=defaults.noise,
+        help='average number of log lines after each result')
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description='write a synthetic `go test -json` stream to stdout')
+    parser.add_argument(
+        '--results', type=int, default=100_000,
+        help='at least this many results, by raising -count')
+    add_config_args(parser)
+    args = parser.parse_args()
+
+    config = config_for(
+        args.results, benchmarks=args.benchmarks, depth=args.depth,
+        variables=args.variables, cardinality=args.cardinality,
+        noise=args.noise, seed=args.seed)
+    write_stream(config, sys.stdout)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,24 +1,30 @@
 import sys
 import argparse
-import gobenchplot.plot as plot
+import csv
+import datetime
+import os
+import shlex
+import sqlite3
+import time
+import typing
+import gobenchplot.arrow as arrow
 import gobenchplot.benchmark as benchmark
 import gobenchplot.inputs as inputs
+import gobenchplot.live as live
+import gobenchplot.planner as planner
+import gobenchplot.plotdata as plotdata
+import gobenchplot.profiling as profiling
+import gobenchplot.query as query
+import gobenchplot.report as report
+import gobenchplot.runner as runner
+import gobenchplot.stats as stats
+import gobenchplot.store as store
+import gobenchplot.streaming as streaming
+import gobenchplot.table as table
 
 
-def main() -> int:
-    parser = argparse.ArgumentParser(
-        description='Plots the results of a go benchmark')
-    parser.add_argument(
-        'file',
-        nargs='?',
-        help=(
-            "file containing bench results\n" +
-            "if empty or '-' stdin is assumed"))
-    parser.add_argument(
-        '--bench',
-        dest='bench',
-        nargs='?',
-        help="the name of the benchmark to plot")
+def add_query_args(parser: argparse.ArgumentParser):
+    # options shared by every command that aggregates benchmark results
     parser.add_argument(
         '--%s' % (inputs.X_NAME),
         dest='x',
@@ -28,11 +34,14 @@ def main() -> int:
     parser.add_argument(
         '--%s' % (inputs.Y_NAME),
         dest='y',
-        nargs='?',
-        default='time',
+        nargs='+',
+        default=['time'],
         help=(
             "the name of the y-axis variable. " +
-            "One of: %s" % (', '.join(available_y_vals))))
+            "One of: %s. " % (', '.join(available_y_vals)) +
+            "May also be an arithmetic expression over outputs and " +
+            "numeric inputs, e.g. 'time/num_elems' or '1e9/time'. " +
+            "Several can be given to plot each in its own subplot"))
     parser.add_argument(
         '--%s' % (inputs.GROUP_BY_NAME),
         dest='group_by',
@@ -64,27 +73,304 @@ def main() -> int:
         nargs='+',
         help=(
             'which plots to show (options: \'%s\'). ' % ('\', \''.join([
-                plot.BAR_TYPE,
-                plot.SCATTER_TYPE,
-                plot.AVG_LINE_TYPE,
-                plot.BEST_FIT_LINE_TYPE])) +
+                plotdata.BAR_TYPE,
+                plotdata.SCATTER_TYPE,
+                plotdata.AVG_LINE_TYPE,
+                plotdata.BEST_FIT_LINE_TYPE,
+                plotdata.DENSITY_TYPE,
+                plotdata.BOX_TYPE,
+                plotdata.VIOLIN_TYPE,
+                plotdata.HISTOGRAM_TYPE,
+                plotdata.HEATMAP_TYPE,
+                plotdata.PARETO_TYPE])) +
             'Defaults to \'%s\' if x corresponds to a non numeric type, ' % (
-                plot.BAR_TYPE) +
-            '[\'%s\'] otherwise' % ('\', \''.join([
-                plot.SCATTER_TYPE,
-                plot.AVG_LINE_TYPE,
-            ]))))
+                plotdata.BAR_TYPE) +
+            '[\'%s\'] otherwise. ' % ('\', \''.join([
+                plotdata.SCATTER_TYPE,
+                plotdata.AVG_LINE_TYPE,
+            ])) +
+            '\'%s\' is drawn on its own and needs --%s. ' % (
+                plotdata.HEATMAP_TYPE, inputs.HEATMAP_Y_NAME) +
+            '\'%s\' is drawn on its own, with one point per ' % (
+                plotdata.PARETO_TYPE) +
+            'configuration of two outputs (e.g. --x time --y mem_used), ' +
+            'and --%s lists its frontier' % (inputs.TABLE_NAME)))
+    parser.add_argument(
+        '--%s' % (inputs.BASELINE_NAME),
+        dest='baseline',
+        nargs='+',
+        help=(
+            'the group to normalize results against. ' +
+            'Form: \'var_name=var_value\'. ' +
+            'Each group\'s average y is divided by the baseline\'s ' +
+            'average y at the same x and plotted on a log scale'))
+    parser.add_argument(
+        '--%s' % (inputs.OUTLIERS_NAME),
+        dest='outliers',
+        nargs='?',
+        help=(
+            'reject outliers within each (group, x) before aggregating. ' +
+            'Form: \'method\' or \'method:param\'. Methods: ' +
+            '\'%s\' (param: fence multiplier, default %s), ' % (
+                stats.IQR_METHOD,
+                stats.DEFAULT_OUTLIER_PARAMS[stats.IQR_METHOD]) +
+            '\'%s\' (param: max modified z-score, default %s), ' % (
+                stats.MAD_METHOD,
+                stats.DEFAULT_OUTLIER_PARAMS[stats.MAD_METHOD]) +
+            '\'%s\' (param: proportion trimmed from each end, default %s)' % (
+                stats.TRIM_METHOD,
+                stats.DEFAULT_OUTLIER_PARAMS[stats.TRIM_METHOD])))
+    parser.add_argument(
+        '--%s' % (inputs.DENSITY_THRESHOLD_NAME),
+        dest='density_threshold',
+        type=int,
+        default=plotdata.DEFAULT_DENSITY_THRESHOLD,
+        help=(
+            'number of points above which \'%s\' plots ' % (
+                plotdata.SCATTER_TYPE) +
+            'are drawn as \'%s\' plots. Defaults to %d' % (
+                plotdata.DENSITY_TYPE, plotdata.DEFAULT_DENSITY_THRESHOLD)))
 
-    args = parser.parse_args()
 
-    suite: benchmark.BenchSuite
-    if args.file is None or args.file == "" or args.file == "-":
-        suite = benchmark.parse_bench_output(sys.stdin)
-    else:
-        with open(args.file) as f:
-            suite = benchmark.parse_bench_output(f)
+def add_output_args(parser: argparse.ArgumentParser):
+    # options selecting what is plotted or printed for a suite of results
+    parser.add_argument(
+        '--bench',
+        dest='bench',
+        nargs='?',
+        help="the name of the benchmark to plot")
+    add_query_args(parser)
+    parser.add_argument(
+        '--%s' % (inputs.TABLE_NAME),
+        dest='table',
+        nargs='?',
+        const=table.CSV_FORMAT,
+        choices=table.TABLE_FORMATS,
+        help=(
+            'print the aggregated (group, x, y, n, stddev) rows to stdout ' +
+            'instead of plotting. Defaults to \'%s\'' % (table.CSV_FORMAT)))
+    parser.add_argument(
+        '--%s' % (inputs.AGGREGATION_NAME),
+        dest='aggregation',
+        default=plotdata.MEAN_AGGREGATION,
+        help=(
+            'how each (group, x) cell\'s results are aggregated: %s, ' % (
+                ', '.join(plotdata.AGGREGATIONS)) +
+            'or a percentile, e.g. \'p90\'. Defaults to \'%s\'' % (
+                plotdata.MEAN_AGGREGATION)))
+    parser.add_argument(
+        '-o', '--%s' % (inputs.OUTPUT_NAME),
+        dest='output',
+        nargs='?',
+        help=(
+            'file to save the plot to instead of showing it. ' +
+            'The format is inferred from the extension ' +
+            '(e.g. png, svg, pdf). ' +
+            'An .html file gets an interactive report of every benchmark, ' +
+            'with the other options selecting its initial view'))
+    parser.add_argument(
+        '--%s' % (inputs.FACET_BY_NAME),
+        dest='facet_by',
+        nargs='?',
+        help=(
+            'draw a grid of subplots with shared axes, one per value of ' +
+            'this variable, or one per sub-benchmark if \'%s\'' % (
+                plotdata.SUBS_FACET)))
+    parser.add_argument(
+        '--%s' % (inputs.SPLIT_OUTPUTS_NAME),
+        dest='split_outputs',
+        action='store_true',
+        help=(
+            'with several --%s, save each to its own file instead of ' % (
+                inputs.Y_NAME) +
+            'stacking them, named after OUTPUT with _<y> before the ' +
+            'extension'))
+    parser.add_argument(
+        '--%s' % (inputs.HEATMAP_Y_NAME),
+        dest='heatmap_y',
+        nargs='?',
+        help=(
+            'the variable on the vertical axis of \'%s\' plots, ' % (
+                plotdata.HEATMAP_TYPE) +
+            'which color each (x, %s) cell by its mean y' % (
+                inputs.HEATMAP_Y_NAME)))
+    parser.add_argument(
+        '--%s' % (inputs.PROFILE_NAME),
+        dest='profile',
+        action='store_true',
+        help=(
+            'print the wall time, cpu time and peak memory of each stage ' +
+            '(read, columns, filter, group, data, aggregate, import, draw, ' +
+            'output) ' +
+            'to stderr. Tracing memory makes everything slower'))
+    parser.add_argument(
+        '--%s' % (inputs.PROFILE_OUTPUT_NAME),
+        dest='profile_output',
+        nargs='?',
+        help=(
+            'also profile every function call, saved to this file as a ' +
+            'chrome trace of the stages if it ends in %s, ' % (
+                profiling.TRACE_EXT) +
+            'otherwise as a cProfile dump. Implies --%s' % (
+                inputs.PROFILE_NAME)))
+
+
+def read_suite(
+        file: typing.Optional[str],
+        bench: typing.Optional[str] = None,
+        subs: typing.Optional[typing.List[str]] = None,
+        filter_vars: typing.Optional[
+            typing.List[str]] = None) -> benchmark.BenchSuite:
+    with profiling.stage('read'):
+        if file is None or file == "" or file == "-":
+            return benchmark.parse_bench_output(sys.stdin)
+        return query.load_suite(
+            file, bench_names=None if bench is None else [bench], subs=subs,
+            filters=filter_vars)
+
+
+def non_default_aggregation(args) -> typing.Optional[str]:
+    # for the checks of options a mode doesn't support
+    if args.aggregation == plotdata.MEAN_AGGREGATION:
+        return None
+    return args.aggregation
+
+
+def profiled(args, render, *render_args) -> int:
+    # stages are only timed with --profile, otherwise marking them is free
+    if not args.profile and args.profile_output is None:
+        return render(*render_args)
+    with profiling.profile(output=args.profile_output):
+        return render(*render_args)
+
+
+def main(argv: typing.List[str] = None) -> int:
+    if argv is None:
+        argv = sys.argv[1:]
+    if len(argv) > 0 and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
+    parser = argparse.ArgumentParser(
+        description='Plots the results of a go benchmark',
+        epilog=(
+            'other commands: %s. ' % (', '.join(COMMANDS)) +
+            'Run \'gobenchplot COMMAND -h\' for their options'))
+    parser.add_argument(
+        'file',
+        nargs='?',
+        help=(
+            "file containing bench results\n" +
+            "if empty or '-' stdin is assumed"))
+    add_output_args(parser)
+    parser.add_argument(
+        '--%s' % (inputs.LIVE_NAME),
+        dest='live',
+        action='store_true',
+        help=(
+            'plot while results are still being written, e.g. when piping ' +
+            '`go test -json` in. The aggregated (group, x) means are ' +
+            'redrawn as new results arrive'))
+    parser.add_argument(
+        '--%s' % (inputs.LIVE_INTERVAL_NAME),
+        dest='live_interval',
+        type=float,
+        default=live.DEFAULT_INTERVAL,
+        help=(
+            'minimum number of seconds between redraws in --%s mode. ' % (
+                inputs.LIVE_NAME) +
+            'Defaults to %s' % (live.DEFAULT_INTERVAL)))
+
+    parser.add_argument(
+        '--%s' % (inputs.WATCH_NAME),
+        dest='watch',
+        action='store_true',
+        help=(
+            'keep following the file as results are appended to it, e.g. ' +
+            'by `go test -json | tee FILE`, and write the output again ' +
+            'each time they are. Only new lines are parsed. Needs --%s ' % (
+                inputs.OUTPUT_NAME) +
+            'or --%s, stop it with Ctrl-C' % (inputs.TABLE_NAME)))
+    parser.add_argument(
+        '--%s' % (inputs.WATCH_DEBOUNCE_NAME),
+        dest='watch_debounce',
+        type=float,
+        default=live.DEFAULT_DEBOUNCE,
+        help=(
+            'number of seconds without new results before the output is ' +
+            'written again in --%s mode. Defaults to %s' % (
+                inputs.WATCH_NAME, live.DEFAULT_DEBOUNCE)))
+
+    parser.add_argument(
+        '--%s' % (inputs.STREAM_NAME),
+        dest='stream',
+        action='store_true',
+        help=(
+            'aggregate the results as they are parsed instead of keeping ' +
+            'them, so memory grows with the number of (group, x) cells ' +
+            'rather than of results. Each cell keeps its count, mean, ' +
+            'stddev, min, max and a sample of %d results, ' % (
+                streaming.SKETCH_SIZE) +
+            'so median and percentile --%s are approximate ' % (
+                inputs.AGGREGATION_NAME) +
+            'beyond that many. The aggregates are plotted in place of ' +
+            'the results'))
+
+    args = parser.parse_args(argv)
+
+    render = output_renderer(args)
+    if args.stream:
+        return main_stream(args)
+    if (args.live or args.watch) and (
+            args.profile or args.profile_output is not None):
+        print("--%s is not supported with --%s or --%s" % (
+            inputs.PROFILE_NAME, inputs.LIVE_NAME, inputs.WATCH_NAME),
+            file=sys.stderr)
+        return 1
+    if args.live and render is main_plot:
+        return main_live(args)
+    if args.watch:
+        return main_watch(args, render)
+    return profiled(args, render, args)
+
+
+def output_renderer(
+        args) -> typing.Callable[[typing.Any, benchmark.BenchSuite], int]:
+    # several --y share one pass over the results
+    if len(args.y) > 1:
+        return main_outputs
+    args.y = args.y[0]
+    return main_plot
+
+
+def main_plot(args, suite: benchmark.BenchSuite = None) -> int:
+    # the suite is read from args.file unless given
+    if report.is_html_output(args.output):
+        if args.aggregation != plotdata.MEAN_AGGREGATION:
+            print("--%s is not supported with html reports" % (
+                inputs.AGGREGATION_NAME), file=sys.stderr)
+            return 1
+        if suite is None:
+            suite = read_suite(args.file)
+        try:
+            with open(args.output, 'w') as f:
+                report.write_html(suite, f, view=report.ViewOptions(
+                    bench=args.bench, x_name=args.x, y_name=args.y,
+                    group_by=args.group_by or [],
+                    filter_vars=args.filter_vars or [], subs=args.subs))
+        except inputs.InvalidInputError as e:
+            print(str(e), file=sys.stderr)
+            return 1
+        return 0
 
     if args.bench is not None:
+        try:
+            if suite is None:
+                suite = read_suite(
+                    args.file, bench=args.bench, subs=args.subs,
+                    filter_vars=args.filter_vars)
+        except inputs.InvalidInputError as e:
+            print(str(e), file=sys.stderr)
+            return 1
         bench = suite.get_benchmark(args.bench)
         if bench is None:
             print("no bench '%s' found" % (args.bench), file=sys.stderr)
@@ -92,9 +378,48 @@ def main() -> int:
 
         else:
             try:
+                if args.plots == [plotdata.PARETO_TYPE]:
+                    return main_pareto(bench, args)
+                if args.table is not None and args.facet_by is not None:
+                    print("--%s is not supported with --%s" % (
+                        inputs.FACET_BY_NAME, inputs.TABLE_NAME),
+                        file=sys.stderr)
+                    return 1
+                if args.facet_by is not None and \
+                        non_default_aggregation(args) is not None:
+                    print("--%s is not supported with --%s" % (
+                        inputs.AGGREGATION_NAME, inputs.FACET_BY_NAME),
+                        file=sys.stderr)
+                    return 1
+                if args.table is not None:
+                    table.table_bench(
+                        bench, args.group_by, args.x, y_name=args.y,
+                        subs=args.subs, filter_vars=args.filter_vars,
+                        baseline=args.baseline, outliers=args.outliers,
+                        fmt=args.table, aggregation=args.aggregation)
+                    return 0
+
+                # matplotlib is slow to import, only load it when plotting
+                with profiling.stage('import'):
+                    import gobenchplot.plot as plot
+                if args.plots == [plotdata.HEATMAP_TYPE]:
+                    return main_heatmap(plot, bench, args)
+                if args.facet_by is not None:
+                    plot.plot_facets(
+                        bench, args.facet_by, args.group_by, args.x,
+                        y_name=args.y, subs=args.subs,
+                        filter_vars=args.filter_vars, plots=args.plots,
+                        baseline=args.baseline, outliers=args.outliers,
+                        density_threshold=args.density_threshold,
+                        output=args.output)
+                    return 0
                 plot.plot_bench(bench, args.group_by, args.x, y_name=args.y,
                                 subs=args.subs, filter_vars=args.filter_vars,
-                                plots=args.plots)
+                                plots=args.plots, baseline=args.baseline,
+                                outliers=args.outliers,
+                                density_threshold=args.density_threshold,
+                                output=args.output,
+                                aggregation=args.aggregation)
             except inputs.InvalidInputError as e:
                 print(str(e), file=sys.stderr)
                 return 1
@@ -105,5 +430,747 @@ def main() -> int:
     return 0
 
 
+def main_outputs(args, suite: benchmark.BenchSuite = None) -> int:
+    for name, value in [
+            (inputs.LIVE_NAME, args.live or None),
+            (inputs.FACET_BY_NAME, args.facet_by),
+            (inputs.HEATMAP_Y_NAME, args.heatmap_y),
+            (inputs.AGGREGATION_NAME, non_default_aggregation(args))]:
+        if value is not None:
+            print("--%s is not supported with several --%s" % (
+                name, inputs.Y_NAME), file=sys.stderr)
+            return 1
+    for plots in [plotdata.HEATMAP_TYPE, plotdata.PARETO_TYPE]:
+        if args.plots == [plots]:
+            print("--%s %s is not supported with several --%s" % (
+                inputs.PLOTS_NAME, plots, inputs.Y_NAME), file=sys.stderr)
+            return 1
+    if report.is_html_output(args.output):
+        print("html reports are not supported with several --%s" % (
+            inputs.Y_NAME), file=sys.stderr)
+        return 1
+    if args.bench is None:
+        print("need to provide benchmark name", file=sys.stderr)
+        return 1
+
+    try:
+        if suite is None:
+            suite = read_suite(
+                args.file, bench=args.bench, subs=args.subs,
+                filter_vars=args.filter_vars)
+    except inputs.InvalidInputError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    bench = suite.get_benchmark(args.bench)
+    if bench is None:
+        print("no bench '%s' found" % (args.bench), file=sys.stderr)
+        return 1
+    try:
+        if args.table is not None:
+            table.table_outputs(
+                bench, args.group_by, args.x, args.y, subs=args.subs,
+                filter_vars=args.filter_vars, baseline=args.baseline,
+                outliers=args.outliers, fmt=args.table)
+            return 0
+        with profiling.stage('import'):
+            import gobenchplot.plot as plot
+        plot.plot_outputs(
+            bench, args.group_by, args.x, args.y, subs=args.subs,
+            filter_vars=args.filter_vars, plots=args.plots,
+            baseline=args.baseline, outliers=args.outliers,
+            density_threshold=args.density_threshold,
+            split_outputs=args.split_outputs, output=args.output)
+    except inputs.InvalidInputError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    return 0
+
+
+def main_heatmap(plot, bench: benchmark.Benchmark, args) -> int:
+    if args.heatmap_y is None:
+        print("--%s is required with --%s %s" % (
+            inputs.HEATMAP_Y_NAME, inputs.PLOTS_NAME, plotdata.HEATMAP_TYPE),
+            file=sys.stderr)
+        return 1
+    for name, value in [
+            (inputs.GROUP_BY_NAME, args.group_by),
+            (inputs.BASELINE_NAME, args.baseline),
+            (inputs.FACET_BY_NAME, args.facet_by),
+            (inputs.AGGREGATION_NAME, non_default_aggregation(args))]:
+        if value is not None:
+            print("--%s is not supported with --%s %s" % (
+                name, inputs.PLOTS_NAME, plotdata.HEATMAP_TYPE),
+                file=sys.stderr)
+            return 1
+    plot.plot_heatmap(
+        bench, args.x, args.heatmap_y, y_name=args.y, subs=args.subs,
+        filter_vars=args.filter_vars, outliers=args.outliers,
+        output=args.output)
+    return 0
+
+
+def main_pareto(bench: benchmark.Benchmark, args) -> int:
+    for name, value in [
+            (inputs.GROUP_BY_NAME, args.group_by),
+            (inputs.BASELINE_NAME, args.baseline),
+            (inputs.OUTLIERS_NAME, args.outliers),
+            (inputs.FACET_BY_NAME, args.facet_by),
+            (inputs.AGGREGATION_NAME, non_default_aggregation(args))]:
+        if value is not None:
+            print("--%s is not supported with --%s %s" % (
+                name, inputs.PLOTS_NAME, plotdata.PARETO_TYPE),
+                file=sys.stderr)
+            return 1
+    if args.table is not None:
+        pareto_data = plotdata.pareto_data(
+            bench, args.x, y_name=args.y, subs=args.subs,
+            filter_vars=args.filter_vars)
+        table.write_pareto_table(pareto_data, fmt=args.table)
+        return 0
+    import gobenchplot.plot as plot
+    plot.plot_pareto(
+        bench, args.x, y_name=args.y, subs=args.subs,
+        filter_vars=args.filter_vars, output=args.output)
+    return 0
+
+
+def main_live(args) -> int:
+    if args.bench is None:
+        print("need to provide benchmark name", file=sys.stderr)
+        return 1
+    for name, value in [
+            (inputs.TABLE_NAME, args.table),
+            (inputs.OUTLIERS_NAME, args.outliers),
+            (inputs.FACET_BY_NAME, args.facet_by),
+            (inputs.WATCH_NAME, args.watch or None),
+            (inputs.AGGREGATION_NAME, non_default_aggregation(args))]:
+        if value is not None:
+            print("--%s is not supported with --%s" % (
+                name, inputs.LIVE_NAME), file=sys.stderr)
+            return 1
+    if report.is_html_output(args.output):
+        print("html reports are not supported with --%s" % (
+            inputs.LIVE_NAME), file=sys.stderr)
+        return 1
+    if store.is_store(args.file) or arrow.columnar_format(args.file):
+        print("--%s needs benchmark output, not a store or %s file" % (
+            inputs.LIVE_NAME, ' or '.join(arrow.COLUMNAR_FORMATS)),
+            file=sys.stderr)
+        return 1
+
+    f = sys.stdin
+    if args.file is not None and args.file != "" and args.file != "-":
+        f = open(args.file)
+    try:
+        query = live.LiveQuery(
+            args.group_by, args.x, y_name=args.y, subs=args.subs,
+            filter_vars=args.filter_vars, baseline=args.baseline)
+        import gobenchplot.plot as plot
+        plot.plot_live(
+            live.LiveReader(f), args.bench, query, plots=args.plots,
+            interval=args.live_interval,
+            density_threshold=args.density_threshold, output=args.output)
+    except inputs.InvalidInputError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return 0
+
+
+def main_stream(args) -> int:
+    if args.bench is None:
+        print("need to provide benchmark name", file=sys.stderr)
+        return 1
+    if not isinstance(args.y, str):
+        print("several --%s are not supported with --%s" % (
+            inputs.Y_NAME, inputs.STREAM_NAME), file=sys.stderr)
+        return 1
+    for name, value in [
+            (inputs.OUTLIERS_NAME, args.outliers),
+            (inputs.FACET_BY_NAME, args.facet_by),
+            (inputs.HEATMAP_Y_NAME, args.heatmap_y),
+            (inputs.LIVE_NAME, args.live or None),
+            (inputs.WATCH_NAME, args.watch or None)]:
+        if value is not None:
+            print("--%s is not supported with --%s" % (
+                name, inputs.STREAM_NAME), file=sys.stderr)
+            return 1
+    # every other plot needs the results themselves
+    for plots in [plotdata.HEATMAP_TYPE, plotdata.PARETO_TYPE]:
+        if args.plots == [plots]:
+            print("--%s %s is not supported with --%s" % (
+                inputs.PLOTS_NAME, plots, inputs.STREAM_NAME),
+                file=sys.stderr)
+            return 1
+    if report.is_html_output(args.output):
+        print("html reports are not supported with --%s" % (
+            inputs.STREAM_NAME), file=sys.stderr)
+        return 1
+    if store.is_store(args.file) or arrow.columnar_format(args.file):
+        print("--%s needs benchmark output, not a store or %s file" % (
+            inputs.STREAM_NAME, ' or '.join(arrow.COLUMNAR_FORMATS)),
+            file=sys.stderr)
+        return 1
+    return profiled(args, render_stream, args)
+
+
+def render_stream(args) -> int:
+    f = sys.stdin
+    if args.file is not None and args.file != "" and args.file != "-":
+        f = open(args.file)
+    try:
+        aggregator = streaming.StreamAggregator(
+            args.group_by or [], args.x, y_name=args.y, subs=args.subs,
+            filter_vars=args.filter_vars, baseline=args.baseline,
+            aggregation=args.aggregation)
+        with profiling.stage('read'):
+            streaming.aggregate_stream(f, args.bench, aggregator)
+        if aggregator.num_results == 0:
+            print("no bench '%s' found" % (args.bench), file=sys.stderr)
+            return 1
+        bench_data = aggregator.bench_data(args.bench)
+        if args.table is not None:
+            table.write_table(bench_data, fmt=args.table)
+            return 0
+        with profiling.stage('import'):
+            import gobenchplot.plot as plot
+        plot.show_bench_data(
+            bench_data, plots=args.plots,
+            density_threshold=args.density_threshold, output=args.output)
+    except inputs.InvalidInputError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    return 0
+
+
+def main_watch(
+        args,
+        render: typing.Callable[
+            [typing.Any, benchmark.BenchSuite], int]) -> int:
+    if args.file is None or args.file == "" or args.file == "-":
+        print("--%s needs a file to follow, not stdin" % (
+            inputs.WATCH_NAME), file=sys.stderr)
+        return 1
+    if store.is_store(args.file) or arrow.columnar_format(args.file):
+        print("--%s needs benchmark output, not a store or %s file" % (
+            inputs.WATCH_NAME, ' or '.join(arrow.COLUMNAR_FORMATS)),
+            file=sys.stderr)
+        return 1
+    if args.output is None and args.table is None:
+        print("--%s needs --%s or --%s" % (
+            inputs.WATCH_NAME, inputs.OUTPUT_NAME, inputs.TABLE_NAME),
+            file=sys.stderr)
+        return 1
+
+    # a failed render (e.g. the benchmark hasn't started yet) is reported
+    # and the file is still followed
+    watcher = live.FileWatcher(args.file, debounce=args.watch_debounce)
+    try:
+        live.watch(watcher, lambda suite: render(args, suite))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main_site(argv: typing.List[str]) -> int:
+    # matplotlib is slow to import, only load it when plotting
+    import gobenchplot.cache as cache
+    import gobenchplot.site as site
+
+    parser = argparse.ArgumentParser(
+        prog='gobenchplot site',
+        description=(
+            'Renders a figure of every benchmark into a directory, with an ' +
+            'index.html listing them. Figures whose aggregated results and ' +
+            'options are unchanged since a previous run are reused'))
+    parser.add_argument(
+        'file',
+        nargs='?',
+        help=(
+            "file containing bench results\n" +
+            "if empty or '-' stdin is assumed"))
+    parser.add_argument(
+        '--out-dir',
+        dest='out_dir',
+        required=True,
+        help='directory to write the figures and index.html to')
+    add_query_args(parser)
+    parser.add_argument(
+        '--format',
+        dest='fmt',
+        default=site.SVG_FORMAT,
+        choices=site.SITE_FORMATS,
+        help='figure format. Defaults to \'%s\'' % (site.SVG_FORMAT))
+    parser.add_argument(
+        '--cache-dir',
+        dest='cache_dir',
+        help=(
+            'directory of previously rendered figures. ' +
+            'Defaults to OUT_DIR/%s' % (site.RENDER_CACHE_DIR)))
+    parser.add_argument(
+        '--cache-max-bytes',
+        dest='cache_max_bytes',
+        type=int,
+        default=cache.DEFAULT_RENDER_CACHE_BYTES,
+        help=(
+            'size above which the least recently used figures are evicted ' +
+            'from the cache. Defaults to %d' % (
+                cache.DEFAULT_RENDER_CACHE_BYTES)))
+    args = parser.parse_args(argv)
+    if len(args.y) > 1:
+        print("only one --%s is supported by the site command" % (
+            inputs.Y_NAME), file=sys.stderr)
+        return 1
+    args.y = args.y[0]
+
+    suite = read_suite(args.file)
+    cache_dir = args.cache_dir
+    if cache_dir is None:
+        cache_dir = os.path.join(args.out_dir, site.RENDER_CACHE_DIR)
+    pages = site.build_site(suite, args.out_dir, options=site.SiteOptions(
+        x_name=args.x, y_name=args.y, group_by=args.group_by,
+        subs=args.subs, filter_vars=args.filter_vars, plots=args.plots,
+        baseline=args.baseline, outliers=args.outliers,
+        density_threshold=args.density_threshold, fmt=args.fmt),
+        render_cache=cache.RenderCache(
+            cache_dir, max_bytes=args.cache_max_bytes))
+    site.report_pages(pages)
+    return 0
+
+
+def main_serve(argv: typing.List[str]) -> int:
+    # matplotlib is slow to import, only load it when plotting
+    import gobenchplot.cache as cache
+    import gobenchplot.serve as serve
+
+    parser = argparse.ArgumentParser(
+        prog='gobenchplot serve',
+        description=(
+            'Parses the results once and serves plots and tables of them ' +
+            'over http. Endpoints: /benchmarks, /variables?bench=NAME, ' +
+            '/subs?bench=NAME, /plot?bench=NAME&x=VAR&... and ' +
+            '/table?bench=NAME&x=VAR&..., where plot and table take the ' +
+            'same parameters as the command line options'))
+    parser.add_argument(
+        'files',
+        nargs='*',
+        help=(
+            "files containing bench results, each served as a suite " +
+            "named after the file. If none or '-' stdin is assumed"))
+    parser.add_argument(
+        '--host',
+        dest='host',
+        default=serve.DEFAULT_HOST,
+        help='address to listen on. Defaults to %s' % (serve.DEFAULT_HOST))
+    parser.add_argument(
+        '--port',
+        dest='port',
+        type=int,
+        default=serve.DEFAULT_PORT,
+        help='port to listen on. Defaults to %d' % (serve.DEFAULT_PORT))
+    parser.add_argument(
+        '--workers',
+        dest='workers',
+        type=int,
+        default=serve.DEFAULT_WORKERS,
+        help='number of renders run at once. Defaults to %d' % (
+            serve.DEFAULT_WORKERS))
+    parser.add_argument(
+        '--cache-max-bytes',
+        dest='cache_max_bytes',
+        type=int,
+        default=cache.DEFAULT_RENDER_CACHE_BYTES,
+        help=(
+            'memory kept for rendered responses. Defaults to %d' % (
+                cache.DEFAULT_RENDER_CACHE_BYTES)))
+    args = parser.parse_args(argv)
+
+    files = args.files or ['-']
+    suites = {
+        name: read_suite(file)
+        for name, file in zip(serve.suite_names(files), files)}
+    app = serve.Server(
+        suites, workers=args.workers, cache_max_bytes=args.cache_max_bytes)
+    server = serve.HTTPServer((args.host, args.port), app)
+    print('serving %s on http://%s:%d' % (
+        ', '.join(suites), server.server_address[0],
+        server.server_address[1]), file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        app.close()
+    return 0
+
+
+def _timestamp(value: str) -> float:
+    # seconds since the epoch, or an ISO 8601 date and time
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "expected seconds since the epoch or an ISO 8601 time, " +
+            "got '%s'" % (value))
+
+
+def main_ingest(argv: typing.List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog='gobenchplot ingest',
+        description=(
+            'Adds benchmark results to a sqlite store, one run per file. ' +
+            'The store can then be given in place of a results file, with ' +
+            'each result getting \'%s\' (the run\'s label) and ' % (
+                store.RUN_VAR) +
+            '\'%s\' (its timestamp) variables to plot trends by' % (
+                store.RUN_TIME_VAR)))
+    parser.add_argument(
+        'db',
+        help='the store, created if it doesn\'t exist')
+    parser.add_argument(
+        'files',
+        nargs='*',
+        help=(
+            "files containing bench results. " +
+            "If none or '-' stdin is assumed"))
+    parser.add_argument(
+        '--label',
+        dest='label',
+        help='label of the runs, e.g. the commit benchmarked')
+    parser.add_argument(
+        '--timestamp',
+        dest='timestamp',
+        type=_timestamp,
+        help=(
+            'time of the runs, in seconds since the epoch or ISO 8601. ' +
+            'Defaults to the file\'s modification time, or now for stdin'))
+    parser.add_argument(
+        '--list',
+        dest='list_runs',
+        action='store_true',
+        help='list the runs in the store instead of adding any')
+    args = parser.parse_args(argv)
+
+    try:
+        conn = store.connect(args.db)
+    except (store.StoreError, sqlite3.DatabaseError) as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    try:
+        if args.list_runs:
+            for run in store.list_runs(conn):
+                print('%d\t%s\t%s\t%s\t%d' % (
+                    run.id, run.label or '', run.file or '',
+                    datetime.datetime.fromtimestamp(
+                        run.timestamp).isoformat(timespec='seconds'),
+                    run.results))
+            return 0
+        for file in args.files or ['-']:
+            timestamp = args.timestamp
+            start = time.perf_counter()
+            if file == '-':
+                run = store.ingest(
+                    conn, benchmark.iter_bench_results(sys.stdin),
+                    label=args.label, timestamp=timestamp)
+            else:
+                if timestamp is None:
+                    timestamp = os.path.getmtime(file)
+                with open(file) as f:
+                    run = store.ingest(
+                        conn, benchmark.iter_bench_results(f),
+                        file=os.path.abspath(file), label=args.label,
+                        timestamp=timestamp)
+            print('run %d: %d results from %s in %.2fs' % (
+                run.id, run.results, 'stdin' if file == '-' else file,
+                time.perf_counter() - start), file=sys.stderr)
+    finally:
+        conn.close()
+    return 0
+
+
+def main_export(argv: typing.List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog='gobenchplot export',
+        description=(
+            'Writes parsed results as a table with one row per result and ' +
+            'columns for the benchmark name, subs, each output and each ' +
+            'input variable. The file can be given in place of a results ' +
+            'file. Needs pyarrow'))
+    parser.add_argument(
+        'file',
+        nargs='?',
+        help=(
+            "file containing bench results (or a store)\n" +
+            "if empty or '-' stdin is assumed"))
+    parser.add_argument(
+        '-o', '--%s' % (inputs.OUTPUT_NAME),
+        dest='output',
+        required=True,
+        help='file to write the table to')
+    parser.add_argument(
+        '--format',
+        dest='fmt',
+        choices=arrow.COLUMNAR_FORMATS,
+        help=(
+            'table format. Defaults to the one matching the output\'s ' +
+            'extension (%s), or \'%s\'' % (
+                ', '.join(arrow.FORMAT_EXTENSIONS), arrow.PARQUET_FORMAT)))
+    args = parser.parse_args(argv)
+
+    suite = read_suite(args.file)
+    try:
+        arrow.write_columnar(suite, args.output, fmt=args.fmt)
+    except ImportError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    return 0
+
+
+def main_run(argv: typing.List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog='gobenchplot run',
+        description=(
+            'Runs the benchmarks and parses their output as it is written, ' +
+            'saving it to a log. The results are plotted (or printed with ' +
+            '--%s) once the command exits, without --bench only ' % (
+                inputs.TABLE_NAME) +
+            'if a single benchmark ran. The log can be given ' +
+            'in place of a results file afterwards'),
+        epilog=(
+            'the command defaults to `%s`, ' % (
+                ' '.join(runner.default_command('BENCH'))) +
+            'or `-bench .` without --bench. Any other command writing ' +
+            '`go test -json` output can be given after \'--\''))
+    add_output_args(parser)
+    parser.add_argument(
+        '--log',
+        dest='log',
+        help=(
+            'file to save the command\'s output to. Defaults to %s ' % (
+                runner.LOG_TIME_FORMAT.replace('%', '%%')) +
+            'in the working directory'))
+    parser.add_argument(
+        'command',
+        nargs=argparse.REMAINDER,
+        help='the command to run')
+    parser.set_defaults(live=False, watch=False)
+    args = parser.parse_args(argv)
+
+    command = args.command
+    if len(command) > 0 and command[0] == '--':
+        command = command[1:]
+    if len(command) == 0:
+        command = runner.default_command(args.bench)
+    log_path = args.log or runner.default_log()
+    render = output_renderer(args)
+
+    try:
+        with open(log_path, 'w') as log:
+            result = runner.run_command(command, log)
+    except OSError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    print('output saved to %s' % (log_path), file=sys.stderr)
+    if result.error is not None:
+        print(str(result.error), file=sys.stderr)
+        return 1
+    if result.returncode != 0:
+        print('%s exited with status %d' % (
+            command[0], result.returncode), file=sys.stderr)
+    if args.bench is None and not report.is_html_output(args.output):
+        # a custom command may run a single benchmark without --bench
+        if len(result.suite.benchmarks) == 1:
+            args.bench = result.suite.benchmarks[0].name
+        elif args.table is not None or args.output is not None:
+            print(
+                '--bench is needed for a table or plot of %d benchmarks' % (
+                    len(result.suite.benchmarks)), file=sys.stderr)
+            return result.returncode or 1
+        else:
+            return result.returncode
+    status = profiled(args, render, args, result.suite)
+    return result.returncode or status
+
+
+def main_plan(argv: typing.List[str]) -> int:
+    parser = argparse.ArgumentParser(
+        prog='gobenchplot plan',
+        description=(
+            'Prints the go test invocations that would run each ' +
+            'configuration of the benchmarks enough more times for the ' +
+            'confidence interval of its mean to be within --%s. ' % (
+                inputs.TARGET_NAME) +
+            'Runs needed are estimated from the coefficient of variation ' +
+            'of the results so far'))
+    parser.add_argument(
+        'file',
+        nargs='?',
+        help=(
+            "file containing bench results (or a store)\n" +
+            "if empty or '-' stdin is assumed"))
+    parser.add_argument(
+        '--bench',
+        dest='bench',
+        nargs='+',
+        help='the benchmarks to plan. Defaults to all of them')
+    parser.add_argument(
+        '--%s' % (inputs.Y_NAME),
+        dest='y',
+        default='time',
+        help='the output (or expression) to measure. Defaults to time')
+    parser.add_argument(
+        '--%s' % (inputs.SUBS_NAME),
+        dest='subs',
+        nargs='+',
+        help="the sub-benchmark(s) to plan")
+    parser.add_argument(
+        '--%s' % (inputs.FILTER_BY_NAME),
+        dest='filter_vars',
+        nargs='+',
+        help='the variables to filter results by, as in plots')
+    parser.add_argument(
+        '--%s' % (inputs.TARGET_NAME),
+        dest='target',
+        type=float,
+        default=planner.DEFAULT_TARGET,
+        help=(
+            'the half width of the confidence interval to reach, ' +
+            'relative to the mean. Defaults to %s' % (planner.DEFAULT_TARGET)))
+    parser.add_argument(
+        '--%s' % (inputs.CONFIDENCE_NAME),
+        dest='confidence',
+        type=float,
+        default=planner.DEFAULT_CONFIDENCE,
+        help=(
+            'the confidence level of the interval. ' +
+            'Defaults to %s' % (planner.DEFAULT_CONFIDENCE)))
+    parser.add_argument(
+        '--%s' % (inputs.MIN_RUNS_NAME),
+        dest='min_runs',
+        type=int,
+        default=planner.DEFAULT_MIN_RUNS,
+        help=(
+            'runs every configuration gets, even without a CI yet. ' +
+            'Defaults to %d' % (planner.DEFAULT_MIN_RUNS)))
+    parser.add_argument(
+        '--%s' % (inputs.MAX_RUNS_NAME),
+        dest='max_runs',
+        type=int,
+        default=planner.DEFAULT_MAX_RUNS,
+        help=(
+            'runs no configuration goes beyond. ' +
+            'Defaults to %d' % (planner.DEFAULT_MAX_RUNS)))
+    parser.add_argument(
+        '--command',
+        dest='command',
+        default=' '.join(runner.bench_command(
+            planner.BENCH_PLACEHOLDER, planner.COUNT_PLACEHOLDER)),
+        help=(
+            'the command to run the benchmarks with, %s and %s are ' % (
+                planner.BENCH_PLACEHOLDER, planner.COUNT_PLACEHOLDER) +
+            'replaced with the -bench regex and -count. ' +
+            'Defaults to \'%(default)s\''))
+    parser.add_argument(
+        '--cells',
+        dest='cells',
+        action='store_true',
+        help=(
+            'print the CSV of each configuration\'s runs so far, mean, ' +
+            'cv, relative CI half width and further runs needed instead'))
+    parser.add_argument(
+        '--run',
+        dest='run',
+        action='store_true',
+        help=(
+            'run the invocations, appending their output to the file so ' +
+            'later plots include it'))
+    args = parser.parse_args(argv)
+
+    if args.run and (
+            args.file is None or args.file in ("", "-") or
+            store.is_store(args.file) or arrow.columnar_format(args.file)):
+        print("--run needs a file of benchmark output to append to",
+              file=sys.stderr)
+        return 1
+    template = shlex.split(args.command)
+
+    def plan(suite: benchmark.BenchSuite) -> typing.List[planner.CellPlan]:
+        return planner.plan_cells(
+            suite, bench_names=args.bench, y_name=args.y, subs=args.subs,
+            filter_vars=args.filter_vars, target=args.target,
+            confidence=args.confidence, min_runs=args.min_runs,
+            max_runs=args.max_runs)
+
+    try:
+        suite = read_suite(args.file)
+        cells = plan(suite)
+    except inputs.InvalidInputError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    if args.cells:
+        writer = csv.writer(sys.stdout, lineterminator='\n')
+        writer.writerow(
+            ['bench', 'config', 'n', 'mean', 'cv', 'ci_width', 'runs'])
+        for cell in cells:
+            writer.writerow([
+                cell.bench, cell.config, cell.n, '%g' % (cell.mean),
+                '%g' % (cell.cv), '%g' % (cell.ci_width), cell.runs])
+        return 0
+
+    invocations = planner.plan_invocations(cells, max_runs=args.max_runs)
+    print('# %d of %d configurations need %d more runs' % (
+        sum(invocation.cells for invocation in invocations), len(cells),
+        sum(invocation.cells * invocation.count
+            for invocation in invocations)))
+    for invocation in invocations:
+        print(shlex.join(invocation.command(template)))
+    if not args.run or len(invocations) == 0:
+        return 0
+
+    status = 0
+    with open(args.file, 'a') as log:
+        for invocation in invocations:
+            command = invocation.command(template)
+            try:
+                result = runner.run_command(command, log)
+            except OSError as e:
+                print(str(e), file=sys.stderr)
+                return 1
+            if result.error is not None:
+                print(str(result.error), file=sys.stderr)
+                status = 1
+            elif result.returncode != 0:
+                print('%s exited with status %d' % (
+                    command[0], result.returncode), file=sys.stderr)
+                status = 1
+            planner.merge_suite(suite, result.suite)
+    # including those already at --max-runs
+    short = [cell for cell in plan(suite) if not cell.ci_width <= args.target]
+    print('# %d configurations are still short of --%s' % (
+        len(short), inputs.TARGET_NAME), file=sys.stderr)
+    return status
+
+
+# subcommands, anything else is handled by main
+COMMANDS: typing.Dict[str, typing.Callable[[typing.List[str]], int]] = {
+    'site': main_site,
+    'serve': main_serve,
+    'ingest': main_ingest,
+    'export': main_export,
+    'run': main_run,
+    'plan': main_plan,
+}
+
+
 if __name__ == '__main__':
     sys.exit(main())
@@ -0,0 +1,365 @@
+import json
+import os
+import typing
+import numpy as np
+import gobenchplot.benchmark as benchmark
+import gobenchplot.columns as columns
+
+# columnar export and import of parsed results, pyarrow is only needed
+# when they're used
+#
+# one row per result, with the benchmark name, its subs joined with '/',
+# each output and each input variable as a column. Benchmarks are written
+# one after another, so reading one back from an arrow file is a slice of
+# the memory mapped file rather than a copy.
+
+PARQUET_FORMAT = 'parquet'
+ARROW_FORMAT = 'arrow'  # the arrow IPC file format, also known as feather
+COLUMNAR_FORMATS = [PARQUET_FORMAT, ARROW_FORMAT]
+FORMAT_EXTENSIONS = {
+    '.parquet': PARQUET_FORMAT,
+    '.pq': PARQUET_FORMAT,
+    '.arrow': ARROW_FORMAT,
+    '.feather': ARROW_FORMAT,
+    '.ipc': ARROW_FORMAT,
+}
+
+PARQUET_MAGIC = b'PAR1'
+ARROW_MAGIC = b'ARROW1'
+
+BENCH_COLUMN = 'bench'
+SUBS_COLUMN = 'subs'
+VAR_PREFIX = 'var.'  # prefixes variables named like another column
+METADATA_KEY = b'gobenchplot'
+METADATA_VERSION = 1
+
+INT_KIND = 'int'
+FLOAT_KIND = 'float'
+BOOL_KIND = 'bool'
+STRING_KIND = 'string'
+MIXED_KIND = 'mixed'  # written as strings, parsed back like a benchmark name
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError(
+            'pyarrow is needed for parquet and arrow files, ' +
+            'install it with `pip install pyarrow`')
+    return pyarrow
+
+
+def columnar_format(file: typing.Optional[str]) -> typing.Optional[str]:
+    # the format of a file written by write_columnar, from its magic bytes
+    if file is None or file in ('', '-') or not os.path.isfile(file):
+        return None
+    with open(file, 'rb') as f:
+        magic = f.read(len(ARROW_MAGIC))
+    if magic.startswith(PARQUET_MAGIC):
+        return PARQUET_FORMAT
+    if magic == ARROW_MAGIC:
+        return ARROW_FORMAT
+    return None
+
+
+def format_from_path(path: str) -> typing.Optional[str]:
+    return FORMAT_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+class _Variable(typing.NamedTuple):
+    column: str
+    name: str
+    kind: str
+
+
+def _kind(dtype_kinds: typing.Set[str]) -> str:
+    # one column type for a variable across every benchmark
+    if dtype_kinds == {'i'}:
+        return INT_KIND
+    if dtype_kinds <= {'i', 'f'}:
+        return FLOAT_KIND
+    if dtype_kinds == {'b'}:
+        return BOOL_KIND
+    if dtype_kinds == {'U'}:
+        return STRING_KIND
+    return MIXED_KIND
+
+
+def _suite_variables(
+        bench_cols: typing.List[
+            columns.BenchColumns]) -> typing.List[_Variable]:
+    reserved = {BENCH_COLUMN, SUBS_COLUMN} | set(columns.OUTPUT_NAMES)
+    dtype_kinds: typing.Dict[str, typing.Set[str]] = {}
+    for cols in bench_cols:
+        for name, var in cols.variables.items():
+            dtype_kinds.setdefault(name, set()).add(var.values.dtype.kind)
+    return [
+        _Variable(
+            column=VAR_PREFIX + name if name in reserved else name,
+            name=name, kind=_kind(kinds))
+        for name, kinds in dtype_kinds.items()]
+
+
+def _var_array(pa, variable: _Variable, bench_cols: typing.List[
+        columns.BenchColumns]):
+    values: typing.List[np.ndarray] = []
+    present: typing.List[np.ndarray] = []
+    for cols in bench_cols:
+        var = cols.variables.get(variable.name)
+        if var is None:
+            values.append(np.zeros(len(cols), dtype=np.int64))
+            present.append(np.zeros(len(cols), dtype=bool))
+            continue
+        bench_values = var.values
+        if variable.kind == MIXED_KIND:
+            bench_values = np.array(
+                [str(value) for value in bench_values], dtype=object)
+        values.append(bench_values)
+        present.append(var.present)
+    mask = ~np.concatenate(present)
+    if variable.kind in (STRING_KIND, MIXED_KIND):
+        return pa.array(
+            np.concatenate([value.astype(object) for value in values]),
+            mask=mask, type=pa.string()).dictionary_encode()
+    arrow_type, dtype = {
+        INT_KIND: (pa.int64(), np.int64),
+        FLOAT_KIND: (pa.float64(), np.float64),
+        BOOL_KIND: (pa.bool_(), bool),
+    }[variable.kind]
+    return pa.array(
+        np.concatenate([value.astype(dtype) for value in values]),
+        mask=mask, type=arrow_type)
+
+
+def _output_array(pa, values: np.ndarray, arrow_type):
+    missing = np.isnan(values)
+    if arrow_type == pa.int64():
+        values = np.where(missing, 0, values).astype(np.int64)
+    return pa.array(values, mask=missing if missing.any() else None,
+                    type=arrow_type)
+
+
+def suite_table(suite: benchmark.BenchSuite):
+    pa = _pyarrow()
+    bench_cols = [columns.bench_columns(bench) for bench in suite.benchmarks]
+    variables = _suite_variables(bench_cols)
+
+    bench_codes = np.concatenate([
+        np.full(len(cols), i, dtype=np.int32)
+        for i, cols in enumerate(bench_cols)] + [np.empty(0, dtype=np.int32)])
+    subs_values = np.concatenate([
+        np.array([
+            None if subs is None else '/'.join(subs) for subs in cols.subs],
+            dtype=object)[cols.subs_codes]
+        for cols in bench_cols] + [np.empty(0, dtype=object)])
+
+    def outputs(name: str) -> np.ndarray:
+        return np.concatenate(
+            [cols.outputs[name] for cols in bench_cols] +
+            [np.empty(0, dtype=np.float64)])
+
+    arrays = {
+        BENCH_COLUMN: pa.DictionaryArray.from_arrays(
+            pa.array(bench_codes, type=pa.int32()),
+            pa.array([bench.name for bench in suite.benchmarks],
+                     type=pa.string())),
+        SUBS_COLUMN: pa.array(
+            subs_values, type=pa.string()).dictionary_encode(),
+        'runs': _output_array(pa, outputs('runs'), pa.int64()),
+        'time': _output_array(pa, outputs('time'), pa.float64()),
+        'mem_allocs': _output_array(pa, outputs('mem_allocs'), pa.int64()),
+        'mem_used': _output_array(pa, outputs('mem_used'), pa.float64()),
+    }
+    for variable in variables:
+        arrays[variable.column] = _var_array(pa, variable, bench_cols)
+    metadata = {
+        'version': METADATA_VERSION,
+        'variables': [list(variable) for variable in variables],
+    }
+    return pa.table(arrays, metadata={
+        METADATA_KEY: json.dumps(metadata).encode()})
+
+
+def write_columnar(suite: benchmark.BenchSuite, path: str, fmt: str = None):
+    pa = _pyarrow()
+    if fmt is None:
+        fmt = format_from_path(path) or PARQUET_FORMAT
+    table = suite_table(suite)
+    if fmt == PARQUET_FORMAT:
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+        return
+    # a single record batch keeps each column one contiguous buffer
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(len(table), 1))
+
+
+def _array(table, name: str):
+    column = table.column(name)
+    if column.num_chunks == 1:
+        return column.chunk(0)
+    return column.combine_chunks()
+
+
+def _table_variables(table) -> typing.List[_Variable]:
+    # files from elsewhere have no metadata, every other column is a variable
+    metadata = table.schema.metadata or {}
+    if METADATA_KEY in metadata:
+        return [
+            _Variable(*variable)
+            for variable in json.loads(metadata[METADATA_KEY])['variables']]
+    pa = _pyarrow()
+    reserved = {BENCH_COLUMN, SUBS_COLUMN} | set(columns.OUTPUT_NAMES)
+    variables: typing.List[_Variable] = []
+    for field in table.schema:
+        if field.name in reserved:
+            continue
+        arrow_type = field.type
+        if pa.types.is_dictionary(arrow_type):
+            arrow_type = arrow_type.value_type
+        if pa.types.is_integer(arrow_type):
+            kind = INT_KIND
+        elif pa.types.is_floating(arrow_type):
+            kind = FLOAT_KIND
+        elif pa.types.is_boolean(arrow_type):
+            kind = BOOL_KIND
+        else:
+            kind = MIXED_KIND
+        variables.append(_Variable(
+            column=field.name, name=field.name, kind=kind))
+    return variables
+
+
+def _present(array) -> np.ndarray:
+    if array.null_count == 0:
+        return np.ones(len(array), dtype=bool)
+    return array.is_valid().to_numpy(zero_copy_only=False)
+
+
+def _numpy(pa, array, arrow_type, dtype, fill) -> np.ndarray:
+    # a view of the buffer when there are no nulls to fill
+    if array.type != arrow_type:
+        array = array.cast(arrow_type)
+    if array.null_count == 0 and arrow_type != pa.bool_():
+        return array.to_numpy(zero_copy_only=True)
+    return np.asarray(
+        array.fill_null(fill).to_numpy(zero_copy_only=False), dtype=dtype)
+
+
+def _encoded(pa, array) -> typing.Tuple[np.ndarray, typing.List]:
+    # dictionary codes of each row (-1 for nulls) and the dictionary
+    if not pa.types.is_dictionary(array.type):
+        array = array.dictionary_encode()
+    codes = np.asarray(
+        array.indices.fill_null(-1).to_numpy(zero_copy_only=False),
+        dtype=np.int64)
+    return codes, array.dictionary.to_pylist()
+
+
+def _var_column(
+        pa, array, variable: _Variable) -> typing.Optional[columns.VarColumn]:
+    present = _present(array)
+    if not present.any():
+        # the variable belongs to another benchmark
+        return None
+    if variable.kind == INT_KIND:
+        values = _numpy(pa, array, pa.int64(), np.int64, 0)
+    elif variable.kind == FLOAT_KIND:
+        values = _numpy(pa, array, pa.float64(), np.float64, 0.0)
+    elif variable.kind == BOOL_KIND:
+        values = _numpy(pa, array, pa.bool_(), bool, False)
+    else:
+        # each distinct value is converted once
+        codes, dictionary = _encoded(pa, array)
+        if variable.kind == MIXED_KIND:
+            dictionary = [
+                None if value is None else benchmark.var_value(str(value))
+                for value in dictionary]
+        used = np.unique(codes[present])
+        typed = columns.var_array([dictionary[code] for code in used])
+        lookup = np.zeros(len(dictionary), dtype=np.int64)
+        lookup[used] = np.arange(len(used))
+        values = typed[lookup[np.where(present, codes, used[0])]]
+        if not present.all():
+            values[~present] = columns.placeholder(values.dtype)
+    return columns.VarColumn(values=values, present=present)
+
+
+def _subs(pa, table) -> typing.Tuple[np.ndarray, typing.List[columns.Subs]]:
+    if SUBS_COLUMN not in table.column_names:
+        return np.zeros(len(table), dtype=np.int64), [None]
+    codes, dictionary = _encoded(pa, _array(table, SUBS_COLUMN))
+    # duplicate and null entries are folded into one code per subs
+    distinct: typing.Dict[columns.Subs, int] = {None: 0}
+    entry_keys = np.array([
+        distinct.setdefault(
+            None if value is None else tuple(value.split('/')), len(distinct))
+        for value in dictionary] + [0], dtype=np.int64)
+    subs_codes, first_index = columns.by_appearance(entry_keys[codes])
+    by_key = {key: subs for subs, key in distinct.items()}
+    return subs_codes, [
+        by_key[entry_keys[codes[i]]] for i in first_index]
+
+
+def _table_columns(
+        pa, table, variables: typing.List[_Variable]) -> columns.BenchColumns:
+    outputs: typing.Dict[str, np.ndarray] = {}
+    for name in columns.OUTPUT_NAMES:
+        if name in table.column_names:
+            outputs[name] = _numpy(
+                pa, _array(table, name), pa.float64(), np.float64, np.nan)
+        else:
+            outputs[name] = np.full(len(table), np.nan)
+    var_columns: typing.Dict[str, columns.VarColumn] = {}
+    for variable in variables:
+        var = _var_column(pa, _array(table, variable.column), variable)
+        if var is not None:
+            var_columns[variable.name] = var
+    subs_codes, subs = _subs(pa, table)
+    return columns.BenchColumns(
+        outputs=outputs, variables=var_columns, subs_codes=subs_codes,
+        subs=subs)
+
+
+def table_suite(
+        table,
+        bench_names: typing.Optional[
+            typing.List[str]] = None) -> benchmark.BenchSuite:
+    pa = _pyarrow()
+    variables = _table_variables(table)
+    codes, names = _encoded(pa, _array(table, BENCH_COLUMN))
+    suite = benchmark.BenchSuite(benchmarks=[])
+    if len(codes) == 0:
+        return suite
+    bench_codes, first_index = columns.by_appearance(codes)
+    for code, first in enumerate(first_index):
+        name = names[codes[first]]
+        if bench_names is not None and name not in bench_names:
+            continue
+        rows = np.flatnonzero(bench_codes == code)
+        if rows[-1] - rows[0] + 1 == len(rows):
+            bench_table = table.slice(int(rows[0]), len(rows))
+        else:
+            bench_table = table.take(pa.array(rows))
+        suite.benchmarks.append(columns.columns_benchmark(
+            name, _table_columns(pa, bench_table, variables)))
+    return suite
+
+
+def read_columnar(
+        path: str,
+        bench_names: typing.Optional[
+            typing.List[str]] = None) -> benchmark.BenchSuite:
+    pa = _pyarrow()
+    if columnar_format(path) == PARQUET_FORMAT:
+        import pyarrow.parquet as pq
+        table = pq.read_table(
+            path, memory_map=True,
+            filters=None if bench_names is None else [
+                (BENCH_COLUMN, 'in', bench_names)])
+    else:
+        # the columns are views of the mapped file
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    return table_suite(table, bench_names=bench_names)
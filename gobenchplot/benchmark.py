@@ -133,6 +133,33 @@ def parse_bench_var_val_cmp(in_str: str) -> BenchVarValComp:
         inputs.FILTER_BY_NAME, input_val=in_str)
 
 
+def parse_bench_var_value(in_str: str, input_name: str) -> BenchVarValue:
+    trim_val = in_str.replace(" ", "").replace(EQ_VAL, "=")
+    split_val = trim_val.split("=")
+    if len(split_val) != 2 or split_val[0] == "":
+        raise inputs.InvalidInputError(
+            "not of expected form 'var_name=var_value'",
+            input_name, input_val=in_str)
+    return BenchVarValue(
+        var_name=split_val[0], var_value=var_value(split_val[1]))
+
+
+def to_bench_var_val_cmp(
+        value: typing.Union[str, BenchVarValComp]) -> BenchVarValComp:
+    # filters are either already typed or of the form 'var_name==var_value'
+    if isinstance(value, BenchVarValComp):
+        return value
+    return parse_bench_var_val_cmp(value)
+
+
+def to_bench_var_value(
+        value: typing.Union[str, BenchVarValue],
+        input_name: str) -> BenchVarValue:
+    if isinstance(value, BenchVarValue):
+        return value
+    return parse_bench_var_value(value, input_name)
+
+
 class BenchVarValues(typing.List[BenchVarValue]):
     def __init__(self, values: typing.List[BenchVarValue]):
         self._values = values
@@ -408,9 +435,11 @@ class BenchResults:
 
 
 class Benchmark:
-    def __init__(self, name: str):
+    def __init__(self, name: str, results: BenchResults = None):
         self.name = name
-        self._results: BenchResults = BenchResults([])
+        if results is None:
+            results = BenchResults([])
+        self._results: BenchResults = results
 
     def add_result(self, result: BenchRes):
         self._results.append(result)
@@ -471,6 +500,9 @@ def build_filter_exprs(
 
 
 bench_info_expr = re.compile(r'^(Benchmark.+?)(?:\-[0-9])?\s+$')
+# newer versions of go may write a result's name and outputs as one line
+bench_result_expr = re.compile(
+    r'^(Benchmark[^\t]*\t)(\s*[0-9]+\t.*)$', re.DOTALL)
 
 
 class BenchInfo(typing.NamedTuple):
@@ -508,8 +540,11 @@ def parse_out_line(line: str) -> typing.Optional[
     bench_line = json.loads(line)
     if "Output" not in bench_line:
         return None
+    return parse_output(line, bench_line["Output"])
 
-    output_info = bench_line["Output"]
+
+def parse_output(line: str, output_info: str) -> typing.Optional[
+        typing.Union[BenchInfo, BenchOutputs]]:
     if output_info.startswith("Benchmark"):
         # BenchInfo
         return parse_bench_info_line(line, output_info)
@@ -592,36 +627,81 @@ class BenchSuite(typing.NamedTuple):
         return None
 
 
-def parse_bench_output(f) -> BenchSuite:
-    benchmarks: typing.List[Benchmark] = []
-    current_bench: typing.Optional[BenchInfo] = None
-    for line in f:
-        res = parse_out_line(line)
+class ResultParser:
+    # pairs each outputs line with the info line before it, without keeping
+    # the results
+    def __init__(self):
+        self._current_bench: typing.Optional[BenchInfo] = None
+        # repeated runs of a benchmark (e.g. with -count) share their inputs
+        self._infos: typing.Dict[str, BenchInfo] = {}
+
+    def feed(self, line: str) -> typing.Optional[typing.Tuple[str, BenchRes]]:
+        # returns the benchmark name and result of an outputs line
+        bench_line = json.loads(line)
+        if "Output" not in bench_line:
+            return None
+        output_info = bench_line["Output"]
+        m = bench_result_expr.match(output_info)
+        if m is not None:
+            self._feed_output(line, m[1])
+            return self._feed_output(line, m[2])
+        return self._feed_output(line, output_info)
+
+    def _feed_output(
+            self,
+            line: str,
+            output_info: str) -> typing.Optional[typing.Tuple[str, BenchRes]]:
+        res = self._infos.get(output_info)
         if res is None:
-            continue
+            res = parse_output(line, output_info)
+        if res is None:
+            return None
         if isinstance(res, BenchInfo):
-            current_bench = res
-            continue
-        if isinstance(res, BenchOutputs):
-            if current_bench is None:
-                raise ParseBenchmarkError(
-                    line,
-                    "bench outputs provided before bench info")
-
-            existing_bench: typing.Optional[Benchmark] = None
-            for bench in benchmarks:
-                if bench.name == current_bench.name:
-                    existing_bench = bench
-            if existing_bench:
-                existing_bench.add_result(BenchRes(
-                    inputs=current_bench.inputs,
-                    outputs=res))
-            else:
-                new_bench = Benchmark(current_bench.name)
-                new_bench.add_result(BenchRes(
-                    inputs=current_bench.inputs,
-                    outputs=res))
-                benchmarks.append(new_bench)
-            current_bench = None
-
-    return BenchSuite(benchmarks=benchmarks)
+            self._infos[output_info] = res
+            self._current_bench = res
+            return None
+        if self._current_bench is None:
+            raise ParseBenchmarkError(
+                line,
+                "bench outputs provided before bench info")
+
+        info = self._current_bench
+        self._current_bench = None
+        return info.name, BenchRes(inputs=info.inputs, outputs=res)
+
+
+def iter_bench_results(f) -> typing.Iterator[typing.Tuple[str, BenchRes]]:
+    parser = ResultParser()
+    for line in f:
+        parsed = parser.feed(line)
+        if parsed is not None:
+            yield parsed
+
+
+class BenchParser:
+    # incremental parser, results are added to the suite as lines are fed
+    def __init__(self):
+        self.suite = BenchSuite(benchmarks=[])
+        self._benchmarks: typing.Dict[str, Benchmark] = {}
+        self._results = ResultParser()
+
+    def feed(self, line: str) -> typing.Optional[Benchmark]:
+        # returns the benchmark a result was added to, if any
+        parsed = self._results.feed(line)
+        if parsed is None:
+            return None
+        name, res = parsed
+        bench = self._benchmarks.get(name)
+        if bench is None:
+            bench = Benchmark(name)
+            self._benchmarks[bench.name] = bench
+            self.suite.benchmarks.append(bench)
+        bench.add_result(res)
+        return bench
+
+
+def parse_bench_output(f) -> BenchSuite:
+    parser = BenchParser()
+    for line in f:
+        parser.feed(line)
+    return parser.suite
@@ -0,0 +1,231 @@
+import collections
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import typing
+import weakref
+import numpy as np
+import gobenchplot.benchmark as benchmark
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_RENDER_CACHE_BYTES = 256 * 1024 * 1024
+
+T = typing.TypeVar('T')
+
+
+def estimate_size(value) -> int:
+    # approximate memory held by a cached value
+    # rows are shared with the suite, so result sets only count references
+    if isinstance(value, np.ndarray):
+        return value.nbytes + sys.getsizeof(value)
+    if isinstance(value, benchmark.BenchResults):
+        return sys.getsizeof(value) + 8 * len(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+def normalize_filters(
+        filter_vars: typing.Optional[typing.List[str]]) -> typing.Tuple:
+    # filters are all applied, so their order doesn't change the result
+    if filter_vars is None:
+        return ()
+    normalized = []
+    for value in filter_vars:
+        var_cmp = benchmark.to_bench_var_val_cmp(value)
+        normalized.append((
+            var_cmp.var_val.var_name,
+            str(var_cmp.comp),
+            repr(var_cmp.var_val.var_value)))
+    return tuple(sorted(normalized))
+
+
+def normalize_group_by(
+        group_by: typing.Union[typing.List[str], str, None]) -> typing.Tuple:
+    if group_by is None:
+        return ()
+    if isinstance(group_by, str):
+        return (group_by,)
+    return tuple(sorted(group_by))
+
+
+def normalize_subs(subs: typing.Optional[typing.List[str]]) -> typing.Tuple:
+    if subs is None:
+        return ()
+    return tuple(subs)
+
+
+def bench_identity(bench: benchmark.Benchmark) -> typing.Tuple[int, int]:
+    # results are only ever appended, so the count acts as a version
+    return (id(bench), len(bench.results))
+
+
+class _Entry(typing.NamedTuple):
+    value: typing.Any
+    size: int
+    bench_ref: typing.Optional[weakref.ref]
+
+
+class QueryCache:
+    # LRU cache of intermediate query results, bounded by estimated memory
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._entries: typing.OrderedDict[typing.Hashable, _Entry] = (
+            collections.OrderedDict())
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _get(self, key: typing.Hashable, bench) -> typing.Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        # ids can be reused once a benchmark is garbage collected
+        if entry.bench_ref is not None and entry.bench_ref() is not bench:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: typing.Hashable):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _put(self, key: typing.Hashable, value, bench):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        bench_ref = None if bench is None else weakref.ref(bench)
+        self._entries[key] = _Entry(
+            value=value, size=size, bench_ref=bench_ref)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def get_or_compute(
+            self,
+            key: typing.Hashable,
+            compute: typing.Callable[[], T],
+            bench: benchmark.Benchmark = None) -> T:
+        with self._lock:
+            entry = self._get(key, bench)
+            if entry is not None:
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+        # computed outside the lock, concurrent misses may compute twice
+        value = compute()
+        with self._lock:
+            self._put(key, value, bench)
+        return value
+
+
+def _update_digest(h, value):
+    # feeds a type tag before each value so e.g. 1 and '1' differ
+    if isinstance(value, np.ndarray):
+        h.update(b'a%s%r' % (value.dtype.str.encode(), value.shape))
+        if value.dtype.kind == 'O':
+            h.update(repr(value.tolist()).encode())
+        else:
+            h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        h.update(b'd%d' % (len(value)))
+        for k, v in value.items():
+            _update_digest(h, k)
+            _update_digest(h, v)
+    elif isinstance(value, (list, tuple)):
+        h.update(b'l%d' % (len(value)))
+        for v in value:
+            _update_digest(h, v)
+    else:
+        h.update(b's%s\0' % (repr(value).encode()))
+
+
+def digest(*values) -> str:
+    # content hash of (nested) arrays, containers and plain values
+    h = hashlib.sha256()
+    for value in values:
+        _update_digest(h, value)
+    return h.hexdigest()
+
+
+class RenderCache:
+    # rendered files stored by content digest, evicting the least recently
+    # used once the directory grows past max_bytes
+    def __init__(
+            self,
+            cache_dir: str,
+            max_bytes: int = DEFAULT_RENDER_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, key: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, '%s.%s' % (key, ext))
+
+    def get(self, key: str, ext: str) -> typing.Optional[str]:
+        path = self.path(key, ext)
+        try:
+            # the modification time orders entries by last use
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def temp_path(self, ext: str) -> str:
+        # a file to render into before put, hidden from lookups and eviction
+        fd, path = tempfile.mkstemp(
+            suffix='.%s' % (ext), prefix='.', dir=self.cache_dir)
+        os.close(fd)
+        return path
+
+    def put(self, key: str, ext: str, src: str) -> str:
+        # moves the rendered file src into the cache
+        path = self.path(key, ext)
+        os.replace(src, path)
+        self.evict()
+        return path
+
+    def size(self) -> int:
+        return sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self) -> typing.List[os.DirEntry]:
+        return [
+            entry for entry in os.scandir(self.cache_dir)
+            if entry.is_file() and not entry.name.startswith('.')]
+
+    def evict(self):
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
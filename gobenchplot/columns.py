@@ -0,0 +1,425 @@
+import threading
+import typing
+import weakref
+import numpy as np
+import gobenchplot.benchmark as benchmark
+import gobenchplot.inputs as inputs
+import gobenchplot.profiling as profiling
+import gobenchplot.stats as stats
+
+OUTPUT_NAMES: typing.Tuple[str, ...] = benchmark.BenchOutputs._fields
+
+Subs = typing.Optional[typing.Tuple[str, ...]]
+
+
+class VarColumn(typing.NamedTuple):
+    values: np.ndarray
+    present: np.ndarray  # False for rows without the variable
+
+
+def py_value(value) -> benchmark.ResValue:
+    # a value read from a column, as the python type it was parsed as
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def var_array(values: typing.List) -> np.ndarray:
+    # keep ints as ints and strings as strings, only mixed types are objects
+    types = set(type(value) for value in values)
+    if len(types) == 0:
+        return np.empty(0, dtype=np.int64)
+    if types == {bool}:
+        return np.array(values, dtype=bool)
+    if types <= {int}:
+        return np.array(values, dtype=np.int64)
+    if types <= {int, float}:
+        return np.array(values, dtype=np.float64)
+    if types == {str}:
+        return np.array(values, dtype=str)
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
+
+def _concat(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if len(a) == 0:
+        return b
+    if len(b) == 0:
+        return a
+    kinds = {a.dtype.kind, b.dtype.kind}
+    if len(kinds) == 1 or kinds <= {'i', 'f'}:
+        return np.concatenate((a, b))
+    return np.concatenate((a.astype(object), b.astype(object)))
+
+
+def placeholder(dtype: np.dtype) -> typing.Any:
+    # value stored for rows where a variable isn't present
+    if dtype.kind == 'U':
+        return ''
+    if dtype.kind == 'O':
+        return None
+    return 0
+
+
+class BenchColumns:
+    # column oriented copy of a benchmark's results
+    def __init__(
+            self,
+            outputs: typing.Dict[str, np.ndarray],
+            variables: typing.Dict[str, VarColumn],
+            subs_codes: np.ndarray,
+            subs: typing.List[Subs]):
+        self.outputs = outputs
+        self.variables = variables
+        self.subs_codes = subs_codes
+        self.subs = subs  # the distinct subs, indexed by subs_codes
+        self._var_codes: typing.Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.subs_codes)
+
+    @property
+    def var_names(self) -> typing.List[str]:
+        return list(self.variables.keys())
+
+    @staticmethod
+    def from_results(
+            results: typing.Iterable[benchmark.BenchRes]) -> 'BenchColumns':
+        # the only pass over individual rows, everything after is vectorized
+        outputs: typing.Dict[str, typing.List] = {
+            name: [] for name in OUTPUT_NAMES}
+        var_values: typing.Dict[str, typing.List] = {}
+        var_rows: typing.Dict[str, typing.List[int]] = {}
+        subs_index: typing.Dict[Subs, int] = {}
+        subs_codes: typing.List[int] = []
+        num_rows = 0
+        for i, res in enumerate(results):
+            num_rows += 1
+            for name, value in zip(OUTPUT_NAMES, res.outputs):
+                outputs[name].append(np.nan if value is None else value)
+            for var in res.inputs.variables:
+                if var.var_name not in var_values:
+                    var_values[var.var_name] = []
+                    var_rows[var.var_name] = []
+                var_values[var.var_name].append(var.var_value)
+                var_rows[var.var_name].append(i)
+            subs = None if res.inputs.subs is None else tuple(res.inputs.subs)
+            if subs not in subs_index:
+                subs_index[subs] = len(subs_index)
+            subs_codes.append(subs_index[subs])
+
+        variables: typing.Dict[str, VarColumn] = {}
+        for name, values in var_values.items():
+            present_values = var_array(values)
+            rows = np.array(var_rows[name], dtype=np.int64)
+            if len(rows) == num_rows:
+                variables[name] = VarColumn(
+                    values=present_values,
+                    present=np.ones(num_rows, dtype=bool))
+                continue
+            column = np.full(
+                num_rows, placeholder(present_values.dtype),
+                dtype=present_values.dtype)
+            column[rows] = present_values
+            present = np.zeros(num_rows, dtype=bool)
+            present[rows] = True
+            variables[name] = VarColumn(values=column, present=present)
+
+        return BenchColumns(
+            outputs={
+                name: np.array(values, dtype=np.float64)
+                for name, values in outputs.items()},
+            variables=variables,
+            subs_codes=np.array(subs_codes, dtype=np.int64),
+            subs=list(subs_index.keys()))
+
+    def extend(self, other: 'BenchColumns') -> 'BenchColumns':
+        # a new set of columns with other's rows appended
+        subs = list(self.subs)
+        remap = np.empty(len(other.subs), dtype=np.int64)
+        for i, sub in enumerate(other.subs):
+            if sub not in subs:
+                subs.append(sub)
+            remap[i] = subs.index(sub)
+
+        variables: typing.Dict[str, VarColumn] = {}
+        for name in self.var_names + [
+                name for name in other.var_names
+                if name not in self.variables]:
+            variables[name] = VarColumn(
+                values=_concat(
+                    self._var_or_missing(name).values,
+                    other._var_or_missing(name).values),
+                present=np.concatenate((
+                    self._var_or_missing(name).present,
+                    other._var_or_missing(name).present)))
+
+        return BenchColumns(
+            outputs={
+                name: np.concatenate((self.outputs[name], other.outputs[name]))
+                for name in OUTPUT_NAMES},
+            variables=variables,
+            subs_codes=np.concatenate(
+                (self.subs_codes, remap[other.subs_codes])),
+            subs=subs)
+
+    def result(self, i: int) -> benchmark.BenchRes:
+        # the row as it would have been parsed
+        subs = self.subs[self.subs_codes[i]]
+        runs, time, mem_allocs, mem_used = [
+            self.outputs[name][i] for name in OUTPUT_NAMES]
+        return benchmark.BenchRes(
+            inputs=benchmark.BenchInputs(
+                variables=[
+                    benchmark.BenchVarValue(
+                        var_name=name, var_value=py_value(var.values[i]))
+                    for name, var in self.variables.items()
+                    if var.present[i]],
+                subs=None if subs is None else list(subs)),
+            outputs=benchmark.BenchOutputs(
+                runs=int(runs), time=float(time),
+                mem_allocs=None if np.isnan(mem_allocs) else int(mem_allocs),
+                mem_used=None if np.isnan(mem_used) else float(mem_used)))
+
+    def _var_or_missing(self, name: str) -> VarColumn:
+        if name in self.variables:
+            return self.variables[name]
+        return VarColumn(
+            values=np.zeros(len(self), dtype=np.int64),
+            present=np.zeros(len(self), dtype=bool))
+
+    def var_codes(self, name: str) -> np.ndarray:
+        # dense code per value of a variable, computed once per column
+        if name not in self._var_codes:
+            values = self.variables[name].values
+            if values.dtype.kind == 'O':
+                # mixed types can't be sorted by np.unique
+                values = np.array([repr(value) for value in values])
+            codes, _ = stats.dense_codes(values)
+            self._var_codes[name] = codes
+        return self._var_codes[name]
+
+    def column(self, name: str, rows: np.ndarray = None) -> np.ndarray:
+        # values of an output or variable, which must be set for every row
+        if rows is None:
+            rows = np.arange(len(self))
+        if name in OUTPUT_NAMES:
+            values = self.outputs[name][rows]
+            if np.any(np.isnan(values)):
+                raise KeyError(name)
+            return values
+        if name not in self.variables:
+            raise KeyError(name)
+        var = self.variables[name]
+        if not np.all(var.present[rows]):
+            raise KeyError(name)
+        return var.values[rows]
+
+
+_bench_columns: (
+    'weakref.WeakKeyDictionary[benchmark.Benchmark, BenchColumns]') = (
+        weakref.WeakKeyDictionary())
+_bench_columns_lock = threading.Lock()
+
+
+def bench_columns(bench: benchmark.Benchmark) -> BenchColumns:
+    # built once per benchmark, then only extended with new results
+    with _bench_columns_lock:
+        cols = _bench_columns.get(bench)
+        num_results = len(bench.results)
+        if cols is not None and len(cols) >= num_results:
+            return cols
+        with profiling.stage('columns'):
+            if cols is None:
+                cols = BenchColumns.from_results(bench.results)
+            else:
+                cols = cols.extend(BenchColumns.from_results(
+                    bench.results[len(cols):num_results]))
+        _bench_columns[bench] = cols
+        return cols
+
+
+class ColumnResults(benchmark.BenchResults):
+    # results read as columns (e.g. from a parquet file), only built into
+    # BenchRes rows if something iterates over them
+    def __init__(self, cols: BenchColumns):
+        self._cols = cols
+        self._rows: typing.Optional[typing.List[benchmark.BenchRes]] = None
+
+    @property
+    def _data(self) -> typing.List[benchmark.BenchRes]:
+        if self._rows is None:
+            self._rows = [self._cols.result(i) for i in range(len(self._cols))]
+        return self._rows
+
+    def __len__(self) -> int:
+        if self._rows is None:
+            return len(self._cols)
+        return len(self._rows)
+
+    def __getitem__(self, key):
+        if self._rows is None and isinstance(key, int):
+            return self._cols.result(range(len(self._cols))[key])
+        return self._data[key]
+
+
+def columns_benchmark(name: str, cols: BenchColumns) -> benchmark.Benchmark:
+    # a benchmark whose columns are already built, so queries don't need
+    # to go through its results
+    bench = benchmark.Benchmark(name, results=ColumnResults(cols))
+    with _bench_columns_lock:
+        _bench_columns[bench] = cols
+    return bench
+
+
+def _compare(
+        values: np.ndarray,
+        filter_by: benchmark.BenchVarValComp) -> np.ndarray:
+    value = filter_by.var_val.var_value
+    if filter_by.comp in (benchmark.Comparison.EQ, benchmark.Comparison.NE):
+        if values.dtype.kind == 'U' and not isinstance(value, str):
+            return np.zeros(len(values), dtype=bool)
+        return np.asarray(values == value, dtype=bool)
+    try:
+        return np.asarray(filter_by.comp.get_fn()(values, value), dtype=bool)
+    except TypeError:
+        raise inputs.InvalidInputError(
+            "can't compare values of '%s' to %r" % (
+                filter_by.var_val.var_name, value),
+            inputs.FILTER_BY_NAME, input_val=str(filter_by.var_val))
+
+
+def select_rows(
+        cols: BenchColumns,
+        subs: typing.Optional[typing.List[str]],
+        filters: typing.List[benchmark.BenchVarValComp]) -> np.ndarray:
+    # indices of the rows matching the subs and all filters
+    mask = np.ones(len(cols), dtype=bool)
+    if subs is not None and len(subs) != 0:
+        if tuple(subs) not in cols.subs:
+            return np.empty(0, dtype=np.int64)
+        mask &= cols.subs_codes == cols.subs.index(tuple(subs))
+    for filter_by in filters:
+        name = filter_by.var_val.var_name
+        if name not in cols.variables:
+            matches = np.zeros(len(cols), dtype=bool)
+        else:
+            var = cols.variables[name]
+            matches = var.present & _compare(var.values, filter_by)
+        if filter_by.comp == benchmark.Comparison.NE:
+            # rows without the variable don't have the excluded value
+            mask &= ~matches
+        else:
+            mask &= matches
+    return np.flatnonzero(mask)
+
+
+class ColumnGroups(typing.NamedTuple):
+    codes: np.ndarray  # group of each selected row, in order of appearance
+    keys: typing.List[benchmark.BenchVarValues]
+
+    def labels(self) -> typing.List[str]:
+        return [str(key) for key in self.keys]
+
+
+def group_rows(
+        cols: BenchColumns,
+        rows: np.ndarray,
+        group_by: typing.Union[typing.List[str], str]) -> ColumnGroups:
+    if isinstance(group_by, str):
+        group_names = [group_by]
+    elif isinstance(group_by, typing.List):
+        group_names = group_by
+    else:
+        raise inputs.InvalidInputError(
+            'invalid type %s' % (type(group_by)),
+            inputs.GROUP_BY_NAME, input_val=group_by)
+
+    for name in group_names:
+        if name not in cols.variables or not np.any(
+                cols.variables[name].present[rows]):
+            raise inputs.InvalidInputError(
+                'no variable with that name',
+                inputs.GROUP_BY_NAME, input_val=name)
+
+    # labels list variables in the order the benchmark names them
+    ordered = [name for name in cols.var_names if name in group_names]
+    keys: typing.List[np.ndarray] = []
+    for name in ordered:
+        # 0 marks rows without the variable
+        present = cols.variables[name].present[rows]
+        keys.append(np.where(present, cols.var_codes(name)[rows] + 1, 0))
+    if len(keys) == 0:
+        keys.append(np.zeros(len(rows), dtype=np.int64))
+
+    codes, first_rows = by_appearance(*keys)
+    group_keys: typing.List[benchmark.BenchVarValues] = []
+    for row in rows[first_rows]:
+        group_keys.append(benchmark.BenchVarValues([
+            benchmark.BenchVarValue(
+                var_name=name,
+                var_value=py_value(cols.variables[name].values[row]))
+            for name in ordered if cols.variables[name].present[row]]))
+    return ColumnGroups(codes=codes, keys=group_keys)
+
+
+def by_appearance(
+        *keys: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+    # dense codes numbered in order of first appearance, and the index of
+    # the first appearance of each code
+    codes, num_codes = stats.cell_codes(*keys)
+    first_index = stats.cell_first_index(codes, num_codes)
+    appearance = np.argsort(first_index, kind='stable')
+    remap = np.empty(num_codes, dtype=np.int64)
+    remap[appearance] = np.arange(num_codes)
+    return remap[codes], first_index[appearance]
+
+
+def subs_rows(
+        cols: BenchColumns,
+        rows: np.ndarray) -> typing.Tuple[np.ndarray, typing.List[Subs]]:
+    # code of each selected row's subs, in order of appearance
+    codes, first_rows = by_appearance(cols.subs_codes[rows])
+    return codes, [cols.subs[cols.subs_codes[row]] for row in rows[first_rows]]
+
+
+def config_rows(
+        cols: BenchColumns,
+        rows: np.ndarray) -> typing.Tuple[np.ndarray, typing.List[str]]:
+    # code of each selected row's configuration (its subs and every
+    # variable it sets) in order of appearance, and a label for each
+    names = [
+        name for name in cols.var_names
+        if np.any(cols.variables[name].present[rows])]
+    groups = group_rows(cols, rows, names)
+    codes, first_rows = by_appearance(cols.subs_codes[rows], groups.codes)
+    labels: typing.List[str] = []
+    for i in first_rows:
+        subs = cols.subs[cols.subs_codes[rows[i]]]
+        parts = [str(groups.keys[groups.codes[i]])]
+        if subs is not None:
+            parts.insert(0, '/'.join(subs))
+        labels.append(': '.join(part for part in parts if part != ''))
+    return codes, labels
+
+
+def split_codes(
+        codes: np.ndarray,
+        num_codes: int,
+        *values: np.ndarray) -> typing.List[typing.Tuple[np.ndarray, ...]]:
+    # the values of each code, keeping the original order within a code
+    sort_codes = codes
+    if num_codes <= np.iinfo(np.uint16).max:
+        # stable sorts of small integer types use a linear time radix sort
+        sort_codes = codes.astype(np.uint16)
+    order = np.argsort(sort_codes, kind='stable')
+    bounds = np.cumsum(np.bincount(codes, minlength=num_codes))
+    split = [np.split(arr[order], bounds[:-1]) for arr in values]
+    return list(zip(*split))
+
+
+def split_groups(
+        groups: ColumnGroups,
+        *values: np.ndarray) -> typing.List[typing.Tuple[np.ndarray, ...]]:
+    return split_codes(groups.codes, len(groups.keys), *values)
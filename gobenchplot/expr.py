@@ -0,0 +1,214 @@
+import re
+import typing
+import numpy as np
+import gobenchplot.inputs as inputs
+
+# small arithmetic language used for derived y values, e.g. 'time/num_elems'
+#
+# expr  := term (('+' | '-') term)*
+# term  := unary (('*' | '/') unary)*
+# unary := '-' unary | power
+# power := atom ('**' unary)?
+# atom  := NUMBER | NAME | FUNC '(' expr ')' | '(' expr ')'
+
+Lookup = typing.Callable[[str], np.ndarray]
+Node = typing.Callable[[Lookup], typing.Union[np.ndarray, float]]
+
+token_expr = re.compile(r'''
+    \s*(?:
+        (?P<number>(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?)|
+        (?P<name>[A-Za-z_][A-Za-z0-9_]*)|
+        (?P<op>\*\*|[-+*/()])
+    )''', re.VERBOSE)
+
+FUNCTIONS: typing.Dict[str, typing.Callable[[np.ndarray], np.ndarray]] = {
+    'abs': np.abs,
+    'sqrt': np.sqrt,
+    'exp': np.exp,
+    'log': np.log,
+    'log2': np.log2,
+    'log10': np.log10,
+}
+
+BINARY_OPS: typing.Dict[
+        str, typing.Callable[[typing.Any, typing.Any], typing.Any]] = {
+    '+': np.add,
+    '-': np.subtract,
+    '*': np.multiply,
+    '/': np.true_divide,
+    '**': np.power,
+}
+
+
+class Token(typing.NamedTuple):
+    kind: str
+    value: str
+
+
+def tokenize(text: str) -> typing.List[Token]:
+    tokens: typing.List[Token] = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = token_expr.match(text, pos)
+        if not m or m.end() == pos:
+            raise inputs.InvalidInputError(
+                "unexpected character '%s'" % (text[pos:].lstrip()[:1]),
+                inputs.Y_NAME, input_val=text)
+        kind = typing.cast(str, m.lastgroup)
+        tokens.append(Token(kind=kind, value=m[kind]))
+        pos = m.end()
+    return tokens
+
+
+def _const(value: float) -> Node:
+    def node(lookup: Lookup):
+        return value
+    return node
+
+
+def _name(name: str) -> Node:
+    def node(lookup: Lookup):
+        return lookup(name)
+    return node
+
+
+def _unary(fn, operand: Node) -> Node:
+    def node(lookup: Lookup):
+        return fn(operand(lookup))
+    return node
+
+
+def _binary(fn, left: Node, right: Node) -> Node:
+    def node(lookup: Lookup):
+        return fn(left(lookup), right(lookup))
+    return node
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.pos = 0
+        self.names: typing.List[str] = []
+
+    def error(self, reason: str) -> inputs.InvalidInputError:
+        return inputs.InvalidInputError(
+            reason, inputs.Y_NAME, input_val=self.text)
+
+    def peek(self) -> typing.Optional[Token]:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None
+
+    def take(self) -> Token:
+        tok = self.peek()
+        if tok is None:
+            raise self.error('unexpected end of expression')
+        self.pos += 1
+        return tok
+
+    def expect(self, value: str):
+        tok = self.take()
+        if tok.value != value:
+            raise self.error("expected '%s', got '%s'" % (value, tok.value))
+
+    def at_op(self, *values: str) -> bool:
+        tok = self.peek()
+        return tok is not None and tok.kind == 'op' and tok.value in values
+
+    def parse(self) -> Node:
+        node = self.expr()
+        if self.peek() is not None:
+            raise self.error("unexpected '%s'" % (typing.cast(
+                Token, self.peek()).value))
+        return node
+
+    def expr(self) -> Node:
+        node = self.term()
+        while self.at_op('+', '-'):
+            op = self.take().value
+            node = _binary(BINARY_OPS[op], node, self.term())
+        return node
+
+    def term(self) -> Node:
+        node = self.unary()
+        while self.at_op('*', '/'):
+            op = self.take().value
+            node = _binary(BINARY_OPS[op], node, self.unary())
+        return node
+
+    def unary(self) -> Node:
+        if self.at_op('-'):
+            self.take()
+            return _unary(np.negative, self.unary())
+        if self.at_op('+'):
+            self.take()
+            return self.unary()
+        return self.power()
+
+    def power(self) -> Node:
+        node = self.atom()
+        if self.at_op('**'):
+            self.take()
+            node = _binary(BINARY_OPS['**'], node, self.unary())
+        return node
+
+    def atom(self) -> Node:
+        tok = self.take()
+        if tok.kind == 'number':
+            return _const(float(tok.value))
+        if tok.kind == 'name':
+            if self.at_op('('):
+                if tok.value not in FUNCTIONS:
+                    raise self.error("unknown function '%s'" % (tok.value))
+                self.expect('(')
+                arg = self.expr()
+                self.expect(')')
+                return _unary(FUNCTIONS[tok.value], arg)
+            if tok.value not in self.names:
+                self.names.append(tok.value)
+            return _name(tok.value)
+        if tok.value == '(':
+            node = self.expr()
+            self.expect(')')
+            return node
+        raise self.error("unexpected '%s'" % (tok.value))
+
+
+class YExpr:
+    def __init__(self, text: str):
+        parser = _Parser(text)
+        self.text = text
+        self._root = parser.parse()
+        self.names: typing.Tuple[str, ...] = tuple(parser.names)
+        self._is_name = len(parser.tokens) == 1 and len(self.names) == 1
+        if len(self.names) == 0:
+            raise inputs.InvalidInputError(
+                'must reference at least one output or variable',
+                inputs.Y_NAME, input_val=text)
+
+    def __str__(self):
+        return self.text
+
+    def field(self) -> typing.Optional[str]:
+        # the name referenced if the expression is just a single name
+        if self._is_name:
+            return self.names[0]
+        return None
+
+    def evaluate(self, lookup: Lookup) -> np.ndarray:
+        def checked_lookup(name: str) -> np.ndarray:
+            values = lookup(name)
+            if values.dtype.kind not in 'biuf':
+                raise inputs.InvalidInputError(
+                    "non numeric value '%s'" % (name),
+                    inputs.Y_NAME, input_val=self.text)
+            return values.astype(np.float64, copy=False)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.asarray(self._root(checked_lookup), dtype=np.float64)
+
+
+def compile_expr(text: str) -> YExpr:
+    return YExpr(text)
@@ -1,9 +1,30 @@
+BENCH_NAME = 'bench'
 X_NAME = 'x'
 Y_NAME = 'y'
 GROUP_BY_NAME = 'group-by'
 FILTER_BY_NAME = 'filter-by'
 SUBS_NAME = 'subs'
 PLOTS_NAME = 'plots'
+BASELINE_NAME = 'baseline'
+OUTLIERS_NAME = 'outliers'
+TABLE_NAME = 'table'
+OUTPUT_NAME = 'output'
+DENSITY_THRESHOLD_NAME = 'density-threshold'
+LIVE_NAME = 'live'
+FACET_BY_NAME = 'facet-by'
+LIVE_INTERVAL_NAME = 'live-interval'
+HEATMAP_Y_NAME = 'heatmap-y'
+SPLIT_OUTPUTS_NAME = 'split-outputs'
+WATCH_NAME = 'watch'
+WATCH_DEBOUNCE_NAME = 'watch-debounce'
+TARGET_NAME = 'target'
+CONFIDENCE_NAME = 'confidence'
+MIN_RUNS_NAME = 'min-runs'
+MAX_RUNS_NAME = 'max-runs'
+AGGREGATION_NAME = 'aggregation'
+PROFILE_NAME = 'profile'
+PROFILE_OUTPUT_NAME = 'profile-output'
+STREAM_NAME = 'stream'
 
 
 class InvalidInputError(Exception):
@@ -0,0 +1,221 @@
+import os
+import threading
+import time
+import typing
+import gobenchplot.benchmark as benchmark
+import gobenchplot.columns as columns
+import gobenchplot.expr as expr
+import gobenchplot.inputs as inputs
+import gobenchplot.plotdata as plotdata
+
+# NOTE: this module must not import matplotlib (directly or indirectly)
+
+DEFAULT_INTERVAL = 1.0  # minimum seconds between redraws
+DEFAULT_POLL_INTERVAL = 0.25  # seconds between checks of a watched file
+DEFAULT_DEBOUNCE = 0.5  # seconds a watched file must be quiet before a redraw
+DEFAULT_MAX_DELAY = 5.0  # seconds a redraw may be held off by appends
+
+
+class LiveReader(threading.Thread):
+    # parses a stream in the background while results are still arriving
+    def __init__(self, f):
+        threading.Thread.__init__(self, daemon=True)
+        self.f = f
+        self.parser = benchmark.BenchParser()
+        self.error: typing.Optional[Exception] = None
+        self.done = threading.Event()
+
+    @property
+    def suite(self) -> benchmark.BenchSuite:
+        return self.parser.suite
+
+    def run(self):
+        try:
+            for line in self.f:
+                self.parser.feed(line)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+
+
+class FileWatcher:
+    # parses the lines appended to a file since it was last polled, e.g.
+    # one written by `go test -json | tee FILE`. Only complete lines are
+    # parsed, a partial one is read again once it's finished.
+    #
+    # if the file is truncated or replaced (e.g. rotated) parsing starts
+    # over with the new contents
+    def __init__(
+            self,
+            path: str,
+            debounce: float = DEFAULT_DEBOUNCE,
+            max_delay: float = DEFAULT_MAX_DELAY,
+            clock: typing.Callable[[], float] = time.monotonic):
+        self.path = path
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._clock = clock
+        self._reset(None)
+
+    def _reset(self, file_id: typing.Optional[typing.Tuple[int, int]]):
+        self.parser = benchmark.BenchParser()
+        self.offset = 0  # bytes of the file parsed so far
+        self._file_id = file_id
+        self._first_change: typing.Optional[float] = None
+        self._last_change: typing.Optional[float] = None
+
+    @property
+    def suite(self) -> benchmark.BenchSuite:
+        return self.parser.suite
+
+    def poll(self) -> bool:
+        # parses whatever was appended, returns whether it added results
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            # e.g. between a rotation and the new file being created
+            return False
+        with f:
+            stat = os.fstat(f.fileno())
+            file_id = (stat.st_dev, stat.st_ino)
+            reset = file_id != self._file_id or stat.st_size < self.offset
+            if reset:
+                had_results = len(self.suite.benchmarks) > 0
+                self._reset(file_id)
+            f.seek(self.offset)
+            data = f.read(stat.st_size - self.offset)
+
+        end = data.rfind(b'\n') + 1
+        added = False
+        for line in data[:end].splitlines():
+            if line.strip() and self.parser.feed(line.decode()) is not None:
+                added = True
+        self.offset += end
+        if reset:
+            # results that were drawn are gone even if none replaced them
+            added = added or had_results
+        if added:
+            now = self._clock()
+            if self._first_change is None:
+                self._first_change = now
+            self._last_change = now
+        return added
+
+    def ready(self) -> bool:
+        # whether results have arrived and the file has been quiet for
+        # debounce seconds, or they've been held for max_delay
+        if self._last_change is None:
+            return False
+        now = self._clock()
+        return (now - self._last_change >= self.debounce or
+                now - self._first_change >= self.max_delay)
+
+    def rendered(self):
+        self._first_change = None
+        self._last_change = None
+
+
+def watch(
+        watcher: FileWatcher,
+        render: typing.Callable[[benchmark.BenchSuite], typing.Any],
+        interval: float = DEFAULT_POLL_INTERVAL,
+        stop: threading.Event = None):
+    # renders the suite once results arrive and then each time more do,
+    # until stopped
+    if stop is None:
+        stop = threading.Event()
+    if watcher.poll():
+        render(watcher.suite)
+        watcher.rendered()
+    while not stop.wait(interval):
+        watcher.poll()
+        if watcher.ready():
+            render(watcher.suite)
+            watcher.rendered()
+
+
+class LiveQuery:
+    # aggregates of a single benchmark, updated with each batch of new
+    # results instead of recomputed from every result seen so far
+    def __init__(
+            self,
+            group_by: typing.Union[typing.List[str], str],
+            x_name: str, y_name: str = 'time',
+            subs: typing.List = None,
+            filter_vars: typing.List[str] = None,
+            baseline: typing.List[str] = None):
+        if isinstance(group_by, str):
+            group_by = [group_by]
+        elif not isinstance(group_by, typing.List):
+            raise inputs.InvalidInputError(
+                'invalid type %s' % (type(group_by)),
+                inputs.GROUP_BY_NAME, input_val=group_by)
+        self.group_by = group_by
+        self.x_name = x_name
+        self.y_name = y_name
+        self.subs = subs
+        self.filter_vars = filter_vars
+        self.baseline = baseline
+        self._filters = [
+            benchmark.to_bench_var_val_cmp(value)
+            for value in filter_vars or []]
+        self._y_expr = expr.compile_expr(y_name)
+
+        self.num_results = 0  # results of the benchmark processed so far
+        self._cells: typing.Dict[str, plotdata.CellStats] = {}
+        self._group_keys: typing.Dict[str, benchmark.BenchVarValues] = {}
+        self._var_names: typing.Set[str] = set()
+
+    def update(self, bench: benchmark.Benchmark) -> bool:
+        # returns whether any new result was added to the aggregates
+        num_results = len(bench.results)
+        if num_results == self.num_results:
+            return False
+        cols = columns.BenchColumns.from_results(
+            bench.results[self.num_results:num_results])
+        rows = columns.select_rows(cols, self.subs, self._filters)
+        if len(rows) == 0:
+            self.num_results = num_results
+            return False
+
+        # a batch may not include every group variable, its groups are
+        # labelled by the ones it does
+        group_by = [
+            name for name in self.group_by
+            if name in cols.variables and
+            cols.variables[name].present[rows].any()]
+        groups = columns.group_rows(cols, rows, group_by)
+        data = plotdata.columns_plot_data(
+            cols, rows, groups, self.x_name, self._y_expr)
+
+        for label, cells in plotdata.aggregate(data).items():
+            if label in self._cells:
+                cells = plotdata.merge_cell_stats(self._cells[label], cells)
+            self._cells[label] = cells
+        for key in groups.keys:
+            self._group_keys.setdefault(str(key), key)
+        self._var_names.update(group_by)
+        self.num_results = num_results
+        return True
+
+    def bench_data(self, bench: benchmark.Benchmark) -> plotdata.BenchData:
+        if len(self._cells) == 0:
+            raise inputs.InvalidInputError(
+                "no results remain",
+                [inputs.FILTER_BY_NAME, inputs.SUBS_NAME],
+                [self.filter_vars, self.subs])
+        for name in self.group_by:
+            if name not in self._var_names:
+                raise inputs.InvalidInputError(
+                    'no variable with that name',
+                    inputs.GROUP_BY_NAME, input_val=name)
+
+        # only the aggregates are kept, so they stand in for the samples
+        data = {
+            label: plotdata.PlotData(x=cells.x, y=cells.y)
+            for label, cells in self._cells.items()}
+        return plotdata.aggregated_bench_data(
+            bench, data, dict(self._cells), self._group_keys.values(),
+            self.x_name, y_name=self.y_name, subs=self.subs,
+            baseline=self.baseline)
@@ -0,0 +1,287 @@
+import decimal
+import re
+import typing
+import numpy as np
+import gobenchplot.benchmark as benchmark
+import gobenchplot.columns as columns
+import gobenchplot.expr as expr
+import gobenchplot.inputs as inputs
+import gobenchplot.plotdata as plotdata
+import gobenchplot.stats as stats
+
+# plans how many more times each configuration of a benchmark needs to run
+# for the confidence interval of its mean to be narrow enough, as the
+# fewest `go test -bench REGEX -count N` invocations running just those
+#
+# NOTE: this module must not import matplotlib (directly or indirectly)
+
+DEFAULT_TARGET = 0.05  # CI half width, relative to the mean
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_MIN_RUNS = 3
+DEFAULT_MAX_RUNS = 20
+COUNT_RATIO = 1.5  # between the counts runs are rounded up to
+
+# replaced in the arguments of a command template
+BENCH_PLACEHOLDER = '{bench}'
+COUNT_PLACEHOLDER = '{count}'
+
+# a configuration is a token for each of its dimensions: the benchmark,
+# each of its subs and each of its variables
+Dim = typing.Tuple
+BENCH_DIM: Dim = ('bench',)
+
+
+class CellPlan(typing.NamedTuple):
+    bench: str
+    config: str  # labelled as in tables
+    dims: typing.Tuple[typing.Tuple[Dim, str], ...]  # (dim, token regex)
+    n: int
+    mean: float
+    cv: float  # stddev / mean, nan with fewer than 2 results
+    ci_width: float  # CI half width relative to the mean
+    runs: int  # further runs needed
+
+
+class Invocation(typing.NamedTuple):
+    bench_regex: str
+    count: int
+    cells: int  # configurations it runs
+
+    def command(self, template: typing.List[str]) -> typing.List[str]:
+        return [
+            arg.replace(BENCH_PLACEHOLDER, self.bench_regex).replace(
+                COUNT_PLACEHOLDER, str(self.count))
+            for arg in template]
+
+
+def _go_float(value: float) -> str:
+    # how go's %v prints a float64: its shortest round trip digits, with
+    # an exponent outside 1e-4 <= |value| < 1e6
+    if not np.isfinite(value):
+        return {'inf': '+Inf', '-inf': '-Inf', 'nan': 'NaN'}[repr(value)]
+    d = decimal.Decimal(repr(value)).normalize()
+    exp = d.adjusted()
+    if -4 <= exp < 6:
+        return format(d, 'f')
+    sign, digits, _ = d.as_tuple()
+    mantissa = str(digits[0])
+    if len(digits) > 1:
+        mantissa += '.' + ''.join(str(digit) for digit in digits[1:])
+    return '%s%se%s%02d' % (
+        '-' if sign else '', mantissa, '-' if exp < 0 else '+', abs(exp))
+
+
+def value_regex(value: benchmark.ResValue) -> str:
+    # matches the value as it appears in a benchmark name
+    if isinstance(value, bool):
+        return str(value).lower()
+    if isinstance(value, float):
+        spellings = list(dict.fromkeys([repr(value), _go_float(value)]))
+        if len(spellings) == 1:
+            return re.escape(spellings[0])
+        return '(?:%s)' % ('|'.join(
+            re.escape(spelling) for spelling in spellings))
+    return re.escape(str(value))
+
+
+def _config_dims(
+        bench: str,
+        cols: columns.BenchColumns,
+        row: int) -> typing.Tuple[typing.Tuple[Dim, str], ...]:
+    dims: typing.List[typing.Tuple[Dim, str]] = [(BENCH_DIM, re.escape(bench))]
+    subs = cols.subs[cols.subs_codes[row]]
+    for i, sub in enumerate(subs or []):
+        dims.append((('subs', i), re.escape(sub)))
+    for name, var in cols.variables.items():
+        if var.present[row]:
+            dims.append((('var', name), '%s=%s' % (
+                re.escape(name), value_regex(columns.py_value(
+                    var.values[row])))))
+    return tuple(dims)
+
+
+def runs_needed(
+        n: np.ndarray,
+        cv: np.ndarray,
+        target: float = DEFAULT_TARGET,
+        confidence: float = DEFAULT_CONFIDENCE,
+        min_runs: int = DEFAULT_MIN_RUNS,
+        max_runs: int = DEFAULT_MAX_RUNS) -> np.ndarray:
+    # further runs of each cell for the CI to be within target, if its cv
+    # stays the same. The total is kept within [min_runs, max_runs]
+    totals = np.arange(min_runs, max_runs + 1)
+    t = stats.t_quantile(1 - (1 - confidence) / 2, totals - 1)
+    with np.errstate(invalid='ignore'):
+        widths = t * cv[:, np.newaxis] / np.sqrt(totals)
+        reached = widths <= target
+    needed = np.where(
+        reached.any(axis=1), totals[reached.argmax(axis=1)], max_runs)
+    # without a cv yet, just the minimum
+    needed = np.where(np.isnan(cv), min_runs, needed)
+    return np.maximum(needed - n, 0)
+
+
+def _check_options(
+        target: float, confidence: float, min_runs: int, max_runs: int):
+    if not target > 0:
+        raise inputs.InvalidInputError(
+            'must be positive', inputs.TARGET_NAME, input_val=target)
+    if not 0 < confidence < 1:
+        raise inputs.InvalidInputError(
+            'must be between 0 and 1', inputs.CONFIDENCE_NAME,
+            input_val=confidence)
+    if min_runs < 2:
+        raise inputs.InvalidInputError(
+            'at least 2 runs are needed for a CI', inputs.MIN_RUNS_NAME,
+            input_val=min_runs)
+    if max_runs < min_runs:
+        raise inputs.InvalidInputError(
+            'must be at least --%s' % (inputs.MIN_RUNS_NAME),
+            inputs.MAX_RUNS_NAME, input_val=max_runs)
+
+
+def plan_cells(
+        suite: benchmark.BenchSuite,
+        bench_names: typing.Optional[typing.List[str]] = None,
+        y_name: str = 'time',
+        subs: typing.List = None,
+        filter_vars: typing.List[str] = None,
+        target: float = DEFAULT_TARGET,
+        confidence: float = DEFAULT_CONFIDENCE,
+        min_runs: int = DEFAULT_MIN_RUNS,
+        max_runs: int = DEFAULT_MAX_RUNS) -> typing.List[CellPlan]:
+    # every configuration of the benchmarks, each a cell
+    _check_options(target, confidence, min_runs, max_runs)
+    y_expr = expr.compile_expr(y_name)
+    filters = [
+        benchmark.to_bench_var_val_cmp(value)
+        for value in filter_vars or []]
+
+    cells: typing.List[CellPlan] = []
+    for bench in suite.benchmarks:
+        if bench_names is not None and bench.name not in bench_names:
+            continue
+        cols = columns.bench_columns(bench)
+        rows = columns.select_rows(cols, subs, filters)
+        y = plotdata.columns_y(cols, rows, y_expr)
+        rows, y = rows[~np.isnan(y)], y[~np.isnan(y)]
+        if len(rows) == 0:
+            continue
+
+        codes, labels = columns.config_rows(cols, rows)
+        counts, means, stddevs = stats.cell_moments(codes, y, len(labels))
+        first_index = stats.cell_first_index(codes, len(labels))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cv = stddevs / np.abs(means)
+            cv[means == 0] = np.nan
+            ci_width = (
+                stats.t_quantile(1 - (1 - confidence) / 2, counts - 1) *
+                cv / np.sqrt(counts))
+        runs = runs_needed(
+            counts, cv, target=target, confidence=confidence,
+            min_runs=min_runs, max_runs=max_runs)
+        for i, label in enumerate(labels):
+            cells.append(CellPlan(
+                bench=bench.name, config=label,
+                dims=_config_dims(bench.name, cols, rows[first_index[i]]),
+                n=int(counts[i]), mean=float(means[i]), cv=float(cv[i]),
+                ci_width=float(ci_width[i]), runs=int(runs[i])))
+    return cells
+
+
+class _Box(typing.NamedTuple):
+    # the cells whose tokens are the cartesian product of these
+    tokens: typing.Dict[Dim, typing.Tuple[str, ...]]
+    cells: int
+
+
+def _merge_boxes(
+        boxes: typing.List[_Box],
+        dims: typing.Tuple[Dim, ...]) -> typing.List[_Box]:
+    # two boxes with the same tokens in all but one dim are still a
+    # product once that dim's tokens are combined, merge until none are
+    changed = True
+    while changed:
+        changed = False
+        for dim in dims:
+            merged: typing.Dict[typing.Tuple, _Box] = {}
+            for box in boxes:
+                key = tuple(
+                    frozenset(box.tokens[other])
+                    for other in dims if other != dim)
+                if key not in merged:
+                    merged[key] = box
+                    continue
+                into = merged[key]
+                tokens = dict(into.tokens)
+                tokens[dim] = into.tokens[dim] + box.tokens[dim]
+                merged[key] = _Box(tokens=tokens, cells=into.cells + box.cells)
+                changed = True
+            boxes = list(merged.values())
+    return boxes
+
+
+def _level_regex(tokens: typing.Iterable[str]) -> str:
+    tokens = list(dict.fromkeys(tokens))
+    if len(tokens) == 1:
+        return '^%s$' % (tokens[0])
+    return '^(?:%s)$' % ('|'.join(tokens))
+
+
+def _box_regex(box: _Box, dims: typing.Tuple[Dim, ...]) -> str:
+    # go matches each '/' separated level of -bench against that level of
+    # the name. The order of subs and variables in the name isn't kept
+    # when parsing, so each sub-level accepts any of the box's tokens
+    levels = [_level_regex(box.tokens[BENCH_DIM])]
+    sub_tokens = [
+        token for dim in dims if dim != BENCH_DIM
+        for token in box.tokens[dim]]
+    levels += [_level_regex(sub_tokens)] * (len(dims) - 1)
+    return '/'.join(levels)
+
+
+def round_count(runs: int, max_runs: int = DEFAULT_MAX_RUNS) -> int:
+    # rounds up to one of a few counts, each about COUNT_RATIO times the
+    # last, so cells needing a similar number of runs share invocations
+    count = 1
+    while count < runs:
+        count = max(count + 1, int(np.ceil(count * COUNT_RATIO)))
+    return min(count, max(runs, max_runs))
+
+
+def plan_invocations(
+        cells: typing.List[CellPlan],
+        max_runs: int = DEFAULT_MAX_RUNS) -> typing.List[Invocation]:
+    # one invocation per count, unless the cells needing it can't be
+    # matched exactly by one regex
+    groups: typing.Dict[
+        typing.Tuple[typing.Tuple[Dim, ...], int], typing.List[_Box]] = {}
+    for cell in cells:
+        if cell.runs == 0:
+            continue
+        dims = tuple(dim for dim, _ in cell.dims)
+        count = round_count(cell.runs, max_runs=max_runs)
+        groups.setdefault((dims, count), []).append(_Box(
+            tokens={dim: (token,) for dim, token in cell.dims}, cells=1))
+
+    invocations: typing.List[Invocation] = []
+    for (dims, count), boxes in groups.items():
+        for box in _merge_boxes(boxes, dims):
+            invocations.append(Invocation(
+                bench_regex=_box_regex(box, dims), count=count,
+                cells=box.cells))
+    return invocations
+
+
+def merge_suite(
+        suite: benchmark.BenchSuite,
+        new: benchmark.BenchSuite) -> benchmark.BenchSuite:
+    # adds the results of new to the benchmarks of suite with their name
+    for bench in new.benchmarks:
+        existing = suite.get_benchmark(bench.name)
+        if existing is None:
+            suite.benchmarks.append(bench)
+            continue
+        for res in bench.results:
+            existing.add_result(res)
+    return suite
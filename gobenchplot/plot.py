@@ -1,93 +1,120 @@
-import copy
+import os
+import re
+import matplotlib.colors
 import matplotlib.pyplot as plt
 import numpy as np
 import typing
 import gobenchplot.benchmark as benchmark
+import gobenchplot.cache as cache
 import gobenchplot.inputs as inputs
+import gobenchplot.live as live
+import gobenchplot.plotdata as plotdata
+import gobenchplot.profiling as profiling
+import gobenchplot.query as query
+
+
+BAR_TYPE = plotdata.BAR_TYPE
+SCATTER_TYPE = plotdata.SCATTER_TYPE
+AVG_LINE_TYPE = plotdata.AVG_LINE_TYPE
+BEST_FIT_LINE_TYPE = plotdata.BEST_FIT_LINE_TYPE
+DENSITY_TYPE = plotdata.DENSITY_TYPE
+HEATMAP_TYPE = plotdata.HEATMAP_TYPE
+BOX_TYPE = plotdata.BOX_TYPE
+VIOLIN_TYPE = plotdata.VIOLIN_TYPE
+HISTOGRAM_TYPE = plotdata.HISTOGRAM_TYPE
+PARETO_TYPE = plotdata.PARETO_TYPE
+DEFAULT_DENSITY_THRESHOLD = plotdata.DEFAULT_DENSITY_THRESHOLD
+
+# (x, y) bins of density rasters, which fixes their size in the output
+DENSITY_BINS = (256, 192)
+
+# heatmap axes label at most this many of their values
+MAX_HEATMAP_TICKS = 20
+# heatmap colors are on a log scale once the means span this ratio
+HEATMAP_LOG_RATIO = 100
+# pareto frontiers with at most this many configurations are labelled
+MAX_PARETO_LABELS = 12
+
+PlotData = plotdata.PlotData
+bench_res_data = plotdata.bench_res_data
+
+
+def _axes(ax):
+    # plots are drawn on the current axes unless given their own
+    if ax is None:
+        return plt.gca()
+    return ax
+
+
+def plot_scatter(data: typing.Dict[str, PlotData], include_label, ax=None):
+    ax = _axes(ax)
+    for label, plot_data in data.items():
+        if include_label:
+            ax.plot(plot_data.x, plot_data.y, '.', label=label)
+        else:
+            ax.plot(plot_data.x, plot_data.y, '.')
 
 
-BAR_TYPE = 'bar'
-SCATTER_TYPE = 'scatter'
-AVG_LINE_TYPE = 'avg_line'
-BEST_FIT_LINE_TYPE = 'best_fit_line'
-
-
-class PlotData(typing.NamedTuple):
-    x: np.ndarray
-    y: np.ndarray
-
-    def x_type(self):
-        return self.x[0].dtype
-
-    def y_type(self):
-        return self.y[0].dtype
-
-    def __eq__(self, other):
-        if not isinstance(other, PlotData):
-            return False
-
-        return (
-            np.array_equal(self.x, other.x) and
-            np.array_equal(self.y, other.y))
-
-    def avg_over_x(self) -> 'PlotData':
-        uniq_x = np.unique(self.x)
-        y_means = np.empty(len(uniq_x), dtype=self.y_type())
-        for i, uniq_x_val in enumerate(uniq_x):
-            indices = list(
-                filter(lambda x: x is not None,
-                       map(
-                           lambda x:  x[0] if x[1] == uniq_x_val else None,
-                           enumerate(self.x))))
-
-            y_vals = np.empty(len(indices), dtype=self.y_type())
-            for j, index in enumerate(indices):
-                y_vals[j] = self.y[index]
-            y_means[i] = np.mean(y_vals)
-
-        return PlotData(x=uniq_x, y=y_means)
-
-
-def bench_res_data(bench_results: typing.List[benchmark.SplitRes]) -> PlotData:
-    order = len(bench_results)
-    x = np.empty(order, dtype=type(bench_results[0].x))
-    y = np.empty(order, dtype=type(bench_results[0].y))
-
-    for i, res in enumerate(bench_results):
-        x[i] = res.x
-        y[i] = res.y
-
-    return PlotData(x=x, y=y)
+def _value_range(values: np.ndarray) -> typing.Tuple[float, float]:
+    low, high = float(np.min(values)), float(np.max(values))
+    if low == high:
+        return (low - 0.5, high + 0.5)
+    return (low, high)
 
 
-def plot_scatter(data: typing.Dict[str, PlotData], include_label):
-    for label, plot_data in data.items():
+def plot_density(data: typing.Dict[str, PlotData], include_label, ax=None):
+    # each group is binned onto the same grid and drawn as a single image
+    # in its color, with opacity following the log of the count per bin
+    all_x = np.concatenate([plot_data.x for plot_data in data.values()])
+    all_y = np.concatenate([plot_data.y for plot_data in data.values()])
+    finite = np.isfinite(all_x) & np.isfinite(all_y)
+    if not np.any(finite):
+        return
+    x_range = _value_range(all_x[finite])
+    y_range = _value_range(all_y[finite])
+
+    ax = _axes(ax)
+    colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    for i, (label, plot_data) in enumerate(data.items()):
+        color = colors[i % len(colors)]
+        counts, _, _ = np.histogram2d(
+            plot_data.x, plot_data.y,
+            bins=DENSITY_BINS, range=[x_range, y_range])
+        if counts.max() > 0:
+            image = np.zeros(counts.T.shape + (4,))
+            image[..., :3] = matplotlib.colors.to_rgb(color)
+            image[..., 3] = np.log1p(counts.T) / np.log1p(counts.max())
+            ax.imshow(
+                image, extent=(x_range[0], x_range[1], y_range[0], y_range[1]),
+                origin='lower', aspect='auto', interpolation='nearest')
         if include_label:
-            plt.plot(plot_data.x, plot_data.y, '.', label=label)
-        else:
-            plt.plot(plot_data.x, plot_data.y, '.')
+            # the images have no legend entries of their own
+            ax.plot([], [], 's', color=color, label=label)
 
 
-def plot_avg_line(data: typing.Dict[str, PlotData], include_label):
+def plot_avg_line(data: typing.Dict[str, PlotData], include_label, ax=None):
+    ax = _axes(ax)
     for label, plot_data in data.items():
         uniq_x, y_means = plot_data.avg_over_x()
         if include_label:
-            plt.plot(uniq_x, y_means, label=label)
+            ax.plot(uniq_x, y_means, label=label)
         else:
-            plt.plot(uniq_x, y_means)
+            ax.plot(uniq_x, y_means)
 
 
-def plot_best_fit_line(data: typing.Dict[str, PlotData], include_label):
+def plot_best_fit_line(
+        data: typing.Dict[str, PlotData], include_label, ax=None):
+    ax = _axes(ax)
     for label, plot_data in data.items():
         uniq_x = np.unique(plot_data.x)
         best_fit_fn = np.poly1d(np.polyfit(plot_data.x, plot_data.y, 1))
         if include_label:
-            plt.plot(
+            ax.plot(
                 uniq_x,
                 best_fit_fn(uniq_x),
                 label=label)
         else:
-            plt.plot(
+            ax.plot(
                 uniq_x,
                 best_fit_fn(uniq_x))
 
@@ -129,9 +156,9 @@ def get_bar_widths(
     return widths
 
 
-def plot_bar(data: typing.Dict[str, PlotData], include_label):
+def plot_bar(data: typing.Dict[str, PlotData], include_label, ax=None):
     x_type = list(data.values())[0].x_type()
-    ax = plt.gca()
+    ax = _axes(ax)
     if non_numeric_dtype(x_type):
         x = np.arange(len(data))
         y_means = np.empty(len(data))
@@ -141,9 +168,9 @@ def plot_bar(data: typing.Dict[str, PlotData], include_label):
         if include_label:
             # TODO come up with an actual label
             # just doing this to prevent legend() error
-            plt.bar(x, y_means, label='')
+            ax.bar(x, y_means, label='')
         else:
-            plt.bar(x, y_means)
+            ax.bar(x, y_means)
         ax.set_xticks(x)
         ax.set_xticklabels(data.keys())
         return
@@ -156,14 +183,124 @@ def plot_bar(data: typing.Dict[str, PlotData], include_label):
             widths = get_bar_widths(uniq_x, num_plots)
             adjustment = get_bar_spacing_adjustment(i, num_plots)
             if include_label:
-                plt.bar(uniq_x-widths*adjustment, y_means, widths, label=label)
+                ax.bar(uniq_x-widths*adjustment, y_means, widths, label=label)
             else:
-                plt.bar(uniq_x-widths*adjustment, y_means, widths)
+                ax.bar(uniq_x-widths*adjustment, y_means, widths)
             i += 1
             ax.set_xticks(uniq_x)
             ax.set_xticklabels(uniq_x)
 
 
+def _distribution_positions(
+        uniq_x: np.ndarray,
+        x: np.ndarray,
+        plotnum: int,
+        num_plots: int) -> typing.Tuple[np.ndarray, np.ndarray]:
+    # center and width of each cell, groups side by side like bars
+    if non_numeric_dtype(uniq_x.dtype):
+        centers = np.searchsorted(uniq_x, x).astype(np.float64)
+        widths = np.full(len(x), 0.8 / num_plots)
+    else:
+        centers = x.astype(np.float64)
+        widths = np.broadcast_to(
+            get_bar_widths(uniq_x, num_plots),
+            uniq_x.shape)[np.searchsorted(uniq_x, x)]
+    adjustment = get_bar_spacing_adjustment(plotnum, num_plots)
+    return centers - widths * adjustment, widths
+
+
+def _draw_distributions(
+        data: typing.Dict[str, PlotData],
+        include_label,
+        ax,
+        draw_fn: typing.Callable):
+    # the distributions of every cell are computed before drawing any
+    dists = plotdata.distributions(data)
+    uniq_x = np.unique(np.concatenate([dist.x for dist in dists.values()]))
+    colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    for i, (label, dist) in enumerate(dists.items()):
+        color = colors[i % len(colors)]
+        positions, widths = _distribution_positions(
+            uniq_x, dist.x, i, len(dists))
+        draw_fn(ax, dist, positions, widths, color)
+        if include_label:
+            # the patches have no legend entries of their own
+            ax.plot([], [], 's', color=color, label=label)
+    if non_numeric_dtype(uniq_x.dtype):
+        ax.set_xticks(np.arange(len(uniq_x)))
+        ax.set_xticklabels(uniq_x)
+
+
+def _draw_boxes(ax, dist: plotdata.Distributions, positions, widths, color):
+    flier_cells = np.searchsorted(dist.x, dist.flier_x)
+    order = np.argsort(flier_cells, kind='stable')
+    fliers = np.split(
+        dist.flier_y[order],
+        np.searchsorted(flier_cells[order], np.arange(1, len(dist.x))))
+    ax.bxp(
+        [
+            dict(
+                med=dist.box.median[i], q1=dist.box.q1[i],
+                q3=dist.box.q3[i], whislo=dist.box.whisker_low[i],
+                whishi=dist.box.whisker_high[i], fliers=fliers[i])
+            for i in range(len(dist.x))],
+        positions=positions, widths=widths * 0.9, manage_ticks=False,
+        patch_artist=True,
+        boxprops=dict(facecolor=color, edgecolor=color, alpha=0.5),
+        medianprops=dict(color=color), whiskerprops=dict(color=color),
+        capprops=dict(color=color),
+        flierprops=dict(marker='.', markeredgecolor=color))
+
+
+def _draw_violins(
+        ax, dist: plotdata.Distributions, positions, widths, color):
+    parts = ax.violin(
+        [
+            # extrema aren't drawn, the whiskers stand in for them
+            dict(
+                coords=dist.kde_y[i], vals=dist.kde_density[i],
+                mean=dist.mean[i], median=dist.box.median[i],
+                min=dist.box.whisker_low[i], max=dist.box.whisker_high[i])
+            for i in range(len(dist.x))],
+        positions=positions, widths=widths * 0.9,
+        showextrema=False, showmedians=True)
+    for body in parts['bodies']:
+        body.set_facecolor(color)
+        body.set_edgecolor(color)
+        body.set_alpha(0.5)
+    parts['cmedians'].set_color(color)
+
+
+def _draw_histograms(
+        ax, dist: plotdata.Distributions, positions, widths, color):
+    # horizontal bars growing right from the left edge of each cell,
+    # scaled so each cell's fullest bin spans its width
+    num_bins = dist.hist_counts.shape[1]
+    lengths = (
+        dist.hist_counts / dist.hist_counts.max(axis=1, keepdims=True) *
+        (widths * 0.9)[:, None])
+    nonzero = dist.hist_counts.ravel() > 0
+    ax.barh(
+        dist.hist_edges[:, :-1].ravel()[nonzero],
+        lengths.ravel()[nonzero],
+        height=np.diff(dist.hist_edges, axis=1).ravel()[nonzero],
+        left=np.repeat(positions - widths * 0.45, num_bins)[nonzero],
+        align='edge', color=color, alpha=0.6)
+
+
+def plot_box(data: typing.Dict[str, PlotData], include_label, ax=None):
+    _draw_distributions(data, include_label, _axes(ax), _draw_boxes)
+
+
+def plot_violin(data: typing.Dict[str, PlotData], include_label, ax=None):
+    _draw_distributions(data, include_label, _axes(ax), _draw_violins)
+
+
+def plot_histogram(
+        data: typing.Dict[str, PlotData], include_label, ax=None):
+    _draw_distributions(data, include_label, _axes(ax), _draw_histograms)
+
+
 SpecifiedPlots = typing.Optional[typing.Union[typing.List[str], str]]
 
 
@@ -183,6 +320,20 @@ def plot_fn_from_type(plots: SpecifiedPlots):
         return plot_avg_line
     elif plots == BEST_FIT_LINE_TYPE:
         return plot_best_fit_line
+    elif plots == DENSITY_TYPE:
+        return plot_density
+    elif plots == BOX_TYPE:
+        return plot_box
+    elif plots == VIOLIN_TYPE:
+        return plot_violin
+    elif plots == HISTOGRAM_TYPE:
+        return plot_histogram
+    elif plots in (HEATMAP_TYPE, PARETO_TYPE):
+        # drawn from aggregates of their own, see draw_heatmap_data and
+        # draw_pareto_data
+        raise inputs.InvalidInputError(
+            "can't combine with other plot types",
+            inputs.PLOTS_NAME, input_val=plots)
     else:
         raise inputs.InvalidInputError(
             'unknown plot type',
@@ -200,10 +351,23 @@ def non_numeric_dtype(dtype) -> bool:
     return False
 
 
+def use_density(plot_fn, num_points: int, density_threshold: int):
+    # swap scatter plots for density plots once there are too many points
+    if num_points <= density_threshold:
+        return plot_fn
+    if isinstance(plot_fn, list):
+        return [use_density(fn, num_points, density_threshold)
+                for fn in plot_fn]
+    if plot_fn is plot_scatter:
+        return plot_density
+    return plot_fn
+
+
 def build_plot_fn(
         data: typing.Dict[str, PlotData],
         x_name: str, y_name: str = 'time',
-        plots=None):
+        plots=None,
+        density_threshold: int = DEFAULT_DENSITY_THRESHOLD):
     x_type = list(data.values())[0].x_type()
     y_type = list(data.values())[0].y_type()
 
@@ -220,6 +384,10 @@ def build_plot_fn(
                 (isinstance(plots, str) and plots == BAR_TYPE)
                 or (isinstance(plots, list) and BAR_TYPE in plots)):
             return plot_fn_from_type(plots)
+        elif all(
+                plot in plotdata.DISTRIBUTION_TYPES
+                for plot in (plots if isinstance(plots, list) else [plots])):
+            return plot_fn_from_type(plots)
         else:
             raise inputs.InvalidInputError(
                 "unsupported data type '%s' for plot type '%s'" % (
@@ -227,51 +395,64 @@ def build_plot_fn(
                 inputs.X_NAME,
                 input_val=x_name)
     else:
+        num_points = sum(len(plot_data.x) for plot_data in data.values())
         if plots is None:
-            return plot_fn_from_type([SCATTER_TYPE, AVG_LINE_TYPE])
+            return use_density(
+                plot_fn_from_type([SCATTER_TYPE, AVG_LINE_TYPE]),
+                num_points, density_threshold)
         else:
-            return plot_fn_from_type(plots)
+            return use_density(
+                plot_fn_from_type(plots), num_points, density_threshold)
 
 
-def run_plot_fns(data: typing.Dict[str, PlotData], plot_fns):
+def run_plot_fns(data: typing.Dict[str, PlotData], plot_fns, ax=None):
     # can't show average bar on same figure as others
     non_avg_bar_fns = list(
         filter(lambda x: x.__name__ != plot_bar.__name__, plot_fns))
     if len(non_avg_bar_fns) != len(plot_fns):
         if len(non_avg_bar_fns) != 0:
+            if ax is not None:
+                # given axes can't be split to make room for the bars
+                raise inputs.InvalidInputError(
+                    "can't combine with other plot types on a single axes",
+                    inputs.PLOTS_NAME, input_val=BAR_TYPE)
             plt.subplot(212)
         for plot_fn in plot_fns:
             if plot_fn.__name__ == plot_bar.__name__:
-                plot_fn(data, include_label=True)
+                plot_fn(data, include_label=True, ax=ax)
                 break
         if len(non_avg_bar_fns) != 0:
             plt.subplot(211)
-    ax = plt.gca()
+    ax = _axes(ax)
     for i, fn in enumerate(non_avg_bar_fns):
         ax.set_prop_cycle(None)
         if i == 0:
-            fn(data, include_label=True)
+            fn(data, include_label=True, ax=ax)
         else:
-            fn(data, include_label=False)
+            fn(data, include_label=False, ax=ax)
 
 
 def plot_data(
         data: typing.Dict[str, PlotData],
         x_name: str,
         y_name: str = 'time',
-        plots=None):
-    plot_fn = build_plot_fn(data, x_name, y_name=y_name, plots=plots)
+        plots=None,
+        density_threshold: int = DEFAULT_DENSITY_THRESHOLD,
+        ax=None):
+    plot_fn = build_plot_fn(
+        data, x_name, y_name=y_name, plots=plots,
+        density_threshold=density_threshold)
     # NOTE: for now assuming all plots can be shown on figure
-    plt.xlabel(x_name)
+    _axes(ax).set_xlabel(x_name)
     y_label = y_name
     y_units = benchmark.bench_output_units(y_name)
     if y_units != '':
         y_label = '%s (%s)' % (y_name, y_units)
-    plt.ylabel(y_label)
+    _axes(ax).set_ylabel(y_label)
     if isinstance(plot_fn, list):
-        run_plot_fns(data, plot_fn)
+        run_plot_fns(data, plot_fn, ax=ax)
     else:
-        plot_fn(data, include_label=True)
+        plot_fn(data, include_label=True, ax=ax)
 
 
 def plot_bench(
@@ -280,31 +461,353 @@ def plot_bench(
         x_name: str, y_name: str = 'time',
         subs: typing.List = None,
         filter_vars: typing.List[str] = None,
-        plots=None):
+        plots=None,
+        baseline: typing.List[str] = None,
+        outliers: str = None,
+        query_cache: cache.QueryCache = None,
+        density_threshold: int = DEFAULT_DENSITY_THRESHOLD,
+        output: str = None,
+        aggregation: str = plotdata.MEAN_AGGREGATION):
+
+    bench_data = plotdata.bench_data(
+        bench, group_by, x_name, y_name=y_name, subs=subs,
+        filter_vars=filter_vars, baseline=baseline, outliers=outliers,
+        query_cache=query_cache, aggregation=aggregation)
+    bench_data.report()
+    show_bench_data(
+        bench_data, plots=plots, density_threshold=density_threshold,
+        output=output)
+
+
+def show_bench_data(
+        bench_data: plotdata.BenchData,
+        plots=None,
+        density_threshold: int = DEFAULT_DENSITY_THRESHOLD,
+        output: str = None):
+    draw_bench_data(
+        bench_data, plots=plots, density_threshold=density_threshold)
+    with profiling.stage('output'):
+        if output is None:
+            plt.show()
+        else:
+            plt.savefig(output)
+            plt.close()
+
+
+def draw_bench_data(
+        bench_data: plotdata.BenchData,
+        plots=None,
+        density_threshold: int = DEFAULT_DENSITY_THRESHOLD,
+        ax=None):
+    data = bench_data.data
+    if bench_data.baseline_label is not None:
+        data = {
+            label: PlotData(x=cells.x, y=cells.y)
+            for label, cells in bench_data.aggregated.items()}
+        _axes(ax).set_yscale('log')
+
+    with profiling.stage('draw'):
+        _axes(ax).set_title(bench_data.title)
+        plot_data(
+            data, bench_data.x_name, y_name=bench_data.y_label, plots=plots,
+            density_threshold=density_threshold, ax=ax)
+        _axes(ax).legend()
+
+
+def draw_query_result(
+        result: query.QueryResult,
+        ax,
+        plots=None,
+        density_threshold: int = DEFAULT_DENSITY_THRESHOLD):
+    # only draws onto ax, showing or saving its figure is left to the
+    # caller
+    draw_bench_data(
+        result.bench_data, plots=plots, density_threshold=density_threshold,
+        ax=ax)
+
+
+def output_path(output: str, y_name: str) -> str:
+    # e.g. plot.png and mem_used -> plot_mem_used.png
+    root, ext = os.path.splitext(output)
+    return '%s_%s%s' % (root, re.sub(r'[^\w.-]', '_', y_name), ext)
+
+
+def draw_outputs_data(
+        outputs_data: typing.List[plotdata.BenchData],
+        plots=None,
+        density_threshold: int = DEFAULT_DENSITY_THRESHOLD):
+    # one subplot per output, stacked with a shared x axis
+    fig, axes = plt.subplots(
+        len(outputs_data), 1, sharex=True, squeeze=False,
+        figsize=(6.4, 3.2 * len(outputs_data)))
+    for i, (ax, bench_data) in enumerate(zip(axes.flat, outputs_data)):
+        draw_bench_data(
+            bench_data, plots=plots, density_threshold=density_threshold,
+            ax=ax)
+        if i != 0:
+            ax.set_title('')
+        if i != len(outputs_data) - 1:
+            ax.set_xlabel('')
+    return fig
+
+
+def plot_outputs(
+        bench: benchmark.Benchmark,
+        group_by: typing.Union[typing.List[str], str],
+        x_name: str, y_names: typing.List[str],
+        subs: typing.List = None,
+        filter_vars: typing.List[str] = None,
+        plots=None,
+        baseline: typing.List[str] = None,
+        outliers: str = None,
+        query_cache: cache.QueryCache = None,
+        density_threshold: int = DEFAULT_DENSITY_THRESHOLD,
+        split_outputs: bool = False,
+        output: str = None):
+    # with split_outputs each y is saved to its own file, see output_path
+    outputs_data = plotdata.outputs_bench_data(
+        bench, group_by, x_name, y_names, subs=subs,
+        filter_vars=filter_vars, baseline=baseline, outliers=outliers,
+        query_cache=query_cache)
+    for bench_data in outputs_data:
+        bench_data.report()
+    if split_outputs:
+        if output is None:
+            raise inputs.InvalidInputError(
+                'one file per output needs a file name',
+                inputs.OUTPUT_NAME)
+        for y_name, bench_data in zip(y_names, outputs_data):
+            plt.figure()
+            draw_bench_data(
+                bench_data, plots=plots, density_threshold=density_threshold)
+            plt.savefig(output_path(output, y_name))
+            plt.close()
+        return
 
-    filter_exprs = benchmark.build_filter_exprs(subs, filter_vars)
-    filtered: benchmark.BenchResults = copy.deepcopy(bench.results)
-    for expr in filter_exprs:
-        filtered = expr(filtered)
+    fig = draw_outputs_data(
+        outputs_data, plots=plots, density_threshold=density_threshold)
+    if output is None:
+        plt.show()
+    else:
+        fig.savefig(output)
+        plt.close(fig)
+
+
+def facet_grid_shape(num_facets: int) -> typing.Tuple[int, int]:
+    # (rows, columns) of the smallest near square grid that fits
+    num_cols = max(1, int(np.ceil(np.sqrt(num_facets))))
+    return int(np.ceil(num_facets / num_cols)), num_cols
+
+
+def draw_facet_data(
+        facet_data: plotdata.FacetData,
+        plots=None,
+        density_threshold: int = DEFAULT_DENSITY_THRESHOLD):
+    num_rows, num_cols = facet_grid_shape(len(facet_data.facets))
+    fig, axes = plt.subplots(
+        num_rows, num_cols, sharex=True, sharey=True, squeeze=False,
+        figsize=(4.8 * num_cols, 3.6 * num_rows))
+    num_facets = len(facet_data.facets)
+    for i, (ax, bench_data) in enumerate(
+            zip(axes.flat, facet_data.facets.values())):
+        draw_bench_data(
+            bench_data, plots=plots, density_threshold=density_threshold,
+            ax=ax)
+        # shared axes only need their labels on the outer edge, which
+        # includes the bottom of columns that end above the last row
+        if i + num_cols < num_facets:
+            ax.set_xlabel('')
+        ax.tick_params(labelbottom=i + num_cols >= num_facets)
+        if i % num_cols != 0:
+            ax.set_ylabel('')
+            ax.tick_params(labelleft=False)
+    for ax in axes.flat[num_facets:]:
+        fig.delaxes(ax)
+    fig.suptitle(facet_data.title)
+    return fig
+
+
+def plot_facets(
+        bench: benchmark.Benchmark,
+        facet_by: str,
+        group_by: typing.Union[typing.List[str], str],
+        x_name: str, y_name: str = 'time',
+        subs: typing.List = None,
+        filter_vars: typing.List[str] = None,
+        plots=None,
+        baseline: typing.List[str] = None,
+        outliers: str = None,
+        query_cache: cache.QueryCache = None,
+        density_threshold: int = DEFAULT_DENSITY_THRESHOLD,
+        output: str = None):
+    facet_data = plotdata.facet_bench_data(
+        bench, facet_by, group_by, x_name, y_name=y_name, subs=subs,
+        filter_vars=filter_vars, baseline=baseline, outliers=outliers,
+        query_cache=query_cache)
+    facet_data.report()
+    fig = draw_facet_data(
+        facet_data, plots=plots, density_threshold=density_threshold)
+    if output is None:
+        plt.show()
+    else:
+        fig.savefig(output)
+        plt.close(fig)
+
+
+def _axis_label(name: str) -> str:
+    units = benchmark.bench_output_units(name)
+    if units != '':
+        return '%s (%s)' % (name, units)
+    return name
+
+
+def _heatmap_ticks(values: np.ndarray) -> np.ndarray:
+    # positions of the labelled cells along an axis
+    step = int(np.ceil(len(values) / MAX_HEATMAP_TICKS))
+    return np.arange(0, len(values), step)
+
+
+def draw_heatmap_data(heatmap_data: plotdata.HeatmapData, ax=None):
+    # cells are evenly spaced whatever their values, as sweeps are
+    # often geometric (1, 2, 4, ...)
+    ax = _axes(ax)
+    mean = np.ma.masked_invalid(heatmap_data.mean)
+    norm = None
+    if mean.count() != 0:
+        low, high = mean.min(), mean.max()
+        if low > 0 and high / low >= HEATMAP_LOG_RATIO:
+            norm = matplotlib.colors.LogNorm(vmin=low, vmax=high)
+    image = ax.imshow(
+        mean, origin='lower', aspect='auto', interpolation='nearest',
+        norm=norm)
+
+    x_ticks = _heatmap_ticks(heatmap_data.x)
+    ax.set_xticks(x_ticks)
+    ax.set_xticklabels([str(value) for value in heatmap_data.x[x_ticks]])
+    var_ticks = _heatmap_ticks(heatmap_data.var_values)
+    ax.set_yticks(var_ticks)
+    ax.set_yticklabels([
+        str(value) for value in heatmap_data.var_values[var_ticks]])
+    ax.set_xlabel(heatmap_data.x_name)
+    ax.set_ylabel(heatmap_data.var_name)
+    ax.set_title(heatmap_data.title)
+
+    ax.figure.colorbar(
+        image, ax=ax, label=_axis_label(heatmap_data.y_label))
+    return image
+
+
+def plot_heatmap(
+        bench: benchmark.Benchmark,
+        x_name: str,
+        var_name: str,
+        y_name: str = 'time',
+        subs: typing.List = None,
+        filter_vars: typing.List[str] = None,
+        outliers: str = None,
+        query_cache: cache.QueryCache = None,
+        output: str = None):
+    heatmap_data = plotdata.heatmap_data(
+        bench, x_name, var_name, y_name=y_name, subs=subs,
+        filter_vars=filter_vars, outliers=outliers, query_cache=query_cache)
+    heatmap_data.report()
+    draw_heatmap_data(heatmap_data)
+    if output is None:
+        plt.show()
+    else:
+        plt.savefig(output)
+        plt.close()
+
+
+def draw_pareto_data(pareto_data: plotdata.ParetoData, ax=None):
+    ax = _axes(ax)
+    frontier = pareto_data.frontier
+    ax.plot(
+        pareto_data.x, pareto_data.y, '.', color='0.6',
+        label='configurations')
+    # everything above and to the right of the steps is dominated
+    ax.step(
+        pareto_data.x[frontier], pareto_data.y[frontier], 'o-',
+        where='post', color='C1', label='pareto frontier')
+    if len(frontier) <= MAX_PARETO_LABELS:
+        for i in frontier:
+            ax.annotate(
+                pareto_data.labels[i], (pareto_data.x[i], pareto_data.y[i]),
+                xytext=(4, 4), textcoords='offset points', fontsize='small')
+    ax.set_xlabel(_axis_label(pareto_data.x_name))
+    ax.set_ylabel(_axis_label(pareto_data.y_label))
+    ax.set_title(pareto_data.title)
+    ax.legend()
+
+
+def plot_pareto(
+        bench: benchmark.Benchmark,
+        x_name: str,
+        y_name: str = 'time',
+        subs: typing.List = None,
+        filter_vars: typing.List[str] = None,
+        query_cache: cache.QueryCache = None,
+        output: str = None):
+    pareto_data = plotdata.pareto_data(
+        bench, x_name, y_name=y_name, subs=subs, filter_vars=filter_vars,
+        query_cache=query_cache)
+    draw_pareto_data(pareto_data)
+    if output is None:
+        plt.show()
+    else:
+        plt.savefig(output)
+        plt.close()
+
+
+def plot_live(
+        reader: live.LiveReader,
+        bench_name: str,
+        query: live.LiveQuery,
+        plots=None,
+        interval: float = live.DEFAULT_INTERVAL,
+        density_threshold: int = DEFAULT_DENSITY_THRESHOLD,
+        output: str = None):
+    # redraws at most once per interval while the reader is running
+    reader.start()
+    plt.figure()
+    if output is None:
+        plt.ion()
+        plt.show()
+    # an invalid query may become valid with later results (e.g. once the
+    # baseline group has run), it is only raised if none came
+    error: typing.Optional[inputs.InvalidInputError] = None
+    while True:
+        done = reader.done.is_set()
+        if reader.error is not None:
+            raise reader.error
+        bench = reader.suite.get_benchmark(bench_name)
+        if bench is not None and query.update(bench):
+            try:
+                bench_data = query.bench_data(bench)
+            except inputs.InvalidInputError as e:
+                error = e
+            else:
+                error = None
+                plt.clf()
+                draw_bench_data(
+                    bench_data, plots=plots,
+                    density_threshold=density_threshold)
+                if output is not None:
+                    plt.savefig(output)
+        if done:
+            break
+        if output is None:
+            plt.pause(interval)
+        else:
+            reader.done.wait(interval)
 
-    if len(filtered) == 0:
+    if bench is None:
         raise inputs.InvalidInputError(
-            "no results remain",
-            [inputs.FILTER_BY_NAME, inputs.SUBS_NAME],
-            [filter_vars, subs])
-
-    split_res: benchmark.SplitResults = filtered.group_by(
-        group_by).split_to(x_name, y_name)
-
-    data: typing.Dict[str, PlotData] = {}
-    for label, res in split_res.items():
-        data[label] = bench_res_data(res)
-
-    if subs is None or len(subs) == 0:
-        plt.title(bench.name)
+            "no bench with that name", inputs.BENCH_NAME, input_val=bench_name)
+    if error is not None:
+        raise error
+    if output is None:
+        plt.ioff()
+        plt.show()
     else:
-        plt.title("%s/%s" % (bench.name, "/".join(subs)))
-
-    plot_data(data, x_name, y_name=y_name, plots=plots)
-    plt.legend()
-    plt.show()
+        plt.close()
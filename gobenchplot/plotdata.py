@@ -0,0 +1,842 @@
+import re
+import sys
+import numpy as np
+import typing
+import gobenchplot.benchmark as benchmark
+import gobenchplot.cache as cache
+import gobenchplot.columns as columns
+import gobenchplot.expr as expr
+import gobenchplot.inputs as inputs
+import gobenchplot.profiling as profiling
+import gobenchplot.stats as stats
+
+BAR_TYPE = 'bar'
+SCATTER_TYPE = 'scatter'
+AVG_LINE_TYPE = 'avg_line'
+BEST_FIT_LINE_TYPE = 'best_fit_line'
+DENSITY_TYPE = 'density'
+# mean y on a grid of (x, second variable), drawn on its own
+HEATMAP_TYPE = 'heatmap'
+# the spread of the samples in each (group, x) cell
+BOX_TYPE = 'box'
+VIOLIN_TYPE = 'violin'
+HISTOGRAM_TYPE = 'histogram'
+DISTRIBUTION_TYPES = [BOX_TYPE, VIOLIN_TYPE, HISTOGRAM_TYPE]
+# one point per configuration with x and y both outputs, drawn on its own
+PARETO_TYPE = 'pareto'
+
+# facet by sub-benchmark rather than by a variable
+SUBS_FACET = 'subs'
+
+# above this many points scatter plots are drawn as density plots
+DEFAULT_DENSITY_THRESHOLD = 100000
+
+# how the samples of each (group, x) cell are summarized
+MEAN_AGGREGATION = 'mean'
+MEDIAN_AGGREGATION = 'median'
+MIN_AGGREGATION = 'min'
+MAX_AGGREGATION = 'max'
+AGGREGATIONS = [
+    MEAN_AGGREGATION, MEDIAN_AGGREGATION, MIN_AGGREGATION, MAX_AGGREGATION]
+# or a percentile, e.g. 'p90'
+PERCENTILE_EXPR = re.compile(r'^p([0-9]+(?:\.[0-9]*)?)$')
+
+# points each violin's density is evaluated at
+KDE_POINTS = 128
+HISTOGRAM_BINS = 20
+
+
+class PlotData(typing.NamedTuple):
+    x: np.ndarray
+    y: np.ndarray
+
+    def x_type(self):
+        return self.x[0].dtype
+
+    def y_type(self):
+        return self.y[0].dtype
+
+    def __eq__(self, other):
+        if not isinstance(other, PlotData):
+            return False
+
+        return (
+            np.array_equal(self.x, other.x) and
+            np.array_equal(self.y, other.y))
+
+    def avg_over_x(self) -> 'PlotData':
+        uniq_x, x_codes = np.unique(self.x, return_inverse=True)
+        x_codes = x_codes.reshape(-1)
+        counts = np.bincount(x_codes, minlength=len(uniq_x))
+        sums = np.bincount(x_codes, weights=self.y, minlength=len(uniq_x))
+        y_means = (sums / counts).astype(self.y_type())
+        return PlotData(x=uniq_x, y=y_means)
+
+
+def bench_res_data(bench_results: typing.List[benchmark.SplitRes]) -> PlotData:
+    order = len(bench_results)
+    x = np.empty(order, dtype=type(bench_results[0].x))
+    y = np.empty(order, dtype=type(bench_results[0].y))
+
+    for i, res in enumerate(bench_results):
+        x[i] = res.x
+        y[i] = res.y
+
+    return PlotData(x=x, y=y)
+
+
+def columns_plot_data(
+        cols: columns.BenchColumns,
+        rows: np.ndarray,
+        groups: columns.ColumnGroups,
+        x_name: str,
+        y_expr: expr.YExpr) -> typing.Dict[str, PlotData]:
+    x, y = columns_xy(cols, rows, x_name, y_expr)
+    return {
+        label: PlotData(x=group_x, y=group_y)
+        for label, (group_x, group_y) in zip(
+            groups.labels(), columns.split_groups(groups, x, y))}
+
+
+def columns_xy(
+        cols: columns.BenchColumns,
+        rows: np.ndarray,
+        x_name: str,
+        y_expr: expr.YExpr) -> typing.Tuple[np.ndarray, np.ndarray]:
+    # x and y of every selected row are gathered with one index per column
+    return columns_x(cols, rows, x_name), columns_y(cols, rows, y_expr)
+
+
+def columns_x(
+        cols: columns.BenchColumns,
+        rows: np.ndarray,
+        x_name: str) -> np.ndarray:
+    try:
+        return cols.column(x_name, rows)
+    except KeyError:
+        if x_name in columns.OUTPUT_NAMES:
+            raise inputs.InvalidInputError(
+                'no output with that name',
+                inputs.X_NAME, input_val=x_name)
+        raise inputs.InvalidInputError(
+            'no variable with that name',
+            inputs.X_NAME, input_val=x_name)
+
+
+def columns_y(
+        cols: columns.BenchColumns,
+        rows: np.ndarray,
+        y_expr: expr.YExpr) -> np.ndarray:
+    def lookup(name: str) -> np.ndarray:
+        try:
+            return cols.column(name, rows)
+        except KeyError:
+            if y_expr.field() is not None:
+                raise inputs.InvalidInputError(
+                    'no output with that name',
+                    inputs.Y_NAME, input_val=y_expr.text)
+            raise inputs.InvalidInputError(
+                "no output or variable '%s'" % (name),
+                inputs.Y_NAME, input_val=y_expr.text)
+
+    return y_expr.evaluate(lookup)
+
+
+def expr_res_data(
+        bench_results: benchmark.BenchResults,
+        x_name: str,
+        y_expr: expr.YExpr) -> PlotData:
+    cols = columns.BenchColumns.from_results(bench_results)
+    rows = np.arange(len(cols))
+    groups = columns.ColumnGroups(
+        codes=np.zeros(len(cols), dtype=np.int64),
+        keys=[benchmark.BenchVarValues([])])
+    data = columns_plot_data(cols, rows, groups, x_name, y_expr)
+    return list(data.values())[0]
+
+
+class DroppedCell(typing.NamedTuple):
+    label: str
+    x: benchmark.ResValue
+    dropped: int
+    total: int
+
+
+def reject_outliers(
+        data: typing.Dict[str, PlotData],
+        outlier_filter: stats.OutlierFilter) -> typing.Tuple[
+            typing.Dict[str, PlotData], typing.List[DroppedCell]]:
+    # every (group, x) cell is filtered at once on the concatenated data
+    labels = list(data.keys())
+    sizes = [len(plot_data.x) for plot_data in data.values()]
+    group_codes = np.repeat(np.arange(len(labels)), sizes)
+    all_x = np.concatenate([plot_data.x for plot_data in data.values()])
+    all_y = np.concatenate([plot_data.y for plot_data in data.values()])
+
+    codes, num_cells = stats.cell_codes(group_codes, all_x)
+    keep = stats.outlier_mask(codes, all_y, num_cells, outlier_filter)
+
+    totals = np.bincount(codes, minlength=num_cells)
+    dropped = totals - np.bincount(codes[keep], minlength=num_cells)
+    first_index = stats.cell_first_index(codes, num_cells)
+    dropped_cells = [
+        DroppedCell(
+            label=labels[group_codes[first_index[cell]]],
+            x=all_x[first_index[cell]],
+            dropped=int(dropped[cell]),
+            total=int(totals[cell]))
+        for cell in np.flatnonzero(dropped)]
+
+    filtered: typing.Dict[str, PlotData] = {}
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    for i, label in enumerate(labels):
+        group_keep = keep[offsets[i]:offsets[i+1]]
+        filtered[label] = PlotData(
+            x=data[label].x[group_keep], y=data[label].y[group_keep])
+    return filtered, dropped_cells
+
+
+def report_dropped_outliers(
+        dropped_cells: typing.List[DroppedCell],
+        x_name: str,
+        file=sys.stderr):
+    for cell in dropped_cells:
+        print(
+            "dropped %d of %d samples as outliers for '%s' at %s = %s" % (
+                cell.dropped, cell.total, cell.label, x_name, cell.x),
+            file=file)
+
+
+def find_baseline_label(
+        group_keys: typing.Iterable[benchmark.BenchVarValues],
+        baseline: typing.List[benchmark.BenchVarValue]) -> str:
+    matches = [
+        str(var_values) for var_values in group_keys
+        if all(value in var_values for value in baseline)]
+    if len(matches) == 0:
+        raise inputs.InvalidInputError(
+            'no group with those values',
+            inputs.BASELINE_NAME,
+            input_val=", ".join(str(value) for value in baseline))
+    if len(matches) > 1:
+        raise inputs.InvalidInputError(
+            'matches multiple groups (%s)' % ("; ".join(matches)),
+            inputs.BASELINE_NAME,
+            input_val=", ".join(str(value) for value in baseline))
+    return matches[0]
+
+
+class CellStats(typing.NamedTuple):
+    # per x aggregates of a single group
+    x: np.ndarray
+    y: np.ndarray  # mean, unless aggregated otherwise
+    n: np.ndarray
+    stddev: np.ndarray  # sample stddev, nan if n < 2
+
+
+def aggregation_quantile(aggregation: str) -> typing.Optional[float]:
+    # the quantile of each cell an aggregation takes, None for the mean
+    quantiles = {
+        MEDIAN_AGGREGATION: 0.5, MIN_AGGREGATION: 0.0, MAX_AGGREGATION: 1.0}
+    if aggregation == MEAN_AGGREGATION:
+        return None
+    if aggregation in quantiles:
+        return quantiles[aggregation]
+    m = PERCENTILE_EXPR.match(aggregation)
+    if m is not None and float(m[1]) <= 100:
+        return float(m[1]) / 100
+    raise inputs.InvalidInputError(
+        'must be one of %s or a percentile, e.g. p90' % (
+            ', '.join(AGGREGATIONS)),
+        inputs.AGGREGATION_NAME, input_val=aggregation)
+
+
+def aggregate(
+        data: typing.Dict[str, PlotData],
+        aggregation: str = MEAN_AGGREGATION) -> typing.Dict[str, CellStats]:
+    # every (group, x) cell is aggregated at once on the concatenated data
+    quantile = aggregation_quantile(aggregation)
+    labels = list(data.keys())
+    sizes = [len(plot_data.x) for plot_data in data.values()]
+    group_codes = np.repeat(np.arange(len(labels)), sizes)
+    all_x = np.concatenate([plot_data.x for plot_data in data.values()])
+    all_y = np.concatenate([plot_data.y for plot_data in data.values()])
+
+    # cells are ordered by group, then by x
+    codes, num_cells = stats.cell_codes(group_codes, all_x)
+    counts, means, stddevs = stats.cell_moments(codes, all_y, num_cells)
+    if quantile is not None:
+        cells = stats.sort_cells(
+            codes, all_y.astype(np.float64), num_cells)
+        means = cells.quantile(quantile)
+    first_index = stats.cell_first_index(codes, num_cells)
+    cell_groups = group_codes[first_index]
+    cell_x = all_x[first_index]
+
+    aggregated: typing.Dict[str, CellStats] = {}
+    bounds = np.searchsorted(cell_groups, np.arange(len(labels) + 1))
+    for i, label in enumerate(labels):
+        cells = slice(bounds[i], bounds[i+1])
+        aggregated[label] = CellStats(
+            x=cell_x[cells], y=means[cells],
+            n=counts[cells], stddev=stddevs[cells])
+    return aggregated
+
+
+class Distributions(typing.NamedTuple):
+    # per x distribution of the samples of a single group
+    x: np.ndarray
+    mean: np.ndarray
+    box: stats.BoxStats
+    # samples beyond the whiskers
+    flier_x: np.ndarray
+    flier_y: np.ndarray
+    # (len(x), KDE_POINTS) y values and the density of the samples there
+    kde_y: np.ndarray
+    kde_density: np.ndarray
+    # (len(x), HISTOGRAM_BINS + 1) edges and (len(x), HISTOGRAM_BINS) counts
+    hist_edges: np.ndarray
+    hist_counts: np.ndarray
+
+
+def distributions(
+        data: typing.Dict[str, PlotData],
+        num_points: int = KDE_POINTS,
+        num_bins: int = HISTOGRAM_BINS) -> typing.Dict[str, Distributions]:
+    # every (group, x) cell is summarized at once on the concatenated data,
+    # sorting it a single time for the quantiles, histograms and densities
+    labels = list(data.keys())
+    sizes = [len(plot_data.x) for plot_data in data.values()]
+    group_codes = np.repeat(np.arange(len(labels)), sizes)
+    all_x = np.concatenate([plot_data.x for plot_data in data.values()])
+    all_y = np.concatenate(
+        [plot_data.y for plot_data in data.values()]).astype(np.float64)
+
+    # cells are ordered by group, then by x
+    codes, num_cells = stats.cell_codes(group_codes, all_x)
+    _, means, _ = stats.cell_moments(codes, all_y, num_cells)
+    cells = stats.sort_cells(codes, all_y, num_cells)
+    box, beyond = stats.cell_box_stats(cells)
+    kde_y, kde_density = stats.cell_kdes(cells, num_points)
+    hist_edges, hist_counts = stats.cell_histograms(cells, num_bins)
+    first_index = stats.cell_first_index(codes, num_cells)
+    cell_groups = group_codes[first_index]
+    cell_x = all_x[first_index]
+
+    result: typing.Dict[str, Distributions] = {}
+    bounds = np.searchsorted(cell_groups, np.arange(len(labels) + 1))
+    offsets = np.concatenate(([0], np.cumsum(sizes)))
+    for i, label in enumerate(labels):
+        group_cells = slice(bounds[i], bounds[i+1])
+        group_beyond = beyond[offsets[i]:offsets[i+1]]
+        result[label] = Distributions(
+            x=cell_x[group_cells], mean=means[group_cells],
+            box=stats.BoxStats(*[
+                values[group_cells] for values in box]),
+            flier_x=data[label].x[group_beyond],
+            flier_y=data[label].y[group_beyond],
+            kde_y=kde_y[group_cells], kde_density=kde_density[group_cells],
+            hist_edges=hist_edges[group_cells],
+            hist_counts=hist_counts[group_cells])
+    return result
+
+
+def merge_cell_stats(a: CellStats, b: CellStats) -> CellStats:
+    # combine the aggregates of two sets of samples from the same group,
+    # as if they had been aggregated together
+    x = np.union1d(a.x, b.x)
+    n = np.zeros(len(x), dtype=np.int64)
+    sums = np.zeros(len(x))
+    for cells in (a, b):
+        indices = np.searchsorted(x, cells.x)
+        n[indices] += cells.n
+        sums[indices] += cells.y * cells.n
+    means = sums / n
+
+    # sum of squared deviations from the merged mean
+    sq_devs = np.zeros(len(x))
+    for cells in (a, b):
+        indices = np.searchsorted(x, cells.x)
+        cell_sq_devs = np.where(
+            cells.n > 1, cells.stddev ** 2 * (cells.n - 1), 0)
+        sq_devs[indices] += (
+            cell_sq_devs + cells.n * (cells.y - means[indices]) ** 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stddevs = np.sqrt(sq_devs / (n - 1))
+    stddevs[n < 2] = np.nan
+    return CellStats(x=x, y=means, n=n, stddev=stddevs)
+
+
+def baseline_join(
+        base_x: np.ndarray,
+        x: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+    # base_x is sorted and unique, so a binary search gives the join
+    # returns the index into base_x of each x and whether it was found
+    indices = np.searchsorted(base_x, x)
+    in_range = indices < len(base_x)
+    found = np.zeros(len(x), dtype=bool)
+    found[in_range] = base_x[indices[in_range]] == x[in_range]
+    return indices, found
+
+
+def normalize_aggregates(
+        aggregated: typing.Dict[str, CellStats],
+        baseline_label: str) -> typing.Tuple[
+            typing.Dict[str, CellStats], typing.Dict[str, np.ndarray]]:
+    # divide each group's mean y by the baseline's mean y at the same x
+    # also returns the x values of each group without a baseline value
+    base = aggregated[baseline_label]
+    normalized: typing.Dict[str, CellStats] = {}
+    missing: typing.Dict[str, np.ndarray] = {}
+    for label, cells in aggregated.items():
+        indices, found = baseline_join(base.x, cells.x)
+        if not np.all(found):
+            missing[label] = cells.x[~found]
+        if np.any(found):
+            base_y = base.y[indices[found]]
+            normalized[label] = CellStats(
+                x=cells.x[found],
+                y=cells.y[found] / base_y,
+                n=cells.n[found],
+                stddev=cells.stddev[found] / base_y)
+    return normalized, missing
+
+
+def normalize_to_baseline(
+        data: typing.Dict[str, PlotData],
+        baseline_label: str) -> typing.Tuple[
+            typing.Dict[str, PlotData], typing.Dict[str, np.ndarray]]:
+    normalized, missing = normalize_aggregates(
+        aggregate(data), baseline_label)
+    return {
+        label: PlotData(x=cells.x, y=cells.y)
+        for label, cells in normalized.items()}, missing
+
+
+def report_missing_baseline(
+        missing: typing.Dict[str, np.ndarray],
+        x_name: str,
+        baseline_label: str,
+        file=sys.stderr):
+    for label, x_vals in missing.items():
+        print(
+            "no baseline value (%s) for '%s' at %s = %s" % (
+                baseline_label, label, x_name,
+                ", ".join(str(x) for x in x_vals)),
+            file=file)
+
+
+class BenchData(typing.NamedTuple):
+    title: str
+    x_name: str
+    y_label: str
+    data: typing.Dict[str, PlotData]
+    # per (group, x) aggregates, relative to the baseline if set
+    aggregated: typing.Dict[str, CellStats]
+    baseline_label: typing.Optional[str]
+    dropped: typing.List[DroppedCell]
+    missing: typing.Dict[str, np.ndarray]
+
+    def report(self, file=sys.stderr):
+        report_dropped_outliers(self.dropped, self.x_name, file=file)
+        if self.baseline_label is not None:
+            report_missing_baseline(
+                self.missing, self.x_name, self.baseline_label, file=file)
+
+
+class FacetData(typing.NamedTuple):
+    title: str
+    facets: typing.Dict[str, BenchData]  # by facet title
+
+    def report(self, file=sys.stderr):
+        for bench_data in self.facets.values():
+            bench_data.report(file=file)
+
+
+def bench_title(
+        bench: benchmark.Benchmark,
+        subs: typing.Optional[typing.List]) -> str:
+    if subs is not None and len(subs) != 0:
+        return "%s/%s" % (bench.name, "/".join(subs))
+    return bench.name
+
+
+def _cached(
+        query_cache: typing.Optional[cache.QueryCache],
+        key: typing.Hashable,
+        compute: typing.Callable[[], cache.T],
+        bench: benchmark.Benchmark) -> cache.T:
+    if query_cache is None:
+        return compute()
+    return query_cache.get_or_compute(key, compute, bench=bench)
+
+
+def _filter_key(
+        bench: benchmark.Benchmark,
+        subs: typing.Optional[typing.List],
+        filter_vars: typing.Optional[typing.List[str]],
+        query_cache: typing.Optional[cache.QueryCache]) -> typing.Tuple:
+    filter_key: typing.Tuple = ('filtered', cache.bench_identity(bench))
+    if query_cache is not None:
+        filter_key += (
+            cache.normalize_subs(subs), cache.normalize_filters(filter_vars))
+    return filter_key
+
+
+def _filtered_rows(
+        bench: benchmark.Benchmark,
+        cols: columns.BenchColumns,
+        subs: typing.Optional[typing.List],
+        filter_vars: typing.Optional[typing.List[str]],
+        filter_key: typing.Tuple,
+        query_cache: typing.Optional[cache.QueryCache]) -> np.ndarray:
+    def compute_filtered() -> np.ndarray:
+        filters = [
+            benchmark.to_bench_var_val_cmp(value)
+            for value in filter_vars or []]
+        with profiling.stage('filter'):
+            rows = columns.select_rows(cols, subs, filters)
+        if len(rows) == 0:
+            raise inputs.InvalidInputError(
+                "no results remain",
+                [inputs.FILTER_BY_NAME, inputs.SUBS_NAME],
+                [filter_vars, subs])
+        return rows
+
+    return _cached(query_cache, filter_key, compute_filtered, bench)
+
+
+def bench_data(
+        bench: benchmark.Benchmark,
+        group_by: typing.Union[typing.List[str], str],
+        x_name: str, y_name: str = 'time',
+        subs: typing.List = None,
+        filter_vars: typing.List[str] = None,
+        baseline: typing.List[str] = None,
+        outliers: str = None,
+        query_cache: cache.QueryCache = None,
+        aggregation: str = MEAN_AGGREGATION) -> BenchData:
+    # each stage is cached separately so queries that only differ in later
+    # stages (e.g. the y value) reuse the selected rows and groups
+    filter_key = _filter_key(bench, subs, filter_vars, query_cache)
+    group_key = filter_key + ('grouped', cache.normalize_group_by(group_by))
+    data_key = group_key + (
+        'data', x_name, y_name, outliers, tuple(baseline or ()), aggregation)
+    cols = columns.bench_columns(bench)
+
+    def compute_grouped() -> columns.ColumnGroups:
+        rows = _filtered_rows(
+            bench, cols, subs, filter_vars, filter_key, query_cache)
+        with profiling.stage('group'):
+            return columns.group_rows(cols, rows, group_by)
+
+    def compute_data() -> BenchData:
+        rows = _filtered_rows(
+            bench, cols, subs, filter_vars, filter_key, query_cache)
+        groups = _cached(query_cache, group_key, compute_grouped, bench)
+        with profiling.stage('data'):
+            data = columns_plot_data(
+                cols, rows, groups, x_name, expr.compile_expr(y_name))
+        return _bench_data(
+            bench, data, groups.keys, x_name, y_name=y_name, subs=subs,
+            baseline=baseline, outliers=outliers, aggregation=aggregation)
+
+    return _cached(query_cache, data_key, compute_data, bench)
+
+
+def outputs_bench_data(
+        bench: benchmark.Benchmark,
+        group_by: typing.Union[typing.List[str], str],
+        x_name: str, y_names: typing.List[str],
+        subs: typing.List = None,
+        filter_vars: typing.List[str] = None,
+        baseline: typing.List[str] = None,
+        outliers: str = None,
+        query_cache: cache.QueryCache = None) -> typing.List[BenchData]:
+    # bench_data of each y, sharing the filtered rows, the groups, x, and
+    # a single sort of every output column into its groups
+    filter_key = _filter_key(bench, subs, filter_vars, query_cache)
+    group_key = filter_key + ('grouped', cache.normalize_group_by(group_by))
+    data_key = group_key + (
+        'outputs', x_name, tuple(y_names), outliers, tuple(baseline or ()))
+    cols = columns.bench_columns(bench)
+
+    def compute_grouped() -> columns.ColumnGroups:
+        rows = _filtered_rows(
+            bench, cols, subs, filter_vars, filter_key, query_cache)
+        with profiling.stage('group'):
+            return columns.group_rows(cols, rows, group_by)
+
+    def compute_outputs() -> typing.List[BenchData]:
+        rows = _filtered_rows(
+            bench, cols, subs, filter_vars, filter_key, query_cache)
+        groups = _cached(query_cache, group_key, compute_grouped, bench)
+        with profiling.stage('data'):
+            x = columns_x(cols, rows, x_name)
+            ys = [
+                columns_y(cols, rows, expr.compile_expr(y_name))
+                for y_name in y_names]
+            split = columns.split_groups(groups, x, *ys)
+        labels = groups.labels()
+        return [
+            _bench_data(
+                bench, {
+                    label: PlotData(x=group[0], y=group[i + 1])
+                    for label, group in zip(labels, split)},
+                groups.keys, x_name, y_name=y_name, subs=subs,
+                baseline=baseline, outliers=outliers)
+            for i, y_name in enumerate(y_names)]
+
+    return _cached(query_cache, data_key, compute_outputs, bench)
+
+
+def _bench_data(
+        bench: benchmark.Benchmark,
+        data: typing.Dict[str, PlotData],
+        group_keys: typing.List[benchmark.BenchVarValues],
+        x_name: str, y_name: str = 'time',
+        subs: typing.List = None,
+        baseline: typing.List[str] = None,
+        outliers: str = None,
+        aggregation: str = MEAN_AGGREGATION) -> BenchData:
+    dropped: typing.List[DroppedCell] = []
+    if outliers is not None:
+        with profiling.stage('outliers'):
+            data, dropped = reject_outliers(
+                data, stats.parse_outlier_filter(outliers))
+
+    with profiling.stage('aggregate'):
+        aggregated = aggregate(data, aggregation=aggregation)
+    return aggregated_bench_data(
+        bench, data, aggregated, group_keys, x_name, y_name=y_name,
+        subs=subs, baseline=baseline, dropped=dropped,
+        aggregation=aggregation)
+
+
+def aggregated_bench_data(
+        bench: benchmark.Benchmark,
+        data: typing.Dict[str, PlotData],
+        aggregated: typing.Dict[str, CellStats],
+        group_keys: typing.Iterable[benchmark.BenchVarValues],
+        x_name: str, y_name: str = 'time',
+        subs: typing.List = None,
+        baseline: typing.List[str] = None,
+        dropped: typing.List[DroppedCell] = None,
+        aggregation: str = MEAN_AGGREGATION) -> BenchData:
+    y_label = y_name
+    if aggregation != MEAN_AGGREGATION:
+        y_label = '%s of %s' % (aggregation, y_name)
+    baseline_label: typing.Optional[str] = None
+    missing: typing.Dict[str, np.ndarray] = {}
+    if baseline is not None and len(baseline) != 0:
+        baseline_label = find_baseline_label(group_keys, [
+            benchmark.to_bench_var_value(value, inputs.BASELINE_NAME)
+            for value in baseline])
+        y_label = '%s relative to %s' % (y_label, baseline_label)
+        aggregated, missing = normalize_aggregates(aggregated, baseline_label)
+
+    return BenchData(
+        title=bench_title(bench, subs), x_name=x_name, y_label=y_label,
+        data=data,
+        aggregated=aggregated, baseline_label=baseline_label,
+        dropped=dropped or [], missing=missing)
+
+
+def facet_bench_data(
+        bench: benchmark.Benchmark,
+        facet_by: str,
+        group_by: typing.Union[typing.List[str], str],
+        x_name: str, y_name: str = 'time',
+        subs: typing.List = None,
+        filter_vars: typing.List[str] = None,
+        baseline: typing.List[str] = None,
+        outliers: str = None,
+        query_cache: cache.QueryCache = None) -> FacetData:
+    # the results are filtered, grouped, and aggregated once for every
+    # facet, each (facet, group) pair is just another cell
+    filter_key = _filter_key(bench, subs, filter_vars, query_cache)
+    data_key = filter_key + (
+        'facets', facet_by, cache.normalize_group_by(group_by),
+        x_name, y_name, outliers, tuple(baseline or ()))
+    cols = columns.bench_columns(bench)
+
+    def compute_facets() -> FacetData:
+        rows = _filtered_rows(
+            bench, cols, subs, filter_vars, filter_key, query_cache)
+        if facet_by == SUBS_FACET:
+            facet_codes, facet_subs = columns.subs_rows(cols, rows)
+            facet_titles = [
+                bench.name if sub is None else "/".join(sub)
+                for sub in facet_subs]
+        else:
+            if facet_by not in cols.variables or not np.any(
+                    cols.variables[facet_by].present[rows]):
+                raise inputs.InvalidInputError(
+                    'no variable with that name',
+                    inputs.FACET_BY_NAME, input_val=facet_by)
+            facets = columns.group_rows(cols, rows, facet_by)
+            facet_codes, facet_titles = facets.codes, facets.labels()
+        groups = columns.group_rows(cols, rows, group_by)
+        x, y = columns_xy(cols, rows, x_name, expr.compile_expr(y_name))
+
+        num_groups = len(groups.keys)
+        labels = groups.labels()
+        split = columns.split_codes(
+            facet_codes * num_groups + groups.codes,
+            len(facet_titles) * num_groups, x, y)
+        data: typing.Dict[typing.Tuple[int, str], PlotData] = {}
+        for code, (cell_x, cell_y) in enumerate(split):
+            if len(cell_x) != 0:
+                data[(code // num_groups, labels[code % num_groups])] = (
+                    PlotData(x=cell_x, y=cell_y))
+
+        dropped: typing.List[DroppedCell] = []
+        if outliers is not None:
+            data, dropped = reject_outliers(
+                data, stats.parse_outlier_filter(outliers))
+        aggregated = aggregate(data)
+
+        facet_data: typing.List[typing.Dict[str, PlotData]] = [
+            {} for _ in facet_titles]
+        facet_aggregated: typing.List[typing.Dict[str, CellStats]] = [
+            {} for _ in facet_titles]
+        facet_dropped: typing.List[typing.List[DroppedCell]] = [
+            [] for _ in facet_titles]
+        for (facet, label), plot_data in data.items():
+            facet_data[facet][label] = plot_data
+            facet_aggregated[facet][label] = aggregated[(facet, label)]
+        for cell in dropped:
+            facet, label = cell.label
+            facet_dropped[facet].append(cell._replace(label=label))
+
+        group_keys = dict(zip(labels, groups.keys))
+        return FacetData(
+            title=bench_title(bench, subs),
+            facets={
+                title: aggregated_bench_data(
+                    bench, facet_data[i], facet_aggregated[i],
+                    [group_keys[label] for label in facet_data[i]],
+                    x_name, y_name=y_name, subs=subs, baseline=baseline,
+                    dropped=facet_dropped[i])._replace(title=title)
+                for i, title in enumerate(facet_titles)})
+
+    return _cached(query_cache, data_key, compute_facets, bench)
+
+
+class HeatmapData(typing.NamedTuple):
+    title: str
+    x_name: str
+    x: np.ndarray  # distinct x values (the columns), sorted
+    var_name: str
+    var_values: np.ndarray  # distinct values of var_name (the rows), sorted
+    y_label: str
+    # (row, column) aggregates, mean is nan where nothing was run
+    mean: np.ndarray
+    n: np.ndarray
+    dropped: typing.List[DroppedCell]
+
+    def report(self, file=sys.stderr):
+        report_dropped_outliers(self.dropped, self.x_name, file=file)
+
+
+def heatmap_data(
+        bench: benchmark.Benchmark,
+        x_name: str,
+        var_name: str,
+        y_name: str = 'time',
+        subs: typing.List = None,
+        filter_vars: typing.List[str] = None,
+        outliers: str = None,
+        query_cache: cache.QueryCache = None) -> HeatmapData:
+    filter_key = _filter_key(bench, subs, filter_vars, query_cache)
+    data_key = filter_key + ('heatmap', x_name, var_name, y_name, outliers)
+    cols = columns.bench_columns(bench)
+
+    def compute_heatmap() -> HeatmapData:
+        rows = _filtered_rows(
+            bench, cols, subs, filter_vars, filter_key, query_cache)
+        x, y = columns_xy(cols, rows, x_name, expr.compile_expr(y_name))
+        try:
+            var = cols.column(var_name, rows)
+        except KeyError:
+            raise inputs.InvalidInputError(
+                'no variable with that name',
+                inputs.HEATMAP_Y_NAME, input_val=var_name)
+
+        # one group-by over every row, cell = (var row, x column)
+        x_codes, num_x = stats.dense_codes(x)
+        var_codes, num_vars = stats.dense_codes(var)
+        codes = var_codes * num_x + x_codes
+        num_cells = num_vars * num_x
+        x_values = x[stats.cell_first_index(x_codes, num_x)]
+        var_values = var[stats.cell_first_index(var_codes, num_vars)]
+
+        dropped: typing.List[DroppedCell] = []
+        if outliers is not None:
+            keep = stats.outlier_mask(
+                codes, y, num_cells, stats.parse_outlier_filter(outliers))
+            totals = np.bincount(codes, minlength=num_cells)
+            num_dropped = totals - np.bincount(
+                codes[keep], minlength=num_cells)
+            dropped = [
+                DroppedCell(
+                    label=str(benchmark.BenchVarValue(
+                        var_name, columns.py_value(
+                            var_values[cell // num_x]))),
+                    x=x_values[cell % num_x],
+                    dropped=int(num_dropped[cell]),
+                    total=int(totals[cell]))
+                for cell in np.flatnonzero(num_dropped)]
+            codes, y = codes[keep], y[keep]
+
+        counts, means, _ = stats.cell_moments(codes, y, num_cells)
+        return HeatmapData(
+            title=bench_title(bench, subs), x_name=x_name, x=x_values,
+            var_name=var_name, var_values=var_values, y_label=y_name,
+            mean=means.reshape(num_vars, num_x),
+            n=counts.reshape(num_vars, num_x), dropped=dropped)
+
+    return _cached(query_cache, data_key, compute_heatmap, bench)
+
+
+class ParetoData(typing.NamedTuple):
+    title: str
+    x_name: str
+    y_label: str
+    # per configuration, in order of appearance
+    labels: typing.List[str]
+    x: np.ndarray  # mean
+    y: np.ndarray  # mean
+    n: np.ndarray
+    # indices of the configurations on the frontier, by increasing x
+    frontier: np.ndarray
+
+
+def pareto_data(
+        bench: benchmark.Benchmark,
+        x_name: str,
+        y_name: str = 'time',
+        subs: typing.List = None,
+        filter_vars: typing.List[str] = None,
+        query_cache: cache.QueryCache = None) -> ParetoData:
+    # e.g. time against mem_used, where lower is better on both axes
+    filter_key = _filter_key(bench, subs, filter_vars, query_cache)
+    data_key = filter_key + ('pareto', x_name, y_name)
+    cols = columns.bench_columns(bench)
+
+    def compute_pareto() -> ParetoData:
+        rows = _filtered_rows(
+            bench, cols, subs, filter_vars, filter_key, query_cache)
+        x, y = columns_xy(cols, rows, x_name, expr.compile_expr(y_name))
+        if x.dtype.kind not in 'iuf':
+            raise inputs.InvalidInputError(
+                'not numeric', inputs.X_NAME, input_val=x_name)
+        codes, labels = columns.config_rows(cols, rows)
+        counts, x_means, _ = stats.cell_moments(codes, x, len(labels))
+        _, y_means, _ = stats.cell_moments(codes, y, len(labels))
+        return ParetoData(
+            title=bench_title(bench, subs), x_name=x_name, y_label=y_name,
+            labels=labels, x=x_means, y=y_means, n=counts,
+            frontier=stats.pareto_frontier(x_means, y_means))
+
+    return _cached(query_cache, data_key, compute_pareto, bench)
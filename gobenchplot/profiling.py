@@ -0,0 +1,161 @@
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import typing
+
+# wall time, cpu time and peak memory of each stage of the pipeline (e.g.
+# reading, filtering, grouping, aggregating and drawing), for --profile.
+# Stages are marked with `with profiling.stage(name):`, which does nothing
+# unless a profile is being taken
+#
+# NOTE: this module must not import matplotlib (directly or indirectly)
+
+# a profile output ending in this is written as a chrome trace (for
+# chrome://tracing or https://ui.perfetto.dev), anything else as a
+# cProfile dump (for pstats or snakeviz)
+TRACE_EXT = '.json'
+
+
+class StageStats(typing.NamedTuple):
+    name: str
+    calls: int
+    wall: float  # seconds, summed over calls
+    cpu: float  # seconds of process time, summed over calls
+    # the most bytes allocated at once above what was allocated when a
+    # call started, None if memory wasn't traced
+    peak: typing.Optional[int]
+
+
+class _Frame:
+    def __init__(self, start_mem: int):
+        self.start_mem = start_mem
+        self.peak = start_mem
+
+
+class Profiler:
+    def __init__(
+            self,
+            trace_memory: bool = True,
+            clock: typing.Callable[[], float] = time.perf_counter,
+            cpu_clock: typing.Callable[[], float] = time.process_time):
+        self.trace_memory = trace_memory
+        self._clock = clock
+        self._cpu_clock = cpu_clock
+        self._origin = clock()
+        # by name, in the order stages were first entered
+        self.stats: typing.Dict[str, StageStats] = {}
+        # chrome trace 'complete' events, one per call
+        self.events: typing.List[typing.Dict[str, typing.Any]] = []
+        self._frames: typing.List[_Frame] = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        # stages may nest, an outer stage's times include its inner ones'
+        self.stats.setdefault(name, StageStats(
+            name=name, calls=0, wall=0.0, cpu=0.0, peak=None))
+        frame = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if len(self._frames) != 0:
+                self._frames[-1].peak = max(self._frames[-1].peak, peak)
+            tracemalloc.reset_peak()
+            frame = _Frame(current)
+            self._frames.append(frame)
+        start = self._clock()
+        start_cpu = self._cpu_clock()
+        try:
+            yield
+        finally:
+            wall = self._clock() - start
+            cpu = self._cpu_clock() - start_cpu
+            peak_bytes = None
+            if frame is not None:
+                frame.peak = max(
+                    frame.peak, tracemalloc.get_traced_memory()[1])
+                self._frames.pop()
+                if len(self._frames) != 0:
+                    self._frames[-1].peak = max(
+                        self._frames[-1].peak, frame.peak)
+                peak_bytes = frame.peak - frame.start_mem
+            self._record(name, start, wall, cpu, peak_bytes)
+
+    def _record(
+            self, name: str, start: float, wall: float, cpu: float,
+            peak: typing.Optional[int]):
+        prev = self.stats[name]
+        self.stats[name] = StageStats(
+            name=name, calls=prev.calls + 1, wall=prev.wall + wall,
+            cpu=prev.cpu + cpu,
+            peak=None if peak is None else max(prev.peak or 0, peak))
+        args: typing.Dict[str, typing.Any] = {'cpu_ms': cpu * 1e3}
+        if peak is not None:
+            args['peak_bytes'] = peak
+        self.events.append({
+            'name': name, 'ph': 'X',
+            'ts': (start - self._origin) * 1e6, 'dur': wall * 1e6,
+            'pid': os.getpid(), 'tid': threading.get_ident(), 'args': args,
+        })
+
+    def report(self, file=sys.stderr):
+        print('%-12s %6s %10s %10s %10s' % (
+            'stage', 'calls', 'wall s', 'cpu s', 'peak MiB'), file=file)
+        for stats in self.stats.values():
+            print('%-12s %6d %10.4f %10.4f %10s' % (
+                stats.name, stats.calls, stats.wall, stats.cpu,
+                '' if stats.peak is None else '%.1f' % (
+                    stats.peak / (1 << 20))), file=file)
+
+    def write_trace(self, file):
+        json.dump({
+            'traceEvents': self.events, 'displayTimeUnit': 'ms'}, file)
+        print(file=file)
+
+
+_profiler: typing.Optional[Profiler] = None
+_NO_STAGE = contextlib.nullcontext()
+
+
+def stage(name: str):
+    if _profiler is None:
+        return _NO_STAGE
+    return _profiler.stage(name)
+
+
+@contextlib.contextmanager
+def profile(
+        output: typing.Optional[str] = None,
+        trace_memory: bool = True,
+        file=None):
+    # profiles the stages run within, reporting them to file (stderr by
+    # default) at the end. Tracing memory slows everything down, so wall
+    # and cpu times are only comparable between profiles taken the same way
+    global _profiler
+    if file is None:
+        file = sys.stderr
+    profiler = Profiler(trace_memory=trace_memory)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    c_profile = None
+    if output is not None and not output.endswith(TRACE_EXT):
+        import cProfile
+        c_profile = cProfile.Profile()
+        c_profile.enable()
+    prev, _profiler = _profiler, profiler
+    try:
+        yield profiler
+    finally:
+        _profiler = prev
+        if c_profile is not None:
+            c_profile.disable()
+            c_profile.dump_stats(output)
+        if started_tracing:
+            tracemalloc.stop()
+        profiler.report(file=file)
+        if output is not None and output.endswith(TRACE_EXT):
+            with open(output, 'w') as f:
+                profiler.write_trace(f)
@@ -0,0 +1,136 @@
+import sys
+import typing
+import numpy as np
+import gobenchplot.arrow as arrow
+import gobenchplot.benchmark as benchmark
+import gobenchplot.cache as cache
+import gobenchplot.inputs as inputs
+import gobenchplot.plotdata as plotdata
+import gobenchplot.store as store
+import gobenchplot.table as table
+
+# the library API, for notebooks and services: a suite is loaded once and
+# any number of typed queries are executed against it, without going
+# through argparse style strings or pyplot's global state. A result is
+# drawn onto the caller's axes with plot.draw_query_result
+#
+# NOTE: this module must not import matplotlib (directly or indirectly)
+
+MEAN = plotdata.MEAN_AGGREGATION
+MEDIAN = plotdata.MEDIAN_AGGREGATION
+MIN = plotdata.MIN_AGGREGATION
+MAX = plotdata.MAX_AGGREGATION
+
+Filter = benchmark.BenchVarValComp
+
+
+def where(
+        var_name: str,
+        comp: typing.Union[benchmark.Comparison, str],
+        value: benchmark.ResValue) -> Filter:
+    # e.g. where('num_elems', '<=', 10), comp is a Comparison or its op
+    return benchmark.BenchVarValComp(
+        var_val=benchmark.BenchVarValue(var_name=var_name, var_value=value),
+        comp=benchmark.Comparison(comp))
+
+
+def load_suite(
+        path: str,
+        bench_names: typing.Optional[typing.List[str]] = None,
+        subs: typing.Optional[typing.List[str]] = None,
+        filters: typing.Optional[
+            typing.List[Filter]] = None) -> benchmark.BenchSuite:
+    # a store is queried for just the benchmarks, subs and filters given,
+    # and only the benchmarks are read from parquet or arrow files. Output
+    # files are parsed whole
+    if store.is_store(path):
+        return store.read_store(
+            path, bench_names=bench_names, subs=subs, filter_vars=filters)
+    if arrow.columnar_format(path) is not None:
+        return arrow.read_columnar(path, bench_names=bench_names)
+    with open(path) as f:
+        return benchmark.parse_bench_output(f)
+
+
+class Query(typing.NamedTuple):
+    bench: str
+    x: str
+    y: str = 'time'
+    group_by: typing.Tuple[str, ...] = ()
+    subs: typing.Optional[typing.Tuple[str, ...]] = None
+    filters: typing.Tuple[Filter, ...] = ()
+    # the values of the group the others are relative to
+    baseline: typing.Tuple[benchmark.BenchVarValue, ...] = ()
+    outliers: typing.Optional[str] = None  # e.g. 'iqr' or 'mad:3'
+    aggregation: str = MEAN
+
+
+class QueryResult(typing.NamedTuple):
+    query: Query
+    bench_data: plotdata.BenchData
+
+    def samples(self) -> typing.Dict[str, plotdata.PlotData]:
+        # the (x, y) of every result left in each group
+        return self.bench_data.data
+
+    def arrays(self) -> typing.Dict[str, plotdata.CellStats]:
+        # per group, the aggregate at each x
+        return self.bench_data.aggregated
+
+    def rows(self) -> typing.List[table.TableRow]:
+        return table.table_rows(self.bench_data.aggregated)
+
+    def columns(self) -> typing.Dict[str, np.ndarray]:
+        # the rows as one array per column, in the same order
+        aggregated = self.bench_data.aggregated.items()
+        return {
+            'group': np.array(
+                [label for label, cells in aggregated
+                 for _ in range(len(cells.x))], dtype=object),
+            'x': _concatenate([cells.x for _, cells in aggregated]),
+            'y': _concatenate([cells.y for _, cells in aggregated]),
+            'n': _concatenate([cells.n for _, cells in aggregated]),
+            'stddev': _concatenate([cells.stddev for _, cells in aggregated]),
+        }
+
+    def to_pandas(self):
+        try:
+            import pandas
+        except ImportError:
+            raise ImportError(
+                'pandas is needed for data frames, ' +
+                'install it with `pip install pandas`')
+        return pandas.DataFrame(self.columns())
+
+    def report(self, file=sys.stderr):
+        self.bench_data.report(file=file)
+
+
+def _concatenate(arrays: typing.List[np.ndarray]) -> np.ndarray:
+    if len(arrays) == 0:
+        return np.empty(0)
+    return np.concatenate(arrays)
+
+
+def execute(
+        suite: benchmark.BenchSuite,
+        query: Query,
+        query_cache: cache.QueryCache = None) -> QueryResult:
+    # the suite's columns are kept with each benchmark, so queries against
+    # the same suite don't parse or convert its results again. A cache also
+    # shares the filtered rows and groups between queries
+    bench = suite.get_benchmark(query.bench)
+    if bench is None:
+        raise inputs.InvalidInputError(
+            'no benchmark with that name', inputs.BENCH_NAME,
+            input_val=query.bench)
+    group_by: typing.Union[typing.List[str], str] = query.group_by
+    if not isinstance(group_by, str):
+        group_by = list(group_by)
+    bench_data = plotdata.bench_data(
+        bench, group_by, query.x, y_name=query.y,
+        subs=None if query.subs is None else list(query.subs),
+        filter_vars=list(query.filters), baseline=list(query.baseline),
+        outliers=query.outliers, query_cache=query_cache,
+        aggregation=query.aggregation)
+    return QueryResult(query=query, bench_data=bench_data)
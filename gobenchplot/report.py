@@ -0,0 +1,487 @@
+import json
+import typing
+import numpy as np
+import gobenchplot.benchmark as benchmark
+import gobenchplot.columns as columns
+import gobenchplot.expr as expr
+import gobenchplot.inputs as inputs
+import gobenchplot.stats as stats
+
+# NOTE: this module must not import matplotlib (directly or indirectly)
+
+# self contained html report of a whole suite
+#
+# each benchmark is aggregated down to one cell per distinct (subs,
+# variable values) configuration, holding the count, mean and sum of
+# squared deviations of each output. Any choice of x, group-by and filters
+# in the viewer is a union of these cells, so it's merged client side
+# without needing the individual results.
+
+HTML_EXTENSIONS = ('.html', '.htm')
+
+# significant digits kept for aggregated values
+PRECISION = 7
+
+
+class ViewOptions(typing.NamedTuple):
+    # initial selections of the viewer, all can be changed in the browser
+    bench: typing.Optional[str] = None
+    x_name: typing.Optional[str] = None
+    y_name: str = 'time'
+    group_by: typing.List[str] = []
+    filter_vars: typing.List[str] = []
+    subs: typing.Optional[typing.List[str]] = None
+
+
+def is_html_output(output: typing.Optional[str]) -> bool:
+    return output is not None and output.lower().endswith(HTML_EXTENSIONS)
+
+
+def _compact(values: np.ndarray) -> typing.List[float]:
+    return [float('%.*g' % (PRECISION, value)) for value in values.tolist()]
+
+
+def _sort_key(value: benchmark.ResValue) -> typing.Tuple[bool, typing.Any]:
+    # numbers (and bools) before strings
+    return (isinstance(value, str), value)
+
+
+def _metric(
+        codes: np.ndarray,
+        values: np.ndarray,
+        num_cells: int) -> typing.Optional[typing.Dict[str, typing.List]]:
+    valid = np.isfinite(values)
+    if not np.any(valid):
+        return None
+    counts, means, stddevs = stats.cell_moments(
+        codes[valid], values[valid], num_cells)
+    sq_devs = np.where(counts > 1, stddevs ** 2 * (counts - 1), 0)
+    return {
+        'n': counts.tolist(),
+        'mean': _compact(np.where(counts > 0, means, 0)),
+        'm2': _compact(sq_devs),
+    }
+
+
+def bench_report_data(
+        bench: benchmark.Benchmark,
+        y_name: str = 'time') -> typing.Dict[str, typing.Any]:
+    cols = columns.bench_columns(bench)
+    var_names = cols.var_names
+    keys = [cols.subs_codes]
+    for name in var_names:
+        # 0 marks rows without the variable
+        keys.append(np.where(
+            cols.variables[name].present, cols.var_codes(name) + 1, 0))
+    codes, num_cells = stats.cell_codes(*keys)
+    first_rows = stats.cell_first_index(codes, num_cells)
+
+    # variable values are dictionary encoded, -1 marks a missing value
+    var_values: typing.List[typing.List[benchmark.ResValue]] = []
+    var_cell_codes: typing.List[typing.List[int]] = []
+    for name in var_names:
+        var = cols.variables[name]
+        present = var.present[first_rows]
+        cell_values = [
+            columns.py_value(value) for value in var.values[first_rows]]
+        values = sorted(
+            set(value for value, is_present in zip(cell_values, present)
+                if is_present),
+            key=_sort_key)
+        index = {value: i for i, value in enumerate(values)}
+        var_values.append(values)
+        var_cell_codes.append([
+            index[value] if is_present else -1
+            for value, is_present in zip(cell_values, present)])
+
+    metrics: typing.Dict[str, typing.Dict[str, typing.List]] = {}
+    for name in columns.OUTPUT_NAMES:
+        metric = _metric(codes, cols.outputs[name], num_cells)
+        if metric is not None:
+            metrics[name] = metric
+    y_expr = expr.compile_expr(y_name)
+    if y_expr.field() is None:
+        # derived values can't be recovered from the aggregated outputs
+        try:
+            metric = _metric(codes, y_expr.evaluate(cols.column), num_cells)
+        except (KeyError, inputs.InvalidInputError):
+            metric = None
+        if metric is not None:
+            metrics[y_expr.text] = metric
+
+    return {
+        'name': bench.name,
+        'vars': var_names,
+        'values': var_values,
+        'subs': [None if sub is None else '/'.join(sub) for sub in cols.subs],
+        'sub': cols.subs_codes[first_rows].tolist(),
+        'codes': var_cell_codes,
+        'metrics': metrics,
+        'units': {
+            name: benchmark.bench_output_units(name) for name in metrics},
+    }
+
+
+def report_data(
+        suite: benchmark.BenchSuite,
+        view: ViewOptions = ViewOptions()) -> typing.Dict[str, typing.Any]:
+    filters = []
+    for value in view.filter_vars:
+        var_cmp = benchmark.parse_bench_var_val_cmp(value)
+        filters.append({
+            'var': var_cmp.var_val.var_name,
+            'op': str(var_cmp.comp),
+            'value': var_cmp.var_val.var_value,
+        })
+    return {
+        'view': {
+            'bench': view.bench,
+            'x': view.x_name,
+            'y': view.y_name,
+            'groupBy': list(view.group_by),
+            'filters': filters,
+            'subs': None if not view.subs else '/'.join(view.subs),
+        },
+        'benchmarks': [
+            bench_report_data(bench, y_name=view.y_name)
+            for bench in suite.benchmarks],
+    }
+
+
+def write_html(
+        suite: benchmark.BenchSuite,
+        file,
+        view: ViewOptions = ViewOptions(),
+        title: str = 'gobenchplot'):
+    if view.bench is not None and suite.get_benchmark(view.bench) is None:
+        raise inputs.InvalidInputError(
+            'no bench with that name', inputs.BENCH_NAME,
+            input_val=view.bench)
+    data = json.dumps(report_data(suite, view), separators=(',', ':'))
+    # the data is embedded in a script element, which a '</' would end
+    data = data.replace('</', '<\\/')
+    file.write(HTML_TEMPLATE.replace(
+        '{{title}}', _escape_html(title)).replace('{{data}}', data))
+
+
+def _escape_html(text: str) -> str:
+    return (
+        text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;'))
+
+
+HTML_TEMPLATE = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{{title}}</title>
+<style>
+body { font-family: sans-serif; margin: 1em; color: #222; }
+#controls {
+  display: flex; flex-wrap: wrap; gap: 1em; align-items: flex-start;
+}
+#controls fieldset { border: 1px solid #ccc; padding: 0.3em 0.6em; }
+#controls legend { font-size: 0.85em; color: #555; }
+#filters fieldset { max-height: 10em; overflow-y: auto; }
+#filters label, #group-by label { display: block; font-size: 0.9em; }
+#chart { margin-top: 1em; }
+#chart text { font-size: 11px; }
+table { border-collapse: collapse; margin-top: 1em; font-size: 0.9em; }
+td, th { border: 1px solid #ddd; padding: 0.2em 0.6em; }
+td.num { text-align: right; }
+</style>
+</head>
+<body>
+<div id="controls">
+  <fieldset><legend>benchmark</legend><select id="bench"></select></fieldset>
+  <fieldset><legend>sub-benchmark</legend>
+    <select id="subs"></select></fieldset>
+  <fieldset><legend>x</legend><select id="x"></select></fieldset>
+  <fieldset><legend>y</legend><select id="y"></select>
+    <label><input type="checkbox" id="log-y"> log scale</label></fieldset>
+  <fieldset><legend>group by</legend><div id="group-by"></div></fieldset>
+  <div id="filters"></div>
+</div>
+<svg id="chart" width="900" height="480"></svg>
+<table id="table"></table>
+<script type="application/json" id="gobenchplot-data">{{data}}</script>
+<script>
+"use strict";
+const DATA = JSON.parse(
+  document.getElementById("gobenchplot-data").textContent);
+const COLORS = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+                "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"];
+const SVG_NS = "http://www.w3.org/2000/svg";
+const state = {};
+
+function el(tag, attrs, text) {
+  const node = tag.startsWith("svg:")
+    ? document.createElementNS(SVG_NS, tag.slice(4))
+    : document.createElement(tag);
+  for (const [k, v] of Object.entries(attrs || {})) node.setAttribute(k, v);
+  if (text !== undefined) node.textContent = text;
+  return node;
+}
+
+function options(select, values, selected) {
+  select.replaceChildren();
+  for (const [value, label] of values) {
+    const opt = el("option", {value: value}, label);
+    if (value === selected) opt.selected = true;
+    select.appendChild(opt);
+  }
+}
+
+function compare(a, op, b) {
+  // mirrors the --filter-by comparisons, mismatched types never match
+  if (typeof a !== typeof b) return op === "!=";
+  switch (op) {
+    case "==": return a === b;
+    case "!=": return a !== b;
+    case "<": return a < b;
+    case ">": return a > b;
+    case "<=": return a <= b;
+    case ">=": return a >= b;
+  }
+  return true;
+}
+
+function selectBench(name, view) {
+  const b = DATA.benchmarks.find(b => b.name === name) || DATA.benchmarks[0];
+  state.bench = b;
+  const metrics = Object.keys(b.metrics);
+  state.y = metrics.includes(view.y) ? view.y : metrics[0];
+  options(document.getElementById("y"),
+          metrics.map(m => [m, m]), state.y);
+  state.x = b.vars.includes(view.x) ? view.x : b.vars[0];
+  options(document.getElementById("x"),
+          b.vars.map(v => [v, v]), state.x);
+  state.sub = -1;
+  const subs = [[-1, "(all)"]].concat(
+    b.subs.map((s, i) => [i, s === null ? "(none)" : s]));
+  if (view.subs !== null) state.sub = b.subs.indexOf(view.subs);
+  options(document.getElementById("subs"), subs, state.sub);
+
+  state.groupBy = new Set(view.groupBy.filter(v => b.vars.includes(v)));
+  const groupBy = document.getElementById("group-by");
+  groupBy.replaceChildren();
+  const filters = document.getElementById("filters");
+  filters.replaceChildren();
+  state.selected = b.vars.map(() => null);
+  b.vars.forEach((v, i) => {
+    const box = el("input", {type: "checkbox"});
+    box.checked = state.groupBy.has(v);
+    box.addEventListener("change", () => {
+      if (box.checked) state.groupBy.add(v); else state.groupBy.delete(v);
+      render();
+    });
+    const label = el("label");
+    label.append(box, " " + v);
+    groupBy.appendChild(label);
+
+    // one checkbox per value, initially checked if it passes the filters
+    const set = el("fieldset");
+    set.appendChild(el("legend", {}, v));
+    state.selected[i] = b.values[i].map(value => view.filters.every(
+      f => f.var !== v || compare(value, f.op, f.value)));
+    b.values[i].forEach((value, j) => {
+      const valueBox = el("input", {type: "checkbox"});
+      valueBox.checked = state.selected[i][j];
+      valueBox.addEventListener("change", () => {
+        state.selected[i][j] = valueBox.checked;
+        render();
+      });
+      const valueLabel = el("label");
+      valueLabel.append(valueBox, " " + value);
+      set.appendChild(valueLabel);
+    });
+    filters.appendChild(set);
+  });
+  // filters on variables the benchmark doesn't have exclude everything
+  state.excluded = view.filters.some(
+    f => !b.vars.includes(f.var) && f.op !== "!=");
+}
+
+function aggregate() {
+  // merge the cells passing the filters into (group, x) cells
+  const b = state.bench;
+  const metric = b.metrics[state.y];
+  const xi = b.vars.indexOf(state.x);
+  const groupVars = b.vars.map((v, i) => i).filter(
+    i => state.groupBy.has(b.vars[i]));
+  const groups = new Map();
+  if (state.excluded) return groups;
+  for (let c = 0; c < b.sub.length; c++) {
+    const n = metric.n[c];
+    if (n === 0 || b.codes[xi][c] < 0) continue;
+    if (state.sub >= 0 && b.sub[c] !== state.sub) continue;
+    let keep = true;
+    for (let i = 0; i < b.vars.length && keep; i++) {
+      const code = b.codes[i][c];
+      keep = code < 0 || state.selected[i][code];
+    }
+    if (!keep) continue;
+    const label = groupVars.filter(i => b.codes[i][c] >= 0)
+      .map(i => b.vars[i] + " = " + b.values[i][b.codes[i][c]])
+      .join(", ");
+    if (!groups.has(label)) groups.set(label, new Map());
+    const cells = groups.get(label);
+    const x = b.codes[xi][c];
+    const cell = cells.get(x);
+    const mean = metric.mean[c], m2 = metric.m2[c];
+    if (cell === undefined) {
+      cells.set(x, {n: n, mean: mean, m2: m2});
+    } else {
+      const total = cell.n + n, delta = mean - cell.mean;
+      cell.m2 += m2 + delta * delta * cell.n * n / total;
+      cell.mean += delta * n / total;
+      cell.n = total;
+    }
+  }
+  return groups;
+}
+
+function render() {
+  const b = state.bench;
+  const xi = b.vars.indexOf(state.x);
+  const xValues = xi < 0 ? [] : b.values[xi];
+  const numeric = xValues.every(v => typeof v === "number");
+  const groups = xi < 0 ? new Map() : aggregate();
+  const logY = document.getElementById("log-y").checked;
+  const svg = document.getElementById("chart");
+  svg.replaceChildren();
+  const table = document.getElementById("table");
+  table.replaceChildren();
+  const unit = b.units[state.y] ? " (" + b.units[state.y] + ")" : "";
+  const header = el("tr");
+  for (const h of ["group", state.x, state.y + unit, "n", "stddev"])
+    header.appendChild(el("th", {}, h));
+  table.appendChild(header);
+
+  const series = [];
+  let yMin = Infinity, yMax = -Infinity;
+  for (const [label, cells] of groups) {
+    const points = [...cells.entries()].sort((a, b) => a[0] - b[0]).map(
+      ([x, c]) => ({x: x, y: c.mean, n: c.n,
+                    sd: c.n > 1 ? Math.sqrt(c.m2 / (c.n - 1)) : NaN}));
+    for (const p of points) {
+      const lo = isNaN(p.sd) ? p.y : p.y - p.sd;
+      const hi = isNaN(p.sd) ? p.y : p.y + p.sd;
+      yMin = Math.min(yMin, logY ? p.y : lo);
+      yMax = Math.max(yMax, hi);
+      const row = el("tr");
+      row.appendChild(el("td", {}, label));
+      row.appendChild(el("td", {class: "num"}, xValues[p.x]));
+      row.appendChild(el("td", {class: "num"}, p.y.toPrecision(6)));
+      row.appendChild(el("td", {class: "num"}, p.n));
+      row.appendChild(el("td", {class: "num"},
+                         isNaN(p.sd) ? "" : p.sd.toPrecision(6)));
+      table.appendChild(row);
+    }
+    series.push({label: label, points: points});
+  }
+  const title = b.name + (state.sub >= 0 && b.subs[state.sub] !== null
+                          ? "/" + b.subs[state.sub] : "");
+  svg.appendChild(el("svg:text", {x: 450, y: 16, "text-anchor": "middle",
+                                  "font-weight": "bold"}, title));
+  if (series.length === 0) {
+    svg.appendChild(el("svg:text", {x: 450, y: 240, "text-anchor": "middle"},
+                       "no results remain"));
+    return;
+  }
+
+  const left = 70, right = 880, top = 30, bottom = 440;
+  const xs = series.flatMap(s => s.points.map(p => p.x));
+  const xPos = numeric
+    ? (() => {
+        const lo = Math.min(...xs.map(x => xValues[x]));
+        const hi = Math.max(...xs.map(x => xValues[x]));
+        const span = hi > lo ? hi - lo : 1;
+        return x => left + (xValues[x] - lo) / span * (right - left);
+      })()
+    : (() => {
+        const used = [...new Set(xs)].sort((a, b) => a - b);
+        const step = (right - left) / used.length;
+        return x => left + step * (used.indexOf(x) + 0.5);
+      })();
+  if (logY) yMin = Math.max(yMin, 1e-300);
+  const scale = v => logY ? Math.log10(Math.max(v, yMin)) : v;
+  const y0 = scale(yMin), y1 = scale(yMax) > y0 ? scale(yMax) : y0 + 1;
+  const yPos = v => bottom - (scale(v) - y0) / (y1 - y0) * (bottom - top);
+
+  svg.appendChild(el("svg:rect", {x: left, y: top, width: right - left,
+                                  height: bottom - top, fill: "none",
+                                  stroke: "#888"}));
+  for (let i = 0; i <= 4; i++) {
+    const v = logY ? Math.pow(10, y0 + (y1 - y0) * i / 4)
+                   : y0 + (y1 - y0) * i / 4;
+    svg.appendChild(el("svg:text", {x: left - 4, y: yPos(v) + 4,
+                                    "text-anchor": "end"},
+                       Number(v.toPrecision(3)).toString()));
+  }
+  for (const x of new Set(xs)) {
+    svg.appendChild(el("svg:text", {x: xPos(x), y: bottom + 14,
+                                    "text-anchor": "middle"}, xValues[x]));
+  }
+  svg.appendChild(el("svg:text", {x: (left + right) / 2, y: bottom + 32,
+                                  "text-anchor": "middle"}, state.x));
+  svg.appendChild(el("svg:text", {x: 14, y: (top + bottom) / 2,
+                                  transform: "rotate(-90 14 " +
+                                    (top + bottom) / 2 + ")",
+                                  "text-anchor": "middle"}, state.y + unit));
+
+  series.forEach((s, i) => {
+    const color = COLORS[i % COLORS.length];
+    const path = s.points.map(
+      (p, j) => (j === 0 ? "M" : "L") + xPos(p.x) + "," + yPos(p.y)).join("");
+    svg.appendChild(el("svg:path", {d: path, fill: "none", stroke: color}));
+    for (const p of s.points) {
+      if (!isNaN(p.sd)) {
+        svg.appendChild(el("svg:line", {
+          x1: xPos(p.x), x2: xPos(p.x), stroke: color,
+          y1: yPos(Math.max(p.y - p.sd, logY ? yMin : -Infinity)),
+          y2: yPos(p.y + p.sd)}));
+      }
+      const dot = el("svg:circle", {cx: xPos(p.x), cy: yPos(p.y), r: 3,
+                                    fill: color});
+      dot.appendChild(el("svg:title", {},
+                         s.label + "\\n" + state.x + " = " + xValues[p.x] +
+                         "\\nmean = " + p.y.toPrecision(6) + ", n = " + p.n));
+      svg.appendChild(dot);
+    }
+    svg.appendChild(el("svg:rect", {x: left + 10, y: top + 8 + 16 * i,
+                                    width: 10, height: 10, fill: color}));
+    svg.appendChild(el("svg:text", {x: left + 26, y: top + 17 + 16 * i},
+                       s.label === "" ? "(all)" : s.label));
+  });
+}
+
+function setup() {
+  options(document.getElementById("bench"),
+          DATA.benchmarks.map(b => [b.name, b.name]), DATA.view.bench);
+  selectBench(DATA.view.bench, DATA.view);
+  const defaults = {x: null, y: null, groupBy: [], filters: [], subs: null};
+  document.getElementById("bench").addEventListener("change", e => {
+    selectBench(e.target.value, defaults);
+    render();
+  });
+  document.getElementById("x").addEventListener("change", e => {
+    state.x = e.target.value;
+    render();
+  });
+  document.getElementById("y").addEventListener("change", e => {
+    state.y = e.target.value;
+    render();
+  });
+  document.getElementById("subs").addEventListener("change", e => {
+    state.sub = Number(e.target.value);
+    render();
+  });
+  document.getElementById("log-y").addEventListener("change", render);
+  render();
+}
+
+if (DATA.benchmarks.length > 0) setup();
+</script>
+</body>
+</html>
+'''
@@ -0,0 +1,69 @@
+import datetime
+import subprocess
+import typing
+import gobenchplot.benchmark as benchmark
+
+# runs the benchmarks and parses their output as it's written, instead of
+# after `go test ... | tee FILE` has finished
+#
+# NOTE: this module must not import matplotlib (directly or indirectly)
+
+LOG_TIME_FORMAT = 'gobench-%Y%m%dT%H%M%S.json'
+
+
+class RunResult(typing.NamedTuple):
+    suite: benchmark.BenchSuite
+    returncode: int
+    # the first line that couldn't be parsed, later lines are only logged
+    error: typing.Optional[Exception] = None
+
+
+def bench_command(
+        bench_regex: str,
+        count: typing.Optional[
+            typing.Union[int, str]] = None) -> typing.List[str]:
+    # the benchmarks of the package in the working directory matching
+    # bench_regex, without its tests
+    command = ['go', 'test', '.', '-run', '^$', '-bench', bench_regex]
+    if count is not None:
+        command += ['-count', str(count)]
+    return command + ['-benchmem', '-json']
+
+
+def default_command(bench: str = None) -> typing.List[str]:
+    # each level of -bench is matched separately, so this runs every
+    # sub-benchmark of bench
+    return bench_command('.' if bench is None else '^%s$' % (bench))
+
+
+def default_log(now: datetime.datetime = None) -> str:
+    if now is None:
+        now = datetime.datetime.now()
+    return now.strftime(LOG_TIME_FORMAT)
+
+
+def run_command(
+        command: typing.List[str],
+        log,
+        **kwargs) -> RunResult:
+    # each line of the command's stdout is written to log and parsed as it
+    # arrives. stderr (e.g. build errors) is left to the caller's
+    parser = benchmark.BenchParser()
+    error = None
+    with subprocess.Popen(
+            command, stdout=subprocess.PIPE, text=True, bufsize=1,
+            **kwargs) as proc:
+        for line in proc.stdout:
+            # flushed as it goes, so the log can be followed with --watch
+            log.write(line)
+            log.flush()
+            if error is not None or not line.strip():
+                continue
+            try:
+                parser.feed(line)
+            except (benchmark.ParseBenchmarkError, ValueError) as e:
+                # keep reading so the command isn't blocked on a full pipe
+                # and the log is complete
+                error = e
+    return RunResult(
+        suite=parser.suite, returncode=proc.returncode, error=error)
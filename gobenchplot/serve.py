@@ -0,0 +1,329 @@
+import concurrent.futures
+import http.server
+import io
+import json
+import os
+import sys
+import traceback
+import typing
+import urllib.parse
+import matplotlib.backends.backend_agg
+import matplotlib.figure
+import gobenchplot.benchmark as benchmark
+import gobenchplot.cache as cache
+import gobenchplot.columns as columns
+import gobenchplot.inputs as inputs
+import gobenchplot.plot as plot
+import gobenchplot.plotdata as plotdata
+import gobenchplot.table as table
+
+# local http server over suites parsed once at startup
+#
+# GET /benchmarks                      every benchmark of every suite
+# GET /variables?bench=NAME            values of each variable
+# GET /subs?bench=NAME                 sub-benchmarks
+# GET /plot?bench=NAME&x=VAR&...       png or svg (format=svg)
+# GET /table?bench=NAME&x=VAR&...      csv, markdown or json (format=json)
+#
+# plot and table take the same parameters as the command line options,
+# repeated for lists (e.g. group-by=a&group-by=b), and suite=NAME when
+# more than one suite is served. Responses are rendered by a pool of
+# workers and kept in memory by normalized query.
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+DEFAULT_WORKERS = 4
+
+PNG_FORMAT = 'png'
+SVG_FORMAT = 'svg'
+PLOT_FORMATS = [PNG_FORMAT, SVG_FORMAT]
+FORMAT_NAME = 'format'
+SUITE_NAME = 'suite'
+
+CONTENT_TYPES = {
+    PNG_FORMAT: 'image/png',
+    SVG_FORMAT: 'image/svg+xml',
+    table.CSV_FORMAT: 'text/csv; charset=utf-8',
+    table.MARKDOWN_FORMAT: 'text/markdown; charset=utf-8',
+    table.JSON_FORMAT: 'application/json',
+}
+
+
+class Response(typing.NamedTuple):
+    status: int
+    content_type: str
+    body: bytes
+    cached: bool = False
+
+
+def json_response(value, status: int = 200) -> Response:
+    return Response(
+        status=status, content_type=CONTENT_TYPES[table.JSON_FORMAT],
+        body=json.dumps(value).encode())
+
+
+def error_response(status: int, message: str) -> Response:
+    return json_response({'error': message}, status=status)
+
+
+class Query(typing.NamedTuple):
+    # a plot or table request, lists are in the order given
+    suite: typing.Optional[str]
+    bench: str
+    x_name: typing.Optional[str]
+    y_name: str = 'time'
+    group_by: typing.Tuple[str, ...] = ()
+    subs: typing.Optional[typing.Tuple[str, ...]] = None
+    filter_vars: typing.Tuple[str, ...] = ()
+    plots: typing.Optional[typing.Tuple[str, ...]] = None
+    baseline: typing.Tuple[str, ...] = ()
+    outliers: typing.Optional[str] = None
+    heatmap_y: typing.Optional[str] = None
+    fmt: typing.Optional[str] = None
+
+    def key(self, kind: str) -> typing.Tuple:
+        # queries that only differ in the order of filters or baseline
+        # values share a key, group-by and subs order change the labels
+        return (
+            kind, self.suite, self.bench, self.x_name, self.y_name,
+            self.group_by, self.subs,
+            cache.normalize_filters(list(self.filter_vars)),
+            self.plots, tuple(sorted(self.baseline)), self.outliers,
+            self.heatmap_y, self.fmt)
+
+
+def _single(
+        params: typing.Dict[str, typing.List[str]],
+        name: str) -> typing.Optional[str]:
+    values = params.get(name)
+    if values is None:
+        return None
+    if len(values) != 1:
+        raise inputs.InvalidInputError(
+            'expected a single value', name, input_val=values)
+    return values[0]
+
+
+def parse_query(params: typing.Dict[str, typing.List[str]]) -> Query:
+    # params as returned by urllib.parse.parse_qs
+    bench = _single(params, inputs.BENCH_NAME)
+    if bench is None:
+        raise inputs.InvalidInputError('missing', inputs.BENCH_NAME)
+    subs = params.get(inputs.SUBS_NAME)
+    plots = params.get(inputs.PLOTS_NAME)
+    return Query(
+        suite=_single(params, SUITE_NAME),
+        bench=bench,
+        x_name=_single(params, inputs.X_NAME),
+        y_name=_single(params, inputs.Y_NAME) or 'time',
+        group_by=tuple(params.get(inputs.GROUP_BY_NAME, [])),
+        subs=None if subs is None else tuple(subs),
+        filter_vars=tuple(params.get(inputs.FILTER_BY_NAME, [])),
+        plots=None if plots is None else tuple(plots),
+        baseline=tuple(params.get(inputs.BASELINE_NAME, [])),
+        outliers=_single(params, inputs.OUTLIERS_NAME),
+        heatmap_y=_single(params, inputs.HEATMAP_Y_NAME),
+        fmt=_single(params, FORMAT_NAME))
+
+
+def _list(values: typing.Tuple) -> typing.Optional[typing.List]:
+    return None if len(values) == 0 else list(values)
+
+
+def bench_variables(
+        cols: columns.BenchColumns) -> typing.Dict[str, typing.List]:
+    # distinct values of each variable, numbers before strings
+    variables: typing.Dict[str, typing.List] = {}
+    for name in cols.var_names:
+        var = cols.variables[name]
+        values = set(
+            columns.py_value(value) for value in var.values[var.present])
+        variables[name] = sorted(
+            values, key=lambda value: (isinstance(value, str), value))
+    return variables
+
+
+def render_plot(bench: benchmark.Benchmark, query: Query,
+                query_cache: cache.QueryCache) -> bytes:
+    # draws without pyplot, whose global state isn't safe across threads
+    fig = matplotlib.figure.Figure()
+    matplotlib.backends.backend_agg.FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    plots = None if query.plots is None else list(query.plots)
+    if plots == [plotdata.HEATMAP_TYPE]:
+        heatmap_data = plotdata.heatmap_data(
+            bench, query.x_name, query.heatmap_y, y_name=query.y_name,
+            subs=_list(query.subs or ()), filter_vars=_list(query.filter_vars),
+            outliers=query.outliers, query_cache=query_cache)
+        plot.draw_heatmap_data(heatmap_data, ax=ax)
+    elif plots == [plotdata.PARETO_TYPE]:
+        pareto_data = plotdata.pareto_data(
+            bench, query.x_name, y_name=query.y_name,
+            subs=_list(query.subs or ()), filter_vars=_list(query.filter_vars),
+            query_cache=query_cache)
+        plot.draw_pareto_data(pareto_data, ax=ax)
+    else:
+        bench_data = plotdata.bench_data(
+            bench, list(query.group_by), query.x_name, y_name=query.y_name,
+            subs=_list(query.subs or ()), filter_vars=_list(query.filter_vars),
+            baseline=_list(query.baseline), outliers=query.outliers,
+            query_cache=query_cache)
+        plot.draw_bench_data(bench_data, plots=plots, ax=ax)
+    f = io.BytesIO()
+    fig.savefig(f, format=query.fmt)
+    return f.getvalue()
+
+
+def render_table(bench: benchmark.Benchmark, query: Query,
+                 query_cache: cache.QueryCache) -> bytes:
+    bench_data = plotdata.bench_data(
+        bench, list(query.group_by), query.x_name, y_name=query.y_name,
+        subs=_list(query.subs or ()), filter_vars=_list(query.filter_vars),
+        baseline=_list(query.baseline), outliers=query.outliers,
+        query_cache=query_cache)
+    f = io.StringIO()
+    table.write_table(bench_data, fmt=query.fmt, file=f)
+    return f.getvalue().encode()
+
+
+class Server:
+    # everything but the http transport, so it can be called directly
+    def __init__(
+            self,
+            suites: typing.Dict[str, benchmark.BenchSuite],
+            workers: int = DEFAULT_WORKERS,
+            cache_max_bytes: int = cache.DEFAULT_RENDER_CACHE_BYTES):
+        self.suites = suites
+        self.query_cache = cache.QueryCache()
+        self.render_cache = cache.QueryCache(max_bytes=cache_max_bytes)
+        self.pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers)
+
+    def close(self):
+        self.pool.shutdown()
+
+    def get_benchmark(
+            self,
+            suite_name: typing.Optional[str],
+            bench_name: str) -> benchmark.Benchmark:
+        if suite_name is None:
+            if len(self.suites) != 1:
+                raise inputs.InvalidInputError(
+                    'one of %s is needed' % (', '.join(self.suites)),
+                    SUITE_NAME)
+            suite = next(iter(self.suites.values()))
+        elif suite_name in self.suites:
+            suite = self.suites[suite_name]
+        else:
+            raise LookupError("no suite '%s'" % (suite_name))
+        bench = suite.get_benchmark(bench_name)
+        if bench is None:
+            raise LookupError("no bench '%s'" % (bench_name))
+        return bench
+
+    def handle(
+            self,
+            path: str,
+            params: typing.Dict[str, typing.List[str]]) -> Response:
+        try:
+            if path == '/benchmarks':
+                return json_response([
+                    {'suite': suite_name, 'name': bench.name,
+                     'results': len(bench.results)}
+                    for suite_name, suite in self.suites.items()
+                    for bench in suite.benchmarks])
+            if path in ('/variables', '/subs'):
+                bench_name = _single(params, inputs.BENCH_NAME)
+                if bench_name is None:
+                    raise inputs.InvalidInputError(
+                        'missing', inputs.BENCH_NAME)
+                cols = columns.bench_columns(self.get_benchmark(
+                    _single(params, SUITE_NAME), bench_name))
+                if path == '/variables':
+                    return json_response(bench_variables(cols))
+                return json_response([
+                    None if subs is None else list(subs)
+                    for subs in cols.subs])
+            if path == '/plot':
+                return self.render(parse_query(params), 'plot')
+            if path == '/table':
+                return self.render(parse_query(params), 'table')
+        except inputs.InvalidInputError as e:
+            return error_response(400, str(e))
+        except LookupError as e:
+            return error_response(404, str(e.args[0]))
+        return error_response(404, "unknown path '%s'" % (path))
+
+    def render(self, query: Query, kind: str) -> Response:
+        if kind == 'plot':
+            render_fn, formats = render_plot, PLOT_FORMATS
+        else:
+            render_fn, formats = render_table, table.TABLE_FORMATS
+        if query.fmt is None:
+            query = query._replace(fmt=formats[0])
+        elif query.fmt not in formats:
+            raise inputs.InvalidInputError(
+                'expected one of: %s' % (', '.join(formats)),
+                FORMAT_NAME, input_val=query.fmt)
+        bench = self.get_benchmark(query.suite, query.bench)
+
+        rendered = []
+
+        def compute() -> bytes:
+            rendered.append(True)
+            return self.pool.submit(
+                render_fn, bench, query, self.query_cache).result()
+
+        body = self.render_cache.get_or_compute(
+            query.key(kind), compute, bench=bench)
+        return Response(
+            status=200, content_type=CONTENT_TYPES[query.fmt], body=body,
+            cached=len(rendered) == 0)
+
+
+class RequestHandler(http.server.BaseHTTPRequestHandler):
+    server_version = 'gobenchplot'
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        try:
+            response = self.server.app.handle(
+                url.path, urllib.parse.parse_qs(url.query))
+        except Exception as e:
+            traceback.print_exc()
+            response = error_response(500, str(e))
+        self.send_response(response.status)
+        self.send_header('Content-Type', response.content_type)
+        self.send_header('Content-Length', str(len(response.body)))
+        self.send_header('X-Cache', 'hit' if response.cached else 'miss')
+        self.end_headers()
+        self.wfile.write(response.body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            sys.stderr.write('%s\n' % (format % args))
+
+
+class HTTPServer(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+            self, address: typing.Tuple[str, int], app: Server,
+            quiet: bool = False):
+        http.server.ThreadingHTTPServer.__init__(self, address, RequestHandler)
+        self.app = app
+        self.quiet = quiet  # don't log each request to stderr
+
+
+def suite_names(files: typing.List[str]) -> typing.List[str]:
+    # file names without their directory, numbered when they clash
+    names: typing.List[str] = []
+    for file in files:
+        name = 'stdin' if file in ('', '-') else os.path.basename(file)
+        unique = name
+        i = 2
+        while unique in names:
+            unique = '%s.%d' % (name, i)
+            i += 1
+        names.append(unique)
+    return names
@@ -0,0 +1,180 @@
+import html
+import os
+import re
+import shutil
+import sys
+import typing
+import matplotlib
+import matplotlib.pyplot as plt
+import gobenchplot.benchmark as benchmark
+import gobenchplot.cache as cache
+import gobenchplot.columns as columns
+import gobenchplot.inputs as inputs
+import gobenchplot.plot as plot
+import gobenchplot.plotdata as plotdata
+
+# static site with one figure per benchmark
+#
+# figures are keyed by a digest of everything that affects how they look,
+# so a run only renders the benchmarks whose results (or options) changed
+
+SVG_FORMAT = 'svg'
+PNG_FORMAT = 'png'
+SITE_FORMATS = [SVG_FORMAT, PNG_FORMAT]
+
+RENDER_CACHE_DIR = '.render-cache'
+
+# bump when a change to the plotting code changes existing figures
+RENDER_VERSION = 1
+
+
+class SiteOptions(typing.NamedTuple):
+    # x and group-by default to each benchmark's own variables
+    x_name: typing.Optional[str] = None
+    y_name: str = 'time'
+    group_by: typing.Optional[typing.List[str]] = None
+    subs: typing.Optional[typing.List[str]] = None
+    filter_vars: typing.Optional[typing.List[str]] = None
+    plots: typing.Optional[typing.List[str]] = None
+    baseline: typing.Optional[typing.List[str]] = None
+    outliers: typing.Optional[str] = None
+    density_threshold: int = plotdata.DEFAULT_DENSITY_THRESHOLD
+    fmt: str = SVG_FORMAT
+
+
+class SitePage(typing.NamedTuple):
+    bench: str
+    file: typing.Optional[str]  # relative to the site directory
+    error: typing.Optional[str]  # why the benchmark wasn't plotted
+    rendered: bool  # False if the figure came from the cache
+
+
+def default_axes(
+        cols: columns.BenchColumns) -> typing.Tuple[str, typing.List[str]]:
+    # x is the first numeric variable (or the first variable), and results
+    # are grouped by the rest
+    names = cols.var_names
+    if len(names) == 0:
+        raise inputs.InvalidInputError(
+            'benchmark has no variables', inputs.X_NAME)
+    x_name = names[0]
+    for name in names:
+        if cols.variables[name].values.dtype.kind in 'iuf':
+            x_name = name
+            break
+    return x_name, [name for name in names if name != x_name]
+
+
+def figure_digest(
+        bench_data: plotdata.BenchData,
+        options: SiteOptions) -> str:
+    return cache.digest(
+        RENDER_VERSION, matplotlib.__version__,
+        options.plots, options.density_threshold, options.fmt,
+        bench_data.title, bench_data.x_name, bench_data.y_label,
+        bench_data.baseline_label, bench_data.data, bench_data.aggregated)
+
+
+def page_file(bench_name: str, fmt: str) -> str:
+    return '%s.%s' % (re.sub(r'[^\w.-]', '_', bench_name), fmt)
+
+
+def render_figure(
+        bench_data: plotdata.BenchData,
+        options: SiteOptions,
+        path: str):
+    fig = plt.figure()
+    try:
+        plot.draw_bench_data(
+            bench_data, plots=options.plots,
+            density_threshold=options.density_threshold)
+        fig.savefig(path, format=options.fmt)
+    finally:
+        plt.close(fig)
+
+
+def site_page(
+        bench: benchmark.Benchmark,
+        out_dir: str,
+        options: SiteOptions,
+        render_cache: cache.RenderCache) -> SitePage:
+    try:
+        x_name, group_by = options.x_name, options.group_by
+        if x_name is None or group_by is None:
+            default_x, default_group_by = default_axes(
+                columns.bench_columns(bench))
+            if x_name is None:
+                x_name = default_x
+            if group_by is None:
+                group_by = [
+                    name for name in default_group_by if name != x_name]
+        bench_data = plotdata.bench_data(
+            bench, group_by, x_name, y_name=options.y_name,
+            subs=options.subs, filter_vars=options.filter_vars,
+            baseline=options.baseline, outliers=options.outliers)
+    except inputs.InvalidInputError as e:
+        return SitePage(
+            bench=bench.name, file=None, error=str(e), rendered=False)
+
+    file = page_file(bench.name, options.fmt)
+    out_path = os.path.join(out_dir, file)
+    key = figure_digest(bench_data, options)
+    cached = render_cache.get(key, options.fmt)
+    if cached is not None:
+        shutil.copyfile(cached, out_path)
+        return SitePage(
+            bench=bench.name, file=file, error=None, rendered=False)
+
+    tmp_path = render_cache.temp_path(options.fmt)
+    try:
+        render_figure(bench_data, options, tmp_path)
+        shutil.copyfile(tmp_path, out_path)
+        render_cache.put(key, options.fmt, tmp_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return SitePage(bench=bench.name, file=file, error=None, rendered=True)
+
+
+def write_index(pages: typing.List[SitePage], file, title: str = 'benchmarks'):
+    print('<!DOCTYPE html>', file=file)
+    print('<html><head><meta charset="utf-8"><title>%s</title></head>' % (
+        html.escape(title)), file=file)
+    print('<body><h1>%s</h1>' % (html.escape(title)), file=file)
+    for page in pages:
+        name = html.escape(page.bench)
+        if page.file is None:
+            print('<h2 id="%s">%s</h2><p>not plotted: %s</p>' % (
+                name, name, html.escape(page.error or '')), file=file)
+        else:
+            print('<h2 id="%s">%s</h2><img src="%s" alt="%s">' % (
+                name, name, html.escape(page.file), name), file=file)
+    print('</body></html>', file=file)
+
+
+def build_site(
+        suite: benchmark.BenchSuite,
+        out_dir: str,
+        options: SiteOptions = SiteOptions(),
+        render_cache: cache.RenderCache = None) -> typing.List[SitePage]:
+    os.makedirs(out_dir, exist_ok=True)
+    if render_cache is None:
+        render_cache = cache.RenderCache(
+            os.path.join(out_dir, RENDER_CACHE_DIR))
+    pages = [
+        site_page(bench, out_dir, options, render_cache)
+        for bench in suite.benchmarks]
+    with open(os.path.join(out_dir, 'index.html'), 'w') as f:
+        write_index(pages, f)
+    return pages
+
+
+def report_pages(pages: typing.List[SitePage], file=sys.stderr):
+    for page in pages:
+        if page.error is not None:
+            print("skipped '%s': %s" % (page.bench, page.error), file=file)
+    reused = [
+        page for page in pages if page.file is not None and not page.rendered]
+    print('rendered %d, reused %d, skipped %d' % (
+        sum(1 for page in pages if page.rendered), len(reused),
+        sum(1 for page in pages if page.file is None)), file=file)
@@ -0,0 +1,318 @@
+import statistics
+import typing
+import numpy as np
+import gobenchplot.inputs as inputs
+
+# per cell statistics, computed for every cell at once
+#
+# cells are identified by dense integer codes (0 <= code < num_cells) so
+# that each helper can sort once and work on contiguous segments
+
+IQR_METHOD = 'iqr'
+MAD_METHOD = 'mad'
+TRIM_METHOD = 'trim'
+
+DEFAULT_OUTLIER_PARAMS = {
+    IQR_METHOD: 1.5,  # fence multiplier
+    MAD_METHOD: 3.5,  # max modified z-score
+    TRIM_METHOD: 0.1,  # proportion trimmed from each end
+}
+
+
+def dense_codes(key: np.ndarray) -> typing.Tuple[np.ndarray, int]:
+    # number the distinct values of key 0..n-1 in sorted order
+    if key.dtype.kind in 'biu' and len(key) != 0:
+        low = int(key.min())
+        span = int(key.max()) - low + 1
+        # a lookup table avoids sorting when the values are close together
+        if span <= 2 * len(key) + 1024:
+            offsets = key.astype(np.int64) - low
+            used = np.bincount(offsets, minlength=span) > 0
+            remap = np.cumsum(used) - 1
+            return remap[offsets], int(used.sum())
+    uniq, codes = np.unique(key, return_inverse=True)
+    return codes.reshape(-1), len(uniq)
+
+
+def cell_codes(*keys: np.ndarray) -> typing.Tuple[np.ndarray, int]:
+    # combine the keys into a dense code per unique combination
+    codes = np.zeros(len(keys[0]), dtype=np.int64)
+    for key in keys:
+        key_codes, num_values = dense_codes(key)
+        codes = codes * num_values + key_codes
+    return dense_codes(codes)
+
+
+def cell_first_index(codes: np.ndarray, num_cells: int) -> np.ndarray:
+    # index of the first value of each cell
+    first_index = np.full(num_cells, len(codes))
+    np.minimum.at(first_index, codes, np.arange(len(codes)))
+    return first_index
+
+
+def cell_moments(
+        codes: np.ndarray,
+        values: np.ndarray,
+        num_cells: int) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # count, mean and sample stddev (nan if count < 2) of each cell
+    counts = np.bincount(codes, minlength=num_cells)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        means = np.bincount(
+            codes, weights=values, minlength=num_cells) / counts
+        sq_devs = np.bincount(
+            codes, weights=(values - means[codes]) ** 2, minlength=num_cells)
+        stddevs = np.sqrt(sq_devs / (counts - 1))
+    stddevs[counts < 2] = np.nan
+    return counts, means, stddevs
+
+
+class SortedCells(typing.NamedTuple):
+    order: np.ndarray  # indices sorting values by (code, value)
+    values: np.ndarray  # values[order]
+    starts: np.ndarray  # start of each cell in values
+    counts: np.ndarray  # number of values in each cell
+
+    def ranks(self) -> np.ndarray:
+        # rank of each value within its cell, in the original order
+        sorted_codes = np.repeat(np.arange(len(self.counts)), self.counts)
+        ranks = np.empty(len(self.order), dtype=np.int64)
+        ranks[self.order] = (
+            np.arange(len(self.order)) - self.starts[sorted_codes])
+        return ranks
+
+    def quantile(self, q: float) -> np.ndarray:
+        # linearly interpolated quantile of each cell, nan for empty cells
+        result = np.full(len(self.counts), np.nan)
+        present = self.counts > 0
+        starts = self.starts[present]
+        last = starts + self.counts[present] - 1
+        pos = starts + q * (self.counts[present] - 1)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, last)
+        frac = pos - lo
+        result[present] = (
+            self.values[lo] * (1 - frac) + self.values[hi] * frac)
+        return result
+
+
+def sort_cells(
+        codes: np.ndarray,
+        values: np.ndarray,
+        num_cells: int) -> SortedCells:
+    order = np.lexsort((values, codes))
+    counts = np.bincount(codes, minlength=num_cells)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    return SortedCells(
+        order=order, values=values[order], starts=starts, counts=counts)
+
+
+class BoxStats(typing.NamedTuple):
+    # per cell, nan for empty cells
+    q1: np.ndarray
+    median: np.ndarray
+    q3: np.ndarray
+    whisker_low: np.ndarray  # lowest value within the lower fence
+    whisker_high: np.ndarray  # highest value within the upper fence
+
+
+def cell_box_stats(
+        cells: SortedCells,
+        whisker: float = 1.5) -> typing.Tuple[BoxStats, np.ndarray]:
+    # also returns whether each value (in the original order) lies beyond
+    # the whiskers, fences are whisker * IQR past the quartiles
+    q1 = cells.quantile(0.25)
+    median = cells.quantile(0.5)
+    q3 = cells.quantile(0.75)
+    sorted_codes = np.repeat(np.arange(len(cells.counts)), cells.counts)
+    fence = whisker * (q3 - q1)
+    inside = (
+        (cells.values >= (q1 - fence)[sorted_codes]) &
+        (cells.values <= (q3 + fence)[sorted_codes]))
+
+    # the quartiles are always inside, so every non empty cell has both
+    whisker_low = np.full(len(cells.counts), np.inf)
+    whisker_high = np.full(len(cells.counts), -np.inf)
+    np.minimum.at(whisker_low, sorted_codes[inside], cells.values[inside])
+    np.maximum.at(whisker_high, sorted_codes[inside], cells.values[inside])
+    whisker_low[cells.counts == 0] = np.nan
+    whisker_high[cells.counts == 0] = np.nan
+
+    beyond = np.empty(len(cells.values), dtype=bool)
+    beyond[cells.order] = ~inside
+    return BoxStats(
+        q1=q1, median=median, q3=q3,
+        whisker_low=whisker_low, whisker_high=whisker_high), beyond
+
+
+def _cell_range(cells: SortedCells) -> typing.Tuple[np.ndarray, np.ndarray]:
+    # min and max of each cell, widened around cells of a single value
+    low = cells.quantile(0)
+    high = cells.quantile(1)
+    same = low == high
+    return np.where(same, low - 0.5, low), np.where(same, high + 0.5, high)
+
+
+def cell_histograms(
+        cells: SortedCells,
+        num_bins: int) -> typing.Tuple[np.ndarray, np.ndarray]:
+    # (num_cells, num_bins + 1) edges spanning each cell's values and the
+    # (num_cells, num_bins) counts in between, nan edges for empty cells
+    num_cells = len(cells.counts)
+    low, high = _cell_range(cells)
+    width = (high - low) / num_bins
+    sorted_codes = np.repeat(np.arange(num_cells), cells.counts)
+    bins = np.floor(
+        (cells.values - low[sorted_codes]) / width[sorted_codes])
+    # the max of each cell falls on the last edge
+    bins = np.clip(bins, 0, num_bins - 1).astype(np.int64)
+    counts = np.bincount(
+        sorted_codes * num_bins + bins, minlength=num_cells * num_bins)
+    edges = low[:, None] + width[:, None] * np.arange(num_bins + 1)
+    return edges, counts.reshape(num_cells, num_bins)
+
+
+def cell_bandwidths(cells: SortedCells) -> np.ndarray:
+    # Silverman's rule of thumb, cells without spread (or a single value)
+    # get 1% of their magnitude so they show up as a narrow spike
+    num_cells = len(cells.counts)
+    sorted_codes = np.repeat(np.arange(num_cells), cells.counts)
+    _, _, stddevs = cell_moments(sorted_codes, cells.values, num_cells)
+    iqr = cells.quantile(0.75) - cells.quantile(0.25)
+    scale = np.where(iqr > 0, np.fmin(stddevs, iqr / 1.34), stddevs)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bandwidths = 0.9 * scale * cells.counts.astype(np.float64) ** -0.2
+    median = np.abs(cells.quantile(0.5))
+    fallback = np.where(median > 0, 0.01 * median, 1.0)
+    return np.where(bandwidths > 0, bandwidths, fallback)
+
+
+def cell_kdes(
+        cells: SortedCells,
+        num_points: int) -> typing.Tuple[np.ndarray, np.ndarray]:
+    # gaussian kernel density estimate of each cell, evaluated on
+    # (num_cells, num_points) points spanning its values plus 3 bandwidths
+    #
+    # values are linearly binned onto each cell's grid and the grids are
+    # smoothed together in the frequency domain, where a gaussian of any
+    # width is a pointwise product, so the cost doesn't grow with n * points
+    num_cells = len(cells.counts)
+    bandwidths = cell_bandwidths(cells)
+    low = cells.quantile(0) - 3 * bandwidths
+    high = cells.quantile(1) + 3 * bandwidths
+    step = (high - low) / (num_points - 1)
+    grid = low[:, None] + step[:, None] * np.arange(num_points)
+
+    sorted_codes = np.repeat(np.arange(num_cells), cells.counts)
+    pos = (cells.values - low[sorted_codes]) / step[sorted_codes]
+    left = np.clip(np.floor(pos).astype(np.int64), 0, num_points - 2)
+    frac = pos - left
+    flat = sorted_codes * num_points + left
+    binned = (
+        np.bincount(flat, weights=1 - frac, minlength=num_cells * num_points) +
+        np.bincount(flat + 1, weights=frac, minlength=num_cells * num_points))
+    binned = binned.reshape(num_cells, num_points)
+
+    # padding to twice the length keeps the smoothing from wrapping around
+    size = 2 * num_points
+    sigma = (bandwidths / step)[:, None]
+    freqs = np.fft.rfftfreq(size)[None, :]
+    smoothed = np.fft.irfft(
+        np.fft.rfft(binned, size) * np.exp(-2 * (np.pi * sigma * freqs) ** 2),
+        size)[:, :num_points]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        density = np.maximum(smoothed, 0) / (cells.counts * step)[:, None]
+    density[cells.counts == 0] = 0
+    return grid, density
+
+
+def pareto_frontier(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    # indices of the points no other point beats on both x and y (lower
+    # is better), by increasing x
+    #
+    # after sorting by (x, y) a point is on the frontier iff its y is
+    # below every y before it, so one sort and a running min suffice
+    order = np.lexsort((y, x))
+    sorted_y = y[order]
+    best_before = np.concatenate(
+        ([np.inf], np.minimum.accumulate(sorted_y)[:-1]))
+    return order[sorted_y < best_before]
+
+
+def t_quantile(p: float, df: np.ndarray) -> np.ndarray:
+    # quantile p of student's t distribution for each df (>= 1, nan
+    # otherwise), without depending on scipy. 1 and 2 degrees of freedom
+    # have closed forms, the Cornish-Fisher expansion in 1/df is within
+    # 0.2% from 3 on
+    df = np.asarray(df, dtype=np.float64)
+    z = statistics.NormalDist().inv_cdf(p)
+    terms = [
+        (z ** 3 + z) / 4,
+        (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96,
+        (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384,
+        (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 -
+         945 * z) / 92160,
+    ]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = z + sum(term / df ** (i + 1) for i, term in enumerate(terms))
+    t = np.where(df == 1, np.tan(np.pi * (p - 0.5)), t)
+    t = np.where(df == 2, (2 * p - 1) / np.sqrt(2 * p * (1 - p)), t)
+    return np.where(df >= 1, t, np.nan)
+
+
+class OutlierFilter(typing.NamedTuple):
+    method: str
+    param: float
+
+
+def parse_outlier_filter(in_str: str) -> OutlierFilter:
+    # form: 'method' or 'method:param'
+    method, _, param = in_str.replace(" ", "").partition(':')
+    if method not in DEFAULT_OUTLIER_PARAMS:
+        raise inputs.InvalidInputError(
+            "unknown method, expected one of: %s" % (
+                ', '.join(DEFAULT_OUTLIER_PARAMS.keys())),
+            inputs.OUTLIERS_NAME, input_val=in_str)
+    if param == '':
+        return OutlierFilter(
+            method=method, param=DEFAULT_OUTLIER_PARAMS[method])
+    try:
+        value = float(param)
+    except ValueError:
+        raise inputs.InvalidInputError(
+            'parameter must be a number',
+            inputs.OUTLIERS_NAME, input_val=in_str)
+    if value < 0 or (method == TRIM_METHOD and value >= 0.5):
+        raise inputs.InvalidInputError(
+            'parameter out of range',
+            inputs.OUTLIERS_NAME, input_val=in_str)
+    return OutlierFilter(method=method, param=value)
+
+
+def outlier_mask(
+        codes: np.ndarray,
+        values: np.ndarray,
+        num_cells: int,
+        outlier_filter: OutlierFilter) -> np.ndarray:
+    # True for each value kept by the filter
+    cells = sort_cells(codes, values, num_cells)
+    if outlier_filter.method == IQR_METHOD:
+        q1 = cells.quantile(0.25)
+        q3 = cells.quantile(0.75)
+        fence = outlier_filter.param * (q3 - q1)
+        return (
+            (values >= (q1 - fence)[codes]) &
+            (values <= (q3 + fence)[codes]))
+    if outlier_filter.method == MAD_METHOD:
+        median = cells.quantile(0.5)
+        abs_dev = np.abs(values - median[codes])
+        mad = sort_cells(codes, abs_dev, num_cells).quantile(0.5)
+        # 0.6745 makes the MAD consistent with the stddev of a normal dist
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = 0.6745 * abs_dev / mad[codes]
+        return (mad[codes] == 0) | (z <= outlier_filter.param)
+    if outlier_filter.method == TRIM_METHOD:
+        trimmed = np.floor(cells.counts * outlier_filter.param)[codes]
+        ranks = cells.ranks()
+        return (ranks >= trimmed) & (ranks < cells.counts[codes] - trimmed)
+    raise Exception("unexpected outlier method: {}".format(
+        outlier_filter.method))
@@ -0,0 +1,472 @@
+import contextlib
+import os
+import sqlite3
+import time
+import typing
+import gobenchplot.benchmark as benchmark
+
+# history of benchmark results kept in a local sqlite database
+#
+# each ingested file is a run, with an optional label (e.g. a commit) and a
+# timestamp. Every distinct benchmark name (its sub-benchmarks and variable
+# values) is a configuration stored once, with one row per variable indexed
+# on (benchmark, variable, value), and results refer to their configuration.
+# Suites loaded back get two extra variables describing the run, so results
+# can be plotted or grouped by run.
+
+SCHEMA_VERSION = 1
+BATCH_SIZE = 50000  # results inserted per transaction
+
+RUN_VAR = 'run'  # the run's label, or its file if it has none
+RUN_TIME_VAR = 'run_time'  # the run's timestamp, in seconds since the epoch
+RUN_VARS = [RUN_VAR, RUN_TIME_VAR]
+
+SQLITE_MAGIC = b'SQLite format 3\x00'
+
+SCHEMA = '''
+CREATE TABLE runs (
+    id INTEGER PRIMARY KEY,
+    file TEXT,
+    label TEXT,
+    timestamp REAL NOT NULL
+);
+CREATE TABLE benchmarks (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE variables (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE configs (
+    id INTEGER PRIMARY KEY,
+    bench_id INTEGER NOT NULL REFERENCES benchmarks (id),
+    subs TEXT
+);
+CREATE INDEX configs_bench ON configs (bench_id);
+CREATE TABLE config_values (
+    config_id INTEGER NOT NULL REFERENCES configs (id),
+    position INTEGER NOT NULL,
+    bench_id INTEGER NOT NULL REFERENCES benchmarks (id),
+    var_id INTEGER NOT NULL REFERENCES variables (id),
+    value,
+    PRIMARY KEY (config_id, position)
+) WITHOUT ROWID;
+CREATE INDEX config_values_bench_var_value
+    ON config_values (bench_id, var_id, value);
+CREATE TABLE results (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    config_id INTEGER NOT NULL REFERENCES configs (id),
+    runs INTEGER NOT NULL,
+    time REAL NOT NULL,
+    mem_allocs INTEGER,
+    mem_used REAL
+);
+CREATE INDEX results_config ON results (config_id);
+'''
+
+
+class StoreError(Exception):
+    pass
+
+
+class Run(typing.NamedTuple):
+    id: int
+    file: typing.Optional[str]
+    label: typing.Optional[str]
+    timestamp: float
+    results: int
+
+
+def is_store(file: typing.Optional[str]) -> bool:
+    # whether a file is a sqlite database rather than benchmark output
+    if file is None or file in ('', '-') or not os.path.isfile(file):
+        return False
+    with open(file, 'rb') as f:
+        return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+
+
+def connect(path: str) -> sqlite3.Connection:
+    # transactions are managed explicitly, see _transaction
+    conn = sqlite3.connect(path, isolation_level=None)
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version not in (0, SCHEMA_VERSION):
+        conn.close()
+        raise StoreError(
+            '%s has schema version %d, expected %d' % (
+                path, version, SCHEMA_VERSION))
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    if version == 0:
+        with _transaction(conn):
+            for statement in SCHEMA.split(';'):
+                if statement.strip() != '':
+                    conn.execute(statement)
+            conn.execute('PRAGMA user_version = %d' % (SCHEMA_VERSION))
+    return conn
+
+
+@contextlib.contextmanager
+def _transaction(conn: sqlite3.Connection):
+    # takes the write lock up front, so ids read inside stay valid
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+
+def _db_value(value: benchmark.ResValue) -> typing.Union[int, float, str]:
+    # sqlite has no booleans, store them as they were written so they're
+    # parsed back the same way
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return value
+
+
+def _py_value(value: typing.Union[int, float, str]) -> benchmark.ResValue:
+    if isinstance(value, str):
+        return benchmark.var_value(value)
+    return value
+
+
+def _db_subs(subs: typing.Optional[typing.List[str]]) -> typing.Optional[str]:
+    # sub-benchmarks come from splitting the name on '/', so can't contain it
+    return None if subs is None else '/'.join(subs)
+
+
+ConfigKey = typing.Tuple[str, typing.Optional[str], typing.Tuple]
+
+
+def _config_key(
+        bench_name: str,
+        subs: typing.Optional[str],
+        variables: typing.Iterable[
+            typing.Tuple[str, typing.Any]]) -> ConfigKey:
+    # the type is part of the key since 1 == 1.0 == True
+    return (bench_name, subs, tuple(
+        (name, type(value), value) for name, value in variables))
+
+
+class Ingester:
+    # inserts the results of one run, a batch of rows per transaction
+    def __init__(
+            self,
+            conn: sqlite3.Connection,
+            file: typing.Optional[str] = None,
+            label: typing.Optional[str] = None,
+            timestamp: typing.Optional[float] = None,
+            batch_size: int = BATCH_SIZE):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.count = 0
+        self._results: typing.List[typing.Tuple[str, benchmark.BenchRes]] = []
+        # (bench, id of inputs) -> (inputs, config id), cleared with each
+        # batch so it doesn't keep results alive
+        self._seen_inputs: typing.Dict[
+            typing.Tuple[str, int],
+            typing.Tuple[benchmark.BenchInputs, int]] = {}
+        self._load_ids()
+        if timestamp is None:
+            timestamp = time.time()
+        with _transaction(conn):
+            self.run_id = conn.execute(
+                'INSERT INTO runs (file, label, timestamp) VALUES (?, ?, ?)',
+                (file, label, timestamp)).lastrowid
+
+    def _load_ids(self):
+        conn = self.conn
+        self._bench_ids: typing.Dict[str, int] = dict(
+            conn.execute('SELECT name, id FROM benchmarks'))
+        self._var_ids: typing.Dict[str, int] = dict(
+            conn.execute('SELECT name, id FROM variables'))
+        config_values: typing.Dict[int, typing.List] = {}
+        for config_id, name, value in conn.execute(
+                'SELECT config_values.config_id, variables.name, ' +
+                'config_values.value FROM config_values ' +
+                'JOIN variables ON variables.id = config_values.var_id ' +
+                'ORDER BY config_values.config_id, config_values.position'):
+            config_values.setdefault(config_id, []).append(
+                (name, _py_value(value)))
+        self._config_ids: typing.Dict[ConfigKey, int] = {}
+        for config_id, bench_name, subs in conn.execute(
+                'SELECT configs.id, benchmarks.name, configs.subs ' +
+                'FROM configs ' +
+                'JOIN benchmarks ON benchmarks.id = configs.bench_id'):
+            key = _config_key(
+                bench_name, subs, config_values.get(config_id, []))
+            self._config_ids[key] = config_id
+
+    def _id(self, table: str, ids: typing.Dict[str, int], name: str) -> int:
+        id_ = ids.get(name)
+        if id_ is None:
+            id_ = self.conn.execute(
+                'INSERT INTO %s (name) VALUES (?)' % (table),
+                (name,)).lastrowid
+            ids[name] = id_
+        return id_
+
+    def _config_id(self, bench_name: str, res: benchmark.BenchRes) -> int:
+        # the parser shares inputs between results of the same benchmark
+        # name, so most results skip building the key
+        seen = self._seen_inputs.get((bench_name, id(res.inputs)))
+        if seen is not None and seen[0] is res.inputs:
+            return seen[1]
+        subs = _db_subs(res.inputs.subs)
+        key = _config_key(bench_name, subs, (
+            (var.var_name, var.var_value) for var in res.inputs.variables))
+        config_id = self._config_ids.get(key)
+        if config_id is None:
+            config_id = self._insert_config(bench_name, subs, res.inputs)
+            self._config_ids[key] = config_id
+        self._seen_inputs[(bench_name, id(res.inputs))] = (
+            res.inputs, config_id)
+        return config_id
+
+    def _insert_config(
+            self,
+            bench_name: str,
+            subs: typing.Optional[str],
+            res_inputs: benchmark.BenchInputs) -> int:
+        bench_id = self._id('benchmarks', self._bench_ids, bench_name)
+        config_id = self.conn.execute(
+            'INSERT INTO configs (bench_id, subs) VALUES (?, ?)',
+            (bench_id, subs)).lastrowid
+        self.conn.executemany(
+            'INSERT INTO config_values (config_id, position, bench_id, ' +
+            'var_id, value) VALUES (?, ?, ?, ?, ?)',
+            [(config_id, position, bench_id,
+              self._id('variables', self._var_ids, var.var_name),
+              _db_value(var.var_value))
+             for position, var in enumerate(res_inputs.variables)])
+        return config_id
+
+    def add(self, bench_name: str, res: benchmark.BenchRes):
+        self._results.append((bench_name, res))
+        if len(self._results) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if len(self._results) == 0:
+            return
+        try:
+            with _transaction(self.conn):
+                run_id = self.run_id
+                rows = []
+                for bench_name, res in self._results:
+                    outputs = res.outputs
+                    rows.append((
+                        run_id, self._config_id(bench_name, res),
+                        outputs.runs, outputs.time, outputs.mem_allocs,
+                        outputs.mem_used))
+                self.conn.executemany(
+                    'INSERT INTO results (run_id, config_id, runs, time, ' +
+                    'mem_allocs, mem_used) VALUES (?, ?, ?, ?, ?, ?)',
+                    rows)
+        except BaseException:
+            # ids inserted by the rolled back transaction are gone
+            self._load_ids()
+            raise
+        finally:
+            self._seen_inputs = {}
+        self.count += len(self._results)
+        self._results = []
+
+
+def ingest(
+        conn: sqlite3.Connection,
+        results: typing.Iterable[typing.Tuple[str, benchmark.BenchRes]],
+        file: typing.Optional[str] = None,
+        label: typing.Optional[str] = None,
+        timestamp: typing.Optional[float] = None,
+        batch_size: int = BATCH_SIZE) -> Run:
+    # results as yielded by benchmark.iter_bench_results
+    ingester = Ingester(
+        conn, file=file, label=label, timestamp=timestamp,
+        batch_size=batch_size)
+    for bench_name, res in results:
+        ingester.add(bench_name, res)
+    ingester.flush()
+    return Run(
+        id=ingester.run_id, file=file, label=label,
+        timestamp=conn.execute(
+            'SELECT timestamp FROM runs WHERE id = ?',
+            (ingester.run_id,)).fetchone()[0],
+        results=ingester.count)
+
+
+def list_runs(conn: sqlite3.Connection) -> typing.List[Run]:
+    return [
+        Run(*row) for row in conn.execute(
+            'SELECT runs.id, runs.file, runs.label, runs.timestamp, ' +
+            'COUNT(results.id) FROM runs ' +
+            'LEFT JOIN results ON results.run_id = runs.id ' +
+            'GROUP BY runs.id ORDER BY runs.id')]
+
+
+def run_label(
+        run_id: int,
+        file: typing.Optional[str],
+        label: typing.Optional[str]) -> str:
+    if label is not None:
+        return label
+    if file is not None:
+        return os.path.basename(file)
+    return 'run %d' % (run_id)
+
+
+Clauses = typing.Tuple[typing.List[str], typing.List]
+
+
+def _filter_clause(
+        bench_names: typing.Optional[typing.List[str]],
+        filter_by: benchmark.BenchVarValComp) -> typing.Optional[
+            typing.Tuple[str, typing.List]]:
+    # filters the index can answer, the rest are left to the in-memory
+    # filtering applied to the loaded suite anyway
+    name = filter_by.var_val.var_name
+    value = filter_by.var_val.var_value
+    if filter_by.comp == benchmark.Comparison.NE or name in RUN_VARS:
+        return None
+    if filter_by.comp == benchmark.Comparison.EQ:
+        op = '='
+    elif isinstance(value, (int, float)):
+        op = str(filter_by.comp)
+    else:
+        return None
+    clause = 'SELECT config_id FROM config_values WHERE '
+    params: typing.List = []
+    if bench_names is not None:
+        clause += (
+            'bench_id IN (SELECT id FROM benchmarks WHERE name IN (%s)) ' % (
+                ', '.join('?' * len(bench_names))) +
+            'AND ')
+        params.extend(bench_names)
+    column = 'value'
+    if isinstance(value, (int, float)):
+        # bools are stored as text, in memory they compare as 0 and 1
+        column = (
+            "CASE value WHEN 'true' THEN 1 WHEN 'false' THEN 0 " +
+            "ELSE value END")
+        value = int(value) if isinstance(value, bool) else value
+    clause += (
+        'var_id = (SELECT id FROM variables WHERE name = ?) ' +
+        'AND %s %s ?' % (column, op))
+    params.extend([name, _db_value(value)])
+    return 'configs.id IN (%s)' % (clause), params
+
+
+def _config_clauses(
+        bench_names: typing.Optional[typing.List[str]],
+        subs: typing.Optional[typing.List[str]],
+        filter_vars: typing.Optional[typing.List[str]]) -> Clauses:
+    clauses: typing.List[str] = []
+    params: typing.List = []
+    if bench_names is not None:
+        clauses.append('benchmarks.name IN (%s)' % (
+            ', '.join('?' * len(bench_names))))
+        params.extend(bench_names)
+    if subs is not None and len(subs) != 0:
+        clauses.append('configs.subs = ?')
+        params.append(_db_subs(subs))
+    for value in filter_vars or []:
+        clause = _filter_clause(
+            bench_names, benchmark.to_bench_var_val_cmp(value))
+        if clause is not None:
+            clauses.append(clause[0])
+            params.extend(clause[1])
+    return clauses, params
+
+
+def _where(clauses: typing.List[str]) -> str:
+    if len(clauses) == 0:
+        return ''
+    return 'WHERE ' + ' AND '.join(clauses) + ' '
+
+
+def load_suite(
+        conn: sqlite3.Connection,
+        bench_names: typing.Optional[typing.List[str]] = None,
+        subs: typing.Optional[typing.List[str]] = None,
+        filter_vars: typing.Optional[typing.List[str]] = None,
+        labels: typing.Optional[
+            typing.List[str]] = None) -> benchmark.BenchSuite:
+    # results matching the query, in the order they were ingested
+    #
+    # subs and filters are only used to narrow down what's read, they
+    # still need to be applied to the suite
+    clauses, params = _config_clauses(bench_names, subs, filter_vars)
+    var_names = dict(conn.execute('SELECT id, name FROM variables'))
+    config_values: typing.Dict[int, typing.List[benchmark.BenchVarValue]] = {}
+    for config_id, var_id, value in conn.execute(
+            'SELECT config_values.config_id, config_values.var_id, ' +
+            'config_values.value FROM config_values ' +
+            'JOIN configs ON configs.id = config_values.config_id ' +
+            'JOIN benchmarks ON benchmarks.id = configs.bench_id ' +
+            _where(clauses) +
+            'ORDER BY config_values.config_id, config_values.position',
+            params):
+        config_values.setdefault(config_id, []).append(benchmark.BenchVarValue(
+            var_name=var_names[var_id], var_value=_py_value(value)))
+
+    if labels is not None:
+        clauses = clauses + ['runs.label IN (%s)' % (
+            ', '.join('?' * len(labels)))]
+        params = params + labels
+    suite = benchmark.BenchSuite(benchmarks=[])
+    benches: typing.Dict[str, benchmark.Benchmark] = {}
+    # results of a configuration in the same run share their inputs
+    run_inputs: typing.Dict[typing.Tuple[int, int], benchmark.BenchInputs] = {}
+    for row in conn.execute(
+            'SELECT results.config_id, results.run_id, results.runs, ' +
+            'results.time, results.mem_allocs, results.mem_used, ' +
+            'benchmarks.name, configs.subs, ' +
+            'runs.file, runs.label, runs.timestamp FROM results ' +
+            'JOIN configs ON configs.id = results.config_id ' +
+            'JOIN benchmarks ON benchmarks.id = configs.bench_id ' +
+            'JOIN runs ON runs.id = results.run_id ' +
+            _where(clauses) + 'ORDER BY results.id', params):
+        (config_id, run_id, runs, time_op, mem_allocs, mem_used,
+         bench_name, db_subs, file, label, timestamp) = row
+        res_inputs = run_inputs.get((config_id, run_id))
+        if res_inputs is None:
+            res_inputs = benchmark.BenchInputs(
+                variables=config_values.get(config_id, []) + [
+                    benchmark.BenchVarValue(
+                        var_name=RUN_VAR,
+                        var_value=run_label(run_id, file, label)),
+                    benchmark.BenchVarValue(
+                        var_name=RUN_TIME_VAR, var_value=int(timestamp))],
+                subs=None if db_subs is None else db_subs.split('/'))
+            run_inputs[(config_id, run_id)] = res_inputs
+
+        bench = benches.get(bench_name)
+        if bench is None:
+            bench = benchmark.Benchmark(bench_name)
+            benches[bench_name] = bench
+            suite.benchmarks.append(bench)
+        bench.add_result(benchmark.BenchRes(
+            inputs=res_inputs,
+            outputs=benchmark.BenchOutputs(
+                runs=runs, time=time_op, mem_allocs=mem_allocs,
+                mem_used=mem_used)))
+    return suite
+
+
+def read_store(
+        path: str,
+        bench_names: typing.Optional[typing.List[str]] = None,
+        subs: typing.Optional[typing.List[str]] = None,
+        filter_vars: typing.Optional[typing.List[str]] = None,
+        labels: typing.Optional[
+            typing.List[str]] = None) -> benchmark.BenchSuite:
+    conn = connect(path)
+    try:
+        return load_suite(
+            conn, bench_names=bench_names, subs=subs, filter_vars=filter_vars,
+            labels=labels)
+    finally:
+        conn.close()
@@ -0,0 +1,245 @@
+import typing
+import numpy as np
+import gobenchplot.benchmark as benchmark
+import gobenchplot.columns as columns
+import gobenchplot.expr as expr
+import gobenchplot.inputs as inputs
+import gobenchplot.plotdata as plotdata
+import gobenchplot.stats as stats
+
+# aggregates a benchmark's results as they are parsed, without keeping
+# them: each (group, x) cell only has its count, mean, variance, min, max
+# and a fixed size sample of its values, so memory grows with the number
+# of cells rather than the number of results
+#
+# NOTE: this module must not import matplotlib (directly or indirectly)
+
+SKETCH_SIZE = 256  # values sampled from each cell for its quantiles
+BATCH_SIZE = 4096  # results folded into the cells at once
+
+
+class StreamAggregator:
+    def __init__(
+            self,
+            group_by: typing.Union[typing.List[str], str],
+            x_name: str, y_name: str = 'time',
+            subs: typing.List = None,
+            filter_vars: typing.List[str] = None,
+            baseline: typing.List[str] = None,
+            aggregation: str = plotdata.MEAN_AGGREGATION,
+            sketch_size: int = SKETCH_SIZE,
+            batch_size: int = BATCH_SIZE,
+            seed: int = 0):
+        if isinstance(group_by, str):
+            group_by = [group_by]
+        elif not isinstance(group_by, typing.List):
+            raise inputs.InvalidInputError(
+                'invalid type %s' % (type(group_by)),
+                inputs.GROUP_BY_NAME, input_val=group_by)
+        self.group_by = group_by
+        self.x_name = x_name
+        self.y_name = y_name
+        self.subs = subs
+        self.filter_vars = filter_vars
+        self.baseline = baseline
+        self.aggregation = aggregation
+        self._quantile = plotdata.aggregation_quantile(aggregation)
+        self.sketch_size = sketch_size
+        self.batch_size = batch_size
+        self._filters = [
+            benchmark.to_bench_var_val_cmp(value)
+            for value in filter_vars or []]
+        self._y_expr = expr.compile_expr(y_name)
+        self._rng = np.random.default_rng(seed)
+
+        self.num_results = 0  # results folded in so far, filtered or not
+        self._batch: typing.List[benchmark.BenchRes] = []
+        self._group_keys: typing.Dict[str, benchmark.BenchVarValues] = {}
+        self._var_names: typing.Set[str] = set()
+
+        # each cell's index in the accumulators, in the order they appeared
+        self._cell_index: typing.Dict[
+            typing.Tuple[str, benchmark.ResValue], int] = {}
+        self._cell_labels: typing.List[str] = []
+        self._cell_x: typing.List[benchmark.ResValue] = []
+        # allocated ahead of the cells, see _reserve
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._means = np.zeros(0)
+        self._sq_devs = np.zeros(0)  # sum of squared deviations from the mean
+        self._mins = np.zeros(0)
+        self._maxs = np.zeros(0)
+        self._sketches = np.zeros((0, sketch_size))
+
+    @property
+    def num_cells(self) -> int:
+        return len(self._cell_labels)
+
+    def add(self, res: benchmark.BenchRes):
+        self._batch.append(res)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        # folds the buffered results into the cells
+        if len(self._batch) == 0:
+            return
+        cols = columns.BenchColumns.from_results(self._batch)
+        self.num_results += len(self._batch)
+        self._batch = []
+        rows = columns.select_rows(cols, self.subs, self._filters)
+        if len(rows) == 0:
+            return
+
+        # a batch may not include every group variable, its groups are
+        # labelled by the ones it does
+        group_by = [
+            name for name in self.group_by
+            if name in cols.variables and
+            cols.variables[name].present[rows].any()]
+        groups = columns.group_rows(cols, rows, group_by)
+        x = plotdata.columns_x(cols, rows, self.x_name)
+        y = plotdata.columns_y(cols, rows, self._y_expr).astype(np.float64)
+        for key in groups.keys:
+            self._group_keys.setdefault(str(key), key)
+        self._var_names.update(group_by)
+
+        keep = ~np.isnan(y)
+        group_codes, x, y = groups.codes[keep], x[keep], y[keep]
+        if len(y) == 0:
+            return
+        codes, num_cells = stats.cell_codes(group_codes, x)
+        labels = groups.labels()
+        cell_index = np.array([
+            self._cell(labels[group_codes[i]], columns.py_value(x[i]))
+            for i in stats.cell_first_index(codes, num_cells)],
+            dtype=np.int64)
+        self._reserve(self.num_cells)
+        self._fold(cell_index, codes, y)
+
+    def _cell(self, label: str, x: benchmark.ResValue) -> int:
+        index = self._cell_index.get((label, x))
+        if index is None:
+            index = self._cell_index[(label, x)] = self.num_cells
+            self._cell_labels.append(label)
+            self._cell_x.append(x)
+        return index
+
+    def _reserve(self, num_cells: int):
+        # grows the accumulators geometrically, so appearing cells cost
+        # amortized constant time
+        capacity = len(self._counts)
+        if num_cells <= capacity:
+            return
+        extra = max(num_cells, 2 * capacity, 16) - capacity
+        self._counts = np.concatenate(
+            (self._counts, np.zeros(extra, dtype=np.int64)))
+        self._means = np.concatenate((self._means, np.zeros(extra)))
+        self._sq_devs = np.concatenate((self._sq_devs, np.zeros(extra)))
+        self._mins = np.concatenate((self._mins, np.full(extra, np.inf)))
+        self._maxs = np.concatenate((self._maxs, np.full(extra, -np.inf)))
+        self._sketches = np.concatenate((
+            self._sketches, np.full((extra, self.sketch_size), np.nan)))
+
+    def _fold(self, cell_index: np.ndarray, codes: np.ndarray, y: np.ndarray):
+        # codes number the batch's cells, cell_index maps them to the
+        # accumulators
+        counts, means, stddevs = stats.cell_moments(codes, y, len(cell_index))
+        sq_devs = np.where(counts > 1, stddevs ** 2 * (counts - 1), 0.0)
+        prev_counts = self._counts[cell_index]
+
+        # reservoir sampling (algorithm R): the i-th value of a cell
+        # replaces a random sample with probability sketch_size / i, which
+        # keeps every value seen equally likely to be sampled
+        order = np.argsort(codes, kind='stable')
+        arrivals = np.empty(len(codes), dtype=np.int64)
+        arrivals[order] = np.arange(len(codes)) - np.repeat(
+            np.cumsum(counts) - counts, counts)
+        seen = prev_counts[codes] + arrivals
+        slots = np.where(
+            seen < self.sketch_size, seen, self._rng.integers(0, seen + 1))
+        sampled = slots < self.sketch_size
+        # later values of a cell overwrite earlier ones in the same slot,
+        # as they would have one at a time
+        self._sketches[cell_index[codes[sampled]], slots[sampled]] = (
+            y[sampled])
+
+        # Chan et al.'s pairwise update, Welford's for a batch at once
+        total = prev_counts + counts
+        delta = means - self._means[cell_index]
+        self._means[cell_index] += delta * counts / total
+        self._sq_devs[cell_index] += (
+            sq_devs + delta ** 2 * prev_counts * counts / total)
+        self._counts[cell_index] = total
+        np.minimum.at(self._mins, cell_index[codes], y)
+        np.maximum.at(self._maxs, cell_index[codes], y)
+
+    def _aggregates(self) -> np.ndarray:
+        num_cells = self.num_cells
+        if self._quantile is None:
+            return self._means[:num_cells]
+        if self._quantile == 0.0:
+            return self._mins[:num_cells]
+        if self._quantile == 1.0:
+            return self._maxs[:num_cells]
+        # exact while a cell has no more values than its sketch holds
+        return np.nanquantile(
+            self._sketches[:num_cells], self._quantile, axis=1)
+
+    def cell_stats(self) -> typing.Dict[str, plotdata.CellStats]:
+        # the aggregates of each group, ordered by x
+        self.flush()
+        num_cells = self.num_cells
+        counts = self._counts[:num_cells]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stddevs = np.sqrt(self._sq_devs[:num_cells] / (counts - 1))
+        stddevs[counts < 2] = np.nan
+        aggregates = self._aggregates()
+
+        by_label: typing.Dict[str, typing.List[int]] = {}
+        for i, label in enumerate(self._cell_labels):
+            by_label.setdefault(label, []).append(i)
+        cells: typing.Dict[str, plotdata.CellStats] = {}
+        for label, indices in by_label.items():
+            x = np.array([self._cell_x[i] for i in indices])
+            order = np.argsort(x, kind='stable')
+            index = np.array(indices)[order]
+            cells[label] = plotdata.CellStats(
+                x=x[order], y=aggregates[index], n=counts[index],
+                stddev=stddevs[index])
+        return cells
+
+    def bench_data(self, bench_name: str) -> plotdata.BenchData:
+        cells = self.cell_stats()
+        if len(cells) == 0:
+            raise inputs.InvalidInputError(
+                "no results remain",
+                [inputs.FILTER_BY_NAME, inputs.SUBS_NAME],
+                [self.filter_vars, self.subs])
+        for name in self.group_by:
+            if name not in self._var_names:
+                raise inputs.InvalidInputError(
+                    'no variable with that name',
+                    inputs.GROUP_BY_NAME, input_val=name)
+
+        # only the aggregates are kept, so they stand in for the samples
+        data = {
+            label: plotdata.PlotData(x=cell.x, y=cell.y)
+            for label, cell in cells.items()}
+        return plotdata.aggregated_bench_data(
+            benchmark.Benchmark(bench_name), data, cells,
+            self._group_keys.values(), self.x_name, y_name=self.y_name,
+            subs=self.subs, baseline=self.baseline,
+            aggregation=self.aggregation)
+
+
+def aggregate_stream(f, bench_name: str, aggregator: StreamAggregator):
+    # folds the results of bench_name in a `go test -json` stream into
+    # aggregator, other benchmarks' results are parsed and dropped
+    parser = benchmark.ResultParser()
+    for line in f:
+        if not line.strip():
+            continue
+        parsed = parser.feed(line)
+        if parsed is not None and parsed[0] == bench_name:
+            aggregator.add(parsed[1])
+    aggregator.flush()
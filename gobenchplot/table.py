@@ -0,0 +1,210 @@
+import csv
+import json
+import math
+import sys
+import typing
+import gobenchplot.benchmark as benchmark
+import gobenchplot.cache as cache
+import gobenchplot.inputs as inputs
+import gobenchplot.plotdata as plotdata
+import gobenchplot.profiling as profiling
+
+# NOTE: this module must not import matplotlib (directly or indirectly)
+
+CSV_FORMAT = 'csv'
+MARKDOWN_FORMAT = 'markdown'
+JSON_FORMAT = 'json'
+
+TABLE_FORMATS = [CSV_FORMAT, MARKDOWN_FORMAT, JSON_FORMAT]
+
+
+class ParetoRow(typing.NamedTuple):
+    configuration: str
+    x: float
+    y: float
+    n: int
+
+
+class TableRow(typing.NamedTuple):
+    group: str
+    x: benchmark.ResValue
+    y: float
+    n: int
+    stddev: typing.Optional[float]
+
+
+def table_rows(
+        aggregated: typing.Dict[
+            str, plotdata.CellStats]) -> typing.List[TableRow]:
+    rows: typing.List[TableRow] = []
+    for label, cells in aggregated.items():
+        for x, y, n, stddev in zip(
+                cells.x.tolist(), cells.y.tolist(),
+                cells.n.tolist(), cells.stddev.tolist()):
+            rows.append(TableRow(
+                group=label, x=x, y=y, n=n,
+                stddev=None if math.isnan(stddev) else stddev))
+    return rows
+
+
+def _fmt_value(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float):
+        return '%.6g' % (value)
+    return str(value)
+
+
+def write_csv(rows: typing.List[TableRow], header: typing.List[str], file):
+    writer = csv.writer(file, lineterminator='\n')
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow([_fmt_value(value) for value in row])
+
+
+def pareto_rows(pareto_data: plotdata.ParetoData) -> typing.List[ParetoRow]:
+    # the frontier, by increasing x
+    return [
+        ParetoRow(
+            configuration=pareto_data.labels[i], x=float(pareto_data.x[i]),
+            y=float(pareto_data.y[i]), n=int(pareto_data.n[i]))
+        for i in pareto_data.frontier]
+
+
+def write_markdown(
+        rows: typing.List[TableRow], header: typing.List[str], file,
+        num_text_columns: int = 2):
+    def md_row(values: typing.Iterable[str]) -> str:
+        return '| %s |' % (' | '.join(
+            value.replace('|', '\\|') for value in values))
+
+    print(md_row(header), file=file)
+    # left align text columns and right align numeric columns
+    print('|%s|' % ('|'.join(
+        [':---'] * num_text_columns +
+        ['---:'] * (len(header) - num_text_columns))), file=file)
+    for row in rows:
+        print(md_row(_fmt_value(value) for value in row), file=file)
+
+
+def json_table(
+        rows: typing.List[typing.NamedTuple],
+        title: str, x_name: str, y_label: str) -> typing.Dict:
+    return {
+        'benchmark': title,
+        'x': x_name,
+        'y': y_label,
+        'rows': [row._asdict() for row in rows],
+    }
+
+
+def write_json(
+        rows: typing.List[TableRow],
+        title: str, x_name: str, y_label: str, file):
+    json.dump(json_table(rows, title, x_name, y_label), file, indent=2)
+    print(file=file)
+
+
+def write_table(
+        bench_data: plotdata.BenchData,
+        fmt: str = CSV_FORMAT,
+        file=None):
+    if file is None:
+        file = sys.stdout
+    rows = table_rows(bench_data.aggregated)
+    header = ['group', bench_data.x_name, bench_data.y_label, 'n', 'stddev']
+    with profiling.stage('output'):
+        if fmt == CSV_FORMAT:
+            write_csv(rows, header, file)
+        elif fmt == MARKDOWN_FORMAT:
+            write_markdown(rows, header, file)
+        elif fmt == JSON_FORMAT:
+            write_json(
+                rows, bench_data.title, bench_data.x_name,
+                bench_data.y_label, file)
+        else:
+            raise inputs.InvalidInputError(
+                'unknown table format', inputs.TABLE_NAME, input_val=fmt)
+
+
+def write_tables(
+        outputs_data: typing.List[plotdata.BenchData],
+        fmt: str = CSV_FORMAT,
+        file=None):
+    if file is None:
+        file = sys.stdout
+    # one table per output, a json list of them or separated by blank lines
+    if fmt == JSON_FORMAT:
+        json.dump([
+            json_table(
+                table_rows(bench_data.aggregated), bench_data.title,
+                bench_data.x_name, bench_data.y_label)
+            for bench_data in outputs_data], file, indent=2)
+        print(file=file)
+        return
+    for i, bench_data in enumerate(outputs_data):
+        if i != 0:
+            print(file=file)
+        write_table(bench_data, fmt=fmt, file=file)
+
+
+def table_bench(
+        bench: benchmark.Benchmark,
+        group_by: typing.Union[typing.List[str], str],
+        x_name: str, y_name: str = 'time',
+        subs: typing.List = None,
+        filter_vars: typing.List[str] = None,
+        baseline: typing.List[str] = None,
+        outliers: str = None,
+        fmt: str = CSV_FORMAT,
+        file=None,
+        query_cache: cache.QueryCache = None,
+        aggregation: str = plotdata.MEAN_AGGREGATION):
+    bench_data = plotdata.bench_data(
+        bench, group_by, x_name, y_name=y_name, subs=subs,
+        filter_vars=filter_vars, baseline=baseline, outliers=outliers,
+        query_cache=query_cache, aggregation=aggregation)
+    bench_data.report()
+    write_table(bench_data, fmt=fmt, file=file)
+
+
+def write_pareto_table(
+        pareto_data: plotdata.ParetoData,
+        fmt: str = CSV_FORMAT,
+        file=None):
+    if file is None:
+        file = sys.stdout
+    rows = pareto_rows(pareto_data)
+    header = [
+        'configuration', pareto_data.x_name, pareto_data.y_label, 'n']
+    if fmt == CSV_FORMAT:
+        write_csv(rows, header, file)
+    elif fmt == MARKDOWN_FORMAT:
+        write_markdown(rows, header, file, num_text_columns=1)
+    elif fmt == JSON_FORMAT:
+        write_json(
+            rows, pareto_data.title, pareto_data.x_name,
+            pareto_data.y_label, file)
+    else:
+        raise inputs.InvalidInputError(
+            'unknown table format', inputs.TABLE_NAME, input_val=fmt)
+
+
+def table_outputs(
+        bench: benchmark.Benchmark,
+        group_by: typing.Union[typing.List[str], str],
+        x_name: str, y_names: typing.List[str],
+        subs: typing.List = None,
+        filter_vars: typing.List[str] = None,
+        baseline: typing.List[str] = None,
+        outliers: str = None,
+        fmt: str = CSV_FORMAT,
+        file=None,
+        query_cache: cache.QueryCache = None):
+    outputs_data = plotdata.outputs_bench_data(
+        bench, group_by, x_name, y_names, subs=subs,
+        filter_vars=filter_vars, baseline=baseline, outliers=outliers,
+        query_cache=query_cache)
+    for bench_data in outputs_data:
+        bench_data.report()
+    write_tables(outputs_data, fmt=fmt, file=file)
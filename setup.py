@@ -4,6 +4,9 @@ setup(
     name='gobenchplot',
     version='0.1.0',
     packages=['gobenchplot'],
+    extras_require={
+        'arrow': ['pyarrow'],
+    },
     entry_points={
             'console_scripts': [
                 'gobenchplot = gobenchplot.__main__:main',
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+import gobenchplot.arrow as arrow
+import gobenchplot.benchmark as benchmark
+import gobenchplot.columns as columns
+from tests.test_benchmark import sample_bench_results
+from tests.test_columns import mixed_results, sample_res
+from collections import namedtuple
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+
+def sample_suite(results: list) -> benchmark.BenchSuite:
+    bench = benchmark.Benchmark('BenchmarkA')
+    for res in results:
+        bench.add_result(res)
+    other = benchmark.Benchmark('BenchmarkB')
+    other.add_result(sample_res(['c'], {'other': 'x'}, 9.0))
+    return benchmark.BenchSuite(benchmarks=[bench, other])
+
+
+@unittest.skipIf(pa is None, 'pyarrow is not installed')
+class TestColumnar(unittest.TestCase):
+    def test_round_trip(self):
+        TestCase = namedtuple('TestCase', 'results')
+        test_cases = {
+            'subs_and_missing_variables': TestCase(results=mixed_results),
+            'all_outputs': TestCase(results=list(sample_bench_results)),
+            'bool_and_float_values': TestCase(results=[
+                sample_res(None, {'sorted': True, 'load': 0.5}, 1.0),
+                sample_res(None, {'sorted': False, 'load': 1.5}, 2.0),
+            ]),
+            'mixed_values': TestCase(results=[
+                sample_res(None, {'size': 1}, 1.0),
+                sample_res(None, {'size': 'big'}, 2.0),
+            ]),
+            'reserved_name': TestCase(results=[
+                sample_res(None, {'time': 'fast', 'bench': 1}, 1.0),
+            ]),
+        }
+        for test_name, test_case in test_cases.items():
+            for fmt in arrow.COLUMNAR_FORMATS:
+                with self.subTest('%s_%s' % (test_name, fmt)):
+                    with tempfile.TemporaryDirectory() as tmp_dir:
+                        path = os.path.join(tmp_dir, 'results')
+                        arrow.write_columnar(
+                            sample_suite(test_case.results), path, fmt=fmt)
+                        self.assertEqual(fmt, arrow.columnar_format(path))
+                        suite = arrow.read_columnar(path)
+                        self.assertEqual(
+                            ['BenchmarkA', 'BenchmarkB'],
+                            [bench.name for bench in suite.benchmarks])
+                        results = suite.get_benchmark('BenchmarkA').results
+                        self.assertEqual(len(test_case.results), len(results))
+                        self.assertEqual(test_case.results, list(results))
+                        for expected, res in zip(test_case.results, results):
+                            # 1 == 1.0 == True, so compare types too
+                            self.assertEqual(
+                                [type(var.var_value)
+                                 for var in expected.inputs.variables],
+                                [type(var.var_value)
+                                 for var in res.inputs.variables])
+
+    def test_read_columnar_bench_names(self):
+        for fmt in arrow.COLUMNAR_FORMATS:
+            with self.subTest(fmt):
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    path = os.path.join(tmp_dir, 'results')
+                    arrow.write_columnar(
+                        sample_suite(mixed_results), path, fmt=fmt)
+                    suite = arrow.read_columnar(
+                        path, bench_names=['BenchmarkB'])
+                    self.assertEqual(
+                        ['BenchmarkB'],
+                        [bench.name for bench in suite.benchmarks])
+                    cols = columns.bench_columns(suite.benchmarks[0])
+                    self.assertEqual(['other'], cols.var_names)
+                    self.assertEqual([('c',)], cols.subs)
+
+    def test_table_suite_without_metadata(self):
+        # a table written by something else, string values are parsed
+        # like the ones in benchmark names
+        table = pa.table({
+            'bench': ['BenchmarkA', 'BenchmarkB', 'BenchmarkA'],
+            'subs': ['x/y', None, None],
+            'runs': [100, 20, 100],
+            'time': [1.0, 2.0, 3.0],
+            'num_elems': ['1', '2', None],
+            'load': [0.5, None, 1.5],
+        })
+        suite = arrow.table_suite(table)
+        self.assertEqual([
+            sample_res(['x', 'y'], {'num_elems': 1, 'load': 0.5}, 1.0),
+            sample_res(None, {'load': 1.5}, 3.0),
+        ], list(suite.get_benchmark('BenchmarkA').results))
+        self.assertEqual(
+            [20], [res.outputs.runs
+                   for res in suite.get_benchmark('BenchmarkB').results])
+
+    def test_columnar_format(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            json_path = os.path.join(tmp_dir, 'results.json')
+            with open(json_path, 'w') as f:
+                f.write('{}\n')
+            self.assertIsNone(arrow.columnar_format(json_path))
+            self.assertIsNone(arrow.columnar_format('-'))
+            self.assertIsNone(arrow.columnar_format(
+                os.path.join(tmp_dir, 'missing')))
+        self.assertEqual(
+            arrow.ARROW_FORMAT, arrow.format_from_path('results.feather'))
+        self.assertEqual(
+            arrow.PARQUET_FORMAT, arrow.format_from_path('results.PARQUET'))
+        self.assertIsNone(arrow.format_from_path('results.json'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import io
+import json
 import copy
 import gobenchplot.benchmark as benchmark
 import gobenchplot.inputs as inputs
@@ -842,6 +843,33 @@ class TestFilterResults(unittest.TestCase):
                 self.assertEqual(test_case.expected_filtered, filtered)
 
 
+class TestParseBenchVarValue(unittest.TestCase):
+    def test_parse(self):
+        TestCase = collections.namedtuple('TestCase', 'in_str expected_value')
+        test_cases = {
+            'single_eq': TestCase(
+                in_str='finder=map',
+                expected_value=benchmark.BenchVarValue(
+                    var_name='finder', var_value='map')),
+            'double_eq_with_spaces': TestCase(
+                in_str='num_elems == 10',
+                expected_value=benchmark.BenchVarValue(
+                    var_name='num_elems', var_value=10)),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                value = benchmark.parse_bench_var_value(
+                    test_case.in_str, inputs.BASELINE_NAME)
+                self.assertEqual(test_case.expected_value, value)
+
+    def test_parse_raises(self):
+        for in_str in ['finder', '=map', 'finder<map', 'a=b=c']:
+            with self.subTest(in_str):
+                with self.assertRaises(inputs.InvalidInputError):
+                    benchmark.parse_bench_var_value(
+                        in_str, inputs.BASELINE_NAME)
+
+
 class TestVarValue(unittest.TestCase):
     def test_int(self):
         parsed_vals = ['1', '2', '0', '-1', '100']
@@ -1012,6 +1040,64 @@ class TestBenchSuite(unittest.TestCase):
         bench2 = suite.get_benchmark("InvalidBenchmarkName")
         self.assertIsNone(bench2)
 
+    def test_bench_parser(self):
+        input_lines = [
+            r'{"Time":"2020-01-30T12:53:44.276751-06:00","Action":"output","Package":"github.com/SomeUser/somepkg","Output":"BenchmarkMyMethod/some_case/first_var=some_name/second_var=1/third_var=1.00-4         \t"}',
+            r'{"Time":"2020-01-30T17:14:23.859509-06:00","Action":"output","Package":"github.com/SomeUser/somepkg","Output":"161651562\t         7.46 ns/op\t       0 B/op\t       0 allocs/op\n"}',
+            r'{"Time":"2020-01-30T12:53:44.276751-06:00","Action":"output","Package":"github.com/SomeUser/somepkg","Output":"BenchmarkOtherMethod/first_var=some_name-4         \t"}',
+            r'{"Time":"2020-01-30T17:14:23.859509-06:00","Action":"output","Package":"github.com/SomeUser/somepkg","Output":"161651562\t         8.46 ns/op\t       0 B/op\t       0 allocs/op\n"}',
+        ]
+
+        parser = benchmark.BenchParser()
+        # results are visible as soon as their output line is fed
+        self.assertIsNone(parser.feed(input_lines[0]))
+        self.assertEqual(0, len(parser.suite.benchmarks))
+        bench = parser.feed(input_lines[1])
+        self.assertEqual('BenchmarkMyMethod', bench.name)
+        self.assertIs(bench, parser.suite.get_benchmark('BenchmarkMyMethod'))
+        self.assertEqual(1, len(bench.results))
+
+        self.assertIsNone(parser.feed(input_lines[2]))
+        other = parser.feed(input_lines[3])
+        self.assertEqual('BenchmarkOtherMethod', other.name)
+        self.assertEqual(2, len(parser.suite.benchmarks))
+        self.assertEqual(1, len(bench.results))
+
+    def test_iter_bench_results(self):
+        info_line = json.dumps({
+            'Action': 'output', 'Output': 'BenchmarkA/num_elems=1-4  \t'})
+        lines = [
+            info_line,
+            json.dumps({'Action': 'output', 'Output': '100\t  1.5 ns/op\n'}),
+            json.dumps({'Action': 'pass'}),
+            info_line,
+            json.dumps({'Action': 'output', 'Output': '100\t  2.5 ns/op\n'}),
+        ]
+        results = list(benchmark.iter_bench_results(lines))
+        self.assertEqual(
+            [('BenchmarkA', 1.5), ('BenchmarkA', 2.5)],
+            [(name, res.outputs.time) for name, res in results])
+        # repeated benchmark names share their inputs
+        self.assertIs(results[0][1].inputs, results[1][1].inputs)
+
+    def test_iter_bench_results_single_line(self):
+        # newer versions of go may write the name and outputs together
+        lines = [
+            json.dumps({
+                'Action': 'output', 'Output': 'BenchmarkA/num_elems=1\n'}),
+            json.dumps({
+                'Action': 'output',
+                'Output': 'BenchmarkA/num_elems=1-4  \t 100\t  1.5 ns/op\n'}),
+            json.dumps({
+                'Action': 'output', 'Output': 'BenchmarkA/num_elems=1-4  \t'}),
+            json.dumps({'Action': 'output', 'Output': '100\t  2.5 ns/op\n'}),
+        ]
+        results = list(benchmark.iter_bench_results(lines))
+        self.assertEqual(
+            [('BenchmarkA', [1], 1.5), ('BenchmarkA', [1], 2.5)],
+            [(name, [var.var_value for var in res.inputs.variables],
+              res.outputs.time) for name, res in results])
+
     def test_readline_raises(self):
         TestCase = collections.namedtuple(
             'TestCase', 'input_lines expected_err_type')
@@ -0,0 +1,186 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import gobenchplot.benchmark as benchmark
+import gobenchplot.cache as cache
+import gobenchplot.plotdata as plotdata
+from tests.test_benchmark import sample_bench_results
+from collections import namedtuple
+
+
+def sample_bench() -> benchmark.Benchmark:
+    bench = benchmark.Benchmark("BenchmarkMyMethod")
+    for bench_res in sample_bench_results:
+        bench.add_result(bench_res)
+    return bench
+
+
+class TestQueryCache(unittest.TestCase):
+    def test_get_or_compute(self):
+        query_cache = cache.QueryCache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return np.arange(10)
+
+        first = query_cache.get_or_compute('key', compute)
+        second = query_cache.get_or_compute('key', compute)
+        self.assertIs(first, second)
+        self.assertEqual(1, len(calls))
+        self.assertEqual(1, query_cache.hits)
+        self.assertEqual(1, query_cache.misses)
+
+    def test_evicts_least_recently_used(self):
+        value_size = cache.estimate_size(np.zeros(100))
+        query_cache = cache.QueryCache(max_bytes=2 * value_size)
+        query_cache.get_or_compute('a', lambda: np.zeros(100))
+        query_cache.get_or_compute('b', lambda: np.zeros(100))
+        # touch 'a' so that 'b' is the least recently used
+        query_cache.get_or_compute('a', lambda: np.zeros(100))
+        query_cache.get_or_compute('c', lambda: np.zeros(100))
+
+        self.assertEqual(2, len(query_cache))
+        self.assertLessEqual(query_cache.size, query_cache.max_bytes)
+        misses = query_cache.misses
+        query_cache.get_or_compute('a', lambda: np.zeros(100))
+        self.assertEqual(misses, query_cache.misses)
+        query_cache.get_or_compute('b', lambda: np.zeros(100))
+        self.assertEqual(misses + 1, query_cache.misses)
+
+    def test_too_large_not_cached(self):
+        query_cache = cache.QueryCache(max_bytes=10)
+        query_cache.get_or_compute('a', lambda: np.zeros(100))
+        self.assertEqual(0, len(query_cache))
+        self.assertEqual(0, query_cache.size)
+
+
+class TestNormalize(unittest.TestCase):
+    def test_normalize_filters(self):
+        TestCase = namedtuple('TestCase', 'a b')
+        test_cases = {
+            'whitespace': TestCase(
+                a=['num_elems<=10'], b=['num_elems <= 10']),
+            'order': TestCase(
+                a=['a==1', 'b!=2'], b=['b!=2', 'a==1']),
+            'none_and_empty': TestCase(a=None, b=[]),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                self.assertEqual(
+                    cache.normalize_filters(test_case.a),
+                    cache.normalize_filters(test_case.b))
+
+    def test_normalize_group_by(self):
+        self.assertEqual(
+            cache.normalize_group_by('a'), cache.normalize_group_by(['a']))
+        self.assertEqual(
+            cache.normalize_group_by(['b', 'a']),
+            cache.normalize_group_by(['a', 'b']))
+
+
+class TestBenchDataCache(unittest.TestCase):
+    def test_stages_reused(self):
+        bench = sample_bench()
+        query_cache = cache.QueryCache()
+        first = plotdata.bench_data(
+            bench, 'first_var', 'second_var', y_name='time',
+            filter_vars=['second_var>0'], query_cache=query_cache)
+        # filtered, grouped and data stages
+        self.assertEqual(3, query_cache.misses)
+
+        same = plotdata.bench_data(
+            bench, ['first_var'], 'second_var', y_name='time',
+            filter_vars=['second_var > 0'], query_cache=query_cache)
+        self.assertIs(first, same)
+        self.assertEqual(3, query_cache.misses)
+
+        # only the final stage differs
+        plotdata.bench_data(
+            bench, 'first_var', 'second_var', y_name='runs',
+            filter_vars=['second_var>0'], query_cache=query_cache)
+        self.assertEqual(4, query_cache.misses)
+
+    def test_new_results_invalidate(self):
+        bench = sample_bench()
+        query_cache = cache.QueryCache()
+        first = plotdata.bench_data(
+            bench, 'first_var', 'second_var', query_cache=query_cache)
+        bench.add_result(sample_bench_results[0])
+        second = plotdata.bench_data(
+            bench, 'first_var', 'second_var', query_cache=query_cache)
+        self.assertIsNot(first, second)
+        self.assertEqual(3, len(second.data['first_var = some_name'].x))
+
+    def test_other_bench_not_shared(self):
+        query_cache = cache.QueryCache()
+        first = plotdata.bench_data(
+            sample_bench(), 'first_var', 'second_var',
+            query_cache=query_cache)
+        other = sample_bench()
+        other.add_result(sample_bench_results[0])
+        second = plotdata.bench_data(
+            other, 'first_var', 'second_var', query_cache=query_cache)
+        self.assertIsNot(first, second)
+
+
+class TestDigest(unittest.TestCase):
+    def test_digest(self):
+        TestCase = namedtuple('TestCase', 'a b expected_equal')
+        test_cases = {
+            'same_arrays': TestCase(
+                a=(np.arange(3), {'x': [1.0]}),
+                b=(np.arange(3), {'x': [1.0]}), expected_equal=True),
+            'different_values': TestCase(
+                a=(np.arange(3),), b=(np.arange(1, 4),),
+                expected_equal=False),
+            'different_dtypes': TestCase(
+                a=(np.arange(3),), b=(np.arange(3, dtype=float),),
+                expected_equal=False),
+            'str_and_int': TestCase(a=('1',), b=(1,), expected_equal=False),
+            'nesting': TestCase(
+                a=([1, 2], 3), b=([1], 2, 3), expected_equal=False),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                self.assertEqual(
+                    test_case.expected_equal,
+                    cache.digest(*test_case.a) == cache.digest(*test_case.b))
+
+
+class TestRenderCache(unittest.TestCase):
+    def put_file(self, render_cache, key, size):
+        path = render_cache.temp_path('svg')
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+        return render_cache.put(key, 'svg', path)
+
+    def test_get_put(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            render_cache = cache.RenderCache(tmp_dir)
+            self.assertIsNone(render_cache.get('a', 'svg'))
+            path = self.put_file(render_cache, 'a', 10)
+            self.assertEqual(path, render_cache.get('a', 'svg'))
+            self.assertIsNone(render_cache.get('a', 'png'))
+            self.assertEqual((1, 2), (render_cache.hits, render_cache.misses))
+            # the temporary file was moved into place
+            self.assertEqual(['a.svg'], os.listdir(tmp_dir))
+
+    def test_evicts_least_recently_used(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            render_cache = cache.RenderCache(tmp_dir, max_bytes=20)
+            for i, key in enumerate(['a', 'b']):
+                path = self.put_file(render_cache, key, 10)
+                os.utime(path, (i, i))
+            # getting 'a' makes 'b' the least recently used
+            render_cache.get('a', 'svg')
+            self.put_file(render_cache, 'c', 10)
+            self.assertLessEqual(render_cache.size(), 20)
+            self.assertIsNotNone(render_cache.get('a', 'svg'))
+            self.assertIsNone(render_cache.get('b', 'svg'))
+            self.assertIsNotNone(render_cache.get('c', 'svg'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,238 @@
+import typing
+import unittest
+import numpy as np
+import gobenchplot.benchmark as benchmark
+import gobenchplot.columns as columns
+import gobenchplot.inputs as inputs
+from tests.test_benchmark import sample_bench_results, sample_bench_results_no_mem
+from collections import namedtuple
+
+
+def sample_res(
+        subs: typing.Optional[typing.List[str]],
+        variables: typing.Dict[str, benchmark.ResValue],
+        time: float) -> benchmark.BenchRes:
+    return benchmark.BenchRes(
+        inputs=benchmark.BenchInputs(
+            subs=subs,
+            variables=[
+                benchmark.BenchVarValue(var_name=name, var_value=value)
+                for name, value in variables.items()]),
+        outputs=benchmark.BenchOutputs(
+            runs=100, time=time, mem_used=None, mem_allocs=None))
+
+
+mixed_results = [
+    sample_res(['a'], {'finder': 'map', 'num_elems': 1}, 1.0),
+    sample_res(['a'], {'finder': 'slice', 'num_elems': 1}, 2.0),
+    sample_res(['b'], {'finder': 'map', 'num_elems': 2}, 3.0),
+    sample_res(['a'], {'finder': 'map', 'num_elems': 2}, 4.0),
+    sample_res(None, {'num_elems': 3}, 5.0),
+]
+
+
+class TestBenchColumns(unittest.TestCase):
+    def test_column(self):
+        TestCase = namedtuple('TestCase', 'results name expected_column')
+        test_cases = {
+            'output': TestCase(
+                results=sample_bench_results,
+                name='time',
+                expected_column=np.array([7.46, 8.46])),
+            'int_variable': TestCase(
+                results=sample_bench_results,
+                name='second_var',
+                expected_column=np.array([1, 2])),
+            'str_variable': TestCase(
+                results=sample_bench_results,
+                name='first_var',
+                expected_column=np.array(['some_name', 'some_name'])),
+            'float_variable': TestCase(
+                results=sample_bench_results,
+                name='third_var',
+                expected_column=np.array([1.00, 1.01])),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                cols = columns.BenchColumns.from_results(test_case.results)
+                column = cols.column(test_case.name)
+                self.assertTrue(
+                    np.array_equal(test_case.expected_column, column))
+                self.assertEqual(
+                    test_case.expected_column.dtype.kind, column.dtype.kind)
+
+    def test_column_raises(self):
+        TestCase = namedtuple('TestCase', 'results name')
+        test_cases = {
+            'unknown_variable': TestCase(
+                results=sample_bench_results,
+                name='fake_var'),
+            'missing_output': TestCase(
+                results=sample_bench_results_no_mem,
+                name='mem_allocs'),
+            'variable_not_in_every_row': TestCase(
+                results=mixed_results,
+                name='finder'),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                cols = columns.BenchColumns.from_results(test_case.results)
+                with self.assertRaises(KeyError):
+                    cols.column(test_case.name)
+
+    def test_extend(self):
+        whole = columns.BenchColumns.from_results(mixed_results)
+        extended = columns.BenchColumns.from_results(mixed_results[:2]).extend(
+            columns.BenchColumns.from_results(mixed_results[2:]))
+        self.assertEqual(len(whole), len(extended))
+        self.assertEqual(whole.var_names, extended.var_names)
+        for name in whole.var_names:
+            with self.subTest(name):
+                self.assertTrue(np.array_equal(
+                    whole.variables[name].present,
+                    extended.variables[name].present))
+                present = whole.variables[name].present
+                self.assertTrue(np.array_equal(
+                    whole.variables[name].values[present],
+                    extended.variables[name].values[present]))
+        self.assertEqual(
+            [whole.subs[code] for code in whole.subs_codes],
+            [extended.subs[code] for code in extended.subs_codes])
+
+    def test_bench_columns_extended_with_new_results(self):
+        bench = benchmark.Benchmark('BenchmarkMyMethod')
+        bench.add_result(mixed_results[0])
+        first = columns.bench_columns(bench)
+        self.assertIs(first, columns.bench_columns(bench))
+        bench.add_result(mixed_results[1])
+        second = columns.bench_columns(bench)
+        self.assertEqual(2, len(second))
+        self.assertTrue(np.array_equal(
+            np.array(['map', 'slice']), second.column('finder')))
+
+
+class TestSelectRows(unittest.TestCase):
+    def test_select_rows(self):
+        TestCase = namedtuple('TestCase', 'subs filters expected_rows')
+        test_cases = {
+            'no_filters': TestCase(
+                subs=None, filters=[], expected_rows=[0, 1, 2, 3, 4]),
+            'subs': TestCase(
+                subs=['a'], filters=[], expected_rows=[0, 1, 3]),
+            'unknown_subs': TestCase(
+                subs=['c'], filters=[], expected_rows=[]),
+            'eq': TestCase(
+                subs=None, filters=['finder==map'], expected_rows=[0, 2, 3]),
+            'ne_includes_missing': TestCase(
+                subs=None, filters=['finder!=map'], expected_rows=[1, 4]),
+            'le': TestCase(
+                subs=None, filters=['num_elems<=1'], expected_rows=[0, 1]),
+            'gt_and_subs': TestCase(
+                subs=['a'], filters=['num_elems>1'], expected_rows=[3]),
+            'eq_wrong_type': TestCase(
+                subs=None, filters=['finder==1'], expected_rows=[]),
+            'unknown_variable': TestCase(
+                subs=None, filters=['fake_var==1'], expected_rows=[]),
+        }
+        cols = columns.BenchColumns.from_results(mixed_results)
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                rows = columns.select_rows(
+                    cols, test_case.subs,
+                    [benchmark.parse_bench_var_val_cmp(value)
+                     for value in test_case.filters])
+                self.assertEqual(test_case.expected_rows, rows.tolist())
+
+    def test_select_rows_raises(self):
+        cols = columns.BenchColumns.from_results(mixed_results)
+        with self.assertRaises(inputs.InvalidInputError):
+            columns.select_rows(
+                cols, None, [benchmark.parse_bench_var_val_cmp('finder<1')])
+
+
+class TestGroupRows(unittest.TestCase):
+    def test_group_rows(self):
+        TestCase = namedtuple(
+            'TestCase', 'rows group_by expected_codes expected_labels')
+        test_cases = {
+            'single_var': TestCase(
+                rows=[0, 1, 2, 3],
+                group_by='finder',
+                expected_codes=[0, 1, 0, 0],
+                expected_labels=['finder = map', 'finder = slice']),
+            'order_of_appearance': TestCase(
+                rows=[1, 2, 3],
+                group_by=['finder'],
+                expected_codes=[0, 1, 1],
+                expected_labels=['finder = slice', 'finder = map']),
+            'multiple_vars': TestCase(
+                rows=[0, 1, 2, 3],
+                group_by=['num_elems', 'finder'],
+                expected_codes=[0, 1, 2, 2],
+                expected_labels=[
+                    'finder = map, num_elems = 1',
+                    'finder = slice, num_elems = 1',
+                    'finder = map, num_elems = 2']),
+            'missing_var': TestCase(
+                rows=[0, 4],
+                group_by='finder',
+                expected_codes=[0, 1],
+                expected_labels=['finder = map', '']),
+        }
+        cols = columns.BenchColumns.from_results(mixed_results)
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                groups = columns.group_rows(
+                    cols, np.array(test_case.rows), test_case.group_by)
+                self.assertEqual(test_case.expected_codes, groups.codes.tolist())
+                self.assertEqual(test_case.expected_labels, groups.labels())
+
+    def test_group_rows_raises(self):
+        cols = columns.BenchColumns.from_results(mixed_results)
+        for group_by in ['fake_var', ['finder', 'fake_var'], None]:
+            with self.subTest(str(group_by)):
+                with self.assertRaises(inputs.InvalidInputError):
+                    columns.group_rows(cols, np.arange(len(cols)), group_by)
+
+    def test_subs_rows(self):
+        cols = columns.BenchColumns.from_results(mixed_results)
+        codes, subs = columns.subs_rows(cols, np.array([2, 4, 0, 1, 3]))
+        self.assertEqual([0, 1, 2, 2, 2], codes.tolist())
+        self.assertEqual([('b',), None, ('a',)], subs)
+
+    def test_config_rows(self):
+        cols = columns.BenchColumns.from_results(mixed_results)
+        codes, labels = columns.config_rows(cols, np.array([4, 0, 2, 3, 1]))
+        self.assertEqual([0, 1, 2, 3, 4], codes.tolist())
+        self.assertEqual([
+            'num_elems = 3',
+            'a: finder = map, num_elems = 1',
+            'b: finder = map, num_elems = 2',
+            'a: finder = map, num_elems = 2',
+            'a: finder = slice, num_elems = 1',
+        ], labels)
+        codes, labels = columns.config_rows(
+            cols, np.array([0, 0, 1]))
+        self.assertEqual([0, 0, 1], codes.tolist())
+
+    def test_split_codes(self):
+        split = columns.split_codes(
+            np.array([2, 0, 2, 0]), 4, np.array([1, 2, 3, 4]))
+        self.assertEqual(
+            [[2, 4], [], [1, 3], []], [arr.tolist() for arr, in split])
+
+    def test_split_groups(self):
+        groups = columns.ColumnGroups(
+            codes=np.array([0, 1, 0, 1, 0]),
+            keys=[benchmark.BenchVarValues([]), benchmark.BenchVarValues([])])
+        split = columns.split_groups(
+            groups, np.array([1, 2, 3, 4, 5]), np.array([10, 20, 30, 40, 50]))
+        self.assertEqual(2, len(split))
+        self.assertEqual([1, 3, 5], split[0][0].tolist())
+        self.assertEqual([10, 30, 50], split[0][1].tolist())
+        self.assertEqual([2, 4], split[1][0].tolist())
+        self.assertEqual([20, 40], split[1][1].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
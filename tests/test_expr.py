@@ -0,0 +1,86 @@
+import unittest
+import numpy as np
+import gobenchplot.expr as expr
+import gobenchplot.inputs as inputs
+from collections import namedtuple
+
+sample_columns = {
+    'time': np.array([10.0, 20.0, 40.0]),
+    'mem_used': np.array([8.0, 16.0, 32.0]),
+    'mem_allocs': np.array([1.0, 2.0, 0.0]),
+    'num_elems': np.array([1, 2, 4]),
+    'finder': np.array(['map', 'slice', 'map']),
+}
+
+
+class TestYExpr(unittest.TestCase):
+    def test_evaluate(self):
+        TestCase = namedtuple(
+            'TestCase', 'text expected_y expected_names expected_field')
+        test_cases = {
+            'single_output': TestCase(
+                text='time',
+                expected_y=np.array([10.0, 20.0, 40.0]),
+                expected_names=('time',),
+                expected_field='time'),
+            'time_per_elem': TestCase(
+                text='time/num_elems',
+                expected_y=np.array([10.0, 10.0, 10.0]),
+                expected_names=('time', 'num_elems'),
+                expected_field=None),
+            'ops_per_second': TestCase(
+                text='1e9 / time',
+                expected_y=np.array([1e8, 5e7, 2.5e7]),
+                expected_names=('time',),
+                expected_field=None),
+            'precedence': TestCase(
+                text='time + mem_used * 2 - -1',
+                expected_y=np.array([27.0, 53.0, 105.0]),
+                expected_names=('time', 'mem_used'),
+                expected_field=None),
+            'parens_and_power': TestCase(
+                text='(num_elems + 1) ** 2',
+                expected_y=np.array([4.0, 9.0, 25.0]),
+                expected_names=('num_elems',),
+                expected_field=None),
+            'function': TestCase(
+                text='log2(num_elems)',
+                expected_y=np.array([0.0, 1.0, 2.0]),
+                expected_names=('num_elems',),
+                expected_field=None),
+            'divide_by_zero': TestCase(
+                text='mem_used/mem_allocs',
+                expected_y=np.array([8.0, 8.0, np.inf]),
+                expected_names=('mem_used', 'mem_allocs'),
+                expected_field=None),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                y_expr = expr.compile_expr(test_case.text)
+                y = y_expr.evaluate(lambda name: sample_columns[name])
+                self.assertTrue(np.array_equal(test_case.expected_y, y))
+                self.assertEqual(test_case.expected_names, y_expr.names)
+                self.assertEqual(test_case.expected_field, y_expr.field())
+
+    def test_compile_raises(self):
+        test_cases = {
+            'empty': '',
+            'constant': '1 + 2',
+            'unbalanced': '(time / num_elems',
+            'trailing_op': 'time /',
+            'unknown_char': 'time % 2',
+            'unknown_function': 'floor(time)',
+        }
+        for test_name, text in test_cases.items():
+            with self.subTest(test_name):
+                with self.assertRaises(inputs.InvalidInputError):
+                    expr.compile_expr(text)
+
+    def test_evaluate_non_numeric_raises(self):
+        y_expr = expr.compile_expr('time/finder')
+        with self.assertRaises(inputs.InvalidInputError):
+            y_expr.evaluate(lambda name: sample_columns[name])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,282 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+import numpy as np
+import gobenchplot.__main__ as gobenchplot
+import gobenchplot.benchmark as benchmark
+import gobenchplot.inputs as inputs
+import gobenchplot.live as live
+import gobenchplot.plotdata as plotdata
+from tests.test_table import sample_res
+from collections import namedtuple
+
+
+sample_results = [
+    sample_res('map', 1, 1.0),
+    sample_res('slice', 1, 4.0),
+    sample_res('map', 1, 3.0),
+    sample_res('map', 2, 5.0),
+    sample_res('slice', 2, 2.0),
+    sample_res('map', 2, 9.0),
+    sample_res('slice', 1, 6.0),
+]
+
+
+def bench_output_lines(name: str, results) -> str:
+    # test2json lines as written by `go test -json`
+    lines = []
+    for res in results:
+        full_name = '/'.join([name] + [
+            str(value) for value in res.inputs.variables])
+        lines.append(json.dumps({
+            'Action': 'output',
+            'Output': '%s-4         \t' % (full_name.replace(' ', ''))}))
+        lines.append(json.dumps({
+            'Action': 'output',
+            'Output': '%d\t  %s ns/op\n' % (
+                res.outputs.runs, res.outputs.time)}))
+    return '\n'.join(lines) + '\n'
+
+
+class TestLiveQuery(unittest.TestCase):
+    def test_update(self):
+        TestCase = namedtuple('TestCase', 'batch_sizes baseline')
+        test_cases = {
+            'single_batch': TestCase(batch_sizes=[7], baseline=None),
+            'single_results': TestCase(
+                batch_sizes=[1, 1, 1, 1, 1, 1, 1], baseline=None),
+            'uneven_batches': TestCase(batch_sizes=[2, 4, 1], baseline=None),
+            'baseline': TestCase(
+                batch_sizes=[3, 4], baseline=['finder=map']),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                bench = benchmark.Benchmark('BenchmarkDedupe')
+                query = live.LiveQuery(
+                    'finder', 'num_elems', baseline=test_case.baseline)
+                for size in test_case.batch_sizes:
+                    for res in sample_results[
+                            len(bench.results):len(bench.results) + size]:
+                        bench.add_result(res)
+                    self.assertTrue(query.update(bench))
+                self.assertFalse(query.update(bench))
+
+                expected = plotdata.bench_data(
+                    bench, 'finder', 'num_elems',
+                    baseline=test_case.baseline)
+                bench_data = query.bench_data(bench)
+                self.assertEqual(expected.y_label, bench_data.y_label)
+                self.assertEqual(
+                    list(expected.aggregated.keys()),
+                    list(bench_data.aggregated.keys()))
+                for label, cells in expected.aggregated.items():
+                    for field in plotdata.CellStats._fields:
+                        self.assertTrue(np.allclose(
+                            getattr(cells, field),
+                            getattr(bench_data.aggregated[label], field),
+                            equal_nan=True))
+
+    def test_update_filtered(self):
+        bench = benchmark.Benchmark('BenchmarkDedupe')
+        query = live.LiveQuery(
+            'finder', 'num_elems', filter_vars=['finder==slice'])
+        bench.add_result(sample_results[0])
+        self.assertFalse(query.update(bench))
+        bench.add_result(sample_results[1])
+        self.assertTrue(query.update(bench))
+        self.assertEqual(
+            ['finder = slice'], list(query.bench_data(bench).aggregated))
+
+    def test_bench_data_raises(self):
+        TestCase = namedtuple('TestCase', 'group_by filter_vars baseline')
+        test_cases = {
+            'no_results': TestCase(
+                group_by='finder', filter_vars=['finder==fake'],
+                baseline=None),
+            'unknown_group_by': TestCase(
+                group_by='fake_var', filter_vars=None, baseline=None),
+            'baseline_not_run': TestCase(
+                group_by='finder', filter_vars=None,
+                baseline=['finder=slice']),
+        }
+        bench = benchmark.Benchmark('BenchmarkDedupe')
+        bench.add_result(sample_results[0])
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                query = live.LiveQuery(
+                    test_case.group_by, 'num_elems',
+                    filter_vars=test_case.filter_vars,
+                    baseline=test_case.baseline)
+                query.update(bench)
+                with self.assertRaises(inputs.InvalidInputError):
+                    query.bench_data(bench)
+
+
+class TestLiveReader(unittest.TestCase):
+    def test_run(self):
+        reader = live.LiveReader(io.StringIO(
+            bench_output_lines('BenchmarkDedupe', sample_results)))
+        reader.start()
+        self.assertTrue(reader.done.wait(10))
+        self.assertIsNone(reader.error)
+        bench = reader.suite.get_benchmark('BenchmarkDedupe')
+        self.assertEqual(sample_results, list(bench.results))
+
+    def test_run_error(self):
+        reader = live.LiveReader(io.StringIO(json.dumps({
+            'Action': 'output', 'Output': '100\t  1 ns/op\n'}) + '\n'))
+        reader.start()
+        self.assertTrue(reader.done.wait(10))
+        self.assertIsInstance(reader.error, benchmark.ParseBenchmarkError)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def write_results(path: str, results, mode: str = 'a'):
+    with open(path, mode) as f:
+        f.write(bench_output_lines('BenchmarkDedupe', results))
+
+
+def bench_results(watcher: live.FileWatcher) -> list:
+    bench = watcher.suite.get_benchmark('BenchmarkDedupe')
+    return [] if bench is None else list(bench.results)
+
+
+class TestFileWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, 'tmp.txt')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_poll(self):
+        watcher = live.FileWatcher(self.path)
+        self.assertFalse(watcher.poll())
+
+        write_results(self.path, sample_results[:2])
+        self.assertTrue(watcher.poll())
+        self.assertEqual(sample_results[:2], bench_results(watcher))
+        self.assertFalse(watcher.poll())
+
+        # a partial line waits for the rest of it
+        lines = bench_output_lines('BenchmarkDedupe', sample_results[2:4])
+        partial = lines[:-10]
+        offset = watcher.offset
+        with open(self.path, 'a') as f:
+            f.write(partial)
+        self.assertTrue(watcher.poll())
+        self.assertEqual(sample_results[:3], bench_results(watcher))
+        self.assertEqual(offset + partial.rfind('\n') + 1, watcher.offset)
+        self.assertFalse(watcher.poll())
+        with open(self.path, 'a') as f:
+            f.write(lines[-10:])
+        self.assertTrue(watcher.poll())
+        self.assertEqual(sample_results[:4], bench_results(watcher))
+        self.assertEqual(os.path.getsize(self.path), watcher.offset)
+
+    def test_poll_replaced(self):
+        TestCase = namedtuple('TestCase', 'replace')
+
+        def truncate(path: str):
+            write_results(path, sample_results[5:], mode='w')
+
+        def rotate(path: str):
+            os.rename(path, path + '.1')
+            write_results(path, sample_results[5:])
+
+        def replace(path: str):
+            write_results(path + '.new', sample_results[5:])
+            os.replace(path + '.new', path)
+
+        test_cases = {
+            'truncated': TestCase(replace=truncate),
+            'rotated': TestCase(replace=rotate),
+            'replaced': TestCase(replace=replace),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                write_results(self.path, sample_results, mode='w')
+                watcher = live.FileWatcher(self.path)
+                self.assertTrue(watcher.poll())
+                test_case.replace(self.path)
+                self.assertTrue(watcher.poll())
+                self.assertEqual(sample_results[5:], bench_results(watcher))
+
+    def test_ready(self):
+        clock = FakeClock()
+        watcher = live.FileWatcher(
+            self.path, debounce=1.0, max_delay=3.0, clock=clock)
+        self.assertFalse(watcher.ready())
+
+        # appends keep holding off the redraw, up to max_delay
+        for i, res in enumerate(sample_results[:4]):
+            clock.now = i * 0.8
+            write_results(self.path, [res])
+            watcher.poll()
+            self.assertFalse(watcher.ready())
+        clock.now = 3.0
+        self.assertTrue(watcher.ready())
+        watcher.rendered()
+        self.assertFalse(watcher.ready())
+
+        write_results(self.path, sample_results[4:5])
+        watcher.poll()
+        clock.now = 3.5
+        self.assertFalse(watcher.ready())
+        clock.now = 4.0
+        self.assertTrue(watcher.ready())
+
+    def test_watch(self):
+        write_results(self.path, sample_results[:2], mode='w')
+        watcher = live.FileWatcher(self.path, debounce=0)
+        stop = threading.Event()
+        rendered = []
+
+        def render(suite: benchmark.BenchSuite):
+            rendered.append(
+                len(suite.get_benchmark('BenchmarkDedupe').results))
+            if len(rendered) == 1:
+                write_results(self.path, sample_results[2:])
+            else:
+                stop.set()
+
+        live.watch(watcher, render, interval=0, stop=stop)
+        self.assertEqual([2, len(sample_results)], rendered)
+
+
+class TestMainLive(unittest.TestCase):
+    def test_main_live_raises(self):
+        TestCase = namedtuple('TestCase', 'args')
+        test_cases = {
+            'html': TestCase(args=['-o', 'report.html']),
+            'table': TestCase(args=['--table']),
+        }
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'results.json')
+            with open(path, 'w') as f:
+                f.write(bench_output_lines('BenchmarkDedupe', sample_results))
+            for test_name, test_case in test_cases.items():
+                with self.subTest(test_name):
+                    stderr = io.StringIO()
+                    with contextlib.redirect_stderr(stderr):
+                        status = gobenchplot.main([
+                            path, '--bench', 'BenchmarkDedupe',
+                            '--x', 'num_elems', '--group-by', 'finder',
+                            '--live'] + test_case.args)
+                    self.assertEqual(1, status)
+                    self.assertIn('not supported', stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import re
+import unittest
+import numpy as np
+import gobenchplot.benchmark as benchmark
+import gobenchplot.inputs as inputs
+import gobenchplot.planner as planner
+from tests.test_columns import sample_res
+from collections import namedtuple
+
+
+def go_matches(bench_regex: str, name: str) -> bool:
+    # how `go test -bench` matches a benchmark's name, one level at a time
+    levels = name.split('/')
+    patterns = bench_regex.split('/')
+    return len(levels) >= len(patterns) and all(
+        re.search(pattern, level)
+        for pattern, level in zip(patterns, levels))
+
+
+def sample_suite(times: dict) -> benchmark.BenchSuite:
+    # times of each (finder, num_elems) configuration
+    bench = benchmark.Benchmark('BenchmarkFind')
+    for (finder, num_elems), config_times in times.items():
+        for time in config_times:
+            bench.add_result(sample_res(
+                ['case'], {'finder': finder, 'num_elems': num_elems}, time))
+    return benchmark.BenchSuite(benchmarks=[bench])
+
+
+class TestRunsNeeded(unittest.TestCase):
+    def test_runs_needed(self):
+        TestCase = namedtuple('TestCase', 'n cv expected')
+        test_cases = {
+            'stable': TestCase(n=3, cv=0.001, expected=0),
+            'no_cv': TestCase(n=1, cv=np.nan, expected=2),
+            # 2.447 * 0.05 / sqrt(7) <= 0.05 < 2.571 * 0.05 / sqrt(6)
+            'noisy': TestCase(n=3, cv=0.05, expected=4),
+            'capped': TestCase(n=3, cv=1.0, expected=17),
+            'already_past_max': TestCase(n=30, cv=1.0, expected=0),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                runs = planner.runs_needed(
+                    np.array([test_case.n]), np.array([test_case.cv]),
+                    target=0.05)
+                self.assertEqual([test_case.expected], runs.tolist())
+
+    def test_round_count(self):
+        self.assertEqual(
+            [1, 2, 3, 5, 5, 8, 12, 18, 20],
+            [planner.round_count(runs)
+             for runs in [1, 2, 3, 4, 5, 6, 9, 13, 19]])
+
+
+class TestValueRegex(unittest.TestCase):
+    def test_value_regex(self):
+        TestCase = namedtuple('TestCase', 'value names')
+        test_cases = {
+            'int': TestCase(value=10, names=['10']),
+            'bool': TestCase(value=True, names=['true']),
+            'string': TestCase(value='a.b', names=['a.b']),
+            'float': TestCase(value=0.5, names=['0.5']),
+            'float_exponent': TestCase(
+                value=1e6, names=['1e+06', '1000000.0']),
+            'small_float': TestCase(value=1.5e-5, names=['1.5e-05']),
+            # e.g. a variable whose other values aren't whole
+            'whole_float': TestCase(value=2.0, names=['2', '2.0']),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                regex = '^%s$' % (planner.value_regex(test_case.value))
+                for name in test_case.names:
+                    self.assertTrue(re.search(regex, name), name)
+                self.assertFalse(re.search(regex, 'x'))
+
+
+class TestPlan(unittest.TestCase):
+    def test_plan_cells(self):
+        suite = sample_suite({
+            ('map', 1): [100.0, 100.1, 99.9],
+            ('map', 2): [100.0, 150.0, 50.0],
+            ('slice', 1): [100.0],
+        })
+        cells = planner.plan_cells(suite)
+        self.assertEqual(
+            ['case: finder = map, num_elems = 1',
+             'case: finder = map, num_elems = 2',
+             'case: finder = slice, num_elems = 1'],
+            [cell.config for cell in cells])
+        self.assertEqual([3, 3, 1], [cell.n for cell in cells])
+        self.assertEqual([0, 17, 2], [cell.runs for cell in cells])
+        self.assertAlmostEqual(0.5, cells[1].cv)
+        # 4.303 * 0.5 / sqrt(3)
+        self.assertAlmostEqual(1.242, cells[1].ci_width, places=3)
+        self.assertTrue(np.isnan(cells[2].cv))
+
+    def test_plan_cells_raises(self):
+        TestCase = namedtuple('TestCase', 'kwargs')
+        test_cases = {
+            'target': TestCase(kwargs={'target': 0}),
+            'confidence': TestCase(kwargs={'confidence': 1}),
+            'min_runs': TestCase(kwargs={'min_runs': 1}),
+            'max_runs': TestCase(kwargs={'min_runs': 5, 'max_runs': 4}),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                with self.assertRaises(inputs.InvalidInputError):
+                    planner.plan_cells(
+                        sample_suite({('map', 1): [1.0]}), **test_case.kwargs)
+
+    def test_plan_invocations(self):
+        TestCase = namedtuple('TestCase', 'times expected_invocations')
+        noisy = [100.0, 150.0, 50.0]
+        stable = [100.0, 100.1, 99.9]
+        test_cases = {
+            'grid': TestCase(
+                times={
+                    ('map', 1): noisy, ('map', 2): noisy,
+                    ('slice', 1): noisy, ('slice', 2): noisy},
+                expected_invocations=1),
+            'one_stable': TestCase(
+                times={
+                    ('map', 1): noisy, ('map', 2): noisy,
+                    ('slice', 1): noisy, ('slice', 2): stable},
+                expected_invocations=2),
+            'different_counts': TestCase(
+                times={
+                    ('map', 1): noisy, ('map', 2): noisy,
+                    ('slice', 1): [100.0], ('slice', 2): stable},
+                expected_invocations=2),
+            'none_needed': TestCase(
+                times={('map', 1): stable, ('slice', 2): stable},
+                expected_invocations=0),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                cells = planner.plan_cells(sample_suite(test_case.times))
+                invocations = planner.plan_invocations(cells)
+                self.assertEqual(
+                    test_case.expected_invocations, len(invocations))
+                # each cell is run by exactly one invocation, with at
+                # least as many runs as it needs
+                names = {
+                    (finder, num_elems): 'BenchmarkFind/case/finder=%s/' % (
+                        finder) + 'num_elems=%d' % (num_elems)
+                    for finder, num_elems in test_case.times}
+                for cell, key in zip(cells, test_case.times):
+                    matched = [
+                        invocation for invocation in invocations
+                        if go_matches(invocation.bench_regex, names[key])]
+                    self.assertEqual(
+                        0 if cell.runs == 0 else 1, len(matched), names[key])
+                    for invocation in matched:
+                        self.assertGreaterEqual(invocation.count, cell.runs)
+                self.assertEqual(
+                    sum(cell.runs > 0 for cell in cells),
+                    sum(invocation.cells for invocation in invocations))
+
+    def test_command(self):
+        invocation = planner.Invocation(
+            bench_regex='^BenchmarkA$', count=3, cells=1)
+        self.assertEqual(
+            ['go', 'test', '-bench', '^BenchmarkA$', '-count=3'],
+            invocation.command(
+                ['go', 'test', '-bench', '{bench}', '-count={count}']))
+
+    def test_merge_suite(self):
+        suite = sample_suite({('map', 1): [1.0, 2.0]})
+        new = sample_suite({('map', 1): [3.0]})
+        new.benchmarks.append(benchmark.Benchmark('BenchmarkOther'))
+        planner.merge_suite(suite, new)
+        self.assertEqual(
+            ['BenchmarkFind', 'BenchmarkOther'],
+            [bench.name for bench in suite.benchmarks])
+        self.assertEqual(
+            [1.0, 2.0, 3.0],
+            [res.outputs.time
+             for res in suite.get_benchmark('BenchmarkFind').results])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,127 +1,25 @@
+import io
+import os
+import tempfile
+import time
 import unittest
+import matplotlib
+matplotlib.use('Agg')  # noqa: E402
+import matplotlib.figure
+import matplotlib.pyplot as plt
 import numpy as np
 import gobenchplot.plot as plot
 import gobenchplot.benchmark as benchmark
 import gobenchplot.inputs as inputs
+import gobenchplot.live as live
+import gobenchplot.plotdata as plotdata
+import gobenchplot.query as query
+from tests.test_live import bench_output_lines, sample_results
+from tests.test_plotdata import facet_results, pareto_results
+from tests.test_table import sample_bench
 from collections import namedtuple
 
 
-class TestPlotData(unittest.TestCase):
-    def test_eq(self):
-        TestCase = namedtuple(
-            'TestCase', 'a b expect_eq')
-        test_cases = {
-            'equal_cases': TestCase(
-                a=plot.PlotData(
-                    x=np.array([1, 2]),
-                    y=np.array([7.46, 8.46])),
-                b=plot.PlotData(
-                    x=np.array([1, 2]),
-                    y=np.array([7.46, 8.46])),
-                expect_eq=True),
-            'not_eq': TestCase(
-                a=plot.PlotData(
-                    x=np.array([1, 2]),
-                    y=np.array([7.46, 8.46])),
-                b=plot.PlotData(
-                    x=np.array([1, 2, 3]),
-                    y=np.array([7.46, 8.46, 9.46])),
-                expect_eq=False),
-            'b_not_plot_data': TestCase(
-                a=plot.PlotData(
-                    x=np.array([1, 2]),
-                    y=np.array([7.46, 8.46])),
-                b={
-                    'x': [1, 2, 3],
-                    'y': [7.46, 8.46, 9.46],
-                },
-                expect_eq=False),
-        }
-
-        for test_name, test_case in test_cases.items():
-            with self.subTest(test_name):
-                is_eq = test_case.a == test_case.b
-                self.assertEqual(test_case.expect_eq, is_eq)
-
-    def test_avg_over_x(self):
-        TestCase = namedtuple(
-            'TestCase', 'data expected_averaged')
-        test_cases = {
-            'no_work_needed': TestCase(
-                data=plot.PlotData(
-                    x=np.array([1, 2]),
-                    y=np.array([7.46, 8.46])),
-                expected_averaged=plot.PlotData(
-                    x=np.array([1, 2]),
-                    y=np.array([7.46, 8.46]))),
-            '3_duplicates': TestCase(
-                data=plot.PlotData(
-                    x=np.array([1, 1, 1, 2, 2, 2, 3, 3, 3]),
-                    y=np.array([1, 2, 3, 1, 2, 3, 1, 2, 3])),
-                expected_averaged=plot.PlotData(
-                    x=np.array([1, 2, 3]),
-                    y=np.array([2, 2, 2]))),
-        }
-
-        for test_name, test_case in test_cases.items():
-            with self.subTest(test_name):
-                avged = test_case.data.avg_over_x()
-                self.assertEqual(test_case.expected_averaged, avged)
-
-
-class TestBenchResData(unittest.TestCase):
-    def test_bench_res_data(self):
-        TestCase = namedtuple(
-            'TestCase', ['split_res_items', 'expected_plot_data', 'expected_x_type', 'expected_y_type'])
-        test_cases = {
-            'int_x_float_y': TestCase(
-                split_res_items=[
-                    benchmark.SplitRes(
-                        x=1, y=7.46),
-                    benchmark.SplitRes(
-                        x=2, y=8.46),
-                ],
-                expected_plot_data=plot.PlotData(
-                    x=np.array([1, 2]),
-                    y=np.array([7.46, 8.46])),
-                expected_x_type=np.dtype(int),
-                expected_y_type=np.dtype(float)),
-            'bool_x_float_y': TestCase(
-                split_res_items=[
-                    benchmark.SplitRes(
-                        x=True, y=7.46),
-                    benchmark.SplitRes(
-                        x=False, y=8.46),
-                ],
-                expected_plot_data=plot.PlotData(
-                    x=np.array([True, False]),
-                    y=np.array([7.46, 8.46])),
-                expected_x_type=np.dtype(bool),
-                expected_y_type=np.dtype(float)),
-            'string_x_int_y': TestCase(
-                split_res_items=[
-                    benchmark.SplitRes(
-                        x='foo', y=1),
-                    benchmark.SplitRes(
-                        x='bar', y=2),
-                ],
-                expected_plot_data=plot.PlotData(
-                    x=np.array(['foo', 'bar'], dtype=np.dtype('<U1')),
-                    y=np.array([1, 2])),
-                expected_x_type=np.dtype('<U1'),
-                expected_y_type=np.dtype(int)),
-        }
-
-        for test_name, test_case in test_cases.items():
-            with self.subTest(test_name):
-                plot_data = plot.bench_res_data(test_case.split_res_items)
-                self.assertEqual(test_case.expected_plot_data, plot_data)
-                self.assertEqual(test_case.expected_x_type,
-                                 plot_data.x_type())
-                self.assertEqual(test_case.expected_y_type,
-                                 plot_data.y_type())
-
-
 class TestPlotBar(unittest.TestCase):
     # test methods used to plot_bar
     def test_get_bar_spacing_adjustment(self):
@@ -242,6 +140,17 @@ class TestBuildPlotFn(unittest.TestCase):
                 y_name='time',
                 plots=plot.BAR_TYPE,
                 expected_plotfn_names=[plot.plot_bar.__name__]),
+            'non_numeric_x_distribution_plots_specified': TestCase(
+                data={
+                    "first_var = some_name": plot.PlotData(
+                        x=np.array(['foo', 'bar'], dtype=np.dtype('<U1')),
+                        y=np.array([7.46, 8.46])),
+                },
+                x_name='first_var',
+                y_name='time',
+                plots=[plot.BOX_TYPE, plot.VIOLIN_TYPE],
+                expected_plotfn_names=[
+                    plot.plot_box.__name__, plot.plot_violin.__name__]),
         }
         for test_name, test_case in test_cases.items():
             with self.subTest(test_name):
@@ -291,5 +200,337 @@ class TestBuildPlotFn(unittest.TestCase):
                         plots=test_case.plots)
 
 
+class TestDensity(unittest.TestCase):
+    def test_build_plot_fn_density(self):
+        data = {
+            "first_var = some_name": plot.PlotData(
+                x=np.array([1, 2, 3]),
+                y=np.array([7.46, 8.46, 9.46])),
+        }
+        TestCase = namedtuple(
+            'TestCase', 'plots density_threshold expected_plotfn_names')
+        test_cases = {
+            'below_threshold': TestCase(
+                plots=None,
+                density_threshold=3,
+                expected_plotfn_names=[
+                    plot.plot_scatter.__name__, plot.plot_avg_line.__name__]),
+            'above_threshold': TestCase(
+                plots=None,
+                density_threshold=2,
+                expected_plotfn_names=[
+                    plot.plot_density.__name__, plot.plot_avg_line.__name__]),
+            'above_threshold_no_scatter': TestCase(
+                plots=plot.BAR_TYPE,
+                density_threshold=2,
+                expected_plotfn_names=[plot.plot_bar.__name__]),
+            'density_specified': TestCase(
+                plots=plot.DENSITY_TYPE,
+                density_threshold=3,
+                expected_plotfn_names=[plot.plot_density.__name__]),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                plot_fn = plot.build_plot_fn(
+                    data, 'first_var', plots=test_case.plots,
+                    density_threshold=test_case.density_threshold)
+                if not isinstance(plot_fn, list):
+                    plot_fn = [plot_fn]
+                self.assertEqual(
+                    test_case.expected_plotfn_names,
+                    [fn.__name__ for fn in plot_fn])
+
+    def test_plot_density(self):
+        rng = np.random.default_rng(0)
+        data = {
+            "finder = map": plot.PlotData(
+                x=rng.integers(1, 100, 1000), y=rng.random(1000)),
+            "finder = slice": plot.PlotData(
+                x=rng.integers(1, 100, 1000), y=rng.random(1000) + 1),
+        }
+        plt.figure()
+        try:
+            plot.plot_density(data, True)
+            ax = plt.gca()
+            # one raster per group regardless of the number of points
+            self.assertEqual(2, len(ax.get_images()))
+            self.assertEqual(
+                list(data.keys()),
+                [line.get_label() for line in ax.get_lines()])
+        finally:
+            plt.close()
+
+
+class TestDistributions(unittest.TestCase):
+    def test_distribution_positions(self):
+        TestCase = namedtuple(
+            'TestCase', 'uniq_x x plotnum num_plots expected_positions')
+        test_cases = {
+            'numeric_single_group': TestCase(
+                uniq_x=np.array([1, 2, 4]), x=np.array([2, 4]),
+                plotnum=0, num_plots=1, expected_positions=[2.0, 4.0]),
+            'numeric_two_groups': TestCase(
+                uniq_x=np.array([1, 2, 4]), x=np.array([1, 2]),
+                plotnum=1, num_plots=2, expected_positions=[0.8, 1.8]),
+            'non_numeric': TestCase(
+                uniq_x=np.array(['a', 'b']), x=np.array(['b']),
+                plotnum=0, num_plots=2, expected_positions=[1.2]),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                positions, widths = plot._distribution_positions(
+                    test_case.uniq_x, test_case.x,
+                    test_case.plotnum, test_case.num_plots)
+                self.assertTrue(np.allclose(
+                    test_case.expected_positions, positions))
+                self.assertEqual(len(test_case.x), len(widths))
+
+    def test_plot_distributions(self):
+        data = {
+            'finder = map': plot.PlotData(
+                x=np.array([1, 1, 1, 1, 2, 2, 2]),
+                y=np.array([1.0, 2.0, 3.0, 40.0, 5.0, 6.0, 7.0])),
+            'finder = slice': plot.PlotData(
+                x=np.array([2]), y=np.array([4.0])),
+        }
+        TestCase = namedtuple('TestCase', 'plot_fn')
+        test_cases = {
+            'box': TestCase(plot_fn=plot.plot_box),
+            'violin': TestCase(plot_fn=plot.plot_violin),
+            'histogram': TestCase(plot_fn=plot.plot_histogram),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                fig, ax = plt.subplots()
+                try:
+                    test_case.plot_fn(data, include_label=True, ax=ax)
+                    self.assertEqual(
+                        list(data.keys()),
+                        [text.get_text()
+                         for text in ax.legend().get_texts()])
+                    # every cell, outliers included, is within the limits
+                    low, high = ax.get_ylim()
+                    self.assertLessEqual(low, 1.0)
+                    self.assertGreaterEqual(high, 40.0)
+                finally:
+                    plt.close(fig)
+
+
+class TestFacets(unittest.TestCase):
+    def test_facet_grid_shape(self):
+        TestCase = namedtuple('TestCase', 'num_facets expected_shape')
+        test_cases = {
+            '1_facet': TestCase(num_facets=1, expected_shape=(1, 1)),
+            '2_facets': TestCase(num_facets=2, expected_shape=(1, 2)),
+            '3_facets': TestCase(num_facets=3, expected_shape=(2, 2)),
+            '5_facets': TestCase(num_facets=5, expected_shape=(2, 3)),
+            '9_facets': TestCase(num_facets=9, expected_shape=(3, 3)),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                self.assertEqual(
+                    test_case.expected_shape,
+                    plot.facet_grid_shape(test_case.num_facets))
+
+    def test_draw_facet_data(self):
+        bench = benchmark.Benchmark("BenchmarkMyMethod")
+        for bench_res in facet_results:
+            bench.add_result(bench_res)
+        facet_data = plotdata.facet_bench_data(
+            bench, plotdata.SUBS_FACET, 'finder', 'num_elems')
+        fig = plot.draw_facet_data(facet_data)
+        try:
+            self.assertEqual(
+                list(facet_data.facets.keys()),
+                [ax.get_title() for ax in fig.axes])
+        finally:
+            plt.close(fig)
+
+    def test_run_plot_fns_raises(self):
+        data = {
+            "first_var = some_name": plot.PlotData(
+                x=np.array([1, 2]), y=np.array([7.46, 8.46])),
+        }
+        fig, ax = plt.subplots()
+        try:
+            with self.assertRaises(inputs.InvalidInputError):
+                plot.run_plot_fns(
+                    data, [plot.plot_bar, plot.plot_scatter], ax=ax)
+        finally:
+            plt.close(fig)
+
+
+class TestHeatmap(unittest.TestCase):
+    def heatmap(self, mean: np.ndarray) -> plotdata.HeatmapData:
+        num_vars, num_x = mean.shape
+        return plotdata.HeatmapData(
+            title='BenchmarkMyMethod', x_name='num_elems',
+            x=np.arange(num_x), var_name='key_size',
+            var_values=np.arange(num_vars) * 8, y_label='time',
+            mean=mean, n=np.ones(mean.shape, dtype=np.int64), dropped=[])
+
+    def test_draw_heatmap_data(self):
+        TestCase = namedtuple(
+            'TestCase', 'mean expected_log expected_num_x_ticks')
+        test_cases = {
+            'linear': TestCase(
+                mean=np.array([[1.0, 2.0], [3.0, np.nan]]),
+                expected_log=False, expected_num_x_ticks=2),
+            'log': TestCase(
+                mean=np.array([[1.0, 10.0], [100.0, 1000.0]]),
+                expected_log=True, expected_num_x_ticks=2),
+            'many_values': TestCase(
+                mean=np.ones((3, 50)),
+                expected_log=False, expected_num_x_ticks=17),
+            'all_missing': TestCase(
+                mean=np.full((2, 2), np.nan),
+                expected_log=False, expected_num_x_ticks=2),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                fig, ax = plt.subplots()
+                try:
+                    image = plot.draw_heatmap_data(
+                        self.heatmap(test_case.mean), ax=ax)
+                    self.assertEqual(
+                        test_case.expected_log,
+                        isinstance(image.norm, matplotlib.colors.LogNorm))
+                    self.assertEqual(
+                        test_case.expected_num_x_ticks,
+                        len(ax.get_xticks()))
+                    self.assertEqual('key_size', ax.get_ylabel())
+                    # the color bar gets axes of its own
+                    self.assertEqual(2, len(fig.axes))
+                finally:
+                    plt.close(fig)
+
+    def test_plot_fn_from_type_raises(self):
+        with self.assertRaises(inputs.InvalidInputError):
+            plot.plot_fn_from_type([plot.SCATTER_TYPE, plot.HEATMAP_TYPE])
+
+
+class TestPareto(unittest.TestCase):
+    def test_draw_pareto_data(self):
+        bench = benchmark.Benchmark('BenchmarkDedupe')
+        for res in pareto_results:
+            bench.add_result(res)
+        pareto_data = plotdata.pareto_data(bench, 'time', y_name='mem_used')
+        fig, ax = plt.subplots()
+        try:
+            plot.draw_pareto_data(pareto_data, ax=ax)
+            self.assertEqual('time (ns/op)', ax.get_xlabel())
+            self.assertEqual('mem_used (B/op)', ax.get_ylabel())
+            # the frontier configurations are labelled
+            self.assertEqual(
+                ['finder = list', 'finder = map', 'finder = slice'],
+                [text.get_text() for text in ax.texts])
+        finally:
+            plt.close(fig)
+
+
+class TestOutputs(unittest.TestCase):
+    def test_output_path(self):
+        TestCase = namedtuple('TestCase', 'output y_name expected')
+        test_cases = {
+            'output': TestCase(
+                output='plot.png', y_name='mem_used',
+                expected='plot_mem_used.png'),
+            'expression': TestCase(
+                output=os.path.join('out', 'plot.svg'),
+                y_name='1e9/time', expected=os.path.join(
+                    'out', 'plot_1e9_time.svg')),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                self.assertEqual(
+                    test_case.expected,
+                    plot.output_path(test_case.output, test_case.y_name))
+
+    def test_draw_outputs_data(self):
+        outputs_data = plotdata.outputs_bench_data(
+            sample_bench, 'finder', 'num_elems', ['time', 'runs'])
+        fig = plot.draw_outputs_data(outputs_data)
+        try:
+            self.assertEqual(
+                ['time (ns/op)', 'runs'],
+                [ax.get_ylabel() for ax in fig.axes])
+            self.assertEqual(
+                ['BenchmarkDedupe', ''], [ax.get_title() for ax in fig.axes])
+        finally:
+            plt.close(fig)
+
+    def test_plot_outputs_split(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            plot.plot_outputs(
+                sample_bench, 'finder', 'num_elems', ['time', 'runs'],
+                split_outputs=True,
+                output=os.path.join(tmp_dir, 'plot.png'))
+            self.assertEqual(
+                ['plot_runs.png', 'plot_time.png'],
+                sorted(os.listdir(tmp_dir)))
+
+
+class TestDrawQueryResult(unittest.TestCase):
+    def test_draw_query_result(self):
+        suite = benchmark.BenchSuite(benchmarks=[sample_bench])
+        result = query.execute(suite, query.Query(
+            bench='BenchmarkDedupe', x='num_elems', group_by=('finder',)))
+        figures = plt.get_fignums()
+        # a figure pyplot doesn't manage, e.g. one a service renders
+        fig = matplotlib.figure.Figure()
+        ax = fig.add_subplot()
+        plot.draw_query_result(result, ax)
+        self.assertEqual(figures, plt.get_fignums())
+        self.assertEqual('BenchmarkDedupe', ax.get_title())
+        self.assertEqual('time (ns/op)', ax.get_ylabel())
+        self.assertEqual(
+            ['finder = map', 'finder = slice'],
+            [text.get_text() for text in ax.get_legend().get_texts()])
+
+
+class TestPlotLive(unittest.TestCase):
+    def test_plot_live(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            output = os.path.join(tmpdir, 'live.png')
+            reader = live.LiveReader(io.StringIO(
+                bench_output_lines('BenchmarkDedupe', sample_results)))
+            query = live.LiveQuery('finder', 'num_elems')
+            plot.plot_live(
+                reader, 'BenchmarkDedupe', query, interval=0.01,
+                output=output)
+            self.assertEqual(len(sample_results), query.num_results)
+            self.assertTrue(os.path.getsize(output) > 0)
+
+    def test_plot_live_raises_once_done(self):
+        # the only batch fails validation while the reader is still
+        # running, no later batch makes it valid
+        query = live.LiveQuery(
+            'finder', 'num_elems', baseline=['finder=fake'])
+
+        def lines():
+            yield from bench_output_lines(
+                'BenchmarkDedupe', sample_results).splitlines(True)
+            deadline = time.monotonic() + 5.0
+            while query.num_results < len(sample_results) and \
+                    time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        reader = live.LiveReader(lines())
+        with self.assertRaises(inputs.InvalidInputError):
+            plot.plot_live(
+                reader, 'BenchmarkDedupe', query, interval=0.01,
+                output=os.devnull)
+        self.assertEqual(len(sample_results), query.num_results)
+
+    def test_plot_live_raises(self):
+        reader = live.LiveReader(io.StringIO(
+            bench_output_lines('BenchmarkDedupe', sample_results)))
+        query = live.LiveQuery('finder', 'num_elems')
+        with self.assertRaises(inputs.InvalidInputError):
+            plot.plot_live(
+                reader, 'BenchmarkFake', query, interval=0.01,
+                output=os.devnull)
+
+
 if __name__ == '__main__':
     unittest.main()
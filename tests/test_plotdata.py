@@ -0,0 +1,729 @@
+import unittest
+import numpy as np
+import gobenchplot.plotdata as plotdata
+import gobenchplot.benchmark as benchmark
+import gobenchplot.cache as cache
+import gobenchplot.expr as expr
+import gobenchplot.inputs as inputs
+import gobenchplot.stats as stats
+from collections import namedtuple
+from tests.test_benchmark import sample_bench_results, sample_bench_results_no_mem
+from tests.test_columns import sample_res
+
+
+class TestPlotData(unittest.TestCase):
+    def test_eq(self):
+        TestCase = namedtuple(
+            'TestCase', 'a b expect_eq')
+        test_cases = {
+            'equal_cases': TestCase(
+                a=plotdata.PlotData(
+                    x=np.array([1, 2]),
+                    y=np.array([7.46, 8.46])),
+                b=plotdata.PlotData(
+                    x=np.array([1, 2]),
+                    y=np.array([7.46, 8.46])),
+                expect_eq=True),
+            'not_eq': TestCase(
+                a=plotdata.PlotData(
+                    x=np.array([1, 2]),
+                    y=np.array([7.46, 8.46])),
+                b=plotdata.PlotData(
+                    x=np.array([1, 2, 3]),
+                    y=np.array([7.46, 8.46, 9.46])),
+                expect_eq=False),
+            'b_not_plot_data': TestCase(
+                a=plotdata.PlotData(
+                    x=np.array([1, 2]),
+                    y=np.array([7.46, 8.46])),
+                b={
+                    'x': [1, 2, 3],
+                    'y': [7.46, 8.46, 9.46],
+                },
+                expect_eq=False),
+        }
+
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                is_eq = test_case.a == test_case.b
+                self.assertEqual(test_case.expect_eq, is_eq)
+
+    def test_avg_over_x(self):
+        TestCase = namedtuple(
+            'TestCase', 'data expected_averaged')
+        test_cases = {
+            'no_work_needed': TestCase(
+                data=plotdata.PlotData(
+                    x=np.array([1, 2]),
+                    y=np.array([7.46, 8.46])),
+                expected_averaged=plotdata.PlotData(
+                    x=np.array([1, 2]),
+                    y=np.array([7.46, 8.46]))),
+            '3_duplicates': TestCase(
+                data=plotdata.PlotData(
+                    x=np.array([1, 1, 1, 2, 2, 2, 3, 3, 3]),
+                    y=np.array([1, 2, 3, 1, 2, 3, 1, 2, 3])),
+                expected_averaged=plotdata.PlotData(
+                    x=np.array([1, 2, 3]),
+                    y=np.array([2, 2, 2]))),
+        }
+
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                avged = test_case.data.avg_over_x()
+                self.assertEqual(test_case.expected_averaged, avged)
+
+
+class TestBenchResData(unittest.TestCase):
+    def test_bench_res_data(self):
+        TestCase = namedtuple(
+            'TestCase', ['split_res_items', 'expected_plot_data', 'expected_x_type', 'expected_y_type'])
+        test_cases = {
+            'int_x_float_y': TestCase(
+                split_res_items=[
+                    benchmark.SplitRes(
+                        x=1, y=7.46),
+                    benchmark.SplitRes(
+                        x=2, y=8.46),
+                ],
+                expected_plot_data=plotdata.PlotData(
+                    x=np.array([1, 2]),
+                    y=np.array([7.46, 8.46])),
+                expected_x_type=np.dtype(int),
+                expected_y_type=np.dtype(float)),
+            'bool_x_float_y': TestCase(
+                split_res_items=[
+                    benchmark.SplitRes(
+                        x=True, y=7.46),
+                    benchmark.SplitRes(
+                        x=False, y=8.46),
+                ],
+                expected_plot_data=plotdata.PlotData(
+                    x=np.array([True, False]),
+                    y=np.array([7.46, 8.46])),
+                expected_x_type=np.dtype(bool),
+                expected_y_type=np.dtype(float)),
+            'string_x_int_y': TestCase(
+                split_res_items=[
+                    benchmark.SplitRes(
+                        x='foo', y=1),
+                    benchmark.SplitRes(
+                        x='bar', y=2),
+                ],
+                expected_plot_data=plotdata.PlotData(
+                    x=np.array(['foo', 'bar'], dtype=np.dtype('<U1')),
+                    y=np.array([1, 2])),
+                expected_x_type=np.dtype('<U1'),
+                expected_y_type=np.dtype(int)),
+        }
+
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                plot_data = plotdata.bench_res_data(test_case.split_res_items)
+                self.assertEqual(test_case.expected_plot_data, plot_data)
+                self.assertEqual(test_case.expected_x_type,
+                                 plot_data.x_type())
+                self.assertEqual(test_case.expected_y_type,
+                                 plot_data.y_type())
+
+
+class TestExprResData(unittest.TestCase):
+    def test_expr_res_data(self):
+        TestCase = namedtuple('TestCase', 'y_text expected_plot_data')
+        test_cases = {
+            'time_per_var': TestCase(
+                y_text='time/second_var',
+                expected_plot_data=plotdata.PlotData(
+                    x=np.array([1, 2]),
+                    y=np.array([7.46, 4.23]))),
+            'ops_per_second': TestCase(
+                y_text='1e9/time',
+                expected_plot_data=plotdata.PlotData(
+                    x=np.array([1, 2]),
+                    y=1e9/np.array([7.46, 8.46]))),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                plot_data = plotdata.expr_res_data(
+                    benchmark.BenchResults(list(sample_bench_results)),
+                    'second_var', expr.compile_expr(test_case.y_text))
+                self.assertEqual(test_case.expected_plot_data, plot_data)
+
+    def test_expr_res_data_raises(self):
+        TestCase = namedtuple('TestCase', 'x_name y_text')
+        test_cases = {
+            'unknown_x': TestCase(x_name='fake_var', y_text='time/second_var'),
+            'unknown_y_name': TestCase(x_name='second_var', y_text='time/fake_var'),
+            'non_numeric_y': TestCase(x_name='second_var', y_text='time/first_var'),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                with self.assertRaises(inputs.InvalidInputError):
+                    plotdata.expr_res_data(
+                        benchmark.BenchResults(list(sample_bench_results)),
+                        test_case.x_name, expr.compile_expr(test_case.y_text))
+
+
+class TestRejectOutliers(unittest.TestCase):
+    def test_reject_outliers(self):
+        data = {
+            'finder = map': plotdata.PlotData(
+                x=np.array([1, 1, 1, 1, 2, 2]),
+                y=np.array([1.0, 1.1, 0.9, 50.0, 2.0, 2.1])),
+            'finder = slice': plotdata.PlotData(
+                x=np.array([1, 1, 1]),
+                y=np.array([3.0, 3.0, 3.1])),
+        }
+        filtered, dropped = plotdata.reject_outliers(
+            data, stats.OutlierFilter(method=stats.IQR_METHOD, param=1.5))
+        self.assertEqual({
+            'finder = map': plotdata.PlotData(
+                x=np.array([1, 1, 1, 2, 2]),
+                y=np.array([1.0, 1.1, 0.9, 2.0, 2.1])),
+            'finder = slice': plotdata.PlotData(
+                x=np.array([1, 1, 1]),
+                y=np.array([3.0, 3.0, 3.1])),
+        }, filtered)
+        self.assertEqual(
+            [plotdata.DroppedCell(label='finder = map', x=1, dropped=1, total=4)],
+            dropped)
+
+
+class TestNormalizeToBaseline(unittest.TestCase):
+    def test_normalize_to_baseline(self):
+        TestCase = namedtuple(
+            'TestCase', 'data baseline_label expected_data expected_missing')
+        test_cases = {
+            'all_x_shared': TestCase(
+                data={
+                    'finder = map': plotdata.PlotData(
+                        x=np.array([1, 1, 2, 2]),
+                        y=np.array([1.0, 3.0, 4.0, 4.0])),
+                    'finder = slice': plotdata.PlotData(
+                        x=np.array([2, 1]),
+                        y=np.array([2.0, 4.0])),
+                },
+                baseline_label='finder = map',
+                expected_data={
+                    'finder = map': plotdata.PlotData(
+                        x=np.array([1, 2]),
+                        y=np.array([1.0, 1.0])),
+                    'finder = slice': plotdata.PlotData(
+                        x=np.array([1, 2]),
+                        y=np.array([2.0, 0.5])),
+                },
+                expected_missing={}),
+            'baseline_missing_x': TestCase(
+                data={
+                    'finder = map': plotdata.PlotData(
+                        x=np.array([1, 2]),
+                        y=np.array([2.0, 4.0])),
+                    'finder = slice': plotdata.PlotData(
+                        x=np.array([0, 1, 2, 3]),
+                        y=np.array([1.0, 1.0, 1.0, 1.0])),
+                },
+                baseline_label='finder = map',
+                expected_data={
+                    'finder = map': plotdata.PlotData(
+                        x=np.array([1, 2]),
+                        y=np.array([1.0, 1.0])),
+                    'finder = slice': plotdata.PlotData(
+                        x=np.array([1, 2]),
+                        y=np.array([0.5, 0.25])),
+                },
+                expected_missing={'finder = slice': np.array([0, 3])}),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                normalized, missing = plotdata.normalize_to_baseline(
+                    test_case.data, test_case.baseline_label)
+                self.assertEqual(test_case.expected_data, normalized)
+                self.assertEqual(
+                    test_case.expected_missing.keys(), missing.keys())
+                for label, x_vals in missing.items():
+                    self.assertTrue(np.array_equal(
+                        test_case.expected_missing[label], x_vals))
+
+    def test_find_baseline_label(self):
+        grouped = benchmark.GroupedResults(initdata={
+            benchmark.BenchVarValues([
+                benchmark.BenchVarValue(var_name='finder', var_value='map'),
+                benchmark.BenchVarValue(var_name='size', var_value=1),
+            ]): [],
+            benchmark.BenchVarValues([
+                benchmark.BenchVarValue(var_name='finder', var_value='map'),
+                benchmark.BenchVarValue(var_name='size', var_value=2),
+            ]): [],
+        })
+        self.assertEqual(
+            'finder = map, size = 2',
+            plotdata.find_baseline_label(grouped, [
+                benchmark.BenchVarValue(var_name='size', var_value=2)]))
+        test_cases = {
+            'no_match': [
+                benchmark.BenchVarValue(var_name='finder', var_value='slice')],
+            'multiple_matches': [
+                benchmark.BenchVarValue(var_name='finder', var_value='map')],
+        }
+        for test_name, baseline in test_cases.items():
+            with self.subTest(test_name):
+                with self.assertRaises(inputs.InvalidInputError):
+                    plotdata.find_baseline_label(grouped, baseline)
+
+
+class TestAggregate(unittest.TestCase):
+    def test_aggregate(self):
+        aggregated = plotdata.aggregate({
+            'finder = map': plotdata.PlotData(
+                x=np.array([2, 1, 2, 1]),
+                y=np.array([4.0, 1.0, 6.0, 3.0])),
+            'finder = slice': plotdata.PlotData(
+                x=np.array([5]),
+                y=np.array([7.0])),
+        })
+        self.assertEqual(['finder = map', 'finder = slice'],
+                         list(aggregated.keys()))
+        expected = {
+            'finder = map': plotdata.CellStats(
+                x=np.array([1, 2]),
+                y=np.array([2.0, 5.0]),
+                n=np.array([2, 2]),
+                stddev=np.array([np.sqrt(2), np.sqrt(2)])),
+            'finder = slice': plotdata.CellStats(
+                x=np.array([5]),
+                y=np.array([7.0]),
+                n=np.array([1]),
+                stddev=np.array([np.nan])),
+        }
+        for label, cells in aggregated.items():
+            with self.subTest(label):
+                for field in plotdata.CellStats._fields:
+                    self.assertTrue(np.allclose(
+                        getattr(expected[label], field),
+                        getattr(cells, field), equal_nan=True))
+
+    def test_aggregation_quantile(self):
+        TestCase = namedtuple('TestCase', 'aggregation expected')
+        test_cases = {
+            'mean': TestCase(aggregation='mean', expected=None),
+            'median': TestCase(aggregation='median', expected=0.5),
+            'max': TestCase(aggregation='max', expected=1.0),
+            'percentile': TestCase(aggregation='p90', expected=0.9),
+            'fractional_percentile': TestCase(
+                aggregation='p99.9', expected=0.999),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                self.assertAlmostEqual(
+                    test_case.expected,
+                    plotdata.aggregation_quantile(test_case.aggregation))
+        for aggregation in ['mode', 'p101', 'p', '90']:
+            with self.subTest(aggregation):
+                with self.assertRaises(inputs.InvalidInputError):
+                    plotdata.aggregation_quantile(aggregation)
+
+    def test_merge_cell_stats(self):
+        TestCase = namedtuple('TestCase', 'first second')
+        test_cases = {
+            'same_x': TestCase(
+                first=plotdata.PlotData(
+                    x=np.array([1, 1]), y=np.array([1.0, 3.0])),
+                second=plotdata.PlotData(
+                    x=np.array([1, 1, 1]), y=np.array([2.0, 8.0, 4.0]))),
+            'disjoint_x': TestCase(
+                first=plotdata.PlotData(
+                    x=np.array([2, 4]), y=np.array([1.0, 3.0])),
+                second=plotdata.PlotData(
+                    x=np.array([1, 3]), y=np.array([2.0, 8.0]))),
+            'single_samples': TestCase(
+                first=plotdata.PlotData(
+                    x=np.array([1, 2]), y=np.array([1.0, 3.0])),
+                second=plotdata.PlotData(
+                    x=np.array([2, 3, 3]), y=np.array([5.0, 8.0, 9.0]))),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                # merging must match aggregating all samples at once
+                expected = plotdata.aggregate({'': plotdata.PlotData(
+                    x=np.concatenate((test_case.first.x, test_case.second.x)),
+                    y=np.concatenate((test_case.first.y, test_case.second.y)),
+                )})['']
+                merged = plotdata.merge_cell_stats(
+                    plotdata.aggregate({'': test_case.first})[''],
+                    plotdata.aggregate({'': test_case.second})[''])
+                for field in plotdata.CellStats._fields:
+                    self.assertTrue(np.allclose(
+                        getattr(expected, field),
+                        getattr(merged, field), equal_nan=True))
+
+
+class TestDistributions(unittest.TestCase):
+    def test_distributions(self):
+        data = {
+            'finder = map': plotdata.PlotData(
+                x=np.array([2, 1, 1, 1, 1, 2]),
+                y=np.array([5.0, 1.0, 2.0, 40.0, 3.0, 7.0])),
+            'finder = slice': plotdata.PlotData(
+                x=np.array([2]), y=np.array([4.0])),
+        }
+        dists = plotdata.distributions(data, num_points=16, num_bins=4)
+        self.assertEqual(list(data.keys()), list(dists.keys()))
+
+        # cells match the aggregates of the same data
+        aggregated = plotdata.aggregate(data)
+        for label, dist in dists.items():
+            with self.subTest(label):
+                self.assertTrue(np.array_equal(aggregated[label].x, dist.x))
+                self.assertTrue(np.allclose(aggregated[label].y, dist.mean))
+                self.assertEqual((len(dist.x), 16), dist.kde_y.shape)
+                self.assertEqual((len(dist.x), 5), dist.hist_edges.shape)
+                self.assertTrue(np.array_equal(
+                    aggregated[label].n, dist.hist_counts.sum(axis=1)))
+
+        map_dist = dists['finder = map']
+        self.assertTrue(np.allclose([2.5, 6.0], map_dist.box.median))
+        self.assertEqual([1], list(map_dist.flier_x))
+        self.assertEqual([40.0], list(map_dist.flier_y))
+
+
+class TestBenchData(unittest.TestCase):
+    def test_bench_data(self):
+        bench = benchmark.Benchmark("BenchmarkMyMethod")
+        for bench_res in sample_bench_results:
+            bench.add_result(bench_res)
+        bench_data = plotdata.bench_data(
+            bench, 'first_var', 'second_var', y_name='time',
+            subs=['first_bench'])
+        self.assertEqual('BenchmarkMyMethod/first_bench', bench_data.title)
+        self.assertEqual('time', bench_data.y_label)
+        self.assertIsNone(bench_data.baseline_label)
+        self.assertEqual({
+            'first_var = some_name': plotdata.PlotData(
+                x=np.array([1, 2]),
+                y=np.array([7.46, 8.46])),
+        }, bench_data.data)
+
+    def test_bench_data_y_label(self):
+        TestCase = namedtuple('TestCase', 'aggregation baseline expected')
+        test_cases = {
+            'mean': TestCase(
+                aggregation='mean', baseline=None, expected='time'),
+            'median': TestCase(
+                aggregation='median', baseline=None,
+                expected='median of time'),
+            'percentile': TestCase(
+                aggregation='p90', baseline=None, expected='p90 of time'),
+            'mean_baseline': TestCase(
+                aggregation='mean', baseline=['first_var=some_name'],
+                expected='time relative to first_var = some_name'),
+            'min_baseline': TestCase(
+                aggregation='min', baseline=['first_var=some_name'],
+                expected='min of time relative to first_var = some_name'),
+        }
+        bench = benchmark.Benchmark("BenchmarkMyMethod")
+        for bench_res in sample_bench_results:
+            bench.add_result(bench_res)
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                bench_data = plotdata.bench_data(
+                    bench, 'first_var', 'second_var', subs=['first_bench'],
+                    baseline=test_case.baseline,
+                    aggregation=test_case.aggregation)
+                self.assertEqual(test_case.expected, bench_data.y_label)
+
+    def test_bench_data_raises(self):
+        TestCase = namedtuple(
+            'TestCase', 'results group_by x_name y_name filter_vars')
+        test_cases = {
+            'no_results_remain': TestCase(
+                results=sample_bench_results,
+                group_by='first_var', x_name='second_var', y_name='time',
+                filter_vars=['second_var>5']),
+            'unknown_x': TestCase(
+                results=sample_bench_results,
+                group_by='first_var', x_name='fake_var', y_name='time',
+                filter_vars=None),
+            'unknown_group_by': TestCase(
+                results=sample_bench_results,
+                group_by='fake_var', x_name='second_var', y_name='time',
+                filter_vars=None),
+            'unknown_y': TestCase(
+                results=sample_bench_results,
+                group_by='first_var', x_name='second_var', y_name='fake',
+                filter_vars=None),
+            'y_corresponds_to_none': TestCase(
+                results=sample_bench_results_no_mem,
+                group_by='first_var', x_name='second_var',
+                y_name='mem_allocs', filter_vars=None),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                bench = benchmark.Benchmark("BenchmarkMyMethod")
+                for bench_res in test_case.results:
+                    bench.add_result(bench_res)
+                with self.assertRaises(inputs.InvalidInputError):
+                    plotdata.bench_data(
+                        bench, test_case.group_by, test_case.x_name,
+                        y_name=test_case.y_name,
+                        filter_vars=test_case.filter_vars)
+
+
+facet_results = [
+    sample_res(['a'], {'finder': 'map', 'num_elems': 1}, 1.0),
+    sample_res(['a'], {'finder': 'slice', 'num_elems': 1}, 2.0),
+    sample_res(['b'], {'finder': 'map', 'num_elems': 1}, 3.0),
+    sample_res(['a'], {'finder': 'map', 'num_elems': 1}, 5.0),
+    sample_res(['b'], {'finder': 'slice', 'num_elems': 2}, 4.0),
+    sample_res(['b'], {'finder': 'map', 'num_elems': 2}, 6.0),
+    sample_res(['a'], {'finder': 'map', 'num_elems': 2}, 9.0),
+    sample_res(['a'], {'finder': 'map', 'num_elems': 1}, 40.0),
+]
+
+
+class TestFacetBenchData(unittest.TestCase):
+    def test_facet_bench_data(self):
+        TestCase = namedtuple(
+            'TestCase', 'facet_by x_name baseline outliers expected_facets')
+        test_cases = {
+            'subs': TestCase(
+                facet_by=plotdata.SUBS_FACET, x_name='num_elems',
+                baseline=None, outliers=None,
+                expected_facets={
+                    'a': dict(subs=['a']), 'b': dict(subs=['b'])}),
+            'variable': TestCase(
+                facet_by='num_elems', x_name='num_elems',
+                baseline=None, outliers=None,
+                expected_facets={
+                    'num_elems = 1': dict(filter_vars=['num_elems==1']),
+                    'num_elems = 2': dict(filter_vars=['num_elems==2'])}),
+            'baseline': TestCase(
+                facet_by=plotdata.SUBS_FACET, x_name='num_elems',
+                baseline=['finder=map'], outliers=None,
+                expected_facets={
+                    'a': dict(subs=['a']), 'b': dict(subs=['b'])}),
+            'outliers': TestCase(
+                facet_by='num_elems', x_name='num_elems',
+                baseline=None, outliers='iqr:0',
+                expected_facets={
+                    'num_elems = 1': dict(filter_vars=['num_elems==1']),
+                    'num_elems = 2': dict(filter_vars=['num_elems==2'])}),
+        }
+        bench = benchmark.Benchmark("BenchmarkMyMethod")
+        for bench_res in facet_results:
+            bench.add_result(bench_res)
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                facet_data = plotdata.facet_bench_data(
+                    bench, test_case.facet_by, 'finder', test_case.x_name,
+                    baseline=test_case.baseline, outliers=test_case.outliers)
+                self.assertEqual('BenchmarkMyMethod', facet_data.title)
+                self.assertEqual(
+                    list(test_case.expected_facets.keys()),
+                    list(facet_data.facets.keys()))
+                # each facet matches the same query restricted to it
+                for title, query in test_case.expected_facets.items():
+                    expected = plotdata.bench_data(
+                        bench, 'finder', test_case.x_name,
+                        baseline=test_case.baseline,
+                        outliers=test_case.outliers, **query)
+                    facet = facet_data.facets[title]
+                    self.assertEqual(title, facet.title)
+                    self.assertEqual(expected.y_label, facet.y_label)
+                    self.assertEqual(expected.data, facet.data)
+                    self.assertEqual(expected.dropped, facet.dropped)
+                    # groups keep the same order (and colors) in every facet
+                    self.assertEqual(
+                        [label for label in ['finder = map', 'finder = slice']
+                         if label in expected.aggregated],
+                        list(facet.aggregated.keys()))
+                    for label, cells in expected.aggregated.items():
+                        for field in plotdata.CellStats._fields:
+                            self.assertTrue(np.allclose(
+                                getattr(cells, field),
+                                getattr(facet.aggregated[label], field),
+                                equal_nan=True))
+
+    def test_facet_bench_data_raises(self):
+        bench = benchmark.Benchmark("BenchmarkMyMethod")
+        for bench_res in facet_results:
+            bench.add_result(bench_res)
+        for facet_by in ['fake_var', 'subs_name']:
+            with self.subTest(facet_by):
+                with self.assertRaises(inputs.InvalidInputError):
+                    plotdata.facet_bench_data(
+                        bench, facet_by, 'finder', 'num_elems')
+
+
+class TestHeatmapData(unittest.TestCase):
+    def test_heatmap_data(self):
+        TestCase = namedtuple(
+            'TestCase', 'subs expected_mean expected_n')
+        test_cases = {
+            'full_grid': TestCase(
+                subs=None,
+                expected_mean=[[12.25, 7.5], [2.0, 4.0]],
+                expected_n=[[4, 2], [1, 1]]),
+            'missing_cell': TestCase(
+                subs=['a'],
+                expected_mean=[[46 / 3, 9.0], [2.0, np.nan]],
+                expected_n=[[3, 1], [1, 0]]),
+        }
+        bench = benchmark.Benchmark("BenchmarkMyMethod")
+        for bench_res in facet_results:
+            bench.add_result(bench_res)
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                heatmap_data = plotdata.heatmap_data(
+                    bench, 'num_elems', 'finder', subs=test_case.subs)
+                self.assertEqual([1, 2], list(heatmap_data.x))
+                self.assertEqual(
+                    ['map', 'slice'], list(heatmap_data.var_values))
+                self.assertTrue(np.allclose(
+                    test_case.expected_mean, heatmap_data.mean,
+                    equal_nan=True))
+                self.assertTrue(np.array_equal(
+                    test_case.expected_n, heatmap_data.n))
+
+    def test_heatmap_data_outliers(self):
+        bench = benchmark.Benchmark("BenchmarkMyMethod")
+        for bench_res in facet_results:
+            bench.add_result(bench_res)
+        heatmap_data = plotdata.heatmap_data(
+            bench, 'num_elems', 'finder', outliers='iqr:0')
+        # the same cells as grouping by the heatmap's variable
+        expected = plotdata.bench_data(
+            bench, 'finder', 'num_elems', outliers='iqr:0')
+        self.assertEqual(expected.dropped, heatmap_data.dropped)
+        for row, label in enumerate(['finder = map', 'finder = slice']):
+            cells = expected.aggregated[label]
+            columns = np.searchsorted(heatmap_data.x, cells.x)
+            self.assertTrue(np.allclose(
+                cells.y, heatmap_data.mean[row, columns]))
+            self.assertEqual(
+                cells.n.sum(), heatmap_data.n[row, columns].sum())
+            self.assertEqual(cells.n.sum(), heatmap_data.n[row].sum())
+
+    def test_heatmap_data_raises(self):
+        bench = benchmark.Benchmark("BenchmarkMyMethod")
+        for bench_res in facet_results:
+            bench.add_result(bench_res)
+        for var_name in ['fake_var', 'num_elems_fake']:
+            with self.subTest(var_name):
+                with self.assertRaises(inputs.InvalidInputError):
+                    plotdata.heatmap_data(bench, 'num_elems', var_name)
+
+
+def pareto_res(finder: str, time: float, mem_used: float) -> benchmark.BenchRes:
+    return benchmark.BenchRes(
+        inputs=benchmark.BenchInputs(
+            subs=None,
+            variables=[benchmark.BenchVarValue('finder', finder)]),
+        outputs=benchmark.BenchOutputs(
+            runs=100, time=time, mem_used=mem_used, mem_allocs=None))
+
+
+# list, map and slice trade time for memory, btree is dominated by map
+pareto_results = [
+    pareto_res('map', 1.0, 8.0),
+    pareto_res('slice', 4.0, 2.0),
+    pareto_res('btree', 5.0, 9.0),
+    pareto_res('map', 3.0, 8.0),
+    pareto_res('list', 1.0, 20.0),
+]
+
+
+class TestParetoData(unittest.TestCase):
+    def test_pareto_data(self):
+        bench = benchmark.Benchmark('BenchmarkDedupe')
+        for res in pareto_results:
+            bench.add_result(res)
+        pareto_data = plotdata.pareto_data(bench, 'time', y_name='mem_used')
+        self.assertEqual([
+            'finder = map', 'finder = slice', 'finder = btree',
+            'finder = list'], pareto_data.labels)
+        self.assertEqual([2.0, 4.0, 5.0, 1.0], pareto_data.x.tolist())
+        self.assertEqual([8.0, 2.0, 9.0, 20.0], pareto_data.y.tolist())
+        self.assertEqual([2, 1, 1, 1], pareto_data.n.tolist())
+        self.assertEqual([3, 0, 1], pareto_data.frontier.tolist())
+
+    def test_pareto_data_raises(self):
+        TestCase = namedtuple('TestCase', 'x_name y_name')
+        test_cases = {
+            'missing_output': TestCase(x_name='time', y_name='mem_allocs'),
+            'missing_x_output': TestCase(x_name='mem_allocs', y_name='time'),
+            'non_numeric_x': TestCase(x_name='finder', y_name='time'),
+        }
+        bench = benchmark.Benchmark('BenchmarkDedupe')
+        for res in pareto_results:
+            bench.add_result(res)
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                with self.assertRaises(inputs.InvalidInputError):
+                    plotdata.pareto_data(
+                        bench, test_case.x_name, y_name=test_case.y_name)
+
+
+class TestOutputsBenchData(unittest.TestCase):
+    def test_outputs_bench_data(self):
+        TestCase = namedtuple('TestCase', 'y_names baseline outliers')
+        test_cases = {
+            'outputs': TestCase(
+                y_names=['time', 'mem_used', 'runs'], baseline=None,
+                outliers=None),
+            'expression': TestCase(
+                y_names=['mem_used/time', 'time'], baseline=None,
+                outliers=None),
+            'baseline_and_outliers': TestCase(
+                y_names=['time', 'mem_used'], baseline=['finder=map'],
+                outliers='iqr'),
+        }
+        bench = benchmark.Benchmark('BenchmarkDedupe')
+        for res in pareto_results:
+            bench.add_result(res)
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                outputs_data = plotdata.outputs_bench_data(
+                    bench, 'finder', 'finder', test_case.y_names,
+                    baseline=test_case.baseline, outliers=test_case.outliers)
+                self.assertEqual(len(test_case.y_names), len(outputs_data))
+                # the same as querying each output on its own
+                for y_name, bench_data in zip(
+                        test_case.y_names, outputs_data):
+                    expected = plotdata.bench_data(
+                        bench, 'finder', 'finder', y_name=y_name,
+                        baseline=test_case.baseline,
+                        outliers=test_case.outliers)
+                    self.assertEqual(expected.y_label, bench_data.y_label)
+                    self.assertEqual(expected.data, bench_data.data)
+                    self.assertEqual(
+                        list(expected.aggregated.keys()),
+                        list(bench_data.aggregated.keys()))
+                    for label, cells in expected.aggregated.items():
+                        self.assertTrue(np.allclose(
+                            cells.y, bench_data.aggregated[label].y))
+
+    def test_outputs_share_stages(self):
+        bench = benchmark.Benchmark('BenchmarkDedupe')
+        for res in pareto_results:
+            bench.add_result(res)
+        query_cache = cache.QueryCache()
+        plotdata.outputs_bench_data(
+            bench, 'finder', 'finder', ['time', 'mem_used'],
+            query_cache=query_cache)
+        # filtered, grouped and outputs stages
+        self.assertEqual(3, query_cache.misses)
+        plotdata.bench_data(
+            bench, 'finder', 'finder', y_name='time', query_cache=query_cache)
+        self.assertEqual(4, query_cache.misses)
+
+    def test_outputs_bench_data_raises(self):
+        bench = benchmark.Benchmark('BenchmarkDedupe')
+        for res in pareto_results:
+            bench.add_result(res)
+        with self.assertRaises(inputs.InvalidInputError):
+            plotdata.outputs_bench_data(
+                bench, 'finder', 'finder', ['time', 'mem_allocs'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import contextlib
+import io
+import json
+import os
+import pstats
+import tempfile
+import unittest
+import gobenchplot.__main__ as gobenchplot
+import gobenchplot.profiling as profiling
+from tests.test_live import bench_output_lines, sample_results
+from collections import namedtuple
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestProfiler(unittest.TestCase):
+    def test_stages(self):
+        clock = FakeClock()
+        cpu_clock = FakeClock()
+        profiler = profiling.Profiler(
+            trace_memory=False, clock=clock, cpu_clock=cpu_clock)
+        for _ in range(2):
+            with profiler.stage('outer'):
+                clock.now += 1.0
+                with profiler.stage('inner'):
+                    clock.now += 2.0
+                    cpu_clock.now += 1.5
+        self.assertEqual(['outer', 'inner'], list(profiler.stats))
+        self.assertEqual(
+            profiling.StageStats(
+                name='outer', calls=2, wall=6.0, cpu=3.0, peak=None),
+            profiler.stats['outer'])
+        self.assertEqual(
+            profiling.StageStats(
+                name='inner', calls=2, wall=4.0, cpu=3.0, peak=None),
+            profiler.stats['inner'])
+        # in the order they ended
+        self.assertEqual(
+            [('inner', 1e6, 2e6), ('outer', 0.0, 3e6),
+             ('inner', 4e6, 2e6), ('outer', 3e6, 3e6)],
+            [(event['name'], event['ts'], event['dur'])
+             for event in profiler.events])
+
+    def test_peak_memory(self):
+        with profiling.profile(file=io.StringIO()) as profiler:
+            with profiling.stage('outer'):
+                with profiling.stage('inner'):
+                    data = bytearray(1 << 20)
+                    del data
+                small = bytearray(1 << 10)
+                del small
+        self.assertGreaterEqual(profiler.stats['inner'].peak, 1 << 20)
+        # the outer stage's peak includes the inner one's
+        self.assertGreaterEqual(
+            profiler.stats['outer'].peak, profiler.stats['inner'].peak)
+
+    def test_disabled(self):
+        self.assertIs(profiling.stage('a'), profiling.stage('b'))
+        with profiling.profile(file=io.StringIO()) as profiler:
+            with profiling.stage('a'):
+                pass
+        with profiling.stage('b'):
+            pass
+        self.assertEqual(['a'], list(profiler.stats))
+
+
+class TestMainProfile(unittest.TestCase):
+    def test_main_profile(self):
+        TestCase = namedtuple('TestCase', 'output')
+        test_cases = {
+            'report': TestCase(output=None),
+            'trace': TestCase(output='trace.json'),
+            'cprofile': TestCase(output='profile.prof'),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    path = os.path.join(tmp_dir, 'results.json')
+                    with open(path, 'w') as f:
+                        f.write(bench_output_lines(
+                            'BenchmarkDedupe', sample_results))
+                    argv = [
+                        path, '--bench', 'BenchmarkDedupe', '--x', 'num_elems',
+                        '--group-by', 'finder', '--table', '--profile']
+                    output = None
+                    if test_case.output is not None:
+                        output = os.path.join(tmp_dir, test_case.output)
+                        argv += ['--profile-output', output]
+                    stderr = io.StringIO()
+                    with contextlib.redirect_stderr(stderr), \
+                            contextlib.redirect_stdout(io.StringIO()):
+                        self.assertEqual(0, gobenchplot.main(argv))
+                    report = stderr.getvalue().splitlines()
+                    self.assertEqual(
+                        ['stage', 'read', 'columns', 'filter', 'group',
+                         'data', 'aggregate', 'output'],
+                        list(dict.fromkeys(
+                            line.split()[0] for line in report)))
+                    if test_case.output == 'trace.json':
+                        with open(output) as f:
+                            trace = json.load(f)
+                        self.assertEqual(
+                            'read', trace['traceEvents'][0]['name'])
+                    elif test_case.output is not None:
+                        self.assertTrue(
+                            pstats.Stats(output).total_calls > 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import numpy as np
+import gobenchplot.benchmark as benchmark
+import gobenchplot.cache as cache
+import gobenchplot.inputs as inputs
+import gobenchplot.plotdata as plotdata
+import gobenchplot.query as query
+import gobenchplot.table as table
+from tests.test_live import bench_output_lines, sample_results
+from tests.test_table import sample_bench
+from collections import namedtuple
+
+sample_suite = benchmark.BenchSuite(benchmarks=[sample_bench])
+
+
+class TestWhere(unittest.TestCase):
+    def test_where(self):
+        TestCase = namedtuple('TestCase', 'comp expected')
+        test_cases = {
+            'op': TestCase(
+                comp='<=',
+                expected=benchmark.parse_bench_var_val_cmp('num_elems<=10')),
+            'comparison': TestCase(
+                comp=benchmark.Comparison.NE,
+                expected=benchmark.parse_bench_var_val_cmp('num_elems!=10')),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                self.assertEqual(
+                    test_case.expected,
+                    query.where('num_elems', test_case.comp, 10))
+
+    def test_where_raises(self):
+        with self.assertRaises(ValueError):
+            query.where('num_elems', '=~', 10)
+
+
+class TestExecute(unittest.TestCase):
+    def test_execute(self):
+        TestCase = namedtuple('TestCase', 'query expected_rows')
+        test_cases = {
+            'mean': TestCase(
+                query=query.Query(
+                    bench='BenchmarkDedupe', x='num_elems',
+                    group_by=('finder',)),
+                expected_rows=[
+                    ('finder = map', 1, 2.0, 2),
+                    ('finder = map', 2, 5.0, 1),
+                    ('finder = slice', 1, 4.0, 1)]),
+            'filters': TestCase(
+                query=query.Query(
+                    bench='BenchmarkDedupe', x='num_elems',
+                    group_by=('finder',),
+                    filters=(
+                        query.where('num_elems', '<', 2),
+                        query.where('finder', '==', 'map'))),
+                expected_rows=[('finder = map', 1, 2.0, 2)]),
+            'min': TestCase(
+                query=query.Query(
+                    bench='BenchmarkDedupe', x='num_elems',
+                    group_by=('finder',), aggregation=query.MIN),
+                expected_rows=[
+                    ('finder = map', 1, 1.0, 2),
+                    ('finder = map', 2, 5.0, 1),
+                    ('finder = slice', 1, 4.0, 1)]),
+            'max_relative_to_baseline': TestCase(
+                query=query.Query(
+                    bench='BenchmarkDedupe', x='num_elems',
+                    group_by=('finder',), aggregation=query.MAX,
+                    baseline=(benchmark.BenchVarValue('finder', 'map'),)),
+                expected_rows=[
+                    ('finder = map', 1, 1.0, 2),
+                    ('finder = map', 2, 1.0, 1),
+                    ('finder = slice', 1, 4.0 / 3.0, 1)]),
+            'no_groups': TestCase(
+                query=query.Query(
+                    bench='BenchmarkDedupe', x='finder',
+                    aggregation=query.MEDIAN),
+                expected_rows=[('', 'map', 3.0, 3), ('', 'slice', 4.0, 1)]),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                result = query.execute(sample_suite, test_case.query)
+                self.assertEqual(
+                    test_case.expected_rows,
+                    [(row.group, row.x, row.y, row.n)
+                     for row in result.rows()])
+
+    def test_execute_raises(self):
+        TestCase = namedtuple('TestCase', 'query')
+        test_cases = {
+            'bench': TestCase(query=query.Query(
+                bench='BenchmarkFake', x='num_elems')),
+            'aggregation': TestCase(query=query.Query(
+                bench='BenchmarkDedupe', x='num_elems', aggregation='mode')),
+            'no_results': TestCase(query=query.Query(
+                bench='BenchmarkDedupe', x='num_elems',
+                filters=(query.where('num_elems', '>', 2),))),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                with self.assertRaises(inputs.InvalidInputError):
+                    query.execute(sample_suite, test_case.query)
+
+    def test_typed_and_string_filters(self):
+        # the same filters given as strings are the same cache entry
+        query_cache = cache.QueryCache()
+        result = query.execute(
+            sample_suite, query.Query(
+                bench='BenchmarkDedupe', x='num_elems', group_by=('finder',),
+                filters=(query.where('finder', '==', 'map'),)),
+            query_cache=query_cache)
+        misses = query_cache.misses
+        bench_data = plotdata.bench_data(
+            sample_bench, ['finder'], 'num_elems', filter_vars=['finder==map'],
+            query_cache=query_cache)
+        self.assertEqual(
+            result.rows(), table.table_rows(bench_data.aggregated))
+        self.assertEqual(misses, query_cache.misses)
+
+    def test_columns(self):
+        result = query.execute(sample_suite, query.Query(
+            bench='BenchmarkDedupe', x='num_elems', group_by=('finder',)))
+        columns = result.columns()
+        self.assertEqual(
+            ['finder = map', 'finder = map', 'finder = slice'],
+            columns['group'].tolist())
+        self.assertEqual([1, 2, 1], columns['x'].tolist())
+        self.assertEqual([2.0, 5.0, 4.0], columns['y'].tolist())
+        self.assertEqual([2, 1, 1], columns['n'].tolist())
+        self.assertTrue(np.isnan(columns['stddev'][1]))
+
+
+class TestLoadSuite(unittest.TestCase):
+    def test_load_suite(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'results.json')
+            with open(path, 'w') as f:
+                f.write(bench_output_lines('BenchmarkDedupe', sample_results))
+            suite = query.load_suite(path)
+        self.assertEqual(
+            sample_results,
+            list(suite.get_benchmark('BenchmarkDedupe').results))
+
+    def test_no_matplotlib(self):
+        out = subprocess.run(
+            [sys.executable, '-c', (
+                'import sys, gobenchplot.query; ' +
+                'print("matplotlib" in sys.modules)')],
+            stdout=subprocess.PIPE, check=True, universal_newlines=True)
+        self.assertEqual('False', out.stdout.strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
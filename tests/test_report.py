@@ -0,0 +1,110 @@
+import io
+import json
+import re
+import unittest
+import gobenchplot.benchmark as benchmark
+import gobenchplot.inputs as inputs
+import gobenchplot.report as report
+from tests.test_columns import mixed_results
+from tests.test_table import sample_bench
+from collections import namedtuple
+
+
+def embedded_data(html: str):
+    m = re.search(
+        r'<script type="application/json" id="gobenchplot-data">(.*?)</script>',
+        html, re.DOTALL)
+    return json.loads(m[1].replace('<\\/', '</'))
+
+
+class TestBenchReportData(unittest.TestCase):
+    def test_bench_report_data(self):
+        data = report.bench_report_data(sample_bench)
+        self.assertEqual('BenchmarkDedupe', data['name'])
+        self.assertEqual(['finder', 'num_elems'], data['vars'])
+        self.assertEqual([['map', 'slice'], [1, 2]], data['values'])
+        self.assertEqual([None], data['subs'])
+        # one cell per distinct configuration
+        self.assertEqual([0, 0, 0], data['sub'])
+        self.assertEqual([[0, 0, 1], [0, 1, 0]], data['codes'])
+        self.assertEqual({
+            'n': [2, 1, 1], 'mean': [2.0, 5.0, 4.0], 'm2': [2.0, 0.0, 0.0],
+        }, data['metrics']['time'])
+        # outputs that were never recorded are left out
+        self.assertEqual(['runs', 'time'], list(data['metrics'].keys()))
+        self.assertEqual('ns/op', data['units']['time'])
+
+    def test_missing_variables(self):
+        bench = benchmark.Benchmark('BenchmarkMyMethod')
+        for res in mixed_results:
+            bench.add_result(res)
+        data = report.bench_report_data(bench)
+        self.assertEqual(['a', 'b', None], data['subs'])
+        finder = data['vars'].index('finder')
+        self.assertEqual(['map', 'slice'], data['values'][finder])
+        self.assertEqual(5, len(data['sub']))
+        self.assertEqual(1, data['codes'][finder].count(-1))
+
+    def test_y_expression(self):
+        TestCase = namedtuple('TestCase', 'y_name expected_metrics')
+        test_cases = {
+            'output': TestCase(
+                y_name='time', expected_metrics={}),
+            'expression': TestCase(
+                y_name='time/num_elems',
+                expected_metrics={'time/num_elems': {
+                    'n': [2, 1, 1], 'mean': [2.0, 2.5, 4.0],
+                    'm2': [2.0, 0.0, 0.0]}}),
+            'missing_output': TestCase(
+                y_name='mem_used/num_elems', expected_metrics={}),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                metrics = report.bench_report_data(
+                    sample_bench, y_name=test_case.y_name)['metrics']
+                # derived values are added next to the outputs
+                self.assertEqual(test_case.expected_metrics, {
+                    name: metric for name, metric in metrics.items()
+                    if name not in ('runs', 'time')})
+
+
+class TestWriteHTML(unittest.TestCase):
+    def test_write_html(self):
+        suite = benchmark.BenchSuite(benchmarks=[sample_bench])
+        f = io.StringIO()
+        report.write_html(suite, f, view=report.ViewOptions(
+            bench='BenchmarkDedupe', x_name='num_elems',
+            group_by=['finder'], filter_vars=['num_elems<2']))
+        data = embedded_data(f.getvalue())
+        self.assertEqual({
+            'bench': 'BenchmarkDedupe', 'x': 'num_elems', 'y': 'time',
+            'groupBy': ['finder'],
+            'filters': [{'var': 'num_elems', 'op': '<', 'value': 2}],
+            'subs': None,
+        }, data['view'])
+        self.assertEqual(
+            report.bench_report_data(sample_bench), data['benchmarks'][0])
+
+    def test_write_html_escapes_script(self):
+        bench = benchmark.Benchmark('Benchmark</script><b>')
+        bench.add_result(sample_bench.results[0])
+        f = io.StringIO()
+        report.write_html(
+            benchmark.BenchSuite(benchmarks=[bench]), f,
+            title='<b>report</b>')
+        html = f.getvalue()
+        self.assertEqual(2, html.count('</script>'))
+        self.assertIn('<title>&lt;b&gt;report&lt;/b&gt;</title>', html)
+        self.assertEqual(
+            'Benchmark</script><b>', embedded_data(html)['benchmarks'][0]['name'])
+
+    def test_write_html_raises(self):
+        suite = benchmark.BenchSuite(benchmarks=[sample_bench])
+        with self.assertRaises(inputs.InvalidInputError):
+            report.write_html(
+                suite, io.StringIO(),
+                view=report.ViewOptions(bench='BenchmarkFake'))
+
+
+if __name__ == '__main__':
+    unittest.main()
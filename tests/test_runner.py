@@ -0,0 +1,147 @@
+import contextlib
+import datetime
+import io
+import os
+import sys
+import tempfile
+import unittest
+import gobenchplot.__main__ as gobenchplot
+import gobenchplot.benchmark as benchmark
+import gobenchplot.runner as runner
+from tests.test_live import bench_output_lines, sample_results
+from collections import namedtuple
+
+# stands in for `go test -json`, writing the recorded output it's given
+STUB = '''import sys
+with open(sys.argv[1]) as f:
+    for line in f:
+        sys.stdout.write(line)
+        sys.stdout.flush()
+sys.exit(int(sys.argv[2]))
+'''
+
+
+class TestRunCommand(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.stub = os.path.join(self.tmp_dir.name, 'stub.py')
+        with open(self.stub, 'w') as f:
+            f.write(STUB)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def stub_command(self, output: str, status: int = 0):
+        recorded = os.path.join(self.tmp_dir.name, 'recorded.json')
+        with open(recorded, 'w') as f:
+            f.write(output)
+        return [sys.executable, self.stub, recorded, str(status)]
+
+    def test_run_command(self):
+        TestCase = namedtuple(
+            'TestCase', 'output status expected_results expected_error')
+        output = bench_output_lines('BenchmarkDedupe', sample_results)
+        test_cases = {
+            'results': TestCase(
+                output=output, status=0, expected_results=sample_results,
+                expected_error=None),
+            'failed': TestCase(
+                output=output, status=1, expected_results=sample_results,
+                expected_error=None),
+            'not_json': TestCase(
+                output='ok  \tpkg\t0.1s\n' + output, status=0,
+                expected_results=[], expected_error=ValueError),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                log = io.StringIO()
+                result = runner.run_command(
+                    self.stub_command(test_case.output, test_case.status), log)
+                self.assertEqual(test_case.status, result.returncode)
+                # the log has every line, even after an error
+                self.assertEqual(test_case.output, log.getvalue())
+                bench = result.suite.get_benchmark('BenchmarkDedupe')
+                self.assertEqual(
+                    test_case.expected_results,
+                    [] if bench is None else list(bench.results))
+                if test_case.expected_error is None:
+                    self.assertIsNone(result.error)
+                else:
+                    self.assertIsInstance(
+                        result.error, test_case.expected_error)
+
+    def test_main_run(self):
+        output = bench_output_lines('BenchmarkDedupe', sample_results)
+        log_path = os.path.join(self.tmp_dir.name, 'run.json')
+        report_path = os.path.join(self.tmp_dir.name, 'report.html')
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertEqual(0, gobenchplot.main([
+                'run', '--log', log_path, '-o', report_path, '--'] +
+                self.stub_command(output)))
+        self.assertEqual(
+            ['output saved to %s' % (log_path)],
+            stderr.getvalue().splitlines())
+        with open(log_path) as f:
+            self.assertEqual(output, f.read())
+        self.assertTrue(os.path.getsize(report_path) > 0)
+        with open(log_path) as f:
+            suite = benchmark.parse_bench_output(f)
+        self.assertEqual(
+            sample_results,
+            list(suite.get_benchmark('BenchmarkDedupe').results))
+
+        # the command's status is passed on, and without --bench the only
+        # benchmark run is printed
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout), \
+                contextlib.redirect_stderr(stderr):
+            self.assertEqual(3, gobenchplot.main([
+                'run', '--log', log_path, '--x', 'num_elems',
+                '--group-by', 'finder', '--table', 'csv', '--'] +
+                self.stub_command(output, 3)))
+        self.assertEqual(
+            ['output saved to %s' % (log_path),
+             '%s exited with status 3' % (sys.executable)],
+            stderr.getvalue().splitlines())
+        self.assertEqual(
+            ['group,num_elems,time,n,stddev',
+             'finder = map,1,2,2,1.41421',
+             'finder = map,2,7,2,2.82843',
+             'finder = slice,1,5,2,1.41421',
+             'finder = slice,2,2,1,'],
+            stdout.getvalue().splitlines())
+
+        # which of several benchmarks to print needs --bench
+        output += bench_output_lines('BenchmarkSort', sample_results)
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout), \
+                contextlib.redirect_stderr(stderr):
+            self.assertEqual(1, gobenchplot.main([
+                'run', '--log', log_path, '--x', 'num_elems',
+                '--group-by', 'finder', '--table', 'csv', '--'] +
+                self.stub_command(output)))
+        self.assertEqual('', stdout.getvalue())
+        self.assertEqual(
+            ['output saved to %s' % (log_path),
+             '--bench is needed for a table or plot of 2 benchmarks'],
+            stderr.getvalue().splitlines())
+
+class TestDefaults(unittest.TestCase):
+    def test_default_command(self):
+        self.assertEqual(
+            ['go', 'test', '.', '-run', '^$', '-bench', '^BenchmarkDedupe$',
+             '-benchmem', '-json'],
+            runner.default_command('BenchmarkDedupe'))
+        self.assertEqual('.', runner.default_command()[6])
+
+    def test_default_log(self):
+        self.assertEqual(
+            'gobench-20240102T030405.json',
+            runner.default_log(datetime.datetime(2024, 1, 2, 3, 4, 5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+import matplotlib
+matplotlib.use('Agg')
+import gobenchplot.benchmark as benchmark  # noqa: E402
+import gobenchplot.inputs as inputs  # noqa: E402
+import gobenchplot.serve as serve  # noqa: E402
+from tests.test_table import sample_bench  # noqa: E402
+from collections import namedtuple  # noqa: E402
+
+
+def sample_server() -> serve.Server:
+    return serve.Server(
+        {'results.json': benchmark.BenchSuite(benchmarks=[sample_bench])},
+        workers=2)
+
+
+class TestParseQuery(unittest.TestCase):
+    def test_parse_query(self):
+        query = serve.parse_query({
+            'bench': ['BenchmarkDedupe'], 'x': ['num_elems'],
+            'group-by': ['finder'], 'filter-by': ['num_elems<2'],
+            'format': ['svg']})
+        self.assertEqual(serve.Query(
+            suite=None, bench='BenchmarkDedupe', x_name='num_elems',
+            group_by=('finder',), filter_vars=('num_elems<2',),
+            fmt='svg'), query)
+
+    def test_parse_query_raises(self):
+        TestCase = namedtuple('TestCase', 'params')
+        test_cases = {
+            'missing_bench': TestCase(params={'x': ['num_elems']}),
+            'repeated_x': TestCase(
+                params={'bench': ['BenchmarkDedupe'], 'x': ['a', 'b']}),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                with self.assertRaises(inputs.InvalidInputError):
+                    serve.parse_query(test_case.params)
+
+    def test_key(self):
+        TestCase = namedtuple('TestCase', 'a b equal')
+        query = serve.Query(suite=None, bench='BenchmarkDedupe', x_name='a')
+        test_cases = {
+            'filter_order': TestCase(
+                a=query._replace(filter_vars=('a<2', 'b==c')),
+                b=query._replace(filter_vars=('b==c', 'a<2')),
+                equal=True),
+            'filter_spacing': TestCase(
+                a=query._replace(filter_vars=('a<2',)),
+                b=query._replace(filter_vars=('a < 2',)),
+                equal=True),
+            'group_by_order': TestCase(
+                a=query._replace(group_by=('a', 'b')),
+                b=query._replace(group_by=('b', 'a')),
+                equal=False),
+            'no_subs': TestCase(
+                a=query._replace(subs=None),
+                b=query._replace(subs=()),
+                equal=False),
+            'format': TestCase(
+                a=query._replace(fmt='png'),
+                b=query._replace(fmt='svg'),
+                equal=False),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                self.assertEqual(
+                    test_case.equal,
+                    test_case.a.key('plot') == test_case.b.key('plot'))
+
+
+class TestSuiteNames(unittest.TestCase):
+    def test_suite_names(self):
+        self.assertEqual(
+            ['stdin', 'a.json', 'a.json.2', 'b.json'],
+            serve.suite_names(['-', 'x/a.json', 'y/a.json', 'b.json']))
+
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.server = sample_server()
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_listings(self):
+        TestCase = namedtuple('TestCase', 'path params expected')
+        test_cases = {
+            'benchmarks': TestCase(
+                path='/benchmarks', params={},
+                expected=[{
+                    'suite': 'results.json', 'name': 'BenchmarkDedupe',
+                    'results': 4}]),
+            'variables': TestCase(
+                path='/variables', params={'bench': ['BenchmarkDedupe']},
+                expected={'finder': ['map', 'slice'], 'num_elems': [1, 2]}),
+            'subs': TestCase(
+                path='/subs', params={'bench': ['BenchmarkDedupe']},
+                expected=[None]),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                response = self.server.handle(
+                    test_case.path, test_case.params)
+                self.assertEqual(200, response.status)
+                self.assertEqual('application/json', response.content_type)
+                self.assertEqual(
+                    test_case.expected, json.loads(response.body))
+
+    def test_plot(self):
+        TestCase = namedtuple('TestCase', 'params content_type prefix')
+        test_cases = {
+            'png': TestCase(
+                params={}, content_type='image/png', prefix=b'\x89PNG'),
+            'svg': TestCase(
+                params={'format': ['svg']}, content_type='image/svg+xml',
+                prefix=b'<?xml'),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                params = {
+                    'bench': ['BenchmarkDedupe'], 'x': ['num_elems'],
+                    'group-by': ['finder'], **test_case.params}
+                response = self.server.handle('/plot', params)
+                self.assertEqual(200, response.status)
+                self.assertEqual(test_case.content_type, response.content_type)
+                self.assertTrue(response.body.startswith(test_case.prefix))
+                self.assertFalse(response.cached)
+
+                # the same query in another order is served from memory
+                again = self.server.handle(
+                    '/plot', dict(reversed(list(params.items()))))
+                self.assertTrue(again.cached)
+                self.assertEqual(response.body, again.body)
+
+    def test_table(self):
+        response = self.server.handle('/table', {
+            'bench': ['BenchmarkDedupe'], 'x': ['num_elems'],
+            'group-by': ['finder'], 'format': ['csv']})
+        self.assertEqual(200, response.status)
+        self.assertEqual(
+            'group,num_elems,time,n,stddev\n' +
+            'finder = map,1,2,2,1.41421\n' +
+            'finder = map,2,5,1,\n' +
+            'finder = slice,1,4,1,\n',
+            response.body.decode())
+
+    def test_errors(self):
+        TestCase = namedtuple('TestCase', 'path params status')
+        test_cases = {
+            'unknown_path': TestCase(path='/nope', params={}, status=404),
+            'unknown_bench': TestCase(
+                path='/plot', params={'bench': ['BenchmarkFake'], 'x': ['a']},
+                status=404),
+            'unknown_suite': TestCase(
+                path='/subs',
+                params={'bench': ['BenchmarkDedupe'], 'suite': ['nope']},
+                status=404),
+            'missing_bench': TestCase(path='/variables', params={}, status=400),
+            'bad_format': TestCase(
+                path='/table',
+                params={
+                    'bench': ['BenchmarkDedupe'], 'x': ['num_elems'],
+                    'format': ['svg']},
+                status=400),
+            'bad_x': TestCase(
+                path='/plot',
+                params={'bench': ['BenchmarkDedupe'], 'x': ['fake']},
+                status=400),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                response = self.server.handle(
+                    test_case.path, test_case.params)
+                self.assertEqual(test_case.status, response.status)
+                self.assertIn('error', json.loads(response.body))
+
+
+class TestHTTPServer(unittest.TestCase):
+    def test_round_trip(self):
+        app = sample_server()
+        server = serve.HTTPServer(('127.0.0.1', 0), app, quiet=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = 'http://127.0.0.1:%d' % (server.server_address[1])
+            with urllib.request.urlopen(url + '/benchmarks') as f:
+                self.assertEqual('miss', f.headers['X-Cache'])
+                self.assertEqual(
+                    'BenchmarkDedupe', json.loads(f.read())[0]['name'])
+            with self.assertRaises(urllib.error.HTTPError) as e:
+                urllib.request.urlopen(url + '/nope')
+            self.assertEqual(404, e.exception.code)
+            e.exception.close()
+        finally:
+            server.shutdown()
+            server.server_close()
+            app.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
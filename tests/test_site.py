@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+import matplotlib
+matplotlib.use('Agg')  # noqa: E402
+import gobenchplot.benchmark as benchmark
+import gobenchplot.cache as cache
+import gobenchplot.columns as columns
+import gobenchplot.inputs as inputs
+import gobenchplot.site as site
+from tests.test_columns import sample_res as columns_res
+from tests.test_live import sample_results
+from tests.test_plotdata import facet_results
+from tests.test_table import sample_res
+from collections import namedtuple
+
+
+def sample_suite() -> benchmark.BenchSuite:
+    dedupe = benchmark.Benchmark('BenchmarkDedupe')
+    for res in sample_results:
+        dedupe.add_result(res)
+    facets = benchmark.Benchmark('BenchmarkFacets')
+    for res in facet_results:
+        facets.add_result(res)
+    return benchmark.BenchSuite(benchmarks=[dedupe, facets])
+
+
+class TestDefaultAxes(unittest.TestCase):
+    def test_default_axes(self):
+        TestCase = namedtuple('TestCase', 'results expected')
+        test_cases = {
+            'numeric_x': TestCase(
+                results=sample_results,
+                expected=('num_elems', ['finder'])),
+            'no_numeric_var': TestCase(
+                results=[columns_res(None, {'finder': 'map'}, 1.0)],
+                expected=('finder', [])),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                cols = columns.BenchColumns.from_results(test_case.results)
+                self.assertEqual(
+                    test_case.expected, site.default_axes(cols))
+
+    def test_no_variables(self):
+        cols = columns.BenchColumns.from_results([columns_res(None, {}, 1.0)])
+        with self.assertRaises(inputs.InvalidInputError):
+            site.default_axes(cols)
+
+
+class TestBuildSite(unittest.TestCase):
+    def test_reuses_unchanged(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            suite = sample_suite()
+            pages = site.build_site(suite, out_dir)
+            self.assertEqual([True, True], [page.rendered for page in pages])
+            self.assertEqual(
+                ['BenchmarkDedupe.svg', 'BenchmarkFacets.svg'],
+                [page.file for page in pages])
+            for page in pages:
+                self.assertTrue(os.path.exists(os.path.join(out_dir, page.file)))
+            with open(os.path.join(out_dir, 'index.html')) as f:
+                self.assertIn('src="BenchmarkFacets.svg"', f.read())
+
+            pages = site.build_site(sample_suite(), out_dir)
+            self.assertEqual([False, False], [page.rendered for page in pages])
+
+            # only the benchmark with a new result is rendered again
+            suite = sample_suite()
+            suite.get_benchmark('BenchmarkDedupe').add_result(
+                sample_res('map', 1, 100.0))
+            pages = site.build_site(suite, out_dir)
+            self.assertEqual([True, False], [page.rendered for page in pages])
+
+            # as is every benchmark when an option that changes them does
+            pages = site.build_site(
+                sample_suite(), out_dir, options=site.SiteOptions(
+                    y_name='time/num_elems'))
+            self.assertEqual([True, True], [page.rendered for page in pages])
+
+    def test_shared_cache_dir(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            render_cache = cache.RenderCache(os.path.join(tmp_dir, 'cache'))
+            site.build_site(
+                sample_suite(), os.path.join(tmp_dir, 'a'),
+                render_cache=render_cache)
+            pages = site.build_site(
+                sample_suite(), os.path.join(tmp_dir, 'b'),
+                render_cache=render_cache)
+            self.assertEqual([False, False], [page.rendered for page in pages])
+            self.assertEqual(2, render_cache.hits)
+
+    def test_skips_invalid(self):
+        with tempfile.TemporaryDirectory() as out_dir:
+            pages = site.build_site(
+                sample_suite(), out_dir, options=site.SiteOptions(
+                    subs=['a']))
+            # BenchmarkDedupe has no sub-benchmarks
+            self.assertEqual(
+                [False, True], [page.rendered for page in pages])
+            self.assertIsNone(pages[0].file)
+            self.assertIsNotNone(pages[0].error)
+            with open(os.path.join(out_dir, 'index.html')) as f:
+                self.assertIn('not plotted', f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import unittest
+import numpy as np
+import gobenchplot.stats as stats
+import gobenchplot.inputs as inputs
+from collections import namedtuple
+
+
+class TestCellCodes(unittest.TestCase):
+    def test_cell_codes(self):
+        codes, num_cells = stats.cell_codes(
+            np.array([0, 0, 1, 1, 0]),
+            np.array(['a', 'b', 'a', 'a', 'a']))
+        self.assertEqual(3, num_cells)
+        self.assertTrue(np.array_equal(np.array([0, 1, 2, 2, 0]), codes))
+
+
+class TestSortedCells(unittest.TestCase):
+    def test_quantile(self):
+        TestCase = namedtuple('TestCase', 'q expected')
+        codes = np.array([1, 0, 1, 0, 0, 1, 1])
+        values = np.array([4.0, 3.0, 1.0, 1.0, 2.0, 3.0, 2.0])
+        cells = stats.sort_cells(codes, values, 3)
+        test_cases = {
+            'min': TestCase(q=0, expected=np.array([1.0, 1.0, np.nan])),
+            'median': TestCase(q=0.5, expected=np.array([2.0, 2.5, np.nan])),
+            'q3': TestCase(q=0.75, expected=np.array([2.5, 3.25, np.nan])),
+            'max': TestCase(q=1, expected=np.array([3.0, 4.0, np.nan])),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                self.assertTrue(np.array_equal(
+                    test_case.expected, cells.quantile(test_case.q),
+                    equal_nan=True))
+
+    def test_ranks(self):
+        cells = stats.sort_cells(
+            np.array([1, 0, 1, 0]), np.array([5.0, 2.0, 4.0, 1.0]), 2)
+        self.assertTrue(np.array_equal(np.array([1, 1, 0, 0]), cells.ranks()))
+
+
+class TestOutlierMask(unittest.TestCase):
+    def test_outlier_mask(self):
+        TestCase = namedtuple('TestCase', 'outlier_filter expected_keep')
+        # two cells, each with a single far outlier
+        codes = np.array([0, 0, 0, 0, 0, 1, 1, 1, 1, 1])
+        values = np.array([
+            10.0, 11.0, 10.5, 10.2, 100.0,
+            5.0, 5.1, 0.1, 4.9, 5.0])
+        test_cases = {
+            'iqr': TestCase(
+                outlier_filter=stats.OutlierFilter(
+                    method=stats.IQR_METHOD, param=1.5),
+                expected_keep=np.array([
+                    True, True, True, True, False,
+                    True, True, False, True, True])),
+            'mad': TestCase(
+                outlier_filter=stats.OutlierFilter(
+                    method=stats.MAD_METHOD, param=3.5),
+                expected_keep=np.array([
+                    True, True, True, True, False,
+                    True, True, False, True, True])),
+            'trim': TestCase(
+                outlier_filter=stats.OutlierFilter(
+                    method=stats.TRIM_METHOD, param=0.2),
+                expected_keep=np.array([
+                    False, True, True, True, False,
+                    True, False, False, True, True])),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                keep = stats.outlier_mask(
+                    codes, values, 2, test_case.outlier_filter)
+                self.assertTrue(np.array_equal(test_case.expected_keep, keep))
+
+    def test_mad_zero_keeps_cell(self):
+        keep = stats.outlier_mask(
+            np.array([0, 0, 0]), np.array([1.0, 1.0, 1.0]), 1,
+            stats.OutlierFilter(method=stats.MAD_METHOD, param=3.5))
+        self.assertTrue(np.all(keep))
+
+
+class TestDistributions(unittest.TestCase):
+    # cell 0 has an outlier, cell 1 a single value and cell 2 is empty
+    codes = np.array([0, 0, 0, 0, 0, 1])
+    values = np.array([10.0, 11.0, 12.0, 13.0, 100.0, 5.0])
+
+    def test_cell_box_stats(self):
+        cells = stats.sort_cells(self.codes, self.values, 3)
+        box, beyond = stats.cell_box_stats(cells)
+        for field, expected in [
+                ('q1', [11.0, 5.0, np.nan]),
+                ('median', [12.0, 5.0, np.nan]),
+                ('q3', [13.0, 5.0, np.nan]),
+                ('whisker_low', [10.0, 5.0, np.nan]),
+                ('whisker_high', [13.0, 5.0, np.nan])]:
+            with self.subTest(field):
+                self.assertTrue(np.array_equal(
+                    expected, getattr(box, field), equal_nan=True))
+        self.assertTrue(np.array_equal(
+            [False, False, False, False, True, False], beyond))
+
+    def test_cell_histograms(self):
+        cells = stats.sort_cells(self.codes, self.values, 3)
+        edges, counts = stats.cell_histograms(cells, 3)
+        self.assertTrue(np.allclose(
+            [[10.0, 40.0, 70.0, 100.0], [4.5, 14.5 / 3, 15.5 / 3, 5.5]],
+            edges[:2]))
+        self.assertTrue(np.all(np.isnan(edges[2])))
+        self.assertTrue(np.array_equal(
+            [[4, 0, 1], [0, 1, 0], [0, 0, 0]], counts))
+
+    def test_cell_kdes(self):
+        rng = np.random.default_rng(0)
+        codes = np.repeat([0, 2], [500, 50])
+        values = np.concatenate(
+            [rng.normal(0, 1, 500), rng.normal(100, 10, 50)])
+        cells = stats.sort_cells(codes, values, 3)
+        grid, density = stats.cell_kdes(cells, 128)
+        self.assertEqual((3, 128), grid.shape)
+        bandwidths = stats.cell_bandwidths(cells)
+        for cell in [0, 2]:
+            with self.subTest(cell):
+                # matches the direct sum over every value
+                cell_values = values[codes == cell]
+                expected = np.exp(-0.5 * (
+                    (grid[cell][:, None] - cell_values[None, :]) /
+                    bandwidths[cell]) ** 2).sum(axis=1) / (
+                        len(cell_values) * bandwidths[cell] *
+                        np.sqrt(2 * np.pi))
+                self.assertTrue(np.allclose(
+                    expected, density[cell], atol=1e-3 * expected.max()))
+        self.assertTrue(np.all(density[1] == 0))
+
+
+class TestParetoFrontier(unittest.TestCase):
+    def test_pareto_frontier(self):
+        TestCase = namedtuple('TestCase', 'x y expected')
+        test_cases = {
+            'single': TestCase(x=[1.0], y=[1.0], expected=[0]),
+            'dominated': TestCase(
+                x=[2.0, 1.0, 3.0], y=[2.0, 1.0, 3.0], expected=[1]),
+            'trade_off': TestCase(
+                x=[4.0, 1.0, 2.0, 5.0, 3.0], y=[2.0, 20.0, 8.0, 9.0, 8.0],
+                expected=[1, 2, 0]),
+            'same_x': TestCase(
+                x=[1.0, 1.0, 2.0], y=[5.0, 3.0, 1.0], expected=[1, 2]),
+            'duplicates': TestCase(
+                x=[1.0, 1.0], y=[2.0, 2.0], expected=[0]),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                self.assertEqual(test_case.expected, stats.pareto_frontier(
+                    np.array(test_case.x), np.array(test_case.y)).tolist())
+
+    def test_pareto_frontier_matches_pairwise(self):
+        rng = np.random.default_rng(0)
+        x = rng.integers(0, 20, 300).astype(np.float64)
+        y = rng.integers(0, 20, 300).astype(np.float64)
+        frontier = set(stats.pareto_frontier(x, y).tolist())
+        for i in range(len(x)):
+            dominated = np.any(
+                (x <= x[i]) & (y <= y[i]) & ((x < x[i]) | (y < y[i])))
+            duplicate_before = np.any((x[:i] == x[i]) & (y[:i] == y[i]))
+            self.assertEqual(
+                not dominated and not duplicate_before, i in frontier)
+
+
+class TestTQuantile(unittest.TestCase):
+    def test_t_quantile(self):
+        TestCase = namedtuple('TestCase', 'p df expected')
+        # from published tables
+        test_cases = {
+            '975_closed_forms': TestCase(
+                p=0.975, df=[1, 2], expected=[12.706, 4.303]),
+            '975': TestCase(
+                p=0.975, df=[3, 4, 5, 10, 30], expected=[
+                    3.182, 2.776, 2.571, 2.228, 2.042]),
+            '995': TestCase(
+                p=0.995, df=[5, 10, 30], expected=[4.032, 3.169, 2.750]),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                self.assertTrue(np.allclose(
+                    test_case.expected,
+                    stats.t_quantile(test_case.p, np.array(test_case.df)),
+                    rtol=2e-3))
+
+    def test_t_quantile_no_df(self):
+        self.assertTrue(
+            np.isnan(stats.t_quantile(0.975, np.array([0, -1]))).all())
+
+
+class TestParseOutlierFilter(unittest.TestCase):
+    def test_parse(self):
+        TestCase = namedtuple('TestCase', 'in_str expected')
+        test_cases = {
+            'default_param': TestCase(
+                in_str='iqr',
+                expected=stats.OutlierFilter(method='iqr', param=1.5)),
+            'explicit_param': TestCase(
+                in_str='trim:0.25',
+                expected=stats.OutlierFilter(method='trim', param=0.25)),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                self.assertEqual(
+                    test_case.expected,
+                    stats.parse_outlier_filter(test_case.in_str))
+
+    def test_parse_raises(self):
+        for in_str in ['unknown', 'mad:abc', 'trim:0.5', 'iqr:-1']:
+            with self.subTest(in_str):
+                with self.assertRaises(inputs.InvalidInputError):
+                    stats.parse_outlier_filter(in_str)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,208 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+import gobenchplot.benchmark as benchmark
+import gobenchplot.columns as columns
+import gobenchplot.store as store
+from tests.test_benchmark import sample_bench_results
+from tests.test_columns import mixed_results, sample_res
+from collections import namedtuple
+
+
+def run_vars(res: benchmark.BenchRes) -> benchmark.BenchRes:
+    # a loaded result without the variables describing its run
+    return res._replace(inputs=res.inputs._replace(variables=[
+        var for var in res.inputs.variables
+        if var.var_name not in store.RUN_VARS]))
+
+
+class TestStore(unittest.TestCase):
+    def setUp(self):
+        self.conn = store.connect(':memory:')
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_round_trip(self):
+        TestCase = namedtuple('TestCase', 'results')
+        test_cases = {
+            'subs_and_missing_variables': TestCase(results=mixed_results),
+            'all_outputs': TestCase(results=list(sample_bench_results)),
+            'bool_and_float_values': TestCase(results=[
+                sample_res(None, {'sorted': True, 'load': 0.5}, 1.0),
+                sample_res(None, {'sorted': 1, 'load': 1}, 2.0),
+                sample_res(None, {'sorted': False, 'load': 1.0}, 3.0),
+            ]),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                conn = store.connect(':memory:')
+                run = store.ingest(
+                    conn, [('BenchmarkA', res) for res in test_case.results],
+                    batch_size=2)
+                self.assertEqual(len(test_case.results), run.results)
+                suite = store.load_suite(conn)
+                loaded = list(suite.get_benchmark('BenchmarkA').results)
+                self.assertEqual(
+                    test_case.results, [run_vars(res) for res in loaded])
+                for expected, res in zip(test_case.results, loaded):
+                    # 1 == 1.0 == True, so compare types too
+                    self.assertEqual(
+                        [type(var.var_value)
+                         for var in expected.inputs.variables],
+                        [type(var.var_value)
+                         for var in run_vars(res).inputs.variables])
+                conn.close()
+
+    def test_runs(self):
+        results = [('BenchmarkA', res) for res in mixed_results]
+        store.ingest(self.conn, results, label='v1', timestamp=100.5)
+        store.ingest(
+            self.conn, results[:2], file='/tmp/results.json', timestamp=200)
+        self.assertEqual([
+            store.Run(id=1, file=None, label='v1', timestamp=100.5, results=5),
+            store.Run(
+                id=2, file='/tmp/results.json', label=None, timestamp=200,
+                results=2),
+        ], store.list_runs(self.conn))
+
+        # configurations are stored once across runs
+        self.assertEqual(
+            5, self.conn.execute('SELECT COUNT(*) FROM configs').fetchone()[0])
+
+        bench = store.load_suite(self.conn).get_benchmark('BenchmarkA')
+        self.assertEqual(7, len(bench.results))
+        self.assertEqual(
+            [('v1', 100)] * 5 + [('results.json', 200)] * 2,
+            [(res.inputs.variables[-2].var_value,
+              res.inputs.variables[-1].var_value)
+             for res in bench.results])
+
+        bench = store.load_suite(
+            self.conn, labels=['v1']).get_benchmark('BenchmarkA')
+        self.assertEqual(5, len(bench.results))
+
+    def test_load_suite_query(self):
+        store.ingest(self.conn, [
+            ('BenchmarkA', res) for res in mixed_results] + [
+            ('BenchmarkB', sample_res(None, {'num_elems': 1}, 6.0))])
+        TestCase = namedtuple(
+            'TestCase', 'bench_names subs filter_vars expected_times')
+        test_cases = {
+            'all': TestCase(
+                bench_names=None, subs=None, filter_vars=None,
+                expected_times={
+                    'BenchmarkA': [1.0, 2.0, 3.0, 4.0, 5.0],
+                    'BenchmarkB': [6.0]}),
+            'bench': TestCase(
+                bench_names=['BenchmarkB'], subs=None, filter_vars=None,
+                expected_times={'BenchmarkB': [6.0]}),
+            'subs': TestCase(
+                bench_names=None, subs=['a'], filter_vars=None,
+                expected_times={'BenchmarkA': [1.0, 2.0, 4.0]}),
+            'eq': TestCase(
+                bench_names=['BenchmarkA'], subs=None,
+                filter_vars=['finder==map'],
+                expected_times={'BenchmarkA': [1.0, 3.0, 4.0]}),
+            'range': TestCase(
+                bench_names=['BenchmarkA'], subs=None,
+                filter_vars=['num_elems>=2', 'num_elems<3'],
+                expected_times={'BenchmarkA': [3.0, 4.0]}),
+            'range_any_bench': TestCase(
+                bench_names=None, subs=None, filter_vars=['num_elems<2'],
+                expected_times={
+                    'BenchmarkA': [1.0, 2.0], 'BenchmarkB': [6.0]}),
+            # left to the in-memory filters
+            'ne': TestCase(
+                bench_names=['BenchmarkA'], subs=None,
+                filter_vars=['finder!=map'],
+                expected_times={'BenchmarkA': [1.0, 2.0, 3.0, 4.0, 5.0]}),
+            'run': TestCase(
+                bench_names=['BenchmarkA'], subs=None,
+                filter_vars=['run==nope'],
+                expected_times={'BenchmarkA': [1.0, 2.0, 3.0, 4.0, 5.0]}),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                suite = store.load_suite(
+                    self.conn, bench_names=test_case.bench_names,
+                    subs=test_case.subs, filter_vars=test_case.filter_vars)
+                self.assertEqual(test_case.expected_times, {
+                    bench.name: [res.outputs.time for res in bench.results]
+                    for bench in suite.benchmarks})
+
+    def test_load_suite_filters_match_memory(self):
+        # the filters pushed into the query select the same results as
+        # filtering all of them in memory
+        results = [
+            sample_res(None, {'sorted': True, 'num_elems': 1}, 1.0),
+            sample_res(None, {'sorted': False, 'num_elems': 2}, 2.0),
+            sample_res(None, {'sorted': 1, 'num_elems': 2.5}, 3.0),
+            sample_res(None, {'sorted': 0, 'num_elems': 3}, 4.0),
+            sample_res(None, {'sorted': True, 'num_elems': 4}, 5.0),
+        ]
+        store.ingest(self.conn, [('BenchmarkA', res) for res in results])
+        cols = columns.BenchColumns.from_results(results)
+        for filter_var in [
+                'sorted==1', 'sorted==0', 'sorted==true', 'sorted==false',
+                'sorted>0', 'sorted<1', 'sorted<=true', 'num_elems==2',
+                'num_elems==2.5', 'num_elems>2', 'num_elems<=3.0']:
+            with self.subTest(filter_var):
+                filters = [benchmark.parse_bench_var_val_cmp(filter_var)]
+                bench = store.load_suite(
+                    self.conn, filter_vars=[filter_var]).get_benchmark(
+                        'BenchmarkA')
+                loaded = [] if bench is None else list(bench.results)
+                loaded_cols = columns.BenchColumns.from_results(loaded)
+                self.assertEqual(
+                    cols.column('time', columns.select_rows(
+                        cols, None, filters)).tolist(),
+                    loaded_cols.column('time', columns.select_rows(
+                        loaded_cols, None, filters)).tolist())
+
+    def test_ingest_rolls_back_batch(self):
+        ingester = store.Ingester(self.conn, batch_size=10)
+        ingester.add('BenchmarkA', mixed_results[0])
+        ingester.add('BenchmarkB', mixed_results[1]._replace(
+            outputs=mixed_results[1].outputs._replace(runs=None)))
+        with self.assertRaises(sqlite3.IntegrityError):
+            ingester.flush()
+        self.assertEqual(
+            0, self.conn.execute('SELECT COUNT(*) FROM configs').fetchone()[0])
+
+        # names from the rolled back batch are inserted again
+        ingester._results = []
+        ingester.add('BenchmarkB', mixed_results[1])
+        ingester.flush()
+        self.assertEqual(
+            [2.0], [res.outputs.time for res in store.load_suite(
+                self.conn).get_benchmark('BenchmarkB').results])
+
+
+class TestStoreFile(unittest.TestCase):
+    def test_is_store(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'history.db')
+            store.connect(db_path).close()
+            json_path = os.path.join(tmp_dir, 'results.json')
+            with open(json_path, 'w') as f:
+                f.write('{}\n')
+            self.assertTrue(store.is_store(db_path))
+            self.assertFalse(store.is_store(json_path))
+            self.assertFalse(store.is_store('-'))
+            self.assertFalse(store.is_store(os.path.join(tmp_dir, 'missing')))
+
+    def test_schema_version(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, 'history.db')
+            conn = sqlite3.connect(db_path)
+            conn.execute('PRAGMA user_version = %d' % (
+                store.SCHEMA_VERSION + 1))
+            conn.close()
+            with self.assertRaises(store.StoreError):
+                store.connect(db_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
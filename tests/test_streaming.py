@@ -0,0 +1,152 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import numpy as np
+import gobenchplot.__main__ as gobenchplot
+import gobenchplot.benchmark as benchmark
+import gobenchplot.inputs as inputs
+import gobenchplot.plotdata as plotdata
+import gobenchplot.streaming as streaming
+import gobenchplot.table as table
+from tests.test_live import bench_output_lines, sample_results
+from tests.test_table import sample_res
+from collections import namedtuple
+
+
+def stream_aggregator(results, **kwargs) -> streaming.StreamAggregator:
+    aggregator = streaming.StreamAggregator('finder', 'num_elems', **kwargs)
+    streaming.aggregate_stream(
+        io.StringIO(bench_output_lines('BenchmarkDedupe', results)),
+        'BenchmarkDedupe', aggregator)
+    return aggregator
+
+
+class TestStreamAggregator(unittest.TestCase):
+    def test_bench_data(self):
+        TestCase = namedtuple('TestCase', 'batch_size aggregation baseline')
+        test_cases = {
+            'mean': TestCase(
+                batch_size=streaming.BATCH_SIZE, aggregation='mean',
+                baseline=None),
+            'single_results': TestCase(
+                batch_size=1, aggregation='mean', baseline=None),
+            'uneven_batches': TestCase(
+                batch_size=3, aggregation='mean', baseline=None),
+            'median': TestCase(
+                batch_size=2, aggregation='median', baseline=None),
+            'min': TestCase(batch_size=2, aggregation='min', baseline=None),
+            'max': TestCase(batch_size=2, aggregation='max', baseline=None),
+            'percentile': TestCase(
+                batch_size=2, aggregation='p90', baseline=None),
+            'baseline': TestCase(
+                batch_size=3, aggregation='mean', baseline=['finder=map']),
+        }
+        bench = benchmark.Benchmark(
+            'BenchmarkDedupe', benchmark.BenchResults(sample_results))
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                # each cell has fewer results than the sketch holds, so
+                # every aggregation is exact
+                aggregator = stream_aggregator(
+                    sample_results, batch_size=test_case.batch_size,
+                    aggregation=test_case.aggregation,
+                    baseline=test_case.baseline)
+                self.assertEqual(len(sample_results), aggregator.num_results)
+                bench_data = aggregator.bench_data('BenchmarkDedupe')
+                expected = plotdata.bench_data(
+                    bench, 'finder', 'num_elems',
+                    aggregation=test_case.aggregation,
+                    baseline=test_case.baseline)
+                self.assertEqual(expected.y_label, bench_data.y_label)
+                expected_rows = table.table_rows(expected.aggregated)
+                rows = table.table_rows(bench_data.aggregated)
+                self.assertEqual(
+                    [row._replace(y=None) for row in expected_rows],
+                    [row._replace(y=None) for row in rows])
+                self.assertTrue(np.allclose(
+                    [row.y for row in expected_rows], [row.y for row in rows]))
+
+    def test_bench_data_raises(self):
+        TestCase = namedtuple('TestCase', 'group_by filter_vars')
+        test_cases = {
+            'no_results': TestCase(
+                group_by='finder', filter_vars=['num_elems>2']),
+            'group_by': TestCase(group_by='fake', filter_vars=None),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                aggregator = streaming.StreamAggregator(
+                    test_case.group_by, 'num_elems',
+                    filter_vars=test_case.filter_vars)
+                for res in sample_results:
+                    aggregator.add(res)
+                with self.assertRaises(inputs.InvalidInputError):
+                    aggregator.bench_data('BenchmarkDedupe')
+
+    def test_many_results(self):
+        # the moments stay exact, the quantiles come from the sketch
+        rng = np.random.default_rng(0)
+        times = rng.lognormal(3, 0.5, size=20_000)
+        aggregator = streaming.StreamAggregator(
+            'finder', 'num_elems', aggregation='median', sketch_size=512,
+            batch_size=1000)
+        for time in times.tolist():
+            aggregator.add(sample_res('map', 1, time))
+        cells = aggregator.cell_stats()['finder = map']
+        self.assertEqual(1, aggregator.num_cells)
+        self.assertEqual([len(times)], cells.n.tolist())
+        self.assertAlmostEqual(
+            np.std(times, ddof=1), cells.stddev[0], places=6)
+        self.assertAlmostEqual(
+            np.median(times), cells.y[0], delta=0.1 * np.median(times))
+        # the sketch never grows past its size
+        self.assertEqual((16, 512), aggregator._sketches.shape)
+
+
+class TestMainStream(unittest.TestCase):
+    def test_main_stream(self):
+        TestCase = namedtuple('TestCase', 'args expected_status expected_y')
+        test_cases = {
+            'table': TestCase(args=[], expected_status=0, expected_y='time'),
+            'percentile': TestCase(
+                args=['--aggregation', 'p50'], expected_status=0,
+                expected_y='p50 of time'),
+            'invalid_aggregation': TestCase(
+                args=['--aggregation', 'p101'], expected_status=1,
+                expected_y=None),
+            'outliers': TestCase(
+                args=['--outliers', 'iqr'], expected_status=1,
+                expected_y=None),
+            'several_y': TestCase(
+                args=['--y', 'time', 'runs'], expected_status=1,
+                expected_y=None),
+        }
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'results.json')
+            with open(path, 'w') as f:
+                f.write(bench_output_lines('BenchmarkDedupe', sample_results))
+            for test_name, test_case in test_cases.items():
+                with self.subTest(test_name):
+                    stdout = io.StringIO()
+                    with contextlib.redirect_stdout(stdout), \
+                            contextlib.redirect_stderr(io.StringIO()):
+                        status = gobenchplot.main([
+                            path, '--bench', 'BenchmarkDedupe',
+                            '--x', 'num_elems', '--group-by', 'finder',
+                            '--table', '--stream'] + test_case.args)
+                    self.assertEqual(test_case.expected_status, status)
+                    if status == 0:
+                        self.assertEqual(
+                            ['group,num_elems,%s,n,stddev' % (
+                                test_case.expected_y),
+                             'finder = map,1,2,2,1.41421',
+                             'finder = map,2,7,2,2.82843',
+                             'finder = slice,1,5,2,1.41421',
+                             'finder = slice,2,2,1,'],
+                            stdout.getvalue().splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import collections
+import io
+import json
+import unittest
+import gobenchplot.benchmark as benchmark
+from benchmarks import synthetic
+from collections import namedtuple
+
+
+def config_name(bench_name: str, res: benchmark.BenchRes) -> str:
+    return '/'.join([bench_name] + (res.inputs.subs or []) + [
+        '%s=%s' % (var.var_name, var.var_value)
+        for var in res.inputs.variables])
+
+
+class TestWriteStream(unittest.TestCase):
+    def test_write_stream(self):
+        TestCase = namedtuple('TestCase', 'config')
+        test_cases = {
+            'variables': TestCase(config=synthetic.StreamConfig(
+                variables=2, cardinality=3, count=4, noise=0.0)),
+            'depth': TestCase(config=synthetic.StreamConfig(
+                benchmarks=2, depth=2, variables=1, cardinality=3, count=2,
+                noise=0.0)),
+            'noise': TestCase(config=synthetic.StreamConfig(
+                benchmarks=2, depth=1, variables=2, cardinality=2, count=3,
+                noise=2.0, seed=1)),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                config = test_case.config
+                f = io.StringIO()
+                synthetic.write_stream(config, f)
+                outputs = [
+                    event['Output'] for event in map(
+                        json.loads, f.getvalue().splitlines())
+                    if event['Action'] == 'output']
+                # results are written both on one line and split in two
+                self.assertTrue(any(
+                    output.startswith('Benchmark') and 'ns/op' in output
+                    for output in outputs))
+                self.assertTrue(any(
+                    output.startswith('Benchmark') and output.endswith('\t')
+                    for output in outputs))
+                self.assertEqual(
+                    config.noise > 0,
+                    any(output in synthetic.NOISE for output in outputs))
+
+                f.seek(0)
+                suite = benchmark.parse_bench_output(f)
+                self.assertEqual(
+                    ['Benchmark%d' % (i) for i in range(config.benchmarks)],
+                    [bench.name for bench in suite.benchmarks])
+                names = collections.Counter(
+                    config_name(bench.name, res)
+                    for bench in suite.benchmarks for res in bench.results)
+                self.assertEqual(config.num_results(), sum(names.values()))
+                self.assertEqual(
+                    {name: config.count
+                     for name in synthetic.config_names(config)},
+                    dict(names))
+
+    def test_config_for(self):
+        config = synthetic.config_for(1000, variables=2, cardinality=3)
+        self.assertEqual(112, config.count)
+        self.assertGreaterEqual(config.num_results(), 1000)
+        self.assertLess(
+            config._replace(count=config.count - 1).num_results(), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,205 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import numpy as np
+import gobenchplot.__main__ as gobenchplot
+import gobenchplot.benchmark as benchmark
+import gobenchplot.plotdata as plotdata
+import gobenchplot.table as table
+from tests.test_plotdata import pareto_results
+from collections import namedtuple
+
+
+def sample_res(
+        finder: str, num_elems: int, time: float) -> benchmark.BenchRes:
+    return benchmark.BenchRes(
+        inputs=benchmark.BenchInputs(
+            subs=None,
+            variables=[
+                benchmark.BenchVarValue(var_name='finder', var_value=finder),
+                benchmark.BenchVarValue(
+                    var_name='num_elems', var_value=num_elems),
+            ]),
+        outputs=benchmark.BenchOutputs(
+            runs=100, time=time, mem_used=None, mem_allocs=None))
+
+
+sample_bench = benchmark.Benchmark('BenchmarkDedupe')
+for res in [
+        sample_res('map', 1, 1.0),
+        sample_res('map', 1, 3.0),
+        sample_res('map', 2, 5.0),
+        sample_res('slice', 1, 4.0)]:
+    sample_bench.add_result(res)
+
+sample_bench_data = plotdata.bench_data(sample_bench, 'finder', 'num_elems')
+
+
+class TestWriteTable(unittest.TestCase):
+    def test_write_table(self):
+        TestCase = namedtuple('TestCase', 'bench_data fmt expected_output')
+        test_cases = {
+            'csv': TestCase(
+                bench_data=sample_bench_data,
+                fmt=table.CSV_FORMAT,
+                expected_output=(
+                    'group,num_elems,time,n,stddev\n' +
+                    'finder = map,1,2,2,1.41421\n' +
+                    'finder = map,2,5,1,\n' +
+                    'finder = slice,1,4,1,\n')),
+            'markdown': TestCase(
+                bench_data=sample_bench_data,
+                fmt=table.MARKDOWN_FORMAT,
+                expected_output=(
+                    '| group | num_elems | time | n | stddev |\n' +
+                    '|:---|:---|---:|---:|---:|\n' +
+                    '| finder = map | 1 | 2 | 2 | 1.41421 |\n' +
+                    '| finder = map | 2 | 5 | 1 |  |\n' +
+                    '| finder = slice | 1 | 4 | 1 |  |\n')),
+            'csv_with_baseline': TestCase(
+                bench_data=plotdata.bench_data(
+                    sample_bench, 'finder', 'num_elems',
+                    baseline=['finder=map']),
+                fmt=table.CSV_FORMAT,
+                expected_output=(
+                    'group,num_elems,time relative to finder = map,n,stddev\n' +
+                    'finder = map,1,1,2,0.707107\n' +
+                    'finder = map,2,1,1,\n' +
+                    'finder = slice,1,2,1,\n')),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                f = io.StringIO()
+                table.write_table(test_case.bench_data, test_case.fmt, file=f)
+                self.assertEqual(test_case.expected_output, f.getvalue())
+
+    def test_write_json(self):
+        f = io.StringIO()
+        table.write_table(sample_bench_data, table.JSON_FORMAT, file=f)
+        self.assertEqual({
+            'benchmark': 'BenchmarkDedupe',
+            'x': 'num_elems',
+            'y': 'time',
+            'rows': [
+                {'group': 'finder = map', 'x': 1, 'y': 2.0, 'n': 2,
+                 'stddev': np.sqrt(2)},
+                {'group': 'finder = map', 'x': 2, 'y': 5.0, 'n': 1,
+                 'stddev': None},
+                {'group': 'finder = slice', 'x': 1, 'y': 4.0, 'n': 1,
+                 'stddev': None},
+            ],
+        }, json.loads(f.getvalue()))
+
+    def test_write_pareto_table(self):
+        bench = benchmark.Benchmark('BenchmarkDedupe')
+        for res in pareto_results:
+            bench.add_result(res)
+        pareto_data = plotdata.pareto_data(bench, 'time', y_name='mem_used')
+        TestCase = namedtuple('TestCase', 'fmt expected_output')
+        test_cases = {
+            'csv': TestCase(
+                fmt=table.CSV_FORMAT,
+                expected_output=(
+                    'configuration,time,mem_used,n\n' +
+                    'finder = list,1,20,1\n' +
+                    'finder = map,2,8,2\n' +
+                    'finder = slice,4,2,1\n')),
+            'markdown': TestCase(
+                fmt=table.MARKDOWN_FORMAT,
+                expected_output=(
+                    '| configuration | time | mem_used | n |\n' +
+                    '|:---|---:|---:|---:|\n' +
+                    '| finder = list | 1 | 20 | 1 |\n' +
+                    '| finder = map | 2 | 8 | 2 |\n' +
+                    '| finder = slice | 4 | 2 | 1 |\n')),
+        }
+        for test_name, test_case in test_cases.items():
+            with self.subTest(test_name):
+                f = io.StringIO()
+                table.write_pareto_table(pareto_data, test_case.fmt, file=f)
+                self.assertEqual(test_case.expected_output, f.getvalue())
+
+    def test_write_tables(self):
+        outputs_data = plotdata.outputs_bench_data(
+            sample_bench, 'finder', 'num_elems', ['time', 'runs'],
+            filter_vars=['finder==slice'])
+        f = io.StringIO()
+        table.write_tables(outputs_data, table.CSV_FORMAT, file=f)
+        self.assertEqual(
+            'group,num_elems,time,n,stddev\n' +
+            'finder = slice,1,4,1,\n' +
+            '\n' +
+            'group,num_elems,runs,n,stddev\n' +
+            'finder = slice,1,100,1,\n', f.getvalue())
+
+        f = io.StringIO()
+        table.write_tables(outputs_data, table.JSON_FORMAT, file=f)
+        self.assertEqual(
+            ['time', 'runs'],
+            [output['y'] for output in json.loads(f.getvalue())])
+
+    def test_no_matplotlib(self):
+        # the table output needs to start quickly
+        out = subprocess.run(
+            [sys.executable, '-c', (
+                'import sys, gobenchplot.table, gobenchplot.__main__; ' +
+                'print("matplotlib" in sys.modules)')],
+            stdout=subprocess.PIPE, check=True, universal_newlines=True)
+        self.assertEqual('False', out.stdout.strip())
+
+
+class TestMainTable(unittest.TestCase):
+    def test_main_table(self):
+        TestCase = namedtuple('TestCase', 'fmt expected_output')
+        test_cases = {
+            'csv': TestCase(
+                fmt='csv',
+                expected_output=(
+                    'group,num_elems,time,n,stddev\n' +
+                    'finder = map,1,2,2,1.41421\n' +
+                    'finder = map,2,5,1,\n' +
+                    'finder = slice,1,4,1,\n')),
+            'markdown': TestCase(
+                fmt='markdown',
+                expected_output=(
+                    '| group | num_elems | time | n | stddev |\n' +
+                    '|:---|:---|---:|---:|---:|\n' +
+                    '| finder = map | 1 | 2 | 2 | 1.41421 |\n' +
+                    '| finder = map | 2 | 5 | 1 |  |\n' +
+                    '| finder = slice | 1 | 4 | 1 |  |\n')),
+        }
+        # the table is written to whatever sys.stdout is when main runs
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'results.json')
+            with open(path, 'w') as f:
+                for finder, num_elems, time in [
+                        ('map', 1, 1.0), ('map', 1, 3.0), ('map', 2, 5.0),
+                        ('slice', 1, 4.0)]:
+                    print(json.dumps({
+                        'Action': 'output',
+                        'Output': 'BenchmarkDedupe/finder=%s/num_elems=%d-4\t'
+                        % (finder, num_elems)}), file=f)
+                    print(json.dumps({
+                        'Action': 'output',
+                        'Output': '100\t  %s ns/op\n' % (time)}), file=f)
+            for test_name, test_case in test_cases.items():
+                with self.subTest(test_name):
+                    stdout = io.StringIO()
+                    with contextlib.redirect_stdout(stdout), \
+                            contextlib.redirect_stderr(io.StringIO()):
+                        status = gobenchplot.main([
+                            path, '--bench', 'BenchmarkDedupe',
+                            '--x', 'num_elems', '--group-by', 'finder',
+                            '--table', test_case.fmt])
+                    self.assertEqual(0, status)
+                    self.assertEqual(
+                        test_case.expected_output, stdout.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()